@@ -8,10 +8,17 @@ ROOT_DIR = Path(__file__).parent.parent
 DATA_RAW = ROOT_DIR / "data" / "raw"
 DATA_PROCESSED = ROOT_DIR / "data" / "processed"
 OUTPUTS = ROOT_DIR / "outputs"
+MODELS_DIR = ROOT_DIR / "models"         # versioned model artifact bundles
 
 # API
 SECOP_ENDPOINT = "https://www.datos.gov.co/resource/jbjy-vk9h.json"
 API_PAGE_SIZE = 50_000
+API_TIMEOUT = 120                # seconds per request (connect + read)
+API_MAX_RETRIES = 5
+API_MAX_WORKERS = 4              # concurrent date shards in flight
+API_SHARD_DAYS = 30              # width of each fecha_de_inicio shard
+API_MIN_INTERVAL = 0.05          # adaptive rate limiter bounds (seconds between requests)
+API_MAX_INTERVAL = 10.0
 
 # Date scope
 TRAIN_START = "2019-01-01"
@@ -43,6 +50,18 @@ TIER_HIGH   = 0.6
 SPLITTING_WINDOWS_DAYS = [30, 60, 90]
 THRESHOLD_PROXIMITY_PCT = 0.10   # within 10% below audit threshold
 
+# Near-duplicate descriptions (MinHash-LSH)
+NEAR_DUP_NUM_PERM  = 128         # MinHash values per description
+NEAR_DUP_BANDS     = 16          # LSH bands of NEAR_DUP_NUM_PERM / NEAR_DUP_BANDS rows
+NEAR_DUP_THRESHOLD = 0.8         # word-bigram Jaccard to link two descriptions
+
+# Audit thresholds as SMMLV multiples (approximate, based on Law 80/1993)
+THRESHOLD_MULTIPLES = {
+    "minima_cuantia": 28,        # Minimum amount — simplest process
+    "menor_cuantia": 1000,       # Lesser amount — abbreviated process
+    "mayor_cuantia": 10000,      # Greater amount — full public tender required
+}
+
 # Anomaly detection
 CONTAMINATION_RATE = 0.05        # top 5% flagged
 
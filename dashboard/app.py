@@ -12,7 +12,9 @@ from pathlib import Path
 import sys
 
 sys.path.append(str(Path(__file__).parent.parent))
-from config.settings import DATA_PROCESSED
+from config.settings import DATA_PROCESSED, OUTPUTS
+from src.dashboard import cube, explorer, export, profiles, query, whatif
+from src.pipeline import metrics, schema
 
 st.set_page_config(
     page_title="AuditLens — Procurement Risk Intelligence",
@@ -21,33 +23,75 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-@st.cache_data
-def load_contracts():
-    df = pd.read_parquet(DATA_PROCESSED / "risk_scores.parquet")
-    df["fecha_de_inicio_del_contrato"] = pd.to_datetime(
-        df["fecha_de_inicio_del_contrato"], errors="coerce"
-    )
-    return df
+@st.cache_resource
+def start_metrics_endpoint():
+    # Prometheus /metrics for this process when AUDITLENS_METRICS_PORT is set (src/pipeline/metrics.py)
+    return metrics.serve_from_env()
+
+@st.cache_resource
+def load_scored():
+    # Opened lazily: tabs read only the columns and partitions they need, from memory-mapped files
+    with metrics.span("dashboard.load_scored"):
+        return query.ScoredDataset.open()
 
 @st.cache_data
 def load_leaderboard():
-    return pd.read_parquet(DATA_PROCESSED / "agency_leaderboard.parquet")
+    with metrics.span("dashboard.load_leaderboard"):
+        return schema.read(DATA_PROCESSED / "agency_leaderboard.parquet")
+
+def _fresh(path: Path) -> bool:
+    # A published file is current unless risk_scores was rewritten after it
+    # (the runner refreshes cached downstream outputs when it republishes risk)
+    return path.exists() and path.stat().st_mtime >= (DATA_PROCESSED / "risk_scores.parquet").stat().st_mtime
 
+@st.cache_data
+def load_cube(_scored):
+    # Published by the pipeline runner; rebuilt here if risk_scores is newer (e.g. from notebook 08)
+    path = DATA_PROCESSED / "overview_cube.parquet"
+    with metrics.span("dashboard.load_cube"):
+        if _fresh(path):
+            return schema.read(path)
+        return cube.build_cube(_scored.scan(cube.CUBE_COLUMNS))
+
+@st.cache_resource
+def load_profile_store(_scored):
+    # Published by the pipeline runner; built in memory if risk_scores is newer
+    root = DATA_PROCESSED / "agency_profiles"
+    with metrics.span("dashboard.load_profiles"):
+        if _fresh(root / "agencies.parquet"):
+            return profiles.ProfileStore.open(root)
+        return profiles.ProfileStore.from_parts(profiles.build_profiles(_scored.scan(profiles.PROFILE_COLUMNS)))
+
+@st.cache_resource
+def load_explorer_index(_scored):
+    with metrics.span("dashboard.load_explorer_index"):
+        return explorer.ExplorerIndex.build(_scored.scan(explorer.INDEX_COLUMNS))
+
+@st.cache_resource
+def load_whatif_engine(_scored):
+    with metrics.span("dashboard.load_whatif_engine"):
+        return whatif.WhatIfEngine.build(_scored.scan(whatif.WHATIF_COLUMNS))
+
+start_metrics_endpoint()
 with st.spinner("Loading data..."):
-    df = load_contracts()
+    scored = load_scored()
     leaderboard = load_leaderboard()
+    overview_cube = load_cube(scored)
+    explorer_index = load_explorer_index(scored)
+    profile_store = load_profile_store(scored)
+    whatif_engine = load_whatif_engine(scored)
 
 # ── Sidebar ──────────────────────────────────────────────────────
 st.sidebar.title("AuditLens")
 st.sidebar.caption("Procurement Risk Intelligence")
 st.sidebar.divider()
 
-year_min = int(df["year"].min())
-year_max = int(df["year"].max())
+year_min = int(overview_cube["year"].min())
+year_max = int(overview_cube["year"].max())
 selected_years = st.sidebar.slider("Year range", year_min, year_max, (year_min, year_max))
 
 selected_sectors = st.sidebar.multiselect(
-    "Sector", options=sorted(df["sector"].dropna().unique()), default=[]
+    "Sector", options=sorted(overview_cube["sector"].dropna().astype(str).unique()), default=[]
 )
 
 selected_tiers = st.sidebar.multiselect(
@@ -55,31 +99,19 @@ selected_tiers = st.sidebar.multiselect(
 )
 
 selected_dept = st.sidebar.multiselect(
-    "Department", options=sorted(df["departamento"].dropna().unique()), default=[]
+    "Department", options=sorted(overview_cube["departamento"].dropna().astype(str).unique()), default=[]
 )
 
 st.sidebar.divider()
 st.sidebar.caption("Data: Colombia SECOP II | 2019-2022")
 st.sidebar.caption("1.5M contracts analyzed")
 
-# ── Filter ───────────────────────────────────────────────────────
-def apply_filters(df, years, sectors, tiers, depts):
-    out = df[df["year"].between(years[0], years[1])]
-    if tiers:
-        out = out[out["risk_tier"].isin(tiers)]
-    if sectors:
-        out = out[out["sector"].isin(sectors)]
-    if depts:
-        out = out[out["departamento"].isin(depts)]
-    return out
-
-filtered = apply_filters(df, selected_years, selected_sectors, selected_tiers, selected_dept)
-
 # ── Tabs ─────────────────────────────────────────────────────────
-tab1, tab2, tab3, tab4 = st.tabs([
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
     "🌐 National Overview",
     "🏛️ Agency Drill-Down",
     "📄 Contract Explorer",
+    "⚖️ What-If Weights",
     "📖 Methodology"
 ])
 
@@ -91,22 +123,21 @@ with tab1:
     st.caption("Detecting value-leakage signals in Colombian government contracting")
     st.divider()
 
+    # Answered from the year × sector × departamento × risk_tier cube, not the 1.5M rows
+    with metrics.span("dashboard.overview", tab="overview"):
+        overview = cube.overview(cube.select(overview_cube, selected_years, selected_sectors, selected_tiers, selected_dept))
+
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Contracts Analyzed", f"{len(filtered):,}")
-    col2.metric("Total Spend", f"${filtered['valor_del_contrato'].sum()/1e12:.1f}T COP")
-    col3.metric("High-Risk Contracts", f"{(filtered['risk_tier']=='High').sum():,}")
-    col4.metric("Direct Award Rate", f"{filtered['is_direct'].mean()*100:.1f}%")
+    col1.metric("Contracts Analyzed", f"{overview['contracts']:,}")
+    col2.metric("Total Spend", f"${overview['spend']/1e12:.1f}T COP")
+    col3.metric("High-Risk Contracts", f"{overview['high_risk_contracts']:,}")
+    col4.metric("Direct Award Rate", f"{overview['direct_rate']*100:.1f}%")
 
     st.divider()
     col_left, col_right = st.columns(2)
 
     with col_left:
-        tier_counts = filtered["risk_tier"].value_counts().reset_index()
-        tier_counts.columns = ["Risk Tier", "Count"]
-        tier_counts["Risk Tier"] = pd.Categorical(
-            tier_counts["Risk Tier"], categories=["High", "Medium", "Low"], ordered=True
-        )
-        tier_counts = tier_counts.sort_values("Risk Tier")
+        tier_counts = overview["tier_counts"]
         fig = px.bar(
             tier_counts, x="Risk Tier", y="Count",
             color="Risk Tier",
@@ -117,10 +148,7 @@ with tab1:
         st.plotly_chart(fig, use_container_width=True)
 
     with col_right:
-        yoy = filtered.groupby("year").agg(
-            contracts=("id_contrato", "count"),
-            direct_rate=("is_direct", "mean")
-        ).reset_index()
+        yoy = overview["yoy"]
         fig = px.line(
             yoy, x="year", y="direct_rate", markers=True,
             title="Direct Award Rate by Year",
@@ -139,7 +167,7 @@ with tab1:
 
     top10 = lb_filtered.nlargest(10, "value_at_risk").copy()
     top10["value_at_risk_B"] = top10["value_at_risk"] / 1e9
-    top10["label"] = top10["codigo_entidad"].astype(str) + " | " + top10["sector"]
+    top10["label"] = top10["codigo_entidad"].astype(str) + " | " + top10["sector"].astype(str)
     fig = px.bar(
         top10.sort_values("value_at_risk_B"),
         x="value_at_risk_B", y="label", orientation="h",
@@ -150,7 +178,7 @@ with tab1:
     st.plotly_chart(fig, use_container_width=True)
 
     st.subheader("Risk Distribution by Sector")
-    sector_risk = filtered.groupby(["sector", "risk_tier"]).size().reset_index(name="count")
+    sector_risk = overview["sector_risk"]
     fig = px.bar(
         sector_risk, x="sector", y="count", color="risk_tier",
         color_discrete_map={"High": "#e74c3c", "Medium": "#f39c12", "Low": "#3498db"},
@@ -168,34 +196,38 @@ with tab2:
     st.title("🏛️ Agency Drill-Down")
     st.caption("Select an agency to explore its risk profile in detail")
 
-    agency_options = sorted(filtered["codigo_entidad"].unique())
+    # Dropdown and profile from the agency profile store; only the selected agency's shard is read
+    with metrics.span("dashboard.agency_options", tab="agency") as s:
+        agency_labels = profile_store.options(selected_years, selected_sectors, selected_tiers, selected_dept)
+        s.rows_out = len(agency_labels)
+    agency_options = list(agency_labels.index)
     if not agency_options:
         st.warning("No agencies match current filters.")
     else:
         selected_agency = st.selectbox(
             "Select Agency",
             options=agency_options,
-            format_func=lambda x: f"{x} | {filtered[filtered['codigo_entidad']==x]['sector'].iloc[0] if len(filtered[filtered['codigo_entidad']==x]) > 0 else ''}",
+            format_func=lambda x: agency_labels[x],
             index=0
         )
 
-        agency_df = filtered[filtered["codigo_entidad"] == selected_agency]
+        with metrics.span("dashboard.agency_profile", tab="agency"):
+            profile = profile_store.profile(selected_agency, selected_years, selected_sectors, selected_tiers, selected_dept)
 
-        if len(agency_df) == 0:
+        if profile["contracts"] == 0:
             st.warning("No contracts found for this agency.")
         else:
             st.divider()
             col1, col2, col3, col4 = st.columns(4)
-            col1.metric("Total Contracts", f"{len(agency_df):,}")
-            col2.metric("Total Spend", f"{agency_df['valor_del_contrato'].sum()/1e9:.1f}B COP")
-            col3.metric("Mean Risk Score", f"{agency_df['risk_score_calibrated'].mean():.3f}")
-            col4.metric("High-Risk Contracts", f"{(agency_df['risk_tier']=='High').sum():,}")
+            col1.metric("Total Contracts", f"{profile['contracts']:,}")
+            col2.metric("Total Spend", f"{profile['spend']/1e9:.1f}B COP")
+            col3.metric("Mean Risk Score", f"{profile['mean_risk']:.3f}")
+            col4.metric("High-Risk Contracts", f"{profile['high_risk_contracts']:,}")
 
             col_left, col_right = st.columns(2)
 
             with col_left:
-                tier_counts = agency_df["risk_tier"].value_counts().reset_index()
-                tier_counts.columns = ["Risk Tier", "Count"]
+                tier_counts = profile["tier_counts"]
                 fig = px.pie(
                     tier_counts, names="Risk Tier", values="Count",
                     color="Risk Tier",
@@ -205,9 +237,7 @@ with tab2:
                 st.plotly_chart(fig, use_container_width=True)
 
             with col_right:
-                vendor_spend = agency_df.groupby("codigo_proveedor")["valor_del_contrato"].sum()
-                vendor_spend = vendor_spend.nlargest(8).reset_index()
-                vendor_spend.columns = ["Vendor", "Spend"]
+                vendor_spend = profile["top_vendors"]
                 vendor_spend["Spend_B"] = vendor_spend["Spend"] / 1e9
                 fig = px.bar(
                     vendor_spend.sort_values("Spend_B"),
@@ -217,10 +247,8 @@ with tab2:
                 )
                 st.plotly_chart(fig, use_container_width=True)
 
-            monthly_risk = agency_df.groupby(
-                agency_df["fecha_de_inicio_del_contrato"].dt.to_period("M")
-            )["risk_score_calibrated"].mean().reset_index()
-            monthly_risk["fecha"] = monthly_risk["fecha_de_inicio_del_contrato"].astype(str)
+            monthly_risk = profile["monthly"]
+            monthly_risk["fecha"] = monthly_risk["month"].dt.to_period("M").astype(str)
             fig = px.line(
                 monthly_risk, x="fecha", y="risk_score_calibrated",
                 title="Mean Risk Score Over Time",
@@ -230,16 +258,12 @@ with tab2:
             st.plotly_chart(fig, use_container_width=True)
 
             st.subheader("High-Risk Contracts")
-            high_risk = agency_df[agency_df["risk_tier"] == "High"][[
-                "id_contrato", "codigo_proveedor", "valor_del_contrato",
-                "risk_score_calibrated", "process_anomaly_score",
-                "splitting_score", "network_score", "risk_tier"
-            ]].sort_values("risk_score_calibrated", ascending=False).head(50)
+            high_risk = profile["high_risk"]
 
             if len(high_risk) == 0:
                 st.info("No High-risk contracts for this agency with current filters.")
             else:
-                st.dataframe(high_risk.reset_index(drop=True), use_container_width=True)
+                st.dataframe(high_risk, use_container_width=True)
 
 
 # ════════════════════════════════════════════════════════════════
@@ -251,27 +275,12 @@ with tab3:
 
     col1, col2, col3 = st.columns(3)
     with col1:
-        search_vendor = st.text_input("Filter by Vendor ID", "")
+        search_vendor = st.text_input("Vendor ID starts with", "")
     with col2:
-        search_agency = st.text_input("Filter by Agency ID", "")
+        search_agency = st.text_input("Agency ID starts with", "")
     with col3:
         min_risk = st.slider("Minimum risk score", 0.0, 1.0, 0.0, 0.01)
 
-    # Build mask without copying full dataframe
-    mask = df["year"].between(selected_years[0], selected_years[1])
-    if selected_tiers:
-        mask &= df["risk_tier"].isin(selected_tiers)
-    if selected_sectors:
-        mask &= df["sector"].isin(selected_sectors)
-    if selected_dept:
-        mask &= df["departamento"].isin(selected_dept)
-    if search_vendor.strip():
-        mask &= df["codigo_proveedor"].astype(str).str.contains(search_vendor.strip(), na=False)
-    if search_agency.strip():
-        mask &= df["codigo_entidad"].astype(str).str.contains(search_agency.strip(), na=False)
-    if min_risk > 0:
-        mask &= df["risk_score_calibrated"] >= min_risk
-
     display_cols = [
         "id_contrato", "codigo_entidad", "codigo_proveedor",
         "valor_del_contrato", "year", "sector",
@@ -279,16 +288,22 @@ with tab3:
         "process_anomaly_score", "splitting_score", "network_score",
         "is_direct", "is_modified"
     ]
-    available_cols = [c for c in display_cols if c in df.columns]
-
-    result = (
-        df.loc[mask, available_cols]
-        .sort_values("risk_score_calibrated", ascending=False)
-        .head(200)
-        .reset_index(drop=True)
-    )
-
-    st.caption(f"Showing {len(result):,} of {mask.sum():,} matching contracts")
+    available_cols = [c for c in display_cols if c in scored.columns]
+
+    # Presorted by risk with bitmap and id-prefix indexes: no full-frame mask or sort
+    filters = dict(years=selected_years, sectors=selected_sectors, tiers=selected_tiers, depts=selected_dept,
+               vendor=search_vendor, agency=search_agency, min_risk=min_risk)
+    with metrics.span("dashboard.explorer_count", tab="explorer") as s:
+        _, n_matches = explorer_index.query(**filters, limit=0)
+        s.rows_out = n_matches
+    n_pages = max(1, -(-n_matches // explorer.PAGE_SIZE))
+    page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1) if n_pages > 1 else 1
+    with metrics.span("dashboard.explorer_page", tab="explorer") as s:
+        positions, n_matches = explorer_index.query(**filters, offset=(page - 1) * explorer.PAGE_SIZE)
+        result = scored.take(positions, available_cols)
+        s.rows_out = len(result)
+
+    st.caption(f"Showing {len(result):,} of {n_matches:,} matching contracts (page {page} of {n_pages})")
 
     if len(result) == 0:
         st.warning("No contracts match the current filters.")
@@ -296,15 +311,99 @@ with tab3:
         st.dataframe(result, width="stretch")
         csv = result.to_csv(index=False)
         st.download_button(
-            label="⬇️ Export as CSV",
+            label="⬇️ Export this page as CSV",
             data=csv,
             file_name="auditlens_contracts.csv",
             mime="text/csv"
         )
+
+        # Every match, streamed to a file in batches (same filters; also: python src/dashboard/export.py)
+        with st.expander(f"Export all {n_matches:,} matching contracts"):
+            export_format = st.selectbox("Format", export.FORMATS, index=1)
+            if st.button("Write export file"):
+                stamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+                export_path = export.EXPORT_DIR / f"auditlens_contracts_{stamp}.{export_format}"
+                with st.spinner(f"Writing {n_matches:,} contracts..."):
+                    with metrics.span("dashboard.export", rows_in=n_matches, tab="explorer", format=export_format) as s:
+                        stats = export.export(scored, export_path, export_format, **filters)
+                        s.rows_out = stats["rows"]
+                st.success(f"{stats['rows']:,} contracts → {export_path.relative_to(OUTPUTS.parent)} "
+                           f"({stats['bytes']/1024**2:.1f} MB in {stats['seconds']:.1f}s, "
+                           f"{stats['rows_per_s']:,.0f} rows/s)")
+                export.rotate()
+                # Streamlit serves downloads from memory: large exports stay on disk
+                if stats["bytes"] <= export.DOWNLOAD_MAX_MB * 1024 ** 2:
+                    st.download_button("⬇️ Download export", data=export_path.read_bytes(), file_name=export_path.name)
+                else:
+                    st.info(f"Over {export.DOWNLOAD_MAX_MB} MB, so not offered as a download. Copy it from "
+                            f"{export_path.relative_to(OUTPUTS.parent)} (the newest {export.KEEP_EXPORTS} exports "
+                            f"are kept), or write it directly with:")
+                    st.code(export.command(Path(export_path.name), **filters), language="bash")
+
 # ════════════════════════════════════════════════════════════════
-# TAB 4 — METHODOLOGY
+# TAB 4 — WHAT-IF WEIGHTS
 # ════════════════════════════════════════════════════════════════
 with tab4:
+    st.title("⚖️ What-If Weights")
+    st.caption("Reweight the five sub-scores and see the tiers and agency leaderboard they produce")
+
+    # Recomputed from the in-memory sub-score matrix on every change (src/dashboard/whatif.py)
+    slider_labels = {
+        "process_anomaly_norm": "Process anomaly", "splitting_norm": "Contract splitting",
+        "network_norm": "Network concentration", "community_norm": "Community",
+        "price_norm": "Price benchmark",
+    }
+    weight_cols = st.columns(len(whatif.SUBSCORES))
+    weights = {
+        col: weight_cols[i].slider(slider_labels[col], 0.0, 1.0, float(whatif.DEFAULT_WEIGHTS[col]), 0.05,
+                                   key=f"whatif_{col}")
+        for i, col in enumerate(whatif.SUBSCORES)
+    }
+    tier_basis = st.radio(
+        "Tier contracts on",
+        ["Weighted composite", "Process anomaly only (as the pipeline)"],
+        horizontal=True,
+        help="The pipeline tiers on process_anomaly_norm; then the weights only move mean_risk_index.",
+    )
+    tier_on = None if tier_basis == "Weighted composite" else "process_anomaly_norm"
+    st.caption(f"Weights sum to {sum(weights.values()):.2f} (not rescaled)")
+
+    with metrics.span("dashboard.whatif", rows_in=len(whatif_engine), tab="whatif"):
+        scenario = whatif_engine.evaluate(weights, tier_on)
+    board = scenario["leaderboard"]
+    baseline_var = leaderboard["value_at_risk"].sum()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("High-Risk Contracts", f"{scenario['tier_counts']['High']:,}")
+    col2.metric("High-Risk Spend", f"${scenario['tier_spend']['High']/1e12:.2f}T COP")
+    col3.metric("Total Value at Risk", f"${board['value_at_risk'].sum()/1e12:.2f}T COP",
+                delta=f"{(board['value_at_risk'].sum() - baseline_var)/1e12:+.2f}T vs pipeline")
+    col4.metric("Tier Cutoffs (p50 / p90)", f"{scenario['thresholds'][0]:.3f} / {scenario['thresholds'][1]:.3f}")
+
+    st.subheader("Top 20 Agencies by Value at Risk")
+    board = board.assign(rank=np.arange(1, len(board) + 1))
+    baseline_rank = leaderboard[whatif.GROUP_KEYS].assign(pipeline_rank=np.arange(1, len(leaderboard) + 1))
+    if selected_sectors:
+        board = board[board["sector"].isin(selected_sectors)]
+    if selected_dept:
+        board = board[board["departamento"].isin(selected_dept)]
+    top20 = board.head(20).merge(baseline_rank, on=whatif.GROUP_KEYS, how="left")
+    top20["rank_change"] = top20["pipeline_rank"] - top20["rank"]
+    st.dataframe(top20[[
+        "rank", "rank_change", "codigo_entidad", "sector", "departamento", "total_contracts",
+        "high_risk_contracts", "mean_risk_index", "mean_calibrated_score", "flagged_spend", "value_at_risk",
+    ]], width="stretch", hide_index=True)
+    st.download_button(
+        label="⬇️ Export this leaderboard as CSV",
+        data=board.to_csv(index=False),
+        file_name="auditlens_whatif_leaderboard.csv",
+        mime="text/csv"
+    )
+
+# ════════════════════════════════════════════════════════════════
+# TAB 5 — METHODOLOGY
+# ════════════════════════════════════════════════════════════════
+with tab5:
     st.title("📖 Methodology")
     st.divider()
 
@@ -0,0 +1,200 @@
+# src/dashboard/cube.py
+"""
+Pre-aggregated rollup cube behind the dashboard's National Overview tab.
+
+Tab 1 used to filter all 1.55M scored contracts on every rerun, then run
+value_counts, groupby("year") and groupby(["sector", "risk_tier"]) over the
+result. Every number it shows is a sum over contracts within one
+year × sector × departamento × risk_tier cell. The sidebar filters also
+select whole cells. The cube stores one row per non-empty cell:
+
+    contracts            count of contracts
+    spend                sum of valor_del_contrato
+    direct_contracts     sum of is_direct
+    high_risk_contracts  contracts with risk_tier == "High"
+
+That is a few thousand rows, so a filter change aggregates a few thousand
+rows instead of 1.55M. Cells with a null sector or department are kept
+(groupby dropna=False), as apply_filters keeps those contracts when no sector
+or department is selected. Counts reconcile exactly with the row-level
+numbers. Spend does too when contract values are whole pesos, as in SECOP:
+their sums stay below 2**53 and float addition is then exact in any order.
+
+The pipeline runner materializes the cube as the "cube" stage and publishes
+it to data/processed/overview_cube.parquet.
+
+Usage:
+    python src/dashboard/cube.py --bench 1553594
+"""
+
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+CUBE_KEYS = ["year", "sector", "departamento", "risk_tier"]
+CUBE_COLUMNS = ["id_contrato", *CUBE_KEYS, "valor_del_contrato", "is_direct"]
+TIER_ORDER = ["High", "Medium", "Low"]
+
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per non-empty year × sector × departamento × risk_tier cell of the scored contracts."""
+    cube = df[CUBE_KEYS].assign(
+        contracts=1,
+        spend=df["valor_del_contrato"].to_numpy(),
+        direct_contracts=df["is_direct"].to_numpy().astype(np.int64),
+        high_risk_contracts=(df["risk_tier"] == "High").to_numpy().astype(np.int64),
+    ).groupby(CUBE_KEYS, dropna=False, observed=True, sort=True).sum().reset_index()
+    return cube.astype({"contracts": np.int64})
+
+
+def select(cube: pd.DataFrame, years: tuple[int, int], sectors: list[str] | None = None,
+           tiers: list[str] | None = None, depts: list[str] | None = None) -> pd.DataFrame:
+    """The cube cells apply_filters would keep contracts from (same arguments, same semantics)."""
+    mask = cube["year"].between(years[0], years[1])
+    if tiers:
+        mask &= cube["risk_tier"].isin(tiers)
+    if sectors:
+        mask &= cube["sector"].isin(sectors)
+    if depts:
+        mask &= cube["departamento"].isin(depts)
+    return cube[mask]
+
+
+def overview(cells: pd.DataFrame) -> dict:
+    """
+    Everything tab 1 shows about the filtered contracts, from their cube cells.
+
+    Returns:
+        contracts, spend, high_risk_contracts, direct_rate (KPIs);
+        tier_counts (Risk Tier, Count in High/Medium/Low order);
+        yoy (year, contracts, direct_rate);
+        sector_risk (sector, risk_tier, count).
+    """
+    contracts = int(cells["contracts"].sum())
+    tier_counts = cells.groupby("risk_tier", observed=True)["contracts"].sum()
+    tier_counts = tier_counts.reindex([t for t in TIER_ORDER if t in tier_counts.index]).reset_index()
+    tier_counts.columns = ["Risk Tier", "Count"]
+    tier_counts["Risk Tier"] = tier_counts["Risk Tier"].astype(str)
+
+    yoy = cells.groupby("year", observed=True)[["contracts", "direct_contracts"]].sum().reset_index()
+    yoy["direct_rate"] = yoy["direct_contracts"] / yoy["contracts"]
+
+    sector_risk = cells.groupby(["sector", "risk_tier"], observed=True)["contracts"].sum()
+    return {
+        "contracts": contracts,
+        "spend": float(cells["spend"].sum()),
+        "high_risk_contracts": int(cells["high_risk_contracts"].sum()),
+        "direct_rate": cells["direct_contracts"].sum() / contracts if contracts else np.nan,
+        "tier_counts": tier_counts,
+        "yoy": yoy[["year", "contracts", "direct_rate"]],
+        "sector_risk": sector_risk[sector_risk > 0].reset_index(name="count"),
+    }
+
+
+def row_level_overview(df: pd.DataFrame, years: tuple[int, int], sectors: list[str] | None = None,
+                       tiers: list[str] | None = None, depts: list[str] | None = None) -> dict:
+    """The same numbers computed the way tab 1 did, over every filtered contract (the reference)."""
+    out = df[df["year"].between(years[0], years[1])]
+    if tiers:
+        out = out[out["risk_tier"].isin(tiers)]
+    if sectors:
+        out = out[out["sector"].isin(sectors)]
+    if depts:
+        out = out[out["departamento"].isin(depts)]
+    tier_counts = out["risk_tier"].value_counts()
+    tier_counts = tier_counts[tier_counts > 0]
+    tier_counts = tier_counts.reindex([t for t in TIER_ORDER if t in tier_counts.index]).reset_index()
+    tier_counts.columns = ["Risk Tier", "Count"]
+    yoy = out.groupby("year").agg(contracts=("id_contrato", "count"), direct_rate=("is_direct", "mean")).reset_index()
+    return {
+        "contracts": len(out),
+        "spend": float(out["valor_del_contrato"].sum()),
+        "high_risk_contracts": int((out["risk_tier"] == "High").sum()),
+        "direct_rate": out["is_direct"].mean(),
+        "tier_counts": tier_counts,
+        "yoy": yoy,
+        "sector_risk": out.groupby(["sector", "risk_tier"], observed=True).size().reset_index(name="count"),
+    }
+
+
+def reconcile(cube: pd.DataFrame, df: pd.DataFrame, filters: dict) -> dict:
+    """Differences between overview(select(cube, ...)) and the row-level numbers (all 0 when they agree)."""
+    fast, slow = overview(select(cube, **filters)), row_level_overview(df, **filters)
+    diffs = {key: abs(fast[key] - slow[key]) if pd.notna(fast[key]) or pd.notna(slow[key]) else 0
+             for key in ("contracts", "spend", "high_risk_contracts", "direct_rate")}
+    for key in ("tier_counts", "yoy", "sector_risk"):
+        a, b = fast[key].reset_index(drop=True), slow[key].reset_index(drop=True)
+        a = a.astype({c: str for c in a.columns if not pd.api.types.is_numeric_dtype(a[c])})
+        b = b.astype({c: str for c in b.columns if not pd.api.types.is_numeric_dtype(b[c])})
+        same = a.shape == b.shape and all(
+            np.allclose(a[c], b[c], rtol=0, atol=1e-12) if pd.api.types.is_float_dtype(a[c])
+            else (a[c].to_numpy() == b[c].to_numpy()).all() for c in a.columns)
+        diffs[key] = 0 if same else 1
+    return diffs
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_rows: int = 1_553_594) -> pd.DataFrame:
+    """Build time and size of the cube, per-filter latency against the row-level path, and reconciliation."""
+    import tempfile
+
+    from src.pipeline import schema
+
+    with tempfile.TemporaryDirectory() as codes:
+        df = schema.compact(schema._synthetic_risk_scores(n_rows)[[*CUBE_COLUMNS]], Path(codes))
+    started = time.perf_counter()
+    cube = build_cube(df)
+    t_build = time.perf_counter() - started
+
+    sectors = list(df["sector"].dropna().unique()[:2])
+    depts = list(df["departamento"].dropna().unique()[:1])
+    cases = {
+        "all years": {"years": (2019, 2022)},
+        "one year": {"years": (2021, 2021)},
+        "High, 2 sectors": {"years": (2019, 2022), "tiers": ["High"], "sectors": sectors},
+        "1 department": {"years": (2020, 2022), "depts": depts},
+    }
+    results = []
+    for label, filters in cases.items():
+        started = time.perf_counter()
+        slow = row_level_overview(df, **filters)
+        t_rows = time.perf_counter() - started
+        started = time.perf_counter()
+        overview(select(cube, **filters))
+        t_cube = time.perf_counter() - started
+        diffs = reconcile(cube, df, filters)
+        results.append({"filter": label, "contracts": slow["contracts"],
+                        "row_level_ms": round(t_rows * 1000, 1), "cube_ms": round(t_cube * 1000, 1),
+                        "mismatches": sum(v != 0 for v in diffs.values())})
+    results = pd.DataFrame(results)
+    print("=" * 70)
+    print(f"OVERVIEW CUBE — {n_rows:,} contracts → {len(cube):,} cells, built in {t_build:.2f}s")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the overview cube or benchmark it")
+    parser.add_argument("input", type=Path, nargs="?", help="risk_scores.parquet")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--bench", type=int, default=None, help="Benchmark on N synthetic contracts")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench)
+    else:
+        from config.settings import DATA_PROCESSED
+        from src.pipeline import schema
+
+        cube = build_cube(schema.read(args.input, columns=CUBE_COLUMNS))
+        schema.write(cube, args.output or DATA_PROCESSED / "overview_cube.parquet")
+        print(f"✅ Overview cube: {len(cube):,} cells")
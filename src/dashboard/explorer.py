@@ -0,0 +1,282 @@
+# src/dashboard/explorer.py
+"""
+Indexed search and top-K retrieval for the dashboard's Contract Explorer.
+
+Tab 3 used to build a boolean mask over every contract on each render. It ran
+astype(str).str.contains on the vendor and agency ids for every keystroke,
+then sorted all matches by risk_score_calibrated only to keep head(200).
+ExplorerIndex is built once per dashboard process and answers the same query
+without touching the contract table:
+
+    order       contract row positions sorted by risk score, descending
+                (stable, NaN last). Every other structure addresses rows by
+                their position p in this order, so "first K matches" means
+                "smallest K matching positions".
+    bitmaps     per value of risk_tier, sector, departamento and year: a
+                packed bitmap (np.packbits, 1 bit per contract, ~190 KB at
+                1.55M rows) of the positions holding that value. A filter ORs
+                the bitmaps of the selected values, and filters AND together.
+    EntityIndex per id column: the sorted distinct ids and, for each id, its
+                contracts' positions (ascending). Ids that share a prefix are
+                adjacent, so a prefix search is two binary searches and one
+                slice of positions.
+    min_risk    contracts scoring >= min_risk are exactly the positions below
+                a cutoff found by binary search, so it only shortens the scan.
+
+A query collects matching positions in order, one 64K-contract bitmap chunk
+at a time, and stops once it has offset + limit of them. Counting all matches
+is one popcount over the combined bitmap. Vendor and agency search match id
+prefixes: typing "9001" finds 900123456, as before, but no longer matches
+"9001" in the middle of an id.
+
+Usage:
+    python src/dashboard/explorer.py --bench 1553594
+"""
+
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+SCORE_COL = "risk_score_calibrated"
+BITMAP_COLUMNS = ["risk_tier", "sector", "departamento", "year"]
+ID_COLUMNS = ["codigo_proveedor", "codigo_entidad"]
+INDEX_COLUMNS = [SCORE_COL, *BITMAP_COLUMNS, *ID_COLUMNS]
+PAGE_SIZE = 200
+
+_CHUNK_BYTES = 8_192  # bitmap bytes unpacked per scan step (65,536 contracts)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def _bits_at(bitmap: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Whether each position's bit is set (np.packbits big-endian bit order)."""
+    return ((bitmap[positions >> 3] >> (7 - (positions & 7))) & 1).astype(bool)
+
+
+class EntityIndex:
+    """
+    Sorted distinct ids of one column and the positions of their contracts.
+
+    Attributes:
+        ids: Distinct ids as strings, sorted.
+        offsets: Contracts of ids[i] are positions[offsets[i]:offsets[i + 1]].
+        positions: Risk-order positions grouped by id, ascending within each id.
+    """
+
+    def __init__(self, ids: np.ndarray, offsets: np.ndarray, positions: np.ndarray):
+        self.ids = ids
+        self.offsets = offsets
+        self.positions = positions
+
+    @classmethod
+    def build(cls, values: pd.Series) -> "EntityIndex":
+        """values: the id column in risk order."""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Rank the categories instead of materializing 1.55M strings
+            categories = np.asarray(values.cat.categories.astype("str"), dtype=object)
+            sorter = np.argsort(categories, kind="stable")
+            rank = np.empty(len(sorter), dtype=np.int64)
+            rank[sorter] = np.arange(len(sorter))
+            codes = values.cat.codes.to_numpy()
+            codes, ids = np.where(codes >= 0, rank[codes], -1), categories[sorter]
+        else:
+            values = values.astype("str").where(values.notna())
+            codes, ids = pd.factorize(values, sort=True)
+        valid = codes >= 0
+        positions = np.flatnonzero(valid).astype(np.int32)
+        positions = positions[np.argsort(codes[valid], kind="stable")]
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes[valid], minlength=len(ids)), out=offsets[1:])
+        return cls(np.asarray(ids, dtype=object), offsets, positions)
+
+    def prefix(self, query: str) -> np.ndarray:
+        """Sorted positions of contracts whose id starts with query."""
+        lo = np.searchsorted(self.ids, query, side="left")
+        hi = np.searchsorted(self.ids, query + "\U0010ffff", side="left")
+        return np.sort(self.positions[self.offsets[lo]:self.offsets[hi]])
+
+
+class ExplorerIndex:
+    """
+    Risk-ordered contract positions with bitmap and id indexes for tab 3.
+
+    Attributes:
+        order: Row position in the contract frame of each risk-order position.
+        scores: Risk scores in risk order (descending, NaN last).
+        bitmaps: Column → value → packed bitmap over risk-order positions.
+        entities: Id column → EntityIndex.
+    """
+
+    def __init__(self, order: np.ndarray, scores: np.ndarray, bitmaps: dict[str, dict],
+                 entities: dict[str, EntityIndex]):
+        self.order = order
+        self.scores = scores
+        self.bitmaps = bitmaps
+        self.entities = entities
+        self.n_scored = int(np.count_nonzero(~np.isnan(scores)))
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "ExplorerIndex":
+        """Index a scored contract frame (risk_scores); the frame itself is not copied or kept."""
+        score = df[SCORE_COL].to_numpy(dtype=np.float64)
+        order = np.argsort(-score, kind="stable").astype(np.int32)
+        bitmaps = {}
+        for col in BITMAP_COLUMNS:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                codes, values = df[col].cat.codes.to_numpy()[order], df[col].cat.categories
+            else:
+                codes, values = pd.factorize(df[col].to_numpy()[order])
+            bitmaps[col] = {value.item() if hasattr(value, "item") else value: np.packbits(codes == k)
+                            for k, value in enumerate(values)}
+        entities = {col: EntityIndex.build(df[col].iloc[order].reset_index(drop=True)) for col in ID_COLUMNS}
+        return cls(order, score[order], bitmaps, entities)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def _cutoff(self, min_risk: float) -> int:
+        """Number of leading positions scoring >= min_risk (all of them when min_risk is 0)."""
+        if min_risk <= 0:
+            return len(self)
+        ascending = self.scores[:self.n_scored][::-1]
+        return self.n_scored - int(np.searchsorted(ascending, min_risk, side="left"))
+
+    def _mask(self, column: str, values) -> np.ndarray:
+        mask = np.zeros((len(self) + 7) // 8, dtype=np.uint8)
+        for value in values:
+            bitmap = self.bitmaps[column].get(value)
+            if bitmap is not None:
+                mask |= bitmap
+        return mask
+
+    def query(self, years: tuple[int, int], sectors: list[str] | None = None, tiers: list[str] | None = None,
+              depts: list[str] | None = None, vendor: str = "", agency: str = "", min_risk: float = 0.0,
+              offset: int = 0, limit: int = PAGE_SIZE) -> tuple[np.ndarray, int]:
+        """
+        One page of the matching contracts, highest risk first.
+
+        Filters mean what they mean in the dashboard's apply_filters. vendor and
+        agency are id prefixes ("" for any); min_risk 0 applies no score filter.
+
+        Returns:
+            Row positions in the contract frame (use with df.iloc) and the total
+            number of matches.
+        """
+        cutoff = self._cutoff(min_risk)
+        year_values = [y for y in self.bitmaps["year"] if years[0] <= y <= years[1]]
+        mask = self._mask("year", year_values)
+        for column, values in (("risk_tier", tiers), ("sector", sectors), ("departamento", depts)):
+            if values:
+                mask &= self._mask(column, values)
+
+        vendor, agency = vendor.strip(), agency.strip()
+        if vendor or agency:
+            candidates = None
+            for column, query in (("codigo_proveedor", vendor), ("codigo_entidad", agency)):
+                if query:
+                    found = self.entities[column].prefix(query)
+                    candidates = found if candidates is None else np.intersect1d(candidates, found,
+                                                                                  assume_unique=True)
+            candidates = candidates[candidates < cutoff]
+            matches = candidates[_bits_at(mask, candidates)]
+            return self.order[matches[offset:offset + limit]], len(matches)
+
+        full, rest = divmod(cutoff, 8)
+        total = int(_POPCOUNT[mask[:full]].sum())
+        if rest:
+            total += int(np.unpackbits(mask[full:full + 1])[:rest].sum())
+        found, need = [], offset + limit
+        n_found = 0
+        for start in range(0, (cutoff + 7) // 8, _CHUNK_BYTES):
+            chunk = np.flatnonzero(np.unpackbits(mask[start:start + _CHUNK_BYTES])) + start * 8
+            chunk = chunk[chunk < cutoff]
+            found.append(chunk)
+            n_found += len(chunk)
+            if n_found >= need:
+                break
+        matches = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+        return self.order[matches[offset:need]], total
+
+
+def reference_query(df: pd.DataFrame, years: tuple[int, int], sectors: list[str] | None = None,
+                    tiers: list[str] | None = None, depts: list[str] | None = None, vendor: str = "",
+                    agency: str = "", min_risk: float = 0.0, offset: int = 0,
+                    limit: int = PAGE_SIZE) -> tuple[np.ndarray, int]:
+    """The same query as a full-frame pandas mask and stable sort (for checking ExplorerIndex)."""
+    mask = df["year"].between(years[0], years[1])
+    if tiers:
+        mask &= df["risk_tier"].isin(tiers)
+    if sectors:
+        mask &= df["sector"].isin(sectors)
+    if depts:
+        mask &= df["departamento"].isin(depts)
+    if vendor.strip():
+        mask &= df["codigo_proveedor"].astype(str).str.startswith(vendor.strip(), na=False)
+    if agency.strip():
+        mask &= df["codigo_entidad"].astype(str).str.startswith(agency.strip(), na=False)
+    if min_risk > 0:
+        mask &= df[SCORE_COL] >= min_risk
+    positions = np.flatnonzero(mask.to_numpy())
+    positions = positions[np.argsort(-df[SCORE_COL].to_numpy(dtype=np.float64)[positions], kind="stable")]
+    return positions[offset:offset + limit], len(positions)
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_rows: int = 1_553_594) -> pd.DataFrame:
+    """Index build time and per-query latency against the full-frame mask, checking identical pages."""
+    import tempfile
+
+    from src.pipeline import schema
+
+    with tempfile.TemporaryDirectory() as codes:
+        df = schema.compact(schema._synthetic_risk_scores(n_rows), Path(codes))
+    started = time.perf_counter()
+    index = ExplorerIndex.build(df)
+    t_build = time.perf_counter() - started
+
+    vendor = str(df["codigo_proveedor"].iloc[0])
+    agency = str(df["codigo_entidad"].iloc[0])
+    sectors = list(df["sector"].dropna().unique()[:2])
+    cases = {
+        "no filter": {"years": (2019, 2022)},
+        "High, 2 sectors": {"years": (2019, 2022), "tiers": ["High"], "sectors": sectors},
+        "min_risk 0.8, page 3": {"years": (2019, 2022), "min_risk": 0.8, "offset": 400},
+        "vendor id": {"years": (2019, 2022), "vendor": vendor},
+        "vendor prefix": {"years": (2019, 2022), "vendor": vendor[:5]},
+        "agency id, 2021": {"years": (2021, 2021), "agency": agency},
+    }
+    results = []
+    for label, query in cases.items():
+        started = time.perf_counter()
+        expected, expected_total = reference_query(df, **query)
+        t_frame = time.perf_counter() - started
+        started = time.perf_counter()
+        positions, total = index.query(**query)
+        t_index = time.perf_counter() - started
+        results.append({"query": label, "matches": total, "frame_ms": round(t_frame * 1000, 1),
+                        "index_ms": round(t_index * 1000, 2),
+                        "identical": total == expected_total and np.array_equal(positions, expected)})
+    results = pd.DataFrame(results)
+    index_mb = (index.order.nbytes + index.scores.nbytes
+                + sum(b.nbytes for col in index.bitmaps.values() for b in col.values())
+                + sum(e.positions.nbytes + e.offsets.nbytes for e in index.entities.values())) / 1024 ** 2
+    print("=" * 70)
+    print(f"EXPLORER INDEX — {n_rows:,} contracts, built in {t_build:.2f}s, {index_mb:.0f} MB of arrays")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Contract Explorer index benchmark")
+    parser.add_argument("--bench", type=int, default=1_553_594, help="Synthetic contracts")
+    args = parser.parse_args()
+
+    benchmark(args.bench)
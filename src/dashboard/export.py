@@ -0,0 +1,265 @@
+# src/dashboard/export.py
+"""
+Streaming bulk export of filtered scored contracts.
+
+The Contract Explorer's "Export as CSV" exported the 200 rows on screen,
+built in memory with to_csv. An audit typically wants every High-tier
+contract of a department, which can be hundreds of thousands of rows.
+export() writes all of them:
+
+    filters     the sidebar's (years, sectors, tiers, depts) plus the
+                explorer's vendor/agency id prefixes and minimum risk score,
+                pushed down into the dataset scan (ScoredDataset.where)
+    streaming   matching rows arrive as Arrow batches of at most batch_rows
+                rows and are written as they come, so memory is bounded by
+                one batch, not by the number of matches
+    formats     csv, csv.gz (gzip level 1, compressed while streaming) and parquet
+
+The dashboard writes its exports to outputs/exports/ and keeps only the
+newest KEEP_EXPORTS (rotate()). It offers a file for download only up to
+DOWNLOAD_MAX_MB, since Streamlit serves a download from the app's memory.
+Larger exports are left on disk, with the equivalent command() to run.
+
+Entity ids are written as their string values, as the notebooks write them.
+Rows come in dataset order (year, then sector), not sorted by risk: sorting
+would need every match in memory. Sort the file afterwards if needed.
+
+Usage:
+    python src/dashboard/export.py --tiers High --depts Antioquia -o high_antioquia.csv.gz
+    python src/dashboard/export.py --years 2021 2022 --vendor 9001 --format parquet -o vendor_9001.parquet
+    python src/dashboard/export.py --bench 1553594
+"""
+
+from pathlib import Path
+import gzip
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import OUTPUTS
+from src.dashboard.query import ScoredDataset
+
+EXPORT_DIR = OUTPUTS / "exports"
+FORMATS = ["csv", "csv.gz", "parquet"]
+KEEP_EXPORTS = 5        # dashboard export files kept in EXPORT_DIR
+DOWNLOAD_MAX_MB = 50    # largest export the dashboard offers as a download
+BATCH_ROWS = 65_536
+GZIP_LEVEL = 1  # ~7x the throughput of Arrow's default gzip level for ~13% larger files
+
+
+class _CsvWriter:
+    """Arrow CSV writer over a plain or gzip file stream, closing both."""
+
+    def __init__(self, path: Path, schema: pa.Schema, compressed: bool):
+        self.sink = gzip.open(path, "wb", compresslevel=GZIP_LEVEL) if compressed else pa.OSFile(str(path), "wb")
+        self.writer = pacsv.CSVWriter(self.sink, schema)
+
+    def write_batch(self, batch: pa.RecordBatch) -> None:
+        self.writer.write_batch(batch)
+
+    def close(self) -> None:
+        self.writer.close()
+        self.sink.close()
+
+
+def _writer(path: Path, fmt: str, schema: pa.Schema):
+    """A writer for path with write_batch() and close()."""
+    if fmt == "parquet":
+        return pq.ParquetWriter(path, schema, compression="snappy")
+    return _CsvWriter(path, schema, compressed=fmt == "csv.gz")
+
+
+def export(scored: ScoredDataset, path: Path, fmt: str = "csv", columns: list[str] | None = None,
+           years: tuple[int, int] | None = None, sectors: list[str] | None = None,
+           tiers: list[str] | None = None, depts: list[str] | None = None, vendor: str = "",
+           agency: str = "", min_risk: float = 0.0, batch_rows: int = BATCH_ROWS) -> dict:
+    """
+    Write every contract matching the filters to path, one batch at a time.
+
+    Filters mean what they mean in ExplorerIndex.query; columns defaults to
+    all of them. The file is written under a temporary name and renamed when
+    complete, so a failed export leaves no partial file behind.
+
+    Returns:
+        rows, bytes, seconds, rows_per_s, mb_per_s and arrow_peak_mb (the
+        most Arrow memory held at once during the export).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}, got {fmt!r}")
+    columns = columns or scored.columns
+    where = scored.where(years, sectors, tiers, depts, vendor, agency, min_risk)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+
+    pool = pa.default_memory_pool()
+    baseline, peak = pool.bytes_allocated(), 0
+    started = time.perf_counter()
+    rows = 0
+    try:
+        # Opened up front, so no matches still writes the header / schema
+        writer = _writer(tmp, fmt, scored.plain_schema(columns))
+        for batch in scored.batches(columns, where, batch_rows):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+            peak = max(peak, pool.bytes_allocated() - baseline)
+        writer.close()
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    tmp.replace(path)
+    seconds = time.perf_counter() - started
+    size = path.stat().st_size
+    return {"rows": rows, "bytes": size, "seconds": seconds,
+            "rows_per_s": rows / seconds if seconds else np.nan,
+            "mb_per_s": size / 1024 ** 2 / seconds if seconds else np.nan,
+            "arrow_peak_mb": peak / 1024 ** 2}
+
+
+def rotate(directory: Path = EXPORT_DIR, keep: int = KEEP_EXPORTS) -> list[Path]:
+    """Delete all but the newest `keep` dashboard exports in directory; returns the deleted files."""
+    files = sorted(directory.glob("auditlens_contracts_*"), key=lambda f: f.stat().st_mtime, reverse=True)
+    stale = [f for f in files if not f.name.endswith(".tmp")][keep:]
+    for f in stale:
+        f.unlink(missing_ok=True)
+    return stale
+
+
+def command(path: Path, years: tuple[int, int] | None = None, sectors: list[str] | None = None,
+            tiers: list[str] | None = None, depts: list[str] | None = None, vendor: str = "",
+            agency: str = "", min_risk: float = 0.0) -> str:
+    """The export.py command line that writes the same export to path."""
+    import shlex
+
+    parts = ["python", "src/dashboard/export.py", "-o", str(path)]
+    if years:
+        parts += ["--years", str(years[0]), str(years[1])]
+    for flag, values in (("--sectors", sectors), ("--tiers", tiers), ("--depts", depts)):
+        if values:
+            parts += [flag, *values]
+    for flag, value in (("--vendor", vendor), ("--agency", agency)):
+        if value:
+            parts += [flag, value]
+    if min_risk:
+        parts += ["--min-risk", str(min_risk)]
+    return shlex.join(parts)
+
+
+def read_export(path: Path, fmt: str) -> pd.DataFrame:
+    """An exported file back as pandas, ids as strings (for checking an export)."""
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype={"codigo_entidad": str, "codigo_proveedor": str, "id_contrato": str},
+                       compression="gzip" if fmt == "csv.gz" else None)
+
+
+def reference_export(df: pd.DataFrame, **filters) -> pd.DataFrame:
+    """The matching rows by a full-frame pandas filter (explorer.reference_query), ids as strings."""
+    from src.dashboard.explorer import reference_query
+    from src.pipeline import schema
+
+    positions, _ = reference_query(df, **filters, limit=len(df))
+    return schema.decode(df.iloc[positions])
+
+
+def compare(exported: pd.DataFrame, reference: pd.DataFrame, key: str = "id_contrato") -> list[str]:
+    """Columns whose values differ between an export and the reference, matched on key (empty if identical)."""
+    if len(exported) != len(reference) or set(exported[key]) != set(reference[key]):
+        return [key]
+    a = exported.sort_values(key).reset_index(drop=True)
+    b = reference.sort_values(key).reset_index(drop=True)
+    bad = []
+    for col in b.columns:
+        x, y = a[col], b[col]
+        if pd.api.types.is_numeric_dtype(y) and not pd.api.types.is_bool_dtype(y):
+            # CSV round-trips float32 scores through their shortest decimal form
+            same = np.allclose(x.to_numpy(dtype=np.float64), y.to_numpy(dtype=np.float64),
+                               rtol=1e-6, atol=0, equal_nan=True)
+        elif pd.api.types.is_datetime64_any_dtype(y):
+            same = (pd.to_datetime(x).to_numpy() == y.to_numpy()).all()
+        else:
+            same = x.astype(str).where(x.notna(), "").equals(y.astype(str).where(y.notna(), ""))
+        if not same:
+            bad.append(col)
+    return bad
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_rows: int = 1_553_594) -> pd.DataFrame:
+    """Throughput and Arrow peak memory per format, against an in-memory pandas to_csv, checking every file."""
+    import tempfile
+
+    from src.dashboard.query import write_dataset
+    from src.pipeline import schema
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        codes_dir, source, root = tmp / "codes", tmp / "risk_scores.parquet", tmp / "risk_scores_dataset"
+        df = schema.write(schema._synthetic_risk_scores(n_rows), source, codes_dir)
+        write_dataset(source, root)
+        scored = ScoredDataset.open(root, source, codes_dir)
+
+        vendor = str(df["codigo_proveedor"].iloc[0])
+        cases = {
+            "High tier": {"years": (2019, 2022), "tiers": ["High"]},
+            "everything": {"years": (2019, 2022)},
+            "vendor prefix, 0.5+": {"years": (2019, 2022), "vendor": vendor[:5], "min_risk": 0.5},
+        }
+        results = []
+        for label, filters in cases.items():
+            started = time.perf_counter()
+            reference = reference_export(df, **filters)
+            reference.to_csv(tmp / "reference.csv", index=False)
+            t_pandas = time.perf_counter() - started
+            for fmt in FORMATS:
+                path = tmp / f"export.{fmt}"
+                stats = export(scored, path, fmt, **filters)
+                mismatched = compare(read_export(path, fmt), reference)
+                results.append({"filter": label, "format": fmt, "rows": stats["rows"],
+                                "pandas_csv_s": round(t_pandas, 2), "export_s": round(stats["seconds"], 2),
+                                "rows_per_s": f"{stats['rows_per_s']:,.0f}", "MB": round(stats["bytes"] / 1024 ** 2, 1),
+                                "arrow_peak_mb": round(stats["arrow_peak_mb"], 1),
+                                "identical": not mismatched})
+    results = pd.DataFrame(results)
+    print("=" * 70)
+    print(f"BULK EXPORT — {n_rows:,} contracts, {BATCH_ROWS:,}-row batches")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export every scored contract matching the dashboard filters")
+    parser.add_argument("-o", "--output", type=Path, help="Output file")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="Default: from the output suffix")
+    parser.add_argument("--years", type=int, nargs=2, default=None, metavar=("FROM", "TO"))
+    parser.add_argument("--sectors", nargs="*", default=None)
+    parser.add_argument("--tiers", nargs="*", default=None)
+    parser.add_argument("--depts", nargs="*", default=None)
+    parser.add_argument("--vendor", default="", help="Vendor id prefix")
+    parser.add_argument("--agency", default="", help="Agency id prefix")
+    parser.add_argument("--min-risk", type=float, default=0.0)
+    parser.add_argument("--columns", nargs="*", default=None, help="Default: all")
+    parser.add_argument("--bench", type=int, default=None, help="Benchmark on N synthetic contracts")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench)
+    elif args.output is None:
+        parser.error("--output is required")
+    else:
+        fmt = args.format or next((f for f in sorted(FORMATS, key=len, reverse=True)
+                                   if args.output.name.endswith("." + f)), "csv")
+        stats = export(ScoredDataset.open(), args.output, fmt, args.columns, tuple(args.years) if args.years else None,
+                       args.sectors, args.tiers, args.depts, args.vendor, args.agency, args.min_risk)
+        print(f"✅ {stats['rows']:,} contracts → {args.output} ({stats['bytes'] / 1024 ** 2:.1f} MB) "
+              f"in {stats['seconds']:.1f}s, {stats['rows_per_s']:,.0f} rows/s")
@@ -0,0 +1,360 @@
+# src/dashboard/profiles.py
+"""
+Materialized per-agency profiles for the dashboard's Agency Drill-Down tab.
+
+Tab 2 used to draw its agency dropdown with a format_func that scanned the
+filtered frame twice per option, so thousands of full scans per render. It
+then filtered, grouped and resampled the selected agency's contracts on each
+rerun. The profile store answers the same questions from small
+pre-aggregated tables, and reads one agency's rows only when it is selected.
+
+The sidebar filters select whole year × risk_tier × sector × departamento
+cells, as in the overview cube. Every profile table is therefore kept at that
+grain, and any filter is a sum over the selected cells:
+
+    agencies.parquet        one row per agency × cell: contracts, spend,
+                            score sum/count, high-risk count, and the first row
+                            position (for the dropdown label)
+    vendors.parquet         spend per vendor per agency × cell (top 8 after summing)
+    monthly.parquet         risk score sum/count per agency × start month × cell
+    high_risk.parquet       the 50 highest-scored High contracts per agency ×
+                            year × sector × departamento. Any filter's top 50
+                            is among the union of its cells' top 50s.
+
+The three shard parts are sorted by agency and written in row groups of
+ROW_GROUP_ROWS. A read filtered on codigo_entidad then opens only the
+row groups whose min/max statistics can hold that agency (the bounds are
+read once, when the store is opened). There are three
+files however many agencies there are. One file per agency per part was
+5,100 files and 9.9 s of writing at 200k contracts.
+
+Counts match the row-level tab exactly. Spend sums do too for whole-peso
+values. Mean risk is a float64 sum / count of the float32 scores, so it can
+differ from pandas' float32 mean in the 7th significant digit.
+
+The pipeline runner builds the tables in the "profiles" stage and publishes
+the store to data/processed/agency_profiles/.
+
+Usage:
+    python src/dashboard/profiles.py --bench 1553594
+"""
+
+from pathlib import Path
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.dashboard.cube import CUBE_KEYS, TIER_ORDER
+from src.pipeline import schema
+
+AGENCY = "codigo_entidad"
+HIGH_RISK_COLUMNS = [
+    "id_contrato", "codigo_proveedor", "valor_del_contrato",
+    "risk_score_calibrated", "process_anomaly_score",
+    "splitting_score", "network_score", "risk_tier",
+]
+PROFILE_COLUMNS = list(dict.fromkeys([
+    AGENCY, *CUBE_KEYS, "fecha_de_inicio_del_contrato", *HIGH_RISK_COLUMNS,
+]))
+SHARD_PARTS = ["vendors", "monthly", "high_risk"]
+TOP_VENDORS = 8
+TOP_HIGH_RISK = 50
+ROW_GROUP_ROWS = 16_384  # one agency's read decodes a row group or two of each part
+
+
+# ── Build ───────────────────────────────────────────────────────────────────
+def build_profiles(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """The agencies table and the per-agency shard tables of a scored contract frame."""
+    keys = [AGENCY, *CUBE_KEYS]
+    score = df["risk_score_calibrated"]
+    base = df[keys].assign(
+        _position=np.arange(len(df)),
+        _spend=df["valor_del_contrato"].to_numpy(),
+        _score=score.fillna(0).to_numpy(),
+        _scored=score.notna().to_numpy().astype(np.int64),
+        _high=(df["risk_tier"] == "High").to_numpy().astype(np.int64),
+    )
+    agencies = base.groupby(keys, dropna=False, observed=True, sort=True).agg(
+        contracts=("_position", "size"),
+        first_position=("_position", "min"),
+        spend=("_spend", "sum"),
+        score_sum=("_score", "sum"),
+        score_count=("_scored", "sum"),
+        high_risk_contracts=("_high", "sum"),
+    ).reset_index()
+
+    vendors = base.assign(codigo_proveedor=df["codigo_proveedor"].to_numpy()).groupby(
+        [*keys, "codigo_proveedor"], dropna=False, observed=True, sort=True,
+    )["_spend"].sum().reset_index(name="spend")
+
+    month = df["fecha_de_inicio_del_contrato"].dt.to_period("M").dt.start_time
+    monthly = base.assign(month=month.to_numpy()).dropna(subset=["month"]).groupby(
+        [*keys, "month"], dropna=False, observed=True, sort=True,
+    ).agg(score_sum=("_score", "sum"), score_count=("_scored", "sum")).reset_index()
+
+    high = df.loc[df["risk_tier"] == "High", [AGENCY, *CUBE_KEYS, *HIGH_RISK_COLUMNS[:-1]]]
+    high = high.assign(position=np.flatnonzero((df["risk_tier"] == "High").to_numpy()))
+    high = high.sort_values(["risk_score_calibrated", "position"], ascending=[False, True], kind="stable")
+    high_risk = high.groupby([AGENCY, "year", "sector", "departamento"], dropna=False, observed=True,
+                             sort=False).head(TOP_HIGH_RISK)
+    return {"agencies": agencies, "vendors": vendors, "monthly": monthly,
+            "high_risk": high_risk.reset_index(drop=True)}
+
+
+def _split(table: pd.DataFrame):
+    """Agency id → that agency's rows of table, without the agency column (one sort, then slices)."""
+    agency = table[AGENCY].astype(str).where(table[AGENCY].notna())
+    order = np.argsort(agency.to_numpy(dtype=object, na_value=""), kind="stable")
+    table, ids = table.iloc[order].drop(columns=AGENCY), agency.to_numpy(dtype=object, na_value="")[order]
+
+    def rows(agency_id: str) -> pd.DataFrame:
+        lo, hi = np.searchsorted(ids, agency_id, side="left"), np.searchsorted(ids, agency_id, side="right")
+        return table.iloc[lo:hi].reset_index(drop=True)
+
+    return rows
+
+
+def write_store(parts: dict[str, pd.DataFrame], root: Path, codes_dir: Path = schema.CODES_DIR) -> Path:
+    """Write the store: agencies.parquet plus one agency-sorted parquet file per shard part."""
+    root = Path(root)
+    tmp = root.with_name(root.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    schema.write(parts["agencies"], tmp / "agencies.parquet", codes_dir)
+    # Plain strings sorted by agency, so row-group statistics on codigo_entidad are narrow ranges
+    for name in SHARD_PARTS:
+        table = schema.decode(parts[name])
+        table = table.assign(**{AGENCY: table[AGENCY].astype(str).where(table[AGENCY].notna())})
+        table = table.dropna(subset=[AGENCY]).sort_values(AGENCY, kind="stable")
+        pq.write_table(pa.Table.from_pandas(table, preserve_index=False), tmp / f"{name}.parquet",
+                       row_group_size=ROW_GROUP_ROWS)
+    # Swap the finished store in whole, so readers never see a half-written one
+    old = root.with_name(root.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if root.exists():
+        root.replace(old)
+    tmp.replace(root)
+    shutil.rmtree(old, ignore_errors=True)
+    return root
+
+
+def _row_group_bounds(f: pq.ParquetFile) -> tuple[np.ndarray, np.ndarray]:
+    """Min and max codigo_entidad of each row group of an agency-sorted part, from its statistics."""
+    column = f.schema_arrow.get_field_index(AGENCY)
+    stats = [f.metadata.row_group(i).column(column).statistics for i in range(f.metadata.num_row_groups)]
+    return (np.array([st.min for st in stats], dtype=object),
+            np.array([st.max for st in stats], dtype=object))
+
+
+# ── Query ───────────────────────────────────────────────────────────────────
+def _select(table: pd.DataFrame, years: tuple[int, int], sectors: list[str] | None = None,
+            tiers: list[str] | None = None, depts: list[str] | None = None) -> pd.DataFrame:
+    """Rows of the cells apply_filters keeps (tables without risk_tier ignore the tier filter)."""
+    mask = table["year"].between(years[0], years[1])
+    if tiers and "risk_tier" in table.columns:
+        mask &= table["risk_tier"].isin(tiers)
+    if sectors:
+        mask &= table["sector"].isin(sectors)
+    if depts:
+        mask &= table["departamento"].isin(depts)
+    return table[mask]
+
+
+class ProfileStore:
+    """
+    Agency dropdown and drill-down profiles, from a published store or from in-memory tables.
+
+    Attributes:
+        agencies: The agencies table (one row per agency × filter cell).
+        loader: Agency id → {"vendors", "monthly", "high_risk"} tables of that agency.
+    """
+
+    def __init__(self, agencies: pd.DataFrame, loader):
+        self.agencies = agencies
+        self.loader = loader
+        self._cells = _split(agencies)
+
+    @classmethod
+    def open(cls, root: Path, codes_dir: Path = schema.CODES_DIR) -> "ProfileStore":
+        """A published store; an agency's rows are read from disk on demand."""
+        root = Path(root)
+        files = {name: pq.ParquetFile(root / f"{name}.parquet") for name in SHARD_PARTS}
+        bounds = {name: _row_group_bounds(f) for name, f in files.items()}
+
+        def load(agency: str) -> dict[str, pd.DataFrame]:
+            agency, tables = str(agency), {}
+            for name, f in files.items():
+                low, high = bounds[name]
+                groups = np.flatnonzero((low <= agency) & (agency <= high)).tolist()
+                table = f.read_row_groups(groups) if groups else f.schema_arrow.empty_table()
+                table = table.filter(pc.equal(table[AGENCY], agency))
+                tables[name] = table.drop_columns(AGENCY).to_pandas()
+            return tables
+
+        return cls(schema.read(root / "agencies.parquet", codes_dir=codes_dir), load)
+
+    @classmethod
+    def from_parts(cls, parts: dict[str, pd.DataFrame]) -> "ProfileStore":
+        """In-memory tables from build_profiles (when no up-to-date store is published)."""
+        shards = {name: _split(parts[name]) for name in SHARD_PARTS}
+
+        def load(agency: str) -> dict[str, pd.DataFrame]:
+            return {name: shards[name](str(agency)) for name in SHARD_PARTS}
+
+        return cls(parts["agencies"], load)
+
+    def options(self, years: tuple[int, int], sectors: list[str] | None = None,
+                tiers: list[str] | None = None, depts: list[str] | None = None) -> pd.Series:
+        """
+        Dropdown labels ("<agency> | <sector>") of agencies with contracts under the filters.
+
+        The sector is that of the agency's first filtered contract, as the old
+        format_func showed. Indexed by agency id, sorted.
+        """
+        cells = _select(self.agencies, years, sectors, tiers, depts)
+        first = cells.sort_values("first_position", kind="stable").drop_duplicates(AGENCY)
+        first = first.assign(**{AGENCY: first[AGENCY].astype(str)}).set_index(AGENCY).sort_index()
+        sector = first["sector"].astype(str).where(first["sector"].notna(), "nan")
+        return first.index.to_series() + " | " + sector
+
+    def profile(self, agency: str, years: tuple[int, int], sectors: list[str] | None = None,
+                tiers: list[str] | None = None, depts: list[str] | None = None) -> dict:
+        """
+        What tab 2 shows for one agency under the sidebar filters.
+
+        Returns:
+            contracts, spend, mean_risk, high_risk_contracts (KPIs);
+            tier_counts (Risk Tier, Count); top_vendors (Vendor, Spend, top 8);
+            monthly (month, risk_score_calibrated mean); high_risk (top 50 contracts).
+        """
+        cells = _select(self._cells(str(agency)), years, sectors, tiers, depts)
+        shard = self.loader(agency)
+        score_count = cells["score_count"].sum()
+
+        tier_counts = cells.groupby("risk_tier", observed=True)["contracts"].sum()
+        tier_counts = tier_counts[tier_counts > 0].reindex(
+            [t for t in TIER_ORDER if t in tier_counts.index]).reset_index()
+        tier_counts.columns = ["Risk Tier", "Count"]
+        tier_counts["Risk Tier"] = tier_counts["Risk Tier"].astype(str)
+
+        vendors = _select(shard["vendors"], years, sectors, tiers, depts)
+        top_vendors = vendors.groupby("codigo_proveedor", observed=True, sort=True)["spend"].sum()
+        top_vendors = top_vendors.nlargest(TOP_VENDORS).reset_index()
+        top_vendors.columns = ["Vendor", "Spend"]
+
+        monthly = _select(shard["monthly"], years, sectors, tiers, depts).groupby("month", sort=True)[
+            ["score_sum", "score_count"]].sum()
+        monthly = (monthly["score_sum"] / monthly["score_count"]).rename("risk_score_calibrated").reset_index()
+
+        high_risk = pd.DataFrame(columns=HIGH_RISK_COLUMNS)
+        if not tiers or "High" in tiers:
+            high_risk = _select(shard["high_risk"], years, sectors, None, depts)
+            high_risk = high_risk.sort_values(["risk_score_calibrated", "position"], ascending=[False, True],
+                                              kind="stable").head(TOP_HIGH_RISK)
+            high_risk = high_risk.assign(risk_tier="High")[HIGH_RISK_COLUMNS].reset_index(drop=True)
+        return {
+            "contracts": int(cells["contracts"].sum()),
+            "spend": float(cells["spend"].sum()),
+            "mean_risk": cells["score_sum"].sum() / score_count if score_count else np.nan,
+            "high_risk_contracts": int(cells["high_risk_contracts"].sum()),
+            "tier_counts": tier_counts,
+            "top_vendors": top_vendors,
+            "monthly": monthly,
+            "high_risk": high_risk,
+        }
+
+
+def row_level_profile(df: pd.DataFrame, agency: str, years: tuple[int, int], sectors: list[str] | None = None,
+                      tiers: list[str] | None = None, depts: list[str] | None = None) -> dict:
+    """The same profile computed the way tab 2 did, over the filtered contract frame (the reference)."""
+    filtered = _select(df, years, sectors, tiers, depts)
+    agency_df = filtered[filtered[AGENCY].astype(str) == str(agency)]
+    vendor_spend = agency_df.groupby("codigo_proveedor", observed=True)["valor_del_contrato"].sum()
+    monthly = agency_df.groupby(agency_df["fecha_de_inicio_del_contrato"].dt.to_period("M"))[
+        "risk_score_calibrated"].mean()
+    high_risk = agency_df[agency_df["risk_tier"] == "High"][HIGH_RISK_COLUMNS].sort_values(
+        "risk_score_calibrated", ascending=False, kind="stable").head(TOP_HIGH_RISK)
+    return {
+        "contracts": len(agency_df),
+        "spend": float(agency_df["valor_del_contrato"].sum()),
+        "mean_risk": agency_df["risk_score_calibrated"].mean(),
+        "high_risk_contracts": int((agency_df["risk_tier"] == "High").sum()),
+        "top_vendors": vendor_spend.nlargest(TOP_VENDORS),
+        "monthly": monthly,
+        "high_risk": high_risk,
+    }
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_rows: int = 1_553_594) -> pd.DataFrame:
+    """Store build and write time, dropdown and profile latency against the row-level tab, and agreement."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        df = schema.compact(schema._synthetic_risk_scores(n_rows)[PROFILE_COLUMNS], tmp / "codes")
+        started = time.perf_counter()
+        parts = build_profiles(df)
+        t_build = time.perf_counter() - started
+        started = time.perf_counter()
+        write_store(parts, tmp / "agency_profiles", tmp / "codes")
+        t_write = time.perf_counter() - started
+        store = ProfileStore.open(tmp / "agency_profiles", tmp / "codes")
+
+        filters = {"years": (2020, 2022), "tiers": ["High", "Medium"]}
+        started = time.perf_counter()
+        filtered = _select(df, **filters)
+        agency_ids = sorted(filtered[AGENCY].astype(str).unique())
+        for x in agency_ids[:100]:
+            f"{x} | {filtered[filtered[AGENCY] == x]['sector'].iloc[0] if len(filtered[filtered[AGENCY] == x]) > 0 else ''}"
+        t_dropdown_rows = (time.perf_counter() - started) * len(agency_ids) / 100
+        started = time.perf_counter()
+        options = store.options(**filters)
+        t_dropdown = time.perf_counter() - started
+
+        results = []
+        counts = df[AGENCY].value_counts()
+        for label, agency in (("largest agency", counts.index[0]), ("median agency", counts.index[len(counts) // 2])):
+            started = time.perf_counter()
+            slow = row_level_profile(df, agency, **filters)
+            t_rows = time.perf_counter() - started
+            started = time.perf_counter()
+            fast = store.profile(agency, **filters)
+            t_store = time.perf_counter() - started
+            same = (fast["contracts"] == slow["contracts"] and fast["spend"] == slow["spend"]
+                    and fast["high_risk_contracts"] == slow["high_risk_contracts"]
+                    and np.isclose(fast["mean_risk"], slow["mean_risk"], rtol=1e-6)
+                    and np.array_equal(fast["top_vendors"]["Spend"], slow["top_vendors"].to_numpy())
+                    and np.allclose(fast["monthly"]["risk_score_calibrated"], slow["monthly"].to_numpy(), rtol=1e-6)
+                    and np.array_equal(fast["high_risk"]["id_contrato"].astype(str),
+                                       slow["high_risk"]["id_contrato"].astype(str)))
+            results.append({"agency": label, "contracts": slow["contracts"], "row_level_ms": round(t_rows * 1000, 1),
+                            "store_ms": round(t_store * 1000, 1), "identical": same})
+        results = pd.DataFrame(results)
+        n_agencies = len(parts["agencies"][AGENCY].unique())
+    print("=" * 70)
+    print(f"AGENCY PROFILES — {n_rows:,} contracts, {n_agencies:,} agencies; "
+          f"built in {t_build:.1f}s, written in {t_write:.1f}s")
+    print(f"Dropdown of {len(options):,} agencies: ~{t_dropdown_rows:.1f}s with format_func scans (extrapolated), "
+          f"{t_dropdown * 1000:.1f} ms from the store")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Agency profile store benchmark")
+    parser.add_argument("--bench", type=int, default=1_553_594, help="Synthetic contracts")
+    args = parser.parse_args()
+
+    benchmark(args.bench)
@@ -0,0 +1,336 @@
+# src/dashboard/query.py
+"""
+Lazy, column-pruned access to the scored contracts for the dashboard.
+
+The dashboard used to start by reading all of risk_scores.parquet into one
+pandas frame under st.cache_data. Every server process decoded every column
+of 1.55M rows, and Streamlit hashed and copied the result. No tab needs all
+of it:
+
+    tab 1   the overview cube (published; else CUBE_COLUMNS)
+    tab 2   the agency profile store (published; else PROFILE_COLUMNS)
+    tab 3   the explorer index (7 columns), then ~200 rows of display columns
+
+ScoredDataset opens the scored contracts as a pyarrow dataset without reading
+them. scan() reads only the columns it is asked for, and pushes the sidebar
+filters down: year and sector prune whole partitions, and risk_tier and
+departamento are evaluated by Arrow before anything reaches pandas. take()
+reads single rows by position, for a page of the Contract Explorer. batches()
+streams every matching row in bounded chunks, for src/dashboard/export.py.
+
+The pipeline runner publishes the risk output a second time, as a dataset:
+
+    data/processed/risk_scores_dataset/year=2021/sector=Salud/part-0.arrow
+
+These are uncompressed Arrow IPC files, opened with memory mapping. Reading a
+column maps its pages instead of decoding them, and dashboard processes on
+the same host share those pages through the OS page cache. Entity columns
+keep their int32 codes on disk and are decoded with schema.py on the way out.
+A new dataset is written beside the old one and swapped in by rename. A
+process that still maps the old files keeps reading them until it reopens.
+
+If the dataset is missing or older than risk_scores.parquet (say, rewritten
+by notebook 08), ScoredDataset opens the Parquet file the same lazy way.
+Column pruning still applies; predicates then skip row groups instead of
+whole partitions.
+
+Usage:
+    python src/dashboard/query.py                     # risk_scores.parquet → risk_scores_dataset/
+    python src/dashboard/query.py --bench 1553594
+"""
+
+from pathlib import Path
+import json
+from typing import Iterator
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import DATA_PROCESSED
+from src.pipeline import schema
+
+SCORE_COL = "risk_score_calibrated"
+SOURCE = DATA_PROCESSED / "risk_scores.parquet"
+DATASET_DIR = DATA_PROCESSED / "risk_scores_dataset"
+RECORD_BATCH_ROWS = 65_536
+PARTITIONING = ds.partitioning(pa.schema([("year", pa.int16()), ("sector", pa.string())]), flavor="hive")
+
+
+def filter_expression(years: tuple[int, int] | None = None, sectors: list[str] | None = None,
+                      tiers: list[str] | None = None, depts: list[str] | None = None) -> ds.Expression | None:
+    """The dashboard's sidebar filters as an Arrow predicate (None when nothing is filtered)."""
+    terms = []
+    if years is not None:
+        terms += [ds.field("year") >= years[0], ds.field("year") <= years[1]]
+    for column, values in (("risk_tier", tiers), ("sector", sectors), ("departamento", depts)):
+        if values:
+            terms.append(ds.field(column).isin(list(values)))
+    if not terms:
+        return None
+    expression = terms[0]
+    for term in terms[1:]:
+        expression &= term
+    return expression
+
+
+def write_dataset(source: Path = SOURCE, dest: Path = DATASET_DIR) -> int:
+    """
+    Rewrite a compact-schema Parquet file as the year/sector-partitioned IPC dataset.
+
+    Int32 entity codes and the schema metadata are copied as they are, so the
+    dataset decodes against the same code dictionaries as source. Returns the
+    number of fragments written.
+    """
+    table = pq.read_table(source)
+    table = table.set_column(table.schema.get_field_index("sector"), "sector", table["sector"].cast(pa.string()))
+    dest = Path(dest)
+    tmp, old = dest.with_name(dest.name + ".tmp"), dest.with_name(dest.name + ".old")
+    shutil.rmtree(tmp, ignore_errors=True)
+    # Record batches of RECORD_BATCH_ROWS: Parquet reads come in ~1K-row chunks, too small to scan quickly
+    ds.write_dataset(table, tmp, format="arrow", partitioning=PARTITIONING,
+                     file_options=ds.IpcFileFormat().make_write_options(compression=None),
+                     min_rows_per_group=RECORD_BATCH_ROWS, max_rows_per_group=RECORD_BATCH_ROWS)
+    shutil.rmtree(old, ignore_errors=True)
+    if dest.exists():
+        dest.rename(old)
+    tmp.rename(dest)
+    shutil.rmtree(old, ignore_errors=True)
+    return sum(1 for _ in dest.rglob("*.arrow"))
+
+
+class ScoredDataset:
+    """
+    The scored contracts, opened lazily.
+
+    Attributes:
+        dataset: The pyarrow dataset (IPC partitions, or the Parquet file).
+        columns: Column names available to scan() and take().
+        entities: Columns stored as int32 codes.
+        codes_dir: Code dictionaries the entity columns decode against.
+    """
+
+    def __init__(self, dataset: ds.Dataset, codes_dir: Path = schema.CODES_DIR):
+        self.dataset = dataset
+        self.columns = list(dataset.schema.names)
+        self.entities = schema.entity_columns(dataset.schema)
+        self.codes_dir = codes_dir
+        self._fragments = list(dataset.get_fragments())
+        self._offsets = np.zeros(len(self._fragments) + 1, dtype=np.int64)
+        np.cumsum([f.count_rows() for f in self._fragments], out=self._offsets[1:])
+
+    @classmethod
+    def open(cls, root: Path = DATASET_DIR, source: Path = SOURCE,
+             codes_dir: Path = schema.CODES_DIR) -> "ScoredDataset":
+        """The partitioned dataset if source is missing or not newer, else source itself."""
+        if root.exists() and (not source.exists() or root.stat().st_mtime >= source.stat().st_mtime):
+            dataset = ds.dataset(root, format="arrow", partitioning=PARTITIONING,
+                                 filesystem=pafs.LocalFileSystem(use_mmap=True))
+        else:
+            dataset = ds.dataset(source, format="parquet")
+        return cls(dataset, codes_dir)
+
+    def __len__(self) -> int:
+        return int(self._offsets[-1])
+
+    def _frame(self, table: pa.Table) -> pd.DataFrame:
+        return schema.from_arrow(table, self.codes_dir, self.entities)
+
+    def scan(self, columns: list[str], years: tuple[int, int] | None = None, sectors: list[str] | None = None,
+             tiers: list[str] | None = None, depts: list[str] | None = None) -> pd.DataFrame:
+        """
+        The given columns of the contracts matching the filters, in the compact schema.
+
+        Rows come in dataset order, the order take() positions refer to (when
+        nothing is filtered, row i of the result is position i).
+        """
+        table = self.dataset.to_table(columns=columns, filter=filter_expression(years, sectors, tiers, depts))
+        return self._frame(table)
+
+    def where(self, years: tuple[int, int] | None = None, sectors: list[str] | None = None,
+              tiers: list[str] | None = None, depts: list[str] | None = None, vendor: str = "",
+              agency: str = "", min_risk: float = 0.0) -> ds.Expression | None:
+        """
+        The Contract Explorer's filters as an Arrow predicate: the sidebar
+        filters, plus vendor and agency id prefixes and a minimum risk score.
+
+        A prefix on an entity column becomes the set of its int32 codes whose
+        value starts with it, so the scan compares integers.
+        """
+        terms = [filter_expression(years, sectors, tiers, depts)]
+        for column, prefix in (("codigo_proveedor", vendor.strip()), ("codigo_entidad", agency.strip())):
+            if not prefix:
+                continue
+            if column in self.entities:
+                values = schema._book(column, self.codes_dir).values
+                terms.append(ds.field(column).isin(np.flatnonzero(values.str.startswith(prefix)).astype(np.int32)))
+            else:
+                terms.append(pc.starts_with(ds.field(column).cast(pa.string()), prefix))
+        if min_risk > 0:
+            terms.append(ds.field(SCORE_COL) >= min_risk)
+        terms = [term for term in terms if term is not None]
+        if not terms:
+            return None
+        expression = terms[0]
+        for term in terms[1:]:
+            expression &= term
+        return expression
+
+    def plain_schema(self, columns: list[str]) -> pa.Schema:
+        """Schema of the batches() yields: entity columns as strings, dictionaries as their value type."""
+        fields = []
+        for col in columns:
+            kind = self.dataset.schema.field(col).type
+            kind = pa.string() if col in self.entities else kind.value_type if pa.types.is_dictionary(kind) else kind
+            fields.append(pa.field(col, kind))
+        return pa.schema(fields)
+
+    def batches(self, columns: list[str], where: ds.Expression | None = None,
+                batch_rows: int = 65_536) -> Iterator[pa.RecordBatch]:
+        """
+        Matching rows as plain Arrow batches of at most batch_rows rows, one at a time.
+
+        Entity codes come back as their string values and dictionary columns
+        as their value type, as schema.decode does for frames. The scan runs
+        on the calling thread: a threaded scan reads ahead of a slower
+        consumer (a CSV writer) and queues batches, which held 160 MB at once
+        in an export of 600K rows.
+        """
+        books = {col: pa.array(np.asarray(schema._book(col, self.codes_dir).values, dtype=object), type=pa.string())
+                 for col in columns if col in self.entities}
+        scanner = self.dataset.scanner(columns=columns, filter=where, batch_size=batch_rows, use_threads=False)
+        for batch in scanner.to_batches():
+            if not batch.num_rows:
+                continue
+            arrays = []
+            for name, array in zip(batch.schema.names, batch.columns):
+                if name in books:
+                    array = books[name].take(pc.if_else(pc.less(array, 0), pa.scalar(None, array.type), array))
+                elif pa.types.is_dictionary(array.type):
+                    array = array.cast(array.type.value_type)
+                arrays.append(array)
+            yield pa.RecordBatch.from_arrays(arrays, names=batch.schema.names)
+
+    def take(self, positions: np.ndarray, columns: list[str]) -> pd.DataFrame:
+        """Rows at the given dataset positions, in the order given; reads only their fragments."""
+        positions = np.asarray(positions, dtype=np.int64)
+        owner = np.searchsorted(self._offsets, positions, side="right") - 1
+        by_owner = np.argsort(owner, kind="stable")
+        parts = []
+        for k in np.unique(owner):
+            local = positions[owner == k] - self._offsets[k]
+            scanner = ds.Scanner.from_fragment(self._fragments[k], schema=self.dataset.schema, columns=columns)
+            parts.append(scanner.take(pa.array(local)))
+        if not parts:
+            return self._frame(self.dataset.schema.empty_table().select(columns))
+        table = pa.concat_tables(parts).take(pa.array(np.argsort(by_owner)))
+        return self._frame(table)
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def _cold_start(mode: str, source: Path, root: Path, codes_dir: Path) -> dict:
+    """Load what tab 3 needs the old way (eager) or through ScoredDataset (lazy); run in a fresh process."""
+    from src.dashboard.explorer import ExplorerIndex, INDEX_COLUMNS
+
+    started = time.perf_counter()
+    if mode == "eager":
+        df = schema.read(source, codes_dir=codes_dir)
+        index = ExplorerIndex.build(df)
+    else:
+        scored = ScoredDataset.open(root, source, codes_dir)
+        index = ExplorerIndex.build(scored.scan(INDEX_COLUMNS))
+    t_start = time.perf_counter() - started
+    positions, _ = index.query(years=(2019, 2022), tiers=["High"])
+    started = time.perf_counter()
+    page = df.iloc[positions] if mode == "eager" else scored.take(positions, ["id_contrato", SCORE_COL])
+    t_page = time.perf_counter() - started
+    # VmHWM, not ru_maxrss: the latter carries the parent's peak across exec
+    status = Path("/proc/self/status").read_text()
+    peak_kb = int(status.split("VmHWM:")[1].split()[0])
+    return {"start_s": t_start, "page_ms": t_page * 1000, "rss_mb": peak_kb / 1024,
+            "scores": page[SCORE_COL].astype(float).tolist()}
+
+
+def benchmark(n_rows: int = 1_553_594) -> pd.DataFrame:
+    """Cold start and peak RSS of a fresh process, eager frame vs lazy dataset, and filtered scan latency."""
+    import subprocess
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        codes_dir, source, root = tmp / "codes", tmp / "risk_scores.parquet", tmp / "risk_scores_dataset"
+        df = schema.write(schema._synthetic_risk_scores(n_rows), source, codes_dir)
+        started = time.perf_counter()
+        n_fragments = write_dataset(source, root)
+        t_write = time.perf_counter() - started
+
+        runs = {}
+        for mode in ("eager", "lazy"):
+            out = subprocess.run([sys.executable, __file__, "--cold-start", mode, str(source), str(root), str(codes_dir)],
+                                 capture_output=True, text=True, check=True)
+            runs[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+        scored = ScoredDataset.open(root, source, codes_dir)
+        sectors = list(df["sector"].dropna().unique()[:2])
+        columns = ["id_contrato", "valor_del_contrato", "risk_score_calibrated"]
+        cases = {
+            "one year": {"years": (2021, 2021)},
+            "High, 2 sectors": {"years": (2019, 2022), "tiers": ["High"], "sectors": sectors},
+        }
+        scans = []
+        for label, filters in cases.items():
+            started = time.perf_counter()
+            mask = df["year"].between(*filters["years"])
+            if filters.get("tiers"):
+                mask &= df["risk_tier"].isin(filters["tiers"])
+            if filters.get("sectors"):
+                mask &= df["sector"].isin(filters["sectors"])
+            expected = df.loc[mask, columns]
+            t_frame = time.perf_counter() - started
+            started = time.perf_counter()
+            got = scored.scan(columns, **filters)
+            t_scan = time.perf_counter() - started
+            same = len(got) == len(expected) and set(got["id_contrato"]) == set(expected["id_contrato"])
+            scans.append({"filter": label, "rows": len(got), "frame_ms": round(t_frame * 1000, 1),
+                          "scan_ms": round(t_scan * 1000, 1), "identical": same})
+
+    results = pd.DataFrame([{"backend": mode, "cold_start_s": round(r["start_s"], 2),
+                             "page_ms": round(r["page_ms"], 1), "peak_rss_mb": round(r["rss_mb"])}
+                            for mode, r in runs.items()])
+    print("=" * 70)
+    print(f"SCORED DATASET — {n_rows:,} contracts, {n_fragments} partitions written in {t_write:.2f}s")
+    print(results.to_string(index=False))
+    # Tied scores may order differently, as dataset order groups rows by partition
+    print(f"  same explorer page scores: {runs['eager']['scores'] == runs['lazy']['scores']}")
+    print(pd.DataFrame(scans).to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write the partitioned scored dataset or benchmark it")
+    parser.add_argument("input", type=Path, nargs="?", default=SOURCE, help="risk_scores.parquet")
+    parser.add_argument("--output", type=Path, default=DATASET_DIR)
+    parser.add_argument("--bench", type=int, default=None, help="Benchmark on N synthetic contracts")
+    parser.add_argument("--cold-start", nargs=4, metavar=("MODE", "SOURCE", "ROOT", "CODES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start:
+        mode, *paths = args.cold_start
+        print(json.dumps(_cold_start(mode, *map(Path, paths))))
+    elif args.bench:
+        benchmark(args.bench)
+    else:
+        n_fragments = write_dataset(args.input, args.output)
+        print(f"✅ Scored dataset: {n_fragments} partitions → {args.output}")
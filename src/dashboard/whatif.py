@@ -0,0 +1,306 @@
+# src/dashboard/whatif.py
+"""
+What-if reweighting of the composite risk index for the dashboard.
+
+Notebook 08 fixes the weights of the five normalized sub-scores with the
+WEIGHT_* constants, and it rebuilt the agency leaderboard with two lambda
+aggregations: one counted High contracts, and flagged_spend indexed back
+into fm.loc[x.index, "risk_tier"] for every group (now summed flag
+columns). Trying another weighting meant re-running the notebook.
+WhatIfEngine is built once per dashboard process and recomputes everything
+a weighting changes from any weight vector, in ~0.15 s at 1.55M contracts
+(--bench):
+
+    scores      the five *_norm sub-scores as one C-contiguous float32
+                (contracts × 5) matrix, rows sorted by agency group
+                (codigo_entidad × sector × departamento, the leaderboard
+                grain). The composite is one matrix-vector product.
+    offsets     the first row of each group, so every leaderboard column is
+                one np.add.reduceat over contiguous rows, not a groupby.
+                Rows with a missing key come after the last group, as
+                groupby drops them.
+    spend       valor_del_contrato in the same order, float64.
+
+The tiers follow notebook 08's rule on a tier score: High from p50 to p90
+(the audit priority), Medium above p90, Low below p50. risk_score_calibrated
+is then the tier base (0.75 / 0.45 / 0.15) plus up to 0.15 by the tier
+score's position within its tier. The pipeline's tier score is
+process_anomaly_norm, whatever the weights (tier_on="process_anomaly_norm"
+reproduces agency_leaderboard.parquet). The default, tier_on=None, tiers on
+the weighted composite, so a weighting also changes which contracts are
+flagged and each agency's value at risk.
+
+Group means are float64 sums / counts of the float32 values, so
+mean_risk_index can differ from pandas' in the 7th significant digit.
+
+Usage:
+    python src/dashboard/whatif.py --bench 1553594
+"""
+
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config import settings
+
+GROUP_KEYS = ["codigo_entidad", "sector", "departamento"]
+SUBSCORES = ["process_anomaly_norm", "splitting_norm", "network_norm", "community_norm", "price_norm"]
+DEFAULT_WEIGHTS = {
+    "process_anomaly_norm": settings.WEIGHT_PROCESS_ANOMALY,
+    "splitting_norm": settings.WEIGHT_SPLITTING,
+    "network_norm": settings.WEIGHT_NETWORK,
+    "community_norm": settings.WEIGHT_COMMUNITY,
+    "price_norm": settings.WEIGHT_PRICE,
+}
+WHATIF_COLUMNS = [*GROUP_KEYS, "valor_del_contrato", *SUBSCORES]
+TIERS = ["Low", "Medium", "High"]          # index = tier_rank
+TIER_BASE = np.array([0.15, 0.45, 0.75])   # calibrated score base per tier_rank
+LEADERBOARD_COLUMNS = [
+    *GROUP_KEYS, "total_contracts", "total_spend", "mean_risk_index", "mean_calibrated_score",
+    "high_risk_contracts", "flagged_spend", "value_at_risk",
+]
+
+
+def _codes(values: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Category codes (-1 for missing) and the categories."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+
+class WhatIfEngine:
+    """
+    Sub-score matrix and agency group offsets for recomputing tiers and the leaderboard.
+
+    Attributes:
+        scores: (contracts × 5) float32 C-contiguous sub-scores, SUBSCORES order, group-sorted.
+        spend: valor_del_contrato in the same order (float64).
+        offsets: Group g is rows offsets[g]:offsets[g + 1]; rows from offsets[-1] have no group.
+        groups: One row per group: GROUP_KEYS, total_contracts and total_spend.
+        order: Row position in the source frame of each engine row.
+    """
+
+    def __init__(self, scores: np.ndarray, spend: np.ndarray, offsets: np.ndarray,
+                 groups: pd.DataFrame, order: np.ndarray):
+        self.scores = np.ascontiguousarray(scores, dtype=np.float32)
+        self.spend = spend
+        self.offsets = offsets
+        self.groups = groups
+        self.order = order
+        self.counts = np.diff(offsets)
+        self.has_nan = bool(np.isnan(self.scores).any())
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "WhatIfEngine":
+        """Build from a scored contract frame (risk_scores with WHATIF_COLUMNS); the frame is not kept."""
+        codes, categories = zip(*(_codes(df[key]) for key in GROUP_KEYS))
+        valid = np.logical_and.reduce([c >= 0 for c in codes])
+        # Sort by the keys, groupless rows last; lexsort takes the primary key last
+        order = np.lexsort((*reversed(codes), ~valid)).astype(np.int64)
+        n_grouped = int(valid.sum())
+        sorted_codes = [c[order[:n_grouped]] for c in codes]
+        starts = np.flatnonzero(np.logical_or.reduce(
+            [np.r_[True, c[1:] != c[:-1]] for c in sorted_codes])) if n_grouped else np.empty(0, np.int64)
+        offsets = np.append(starts, n_grouped).astype(np.int64)
+
+        scores = np.empty((len(df), len(SUBSCORES)), dtype=np.float32)
+        for j, col in enumerate(SUBSCORES):
+            scores[:, j] = df[col].to_numpy(dtype=np.float32)[order]
+        spend = df["valor_del_contrato"].to_numpy(dtype=np.float64)[order]
+
+        groups = pd.DataFrame({key: cat.take(c[starts]) for key, cat, c in zip(GROUP_KEYS, categories, sorted_codes)})
+        for key in GROUP_KEYS:
+            if isinstance(df[key].dtype, pd.CategoricalDtype):
+                groups[key] = pd.Categorical(groups[key], categories=df[key].cat.categories)
+        groups["total_contracts"] = np.diff(offsets)
+        groups["total_spend"] = np.add.reduceat(spend, starts) if len(starts) else np.empty(0)
+        return cls(scores, spend, offsets, groups, order)
+
+    def __len__(self) -> int:
+        return len(self.spend)
+
+    @staticmethod
+    def weight_vector(weights: dict[str, float] | None = None) -> np.ndarray:
+        """Weights by sub-score name (missing ones 0; None = the WEIGHT_* settings) as a float32 vector."""
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        unknown = set(weights) - set(SUBSCORES)
+        if unknown:
+            raise ValueError(f"Unknown sub-scores {sorted(unknown)}; expected some of {SUBSCORES}")
+        return np.array([weights.get(col, 0.0) for col in SUBSCORES], dtype=np.float32)
+
+    def _group_mean(self, values: np.ndarray) -> np.ndarray:
+        """Mean of values per group, skipping NaN as groupby does (float64 accumulation)."""
+        starts, n_grouped = self.offsets[:-1], self.offsets[-1]
+        values = values[:n_grouped]
+        nan = np.isnan(values)
+        if not nan.any():
+            return np.add.reduceat(values, starts, dtype=np.float64) / self.counts
+        sums = np.add.reduceat(np.where(nan, 0, values), starts, dtype=np.float64)
+        counts = np.add.reduceat(~nan, starts, dtype=np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def evaluate(self, weights: dict[str, float] | None = None, tier_on: str | None = None) -> dict:
+        """
+        Composite score, tiers, calibrated scores and leaderboard for one weighting.
+
+        Args:
+            weights: Sub-score name → weight (None = the WEIGHT_* settings). Not rescaled.
+            tier_on: Sub-score to tier on (e.g. "process_anomaly_norm", as the
+                pipeline does), or None to tier on the weighted composite.
+
+        Returns:
+            dict with risk_index (float32), tier_rank (int8: 0 Low, 1 Medium, 2 High)
+            and risk_score_calibrated (float64) per contract in engine order
+            (source row self.order[i]); thresholds (p50, p90); tier_counts and
+            tier_spend by tier name; and the leaderboard sorted by value_at_risk.
+        """
+        if tier_on is not None and tier_on not in SUBSCORES:
+            raise ValueError(f"tier_on must be None or one of {SUBSCORES}, got {tier_on!r}")
+        n_groups = len(self.groups)
+        risk_index = self.scores @ self.weight_vector(weights)
+        tier_score = risk_index if tier_on is None else self.scores[:, SUBSCORES.index(tier_on)]
+
+        known = tier_score[~np.isnan(tier_score)] if self.has_nan else tier_score
+        p50, p90 = (np.quantile(known.astype(np.float64), [0.5, 0.9]) if len(known) else (np.nan, np.nan))
+        # NaN compares False everywhere: Low, as np.select in the notebook
+        tier_rank = (tier_score >= p50).astype(np.int8) * 2
+        tier_rank[tier_score >= p90] = 1
+
+        # Per tier, the tier score's min-max position within it, as notebook 08
+        lo, hi = np.zeros(3), np.zeros(3)
+        for rank in range(3):
+            within = tier_score[tier_rank == rank]
+            within = within[~np.isnan(within)] if self.has_nan else within
+            if len(within):
+                lo[rank], hi[rank] = within.min(), within.max()
+        calibrated = TIER_BASE[tier_rank] + (tier_score - lo[tier_rank]) / (hi[tier_rank] - lo[tier_rank] + 1e-9) * 0.15
+
+        high = tier_rank == 2
+        flagged = np.where(high, self.spend, 0.0)
+        starts, n_grouped = self.offsets[:-1], self.offsets[-1]
+        board = self.groups.copy()
+        if n_groups:
+            board["mean_risk_index"] = self._group_mean(risk_index)
+            board["mean_calibrated_score"] = self._group_mean(calibrated)
+            board["high_risk_contracts"] = np.add.reduceat(high[:n_grouped], starts, dtype=np.int64)
+            board["flagged_spend"] = np.add.reduceat(flagged[:n_grouped], starts)
+        else:
+            board = board.assign(mean_risk_index=[], mean_calibrated_score=[], high_risk_contracts=[],
+                                 flagged_spend=[])
+        board["value_at_risk"] = board["flagged_spend"] * board["mean_calibrated_score"]
+        var = board["value_at_risk"].to_numpy()
+        board = board.iloc[np.argsort(-np.nan_to_num(var, nan=-np.inf), kind="stable")].reset_index(drop=True)
+
+        counts = np.bincount(tier_rank, minlength=3)
+        spend = np.bincount(tier_rank, weights=self.spend, minlength=3)
+        return {
+            "risk_index": risk_index, "tier_rank": tier_rank, "risk_score_calibrated": calibrated,
+            "thresholds": (float(p50), float(p90)),
+            "tier_counts": {TIERS[r]: int(counts[r]) for r in (2, 1, 0)},
+            "tier_spend": {TIERS[r]: float(spend[r]) for r in (2, 1, 0)},
+            "leaderboard": board[LEADERBOARD_COLUMNS],
+        }
+
+
+def reference_leaderboard(df: pd.DataFrame, weights: dict[str, float] | None = None,
+                          tier_on: str | None = None) -> pd.DataFrame:
+    """The same leaderboard with notebook 08's original pandas code, lambdas included (for checking WhatIfEngine)."""
+    fm = df[WHATIF_COLUMNS].copy()
+    fm["risk_index"] = fm[SUBSCORES].to_numpy(dtype=np.float32) @ WhatIfEngine.weight_vector(weights)
+    score = fm["risk_index" if tier_on is None else tier_on].astype(np.float64)
+    p50, p90 = score.quantile(0.50), score.quantile(0.90)
+    fm["risk_tier"] = np.select([score >= p90, (score >= p50) & (score < p90)], ["Medium", "High"], default="Low")
+    fm["risk_score_calibrated"] = np.nan
+    for tier, base in {"High": 0.75, "Medium": 0.45, "Low": 0.15}.items():
+        mask = fm["risk_tier"] == tier
+        within = score[mask]
+        fm.loc[mask, "risk_score_calibrated"] = base + (within - within.min()) / (within.max() - within.min() + 1e-9) * 0.15
+    board = fm.groupby(GROUP_KEYS, observed=True).agg(
+        total_contracts=("valor_del_contrato", "size"),
+        total_spend=("valor_del_contrato", "sum"),
+        mean_risk_index=("risk_index", "mean"),
+        mean_calibrated_score=("risk_score_calibrated", "mean"),
+        high_risk_contracts=("risk_tier", lambda x: (x == "High").sum()),
+        flagged_spend=("valor_del_contrato", lambda x: x[fm.loc[x.index, "risk_tier"] == "High"].sum()),
+    ).reset_index()
+    board["value_at_risk"] = board["flagged_spend"] * board["mean_calibrated_score"]
+    return board.sort_values("value_at_risk", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def _same_leaderboard(fast: pd.DataFrame, reference: pd.DataFrame) -> bool:
+    """Same groups with the same counts, and sums and means within float tolerance."""
+    merged = reference.merge(fast, on=GROUP_KEYS, suffixes=("_ref", ""))
+    if len(merged) != len(reference) or len(fast) != len(reference):
+        return False
+    for col in ["total_contracts", "high_risk_contracts"]:
+        if not np.array_equal(merged[col].to_numpy(), merged[f"{col}_ref"].to_numpy()):
+            return False
+    return all(np.allclose(merged[col].to_numpy(dtype=np.float64), merged[f"{col}_ref"].to_numpy(dtype=np.float64),
+                           rtol=1e-5, equal_nan=True)
+               for col in ["total_spend", "mean_risk_index", "mean_calibrated_score", "flagged_spend", "value_at_risk"])
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_rows: int = 1_553_594, n_reference: int = 200_000) -> pd.DataFrame:
+    """Engine build and per-weighting latency, checked against the notebook's pandas leaderboard."""
+    import tempfile
+
+    from src.pipeline import schema
+
+    with tempfile.TemporaryDirectory() as codes:
+        df = schema.compact(schema._synthetic_risk_scores(n_rows), Path(codes))[WHATIF_COLUMNS]
+    started = time.perf_counter()
+    engine = WhatIfEngine.build(df)
+    t_build = time.perf_counter() - started
+
+    cases = {
+        "settings, pipeline tiers": (None, "process_anomaly_norm"),
+        "settings, composite tiers": (None, None),
+        "equal weights": ({col: 0.2 for col in SUBSCORES}, None),
+        "splitting only": ({"splitting_norm": 1.0}, None),
+        "price-heavy": ({"process_anomaly_norm": 0.3, "price_norm": 0.7}, None),
+    }
+    sample = df.iloc[:n_reference]
+    small = WhatIfEngine.build(sample)
+    results = []
+    for label, (weights, tier_on) in cases.items():
+        started = time.perf_counter()
+        out = engine.evaluate(weights, tier_on)
+        t_engine = time.perf_counter() - started
+        # The lambda aggregations take minutes at full scale; compare on a sample
+        started = time.perf_counter()
+        reference = reference_leaderboard(sample, weights, tier_on)
+        t_reference = time.perf_counter() - started
+        results.append({
+            "weights": label, "high": out["tier_counts"]["High"],
+            "top_agency_var": f"{out['leaderboard']['value_at_risk'].iloc[0]:.3g}",
+            "engine_ms": round(t_engine * 1000, 1),
+            f"pandas_ms@{n_reference // 1000}K": round(t_reference * 1000, 1),
+            "identical": _same_leaderboard(small.evaluate(weights, tier_on)["leaderboard"], reference),
+        })
+    results = pd.DataFrame(results)
+    print("=" * 70)
+    print(f"WHAT-IF REWEIGHTING — {n_rows:,} contracts, {len(engine.groups):,} agency groups, "
+          f"built in {t_build:.2f}s, {engine.scores.nbytes / 1024 ** 2:.0f} MB matrix")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="What-if reweighting benchmark")
+    parser.add_argument("--bench", type=int, default=1_553_594, help="Synthetic contracts")
+    parser.add_argument("--reference-rows", type=int, default=200_000,
+                        help="Rows the pandas reference leaderboard is checked on")
+    args = parser.parse_args()
+
+    benchmark(args.bench, args.reference_rows)
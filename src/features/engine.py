@@ -0,0 +1,451 @@
+# src/features/engine.py
+"""
+Feature engine for notebooks/03_feature_engineering.ipynb.
+
+Vendors and agencies are factorized to integer codes once. Each vendor-agency
+pair's spend is then summed in a single groupby. That sparse vendor×agency
+spend table gives HHI, top-vendor share and distinct counts as segmented
+reductions, with no per-agency groupby().apply. Vendor and agency statistics
+each run as one groupby over the integer codes, and are broadcast back to
+contracts by code instead of a merge on string keys.
+
+The output is column-for-column identical to the notebook's feature_matrix.
+Segment sums reproduce pandas' own summation order: Kahan sums within a pair,
+then numpy pairwise sums across an agency's vendors.
+
+Usage:
+    python src/features/engine.py                       # build data/processed/feature_matrix.parquet
+    python src/features/engine.py --bench --synthetic 1500000
+"""
+
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import DATA_PROCESSED, RANDOM_STATE
+from src.pipeline import metrics
+
+DIRECT_KEYWORDS = ["directa", "régimen especial"]
+
+FEATURE_COLS = [
+    # Identifiers (not used in models, kept for joining)
+    "id_contrato", "codigo_entidad", "codigo_proveedor",
+    "nombre_entidad", "year", "month", "quarter", "departamento", "sector",
+
+    # Raw value
+    "valor_del_contrato", "log_valor",
+
+    # Temporal features
+    "duracion_dias", "dias_firma_a_inicio",
+    "flag_rush", "flag_q4", "flag_december",
+    "flag_short_contract", "flag_long_contract",
+
+    # Contract flags
+    "is_direct", "is_modified", "is_cancelled",
+    "flag_extended", "flag_extreme_value",
+    "dias_adicionados",
+
+    # Vendor features
+    "vendor_total_contracts", "vendor_total_spend",
+    "vendor_mean_value", "vendor_median_value",
+    "vendor_distinct_agencies", "vendor_direct_rate",
+    "vendor_modified_rate", "vendor_tenure_days",
+    "vendor_agency_diversity", "log_vendor_total_spend",
+    "log_vendor_mean_value",
+
+    # Agency features
+    "agency_total_contracts", "agency_total_spend",
+    "agency_direct_rate", "agency_modified_rate",
+    "agency_distinct_vendors", "agency_median_value",
+    "agency_hhi", "agency_top_vendor_share",
+    "flag_agency_concentrated",
+
+    # Proxy labels
+    "proxy_strong", "proxy_medium",
+]
+
+
+# ── Contract-level features ─────────────────────────────────────────────────
+def contract_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Temporal features and contract flags (one row per contract, same order as df)."""
+    feat = df[["id_contrato", "codigo_entidad", "codigo_proveedor",
+               "valor_del_contrato", "fecha_de_inicio_del_contrato",
+               "fecha_de_fin_del_contrato", "fecha_de_firma",
+               "modalidad_de_contratacion", "estado_contrato",
+               "dias_adicionados", "sector", "departamento",
+               "year", "month", "quarter"]].copy()
+
+    feat["duracion_dias"] = (
+        feat["fecha_de_fin_del_contrato"] - feat["fecha_de_inicio_del_contrato"]
+    ).dt.days
+    feat["dias_firma_a_inicio"] = (
+        feat["fecha_de_inicio_del_contrato"] - feat["fecha_de_firma"]
+    ).dt.days
+
+    feat["flag_rush"] = feat["dias_firma_a_inicio"].between(0, 1, inclusive="both").astype(int)
+    feat["flag_q4"] = (feat["quarter"] == 4).astype(int)
+    feat["flag_december"] = (feat["month"] == 12).astype(int)
+    feat["flag_short_contract"] = (feat["duracion_dias"] < 30).astype(int)
+    feat["flag_long_contract"] = (feat["duracion_dias"] > 730).astype(int)
+    feat["log_valor"] = np.log10(feat["valor_del_contrato"].clip(lower=1))
+
+    feat["is_direct"] = feat["modalidad_de_contratacion"].str.lower().str.contains(
+        "|".join(DIRECT_KEYWORDS), na=False
+    ).astype(int)
+    feat["is_modified"] = (feat["estado_contrato"] == "Modificado").astype(int)
+    feat["is_cancelled"] = (feat["estado_contrato"] == "Cancelado").astype(int)
+
+    feat["dias_adicionados"] = pd.to_numeric(feat["dias_adicionados"], errors="coerce").fillna(0)
+    feat["flag_extended"] = (feat["dias_adicionados"] > 0).astype(int)
+
+    cap = feat["valor_del_contrato"].quantile(0.999)
+    feat["flag_extreme_value"] = (feat["valor_del_contrato"] > cap).astype(int)
+    return feat
+
+
+# ── Vendor × agency spend matrix ────────────────────────────────────────────
+class SpendMatrix:
+    """
+    Factorized vendor and agency codes plus the sparse vendor×agency spend table.
+
+    Codes follow sorted key order (as groupby does); missing keys get -1.
+    Pairs are stored sorted by (agency, vendor).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.vendor_codes, self.vendors = pd.factorize(df["codigo_proveedor"], sort=True)
+        self.agency_codes, self.agencies = pd.factorize(df["codigo_entidad"], sort=True)
+        n_vendors = len(self.vendors)
+
+        both = (self.vendor_codes >= 0) & (self.agency_codes >= 0)
+        pair_key = np.where(both, self.agency_codes.astype(np.int64) * n_vendors + self.vendor_codes, -1)
+        # groupby sum keeps row order within each pair, matching the notebook's per-agency groupby
+        spend = df["valor_del_contrato"].groupby(pair_key, sort=True).sum()
+        spend = spend[spend.index >= 0]
+
+        keys = spend.index.to_numpy()
+        self.pair_agency = keys // n_vendors
+        self.pair_vendor = keys % n_vendors
+        self.pair_spend = spend.to_numpy()
+        # Start of each agency's run of pairs
+        self.agency_start = np.searchsorted(self.pair_agency, np.arange(len(self.agencies)))
+        self.agency_pairs = np.diff(np.r_[self.agency_start, len(keys)])
+
+    def vendor_distinct_agencies(self) -> np.ndarray:
+        return np.bincount(self.pair_vendor, minlength=len(self.vendors))
+
+    def agency_distinct_vendors(self) -> np.ndarray:
+        return self.agency_pairs
+
+    def agency_concentration(self) -> tuple[np.ndarray, np.ndarray]:
+        """(HHI, top-vendor share) per agency; both 0 when an agency's spend is 0."""
+        total = _segment_sum(self.pair_spend, self.agency_start, self.agency_pairs)
+        pair_total = np.repeat(total, self.agency_pairs)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shares = self.pair_spend / pair_total
+            hhi = _segment_sum(shares ** 2, self.agency_start, self.agency_pairs)
+            top = _segment_max(self.pair_spend, self.agency_start, self.agency_pairs) / total
+        hhi = np.where(total == 0, 0.0, hhi)
+        top = np.where(total > 0, top, 0.0)
+        return hhi, top
+
+
+def _segment_sum(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Sum of each segment, bit-identical to Series.sum() on the segment.
+
+    Segments of equal length are stacked into one 2D block and reduced along
+    rows, which uses numpy's pairwise summation per row, like a 1D sum.
+    """
+    out = np.zeros(len(starts))
+    for length in np.unique(lengths[lengths > 0]):
+        idx = np.flatnonzero(lengths == length)
+        out[idx] = values[starts[idx, None] + np.arange(length)].sum(axis=1)
+    return out
+
+
+def _segment_max(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    out = np.full(len(starts), np.nan)
+    nonempty = lengths > 0
+    out[nonempty] = np.maximum.reduceat(values, starts[nonempty])
+    return out
+
+
+# ── Vendor / agency features ────────────────────────────────────────────────
+def _by_code(df: pd.DataFrame, codes: np.ndarray, **aggs) -> pd.DataFrame:
+    """One groupby over integer codes; rows with a missing key (-1) are dropped."""
+    out = df.groupby(codes, sort=True).agg(**aggs)
+    return out[out.index >= 0]
+
+
+def vendor_features(df: pd.DataFrame, matrix: SpendMatrix) -> pd.DataFrame:
+    """Vendor-level history features, one row per vendor (sorted, like groupby)."""
+    vendor_agg = _by_code(
+        df, matrix.vendor_codes,
+        vendor_total_contracts=("id_contrato", "count"),
+        vendor_total_spend=("valor_del_contrato", "sum"),
+        vendor_mean_value=("valor_del_contrato", "mean"),
+        vendor_median_value=("valor_del_contrato", "median"),
+        vendor_direct_rate=("is_direct", "mean"),
+        vendor_modified_rate=("is_modified", "mean"),
+        vendor_first_contract=("fecha_de_inicio_del_contrato", "min"),
+        vendor_last_contract=("fecha_de_inicio_del_contrato", "max"),
+    )
+    vendor_agg.insert(4, "vendor_distinct_agencies", matrix.vendor_distinct_agencies()[vendor_agg.index])
+    vendor_agg.insert(0, "codigo_proveedor", matrix.vendors[vendor_agg.index])
+
+    vendor_agg["vendor_tenure_days"] = (
+        vendor_agg["vendor_last_contract"] - vendor_agg["vendor_first_contract"]
+    ).dt.days.clip(lower=0)
+    vendor_agg["log_vendor_total_spend"] = np.log10(vendor_agg["vendor_total_spend"].clip(lower=1))
+    vendor_agg["log_vendor_mean_value"] = np.log10(vendor_agg["vendor_mean_value"].clip(lower=1))
+
+    # 1 = max diversity, 0 = single agency
+    max_agencies = vendor_agg["vendor_distinct_agencies"].max()
+    vendor_agg["vendor_agency_diversity"] = vendor_agg["vendor_distinct_agencies"] / max_agencies
+
+    return vendor_agg.drop(columns=["vendor_first_contract", "vendor_last_contract"]).reset_index(drop=True)
+
+
+def agency_features(df: pd.DataFrame, matrix: SpendMatrix) -> pd.DataFrame:
+    """Agency-level features including HHI and top-vendor share, one row per agency."""
+    agency_feat = _by_code(
+        df, matrix.agency_codes,
+        agency_total_contracts=("id_contrato", "count"),
+        agency_total_spend=("valor_del_contrato", "sum"),
+        agency_direct_rate=("is_direct", "mean"),
+        agency_modified_rate=("is_modified", "mean"),
+        agency_median_value=("valor_del_contrato", "median"),
+    )
+    agency_feat.insert(4, "agency_distinct_vendors", matrix.agency_distinct_vendors()[agency_feat.index])
+    agency_feat.insert(0, "codigo_entidad", matrix.agencies[agency_feat.index])
+
+    hhi, top = matrix.agency_concentration()
+    agency_feat["agency_hhi"] = hhi[agency_feat.index]
+    agency_feat["agency_top_vendor_share"] = top[agency_feat.index]
+    agency_feat["flag_agency_concentrated"] = (agency_feat["agency_top_vendor_share"] > 0.5).astype(int)
+    return agency_feat.reset_index(drop=True)
+
+
+def _broadcast(table: pd.DataFrame, codes: np.ndarray, key: str) -> pd.DataFrame:
+    """Table rows per contract by code; a missing key gives NaN, as a left merge would."""
+    return table.drop(columns=key).reindex(codes).reset_index(drop=True)
+
+
+# ── Feature matrix ──────────────────────────────────────────────────────────
+@metrics.instrumented("features.build", rows_in=len, rows_out=len)
+def build_feature_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Full notebook 03 feature matrix from the EDA frame.
+
+    Args:
+        df: secop_eda frame (needs is_direct, is_modified, nombre_entidad).
+
+    Returns:
+        FEATURE_COLS, one row per contract in df order, nulls filled.
+    """
+    feat = contract_features(df)
+    matrix = SpendMatrix(df)
+
+    vendor_agg = vendor_features(df, matrix)
+    agency_feat = agency_features(df, matrix)
+    feat = pd.concat([
+        feat.reset_index(drop=True),
+        _broadcast(vendor_agg, matrix.vendor_codes, "codigo_proveedor"),
+        _broadcast(agency_feat, matrix.agency_codes, "codigo_entidad"),
+    ], axis=1)
+
+    # nombre_entidad of the first row carrying each id_contrato
+    id_codes, _ = pd.factorize(df["id_contrato"], use_na_sentinel=False)
+    first_row = np.unique(id_codes, return_index=True)[1]
+    feat["nombre_entidad"] = df["nombre_entidad"].iloc[first_row[id_codes]].to_numpy()
+
+    feat = _proxy_labels(feat)
+    feature_matrix = feat[[c for c in FEATURE_COLS if c in feat.columns]]
+
+    # Temporal features are null when dates are missing; fill with median
+    for col in ["duracion_dias", "dias_firma_a_inicio"]:
+        if col in feature_matrix.columns:
+            feature_matrix[col] = feature_matrix[col].fillna(feature_matrix[col].median())
+    return feature_matrix
+
+
+def _proxy_labels(feat: pd.DataFrame) -> pd.DataFrame:
+    """Auditor-endorsed risk signals. Never called fraud labels."""
+    feat["proxy_strong"] = ((feat["is_direct"] == 1) & (feat["is_modified"] == 1)).astype(int)
+    feat["proxy_medium"] = (
+        (feat["is_direct"] == 1) | (feat["is_modified"] == 1) | (feat["flag_rush"] == 1)
+    ).astype(int)
+    return feat
+
+
+# ── Reference implementation and benchmark ──────────────────────────────────
+def legacy_entity_features(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Notebook 03's vendor_agg / agency_feat code, kept for equality checks and benchmarks."""
+    vendor_agg = df.groupby("codigo_proveedor").agg(
+        vendor_total_contracts=("id_contrato", "count"),
+        vendor_total_spend=("valor_del_contrato", "sum"),
+        vendor_mean_value=("valor_del_contrato", "mean"),
+        vendor_median_value=("valor_del_contrato", "median"),
+        vendor_distinct_agencies=("codigo_entidad", "nunique"),
+        vendor_direct_rate=("is_direct", "mean"),
+        vendor_modified_rate=("is_modified", "mean"),
+        vendor_first_contract=("fecha_de_inicio_del_contrato", "min"),
+        vendor_last_contract=("fecha_de_inicio_del_contrato", "max"),
+    ).reset_index()
+    vendor_agg["vendor_tenure_days"] = (
+        vendor_agg["vendor_last_contract"] - vendor_agg["vendor_first_contract"]
+    ).dt.days.clip(lower=0)
+    vendor_agg["log_vendor_total_spend"] = np.log10(vendor_agg["vendor_total_spend"].clip(lower=1))
+    vendor_agg["log_vendor_mean_value"] = np.log10(vendor_agg["vendor_mean_value"].clip(lower=1))
+    max_agencies = vendor_agg["vendor_distinct_agencies"].max()
+    vendor_agg["vendor_agency_diversity"] = vendor_agg["vendor_distinct_agencies"] / max_agencies
+    vendor_agg = vendor_agg.drop(columns=["vendor_first_contract", "vendor_last_contract"])
+
+    def compute_hhi(series):
+        total = series.sum()
+        if total == 0:
+            return 0
+        shares = series / total
+        return (shares ** 2).sum()
+
+    agency_hhi = df.groupby("codigo_entidad")["valor_del_contrato"].apply(
+        lambda x: compute_hhi(
+            df.loc[x.index].groupby("codigo_proveedor")["valor_del_contrato"].sum()
+        )
+    ).reset_index()
+    agency_hhi.columns = ["codigo_entidad", "agency_hhi"]
+
+    def top_vendor_share(group):
+        vendor_spend = group.groupby("codigo_proveedor")["valor_del_contrato"].sum()
+        total = vendor_spend.sum()
+        return vendor_spend.max() / total if total > 0 else 0
+
+    agency_top_vendor = df.groupby("codigo_entidad").apply(
+        top_vendor_share, include_groups=False
+    ).reset_index()
+    agency_top_vendor.columns = ["codigo_entidad", "agency_top_vendor_share"]
+
+    agency_agg = df.groupby("codigo_entidad").agg(
+        agency_total_contracts=("id_contrato", "count"),
+        agency_total_spend=("valor_del_contrato", "sum"),
+        agency_direct_rate=("is_direct", "mean"),
+        agency_modified_rate=("is_modified", "mean"),
+        agency_distinct_vendors=("codigo_proveedor", "nunique"),
+        agency_median_value=("valor_del_contrato", "median"),
+    ).reset_index()
+    agency_feat = agency_agg.merge(agency_hhi, on="codigo_entidad", how="left")
+    agency_feat = agency_feat.merge(agency_top_vendor, on="codigo_entidad", how="left")
+    agency_feat["flag_agency_concentrated"] = (agency_feat["agency_top_vendor_share"] > 0.5).astype(int)
+    return vendor_agg, agency_feat
+
+
+def legacy_feature_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    """Notebook 03 assembly: merges on string keys around legacy_entity_features."""
+    feat = contract_features(df)
+    vendor_agg, agency_feat = legacy_entity_features(df)
+    feat = feat.merge(vendor_agg, on="codigo_proveedor", how="left")
+    feat = feat.merge(agency_feat, on="codigo_entidad", how="left")
+    feat = _proxy_labels(feat)
+    nombre_map = df[["id_contrato", "nombre_entidad"]].drop_duplicates("id_contrato")
+    feat = feat.merge(nombre_map, on="id_contrato", how="left")
+    feature_matrix = feat[[c for c in FEATURE_COLS if c in feat.columns]].copy()
+    for col in ["duracion_dias", "dias_firma_a_inicio"]:
+        feature_matrix[col] = feature_matrix[col].fillna(feature_matrix[col].median())
+    return feature_matrix
+
+
+def _synthetic_eda(n_rows: int, seed: int = RANDOM_STATE) -> pd.DataFrame:
+    """secop_eda-shaped frame with skewed vendor/agency activity."""
+    rng = np.random.default_rng(seed)
+    n_agencies, n_vendors = 1_700, max(10, n_rows // 5)
+    agency = (n_agencies * rng.random(n_rows) ** 2).astype(int)
+    vendor = (n_vendors * rng.random(n_rows) ** 3).astype(int)
+    start = np.datetime64("2019-01-01") + rng.integers(0, 1_313, n_rows).astype("timedelta64[D]")
+    inicio = pd.Series(start.astype("datetime64[ns]"))
+    modalidad = rng.choice(["Contratación directa", "Mínima cuantía", "Licitación pública",
+                            "Contratación régimen especial", "Selección abreviada"], n_rows,
+                           p=[0.55, 0.2, 0.05, 0.1, 0.1])
+    estado = rng.choice(["En ejecución", "Modificado", "Cerrado", "Cancelado"], n_rows, p=[0.5, 0.15, 0.33, 0.02])
+    df = pd.DataFrame({
+        "id_contrato": pd.Series([f"CO1.PCCNTR.{i}" for i in range(n_rows)], dtype="str"),
+        "codigo_entidad": pd.Series([f"7{a:07d}" for a in agency], dtype="str"),
+        "nombre_entidad": pd.Series([f"ENTIDAD {a}" for a in agency], dtype="str"),
+        "codigo_proveedor": pd.Series([f"9{v:08d}" for v in vendor], dtype="str"),
+        "valor_del_contrato": np.round(10 ** rng.normal(7.3, 0.9, n_rows)),
+        "fecha_de_inicio_del_contrato": inicio,
+        "fecha_de_fin_del_contrato": inicio + pd.to_timedelta(rng.integers(5, 900, n_rows), unit="D"),
+        "fecha_de_firma": inicio - pd.to_timedelta(rng.integers(0, 20, n_rows), unit="D"),
+        "modalidad_de_contratacion": modalidad,
+        "estado_contrato": estado,
+        "dias_adicionados": rng.choice([0, 0, 0, 15, 30, 60], n_rows).astype(float),
+        "sector": rng.choice(["Salud", "Educación", "Transporte", "Defensa"], n_rows),
+        "departamento": rng.choice(["Bogotá", "Antioquia", "Valle del Cauca", "Nariño"], n_rows),
+    })
+    df.loc[rng.random(n_rows) < 0.01, "fecha_de_fin_del_contrato"] = pd.NaT
+    df["year"] = df["fecha_de_inicio_del_contrato"].dt.year
+    df["month"] = df["fecha_de_inicio_del_contrato"].dt.month
+    df["quarter"] = df["fecha_de_inicio_del_contrato"].dt.quarter
+    df["is_direct"] = df["modalidad_de_contratacion"].str.lower().str.contains(
+        "|".join(DIRECT_KEYWORDS), na=False).astype(int)
+    df["is_modified"] = (df["estado_contrato"] == "Modificado").astype(int)
+    return df
+
+
+def benchmark(df: pd.DataFrame) -> pd.DataFrame:
+    """Time the notebook code against the engine and confirm identical output."""
+    started = time.perf_counter()
+    legacy_vendor, legacy_agency = legacy_entity_features(df)
+    t_legacy_entity = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matrix = SpendMatrix(df)
+    vendor_agg, agency_feat = vendor_features(df, matrix), agency_features(df, matrix)
+    t_entity = time.perf_counter() - started
+
+    started = time.perf_counter()
+    legacy = legacy_feature_matrix(df)
+    t_legacy_full = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fast = build_feature_matrix(df)
+    t_full = time.perf_counter() - started
+
+    results = pd.DataFrame([
+        {"stage": "vendor + agency features", "notebook_s": round(t_legacy_entity, 2),
+         "engine_s": round(t_entity, 2), "speedup": round(t_legacy_entity / t_entity, 1),
+         "identical": vendor_agg.equals(legacy_vendor) and agency_feat.equals(legacy_agency[agency_feat.columns])},
+        {"stage": "full feature matrix", "notebook_s": round(t_legacy_full, 2),
+         "engine_s": round(t_full, 2), "speedup": round(t_legacy_full / t_full, 1),
+         "identical": fast.equals(legacy)},
+    ])
+    print("=" * 70)
+    print(f"FEATURE ENGINE BENCHMARK — {len(df):,} rows, "
+          f"{len(matrix.agencies):,} agencies, {len(matrix.vendors):,} vendors")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the notebook 03 feature matrix")
+    parser.add_argument("--input", type=Path, default=DATA_PROCESSED / "secop_eda.parquet")
+    parser.add_argument("--output", type=Path, default=DATA_PROCESSED / "feature_matrix.parquet")
+    parser.add_argument("--bench", action="store_true", help="Compare against the notebook code")
+    parser.add_argument("--synthetic", type=int, default=None, help="Use N synthetic rows instead of --input")
+    args = parser.parse_args()
+
+    df = _synthetic_eda(args.synthetic) if args.synthetic else pd.read_parquet(args.input)
+    if args.bench:
+        benchmark(df)
+    else:
+        feature_matrix = build_feature_matrix(df)
+        feature_matrix.to_parquet(args.output, index=False, compression="snappy")
+        print(f"✅ Feature matrix: {feature_matrix.shape[0]:,} rows × {feature_matrix.shape[1]} columns → {args.output}")
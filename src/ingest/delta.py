@@ -0,0 +1,330 @@
+# src/ingest/delta.py
+"""
+Incremental (delta) refresh of the partitioned raw dataset.
+
+Keeps a high-water mark of Socrata's :updated_at per year/month partition,
+pulls only rows created or changed since then, and upserts them by
+id_contrato, rewriting only the partitions that were touched. Each run
+writes the changed ids so downstream stages can recompute incrementally.
+
+A contract whose latest version no longer passes cleaning (no value or no
+start date) is removed: its old row would otherwise stay in the dataset.
+A month whose fetch fails keeps its watermark and is pulled again next
+run. The months that did arrive are still upserted, and the run record
+lists the failed ones.
+
+The dataset must be hive-partitioned (pull_data(partition=True)).
+Bookkeeping lives next to the partitions in files that parquet readers skip:
+    _delta_state.json   per-partition watermarks and run history
+    _id_index.parquet   id hash → partition, to catch contracts whose start date moved
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import (
+    DATA_RAW, SECOP_ENDPOINT, API_PAGE_SIZE, API_MAX_WORKERS,
+    TRAIN_START, VALID_END,
+)
+from src.ingest.secop_client import (
+    ARROW_SCHEMA, AdaptiveRateLimiter, clean_page, fetch_page, make_session,
+)
+
+STATE_FILE = "_delta_state.json"
+INDEX_FILE = "_id_index.parquet"
+CHANGED_IDS_PATH = DATA_RAW / "changed_ids.parquet"
+
+# Re-read this much before a bootstrapped watermark; upserts are idempotent
+BOOTSTRAP_OVERLAP = timedelta(days=1)
+
+
+def month_partitions(start: str = TRAIN_START, end: str = VALID_END) -> list[tuple[str, str, str]]:
+    """(key, first day, last day) per calendar month, clipped to [start, end]."""
+    lo, hi = pd.Timestamp(start), pd.Timestamp(end)
+    months = []
+    for period in pd.period_range(lo, hi, freq="M"):
+        first = max(period.start_time.normalize(), lo)
+        last = min(period.end_time.normalize(), hi)
+        months.append((str(period), first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")))
+    return months
+
+
+def partition_path(dataset: Path, key: str) -> Path:
+    year, month = key.split("-")
+    return dataset / f"year={int(year)}" / f"month={int(month)}" / "part-0.parquet"
+
+
+def _hash_ids(ids) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(ids, dtype=object))
+
+
+def _format_watermark(ts) -> str:
+    return pd.Timestamp(ts).tz_localize(None).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+
+
+def load_state(dataset: Path) -> dict:
+    """Read watermarks, bootstrapping them from partition file times on first use."""
+    path = dataset / STATE_FILE
+    if path.exists():
+        return json.loads(path.read_text())
+
+    # No watermark yet: the pull that wrote each partition saw every change
+    # up to its file time, so start just before it.
+    watermarks = {}
+    for file in dataset.glob("year=*/month=*/*.parquet"):
+        year = int(file.parent.parent.name.split("=")[1])
+        month = int(file.parent.name.split("=")[1])
+        mtime = datetime.fromtimestamp(file.stat().st_mtime, tz=timezone.utc) - BOOTSTRAP_OVERLAP
+        watermarks[f"{year:04d}-{month:02d}"] = _format_watermark(mtime)
+    return {"watermarks": watermarks, "runs": []}
+
+
+def load_id_index(dataset: Path) -> pd.DataFrame:
+    """id hash → partition key for every contract in the dataset."""
+    path = dataset / INDEX_FILE
+    if path.exists():
+        return pd.read_parquet(path)
+
+    print("Building id index (one-time scan of id_contrato)...")
+    frames = []
+    for file in sorted(dataset.glob("year=*/month=*/*.parquet")):
+        key = f"{int(file.parent.parent.name.split('=')[1]):04d}-{int(file.parent.name.split('=')[1]):02d}"
+        ids = pq.read_table(file, columns=["id_contrato"])["id_contrato"].to_numpy(zero_copy_only=False)
+        frames.append(pd.DataFrame({"id_hash": _hash_ids(ids), "partition": key}))
+    if not frames:
+        return pd.DataFrame({"id_hash": pd.Series(dtype="uint64"), "partition": pd.Series(dtype=str)})
+    return pd.concat(frames, ignore_index=True)
+
+
+def _fetch_month(key: str, start: str, end: str, watermark: str, session, limiter,
+                 page_size: int, endpoint: str) -> tuple[str, list[dict]]:
+    """All rows of one month changed after its watermark (every row if none)."""
+    rows, offset = [], 0
+    while True:
+        batch = fetch_page(offset=offset, limit=page_size, start=start, end=end,
+                           session=session, limiter=limiter, endpoint=endpoint,
+                           updated_after=watermark, with_updated_at=True)
+        rows.extend(batch)
+        offset += len(batch)
+        if len(batch) < page_size:
+            return key, rows
+
+
+def _write_atomic(table: pa.Table, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(table, tmp, compression="snappy")
+    os.replace(tmp, path)
+
+
+def delta_pull(dataset: Path = DATA_RAW / "secop_raw.parquet", end: str = VALID_END,
+               workers: int = API_MAX_WORKERS, page_size: int = API_PAGE_SIZE,
+               endpoint: str = SECOP_ENDPOINT, changed_ids_path: Path = CHANGED_IDS_PATH) -> Path:
+    """
+    Pull rows changed since the last run and upsert them into the dataset.
+
+    Args:
+        dataset: Hive-partitioned raw dataset directory (pull_data(partition=True)).
+        end: Last contract start date to cover. Months past the current
+            dataset have no watermark and are pulled in full.
+        workers: Months fetched concurrently.
+        page_size: Rows per API request.
+        endpoint: Socrata resource URL.
+        changed_ids_path: Where to write this run's changed ids.
+
+    Returns:
+        Path to the changed-ids parquet (id_contrato, partition, change, updated_at;
+        change is "inserted", "updated" or "removed", the partition of a removed
+        contract is the one it left), or None if the dataset is not partitioned.
+        Watermarks only advance after the upsert is written, and only for
+        months fetched in full.
+    """
+    dataset = Path(dataset)
+    if not dataset.is_dir():
+        print(f"❌ {dataset} is not a partitioned dataset. Run pull_data(partition=True) first.")
+        return None
+
+    state = load_state(dataset)
+    watermarks = state["watermarks"]
+    index = load_id_index(dataset)
+    months = month_partitions(TRAIN_START, end)
+
+    print("Starting delta pull from SECOP II API...")
+    print(f"Partitions: {len(months)} ({sum(k in watermarks for k, _, _ in months)} with watermark)")
+    print("-" * 50)
+
+    started = time.perf_counter()
+    limiter = AdaptiveRateLimiter()
+    session = make_session(workers)
+    fetched, failed = {}, {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_fetch_month, key, lo, hi, watermarks.get(key), session,
+                        limiter, page_size, endpoint): key
+            for key, lo, hi in months
+        }
+        for future in as_completed(futures):
+            try:
+                key, rows = future.result()
+            except Exception as e:  # one month's failure must not lose the others
+                failed[futures[future]] = f"{type(e).__name__}: {e}"
+                continue
+            if rows:
+                fetched[key] = rows
+    n_fetched = sum(len(r) for r in fetched.values())
+    print(f"Fetched {n_fetched:,} new or changed rows in {time.perf_counter() - started:.1f}s")
+    failed = dict(sorted(failed.items()))
+    for key, error in failed.items():
+        print(f"  ⚠ {key} failed, kept its watermark for the next run: {error}")
+
+    # ── Clean and route the delta ────────────────────────────────────────────
+    new_watermarks = {}
+    tables, routes, versions = [], [], []
+    for key, rows in fetched.items():
+        new_watermarks[key] = _format_watermark(max(r[":updated_at"] for r in rows))
+        updated_at = {r.get("id_contrato"): r[":updated_at"] for r in rows}
+        versions.append(pd.DataFrame({"id_contrato": list(updated_at), "updated_at": list(updated_at.values())}))
+        table = clean_page(rows)
+        if not table.num_rows:
+            continue
+        # Route by the cleaned start date: a contract can move to another month
+        ids = table["id_contrato"].to_numpy(zero_copy_only=False)
+        routes.append(pd.DataFrame({
+            "table": len(tables),
+            "row": np.arange(table.num_rows),
+            "id_contrato": ids,
+            "partition": pc.strftime(table["fecha_de_inicio_del_contrato"], format="%Y-%m")
+                           .to_numpy(zero_copy_only=False),
+            "updated_at": [updated_at.get(i) for i in ids],
+        }))
+        tables.append(table)
+
+    # Latest version of each contract seen in this run, kept or not by cleaning
+    latest = (pd.concat(versions, ignore_index=True) if versions
+              else pd.DataFrame({"id_contrato": [], "updated_at": []}))
+    latest = latest.dropna(subset=["id_contrato"]).sort_values("updated_at", kind="stable")
+    latest = latest.drop_duplicates("id_contrato", keep="last")
+    delta = (pd.concat(routes, ignore_index=True) if routes
+             else pd.DataFrame({c: [] for c in ["table", "row", "id_contrato", "partition", "updated_at"]}))
+    delta = delta.sort_values("updated_at", kind="stable").drop_duplicates("id_contrato", keep="last")
+    current = delta.merge(latest, on="id_contrato", how="left", suffixes=("", "_latest"))
+    delta = delta[(current["updated_at"] == current["updated_at_latest"]).to_numpy()]
+
+    # Contracts whose latest version cleaning dropped leave the dataset
+    removed = latest[~latest["id_contrato"].isin(delta["id_contrato"])].assign(partition=None)
+    delta = pd.concat([delta, removed], ignore_index=True)
+    delta["id_hash"] = _hash_ids(delta["id_contrato"].values)
+    previous = delta[["id_hash"]].merge(index, on="id_hash", how="left")["partition"].values
+    delta["previous_partition"] = previous
+    delta["change"] = np.where(delta["partition"].isna(), "removed",
+                               np.where(pd.isna(previous), "inserted", "updated"))
+    delta = delta[(delta["change"] != "removed") | delta["previous_partition"].notna()]
+
+    if delta.empty:
+        for key, mark in new_watermarks.items():
+            watermarks[key] = max(mark, watermarks.get(key, mark))
+        state["runs"].append({"at": _format_watermark(datetime.now(timezone.utc)), "changed": 0,
+                              **({"failed": failed} if failed else {})})
+        _save_state(dataset, state)
+        print("⚠ No months fetched; the next run retries them." if failed and not fetched
+              else "✅ Dataset already up to date.")
+        empty = pd.DataFrame(columns=["id_contrato", "partition", "change", "updated_at"])
+        return _write_changed_ids(empty, changed_ids_path)
+
+    # ── Upsert touched partitions ────────────────────────────────────────────
+    touched = sorted(set(delta["partition"].dropna()) | set(delta["previous_partition"].dropna()))
+    drop_hashes = pa.array(delta["id_hash"].values, type=pa.uint64())
+    print(f"Upserting {len(delta):,} contracts into {len(touched)} partition(s)...")
+
+    for key in touched:
+        path = partition_path(dataset, key)
+        incoming = delta[delta["partition"] == key]
+        pieces = []
+        if path.exists():
+            existing = pq.read_table(path, schema=ARROW_SCHEMA)
+            existing_hashes = pa.array(_hash_ids(existing["id_contrato"].to_numpy(zero_copy_only=False)),
+                                       type=pa.uint64())
+            pieces.append(existing.filter(pc.invert(pc.is_in(existing_hashes, value_set=drop_hashes))))
+        for t, group in incoming.groupby("table"):
+            pieces.append(tables[int(t)].take(pa.array(group["row"].values.astype(np.int64))))
+        table = pa.concat_tables(pieces) if pieces else ARROW_SCHEMA.empty_table()
+        if table.num_rows:
+            _write_atomic(table.sort_by("fecha_de_inicio_del_contrato"), path)
+        elif path.exists():
+            path.unlink()
+
+    # ── Commit bookkeeping (only after the data is written) ─────────────────
+    index = index[~index["id_hash"].isin(delta["id_hash"])]
+    index = pd.concat([index, delta.loc[delta["change"] != "removed", ["id_hash", "partition"]]],
+                      ignore_index=True)
+    tmp = dataset / (INDEX_FILE + ".tmp")
+    index.to_parquet(tmp, index=False)
+    os.replace(tmp, dataset / INDEX_FILE)
+
+    for key, mark in new_watermarks.items():
+        watermarks[key] = max(mark, watermarks.get(key, mark))
+    state["runs"].append({
+        "at": _format_watermark(datetime.now(timezone.utc)),
+        "changed": int(len(delta)),
+        "inserted": int((delta["change"] == "inserted").sum()),
+        "removed": int((delta["change"] == "removed").sum()),
+        "partitions": touched,
+        **({"failed": failed} if failed else {}),
+    })
+    _save_state(dataset, state)
+
+    changed = delta.assign(partition=delta["partition"].fillna(delta["previous_partition"]))
+    changed = changed[["id_contrato", "partition", "change", "updated_at"]].reset_index(drop=True)
+    path = _write_changed_ids(changed, changed_ids_path)
+
+    elapsed = time.perf_counter() - started
+    print("\n" + "=" * 50)
+    print("✅ DELTA COMPLETE")
+    print(f"   Inserted:        {(changed['change'] == 'inserted').sum():,}")
+    print(f"   Updated:         {(changed['change'] == 'updated').sum():,}")
+    print(f"   Removed:         {(changed['change'] == 'removed').sum():,} (dropped by cleaning)")
+    if failed:
+        print(f"   Failed months:   {', '.join(sorted(failed))} (retried next run)")
+    print(f"   Partitions:      {len(touched)} rewritten of {len(list(dataset.glob('year=*/month=*')))}")
+    print(f"   Elapsed:         {elapsed:.1f}s")
+    print(f"   Changed ids:     {path}")
+    print("=" * 50)
+    return path
+
+
+def _save_state(dataset: Path, state: dict):
+    tmp = dataset / (STATE_FILE + ".tmp")
+    tmp.write_text(json.dumps(state, indent=1))
+    os.replace(tmp, dataset / STATE_FILE)
+
+
+def _write_changed_ids(changed: pd.DataFrame, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    changed.to_parquet(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Delta refresh of the partitioned SECOP II raw dataset")
+    parser.add_argument("--dataset", type=Path, default=DATA_RAW / "secop_raw.parquet")
+    parser.add_argument("--end", default=VALID_END, help="Last contract start date to cover")
+    parser.add_argument("--workers", type=int, default=API_MAX_WORKERS)
+    parser.add_argument("--endpoint", default=SECOP_ENDPOINT)
+    args = parser.parse_args()
+
+    delta_pull(args.dataset, args.end, args.workers, endpoint=args.endpoint)
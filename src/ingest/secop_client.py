@@ -3,23 +3,45 @@
 SECOP II API client.
 Pulls contract data from Colombia's open procurement platform,
 saves to Parquet for all downstream work.
+
+The date range is split into fecha_de_inicio_del_contrato shards that are
+fetched concurrently over a pooled HTTP session. Every page is checkpointed
+to disk, so an interrupted pull resumes where it stopped.
+
+In streaming mode each page is cleaned, typed against ARROW_SCHEMA and
+deduplicated as it arrives, then compacted into row groups, so memory stays
+flat however many pages the pull returns.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
 import pandas as pd
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from tqdm import tqdm
+import json
+import math
+import os
+import shutil
 import sys
+import threading
 import time
 
 # Add project root to path so config is importable
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from config.settings import (
     SECOP_ENDPOINT, API_PAGE_SIZE, DATA_RAW,
-    TRAIN_START, VALID_END
+    TRAIN_START, VALID_END,
+    API_TIMEOUT, API_MAX_RETRIES, API_MAX_WORKERS, API_SHARD_DAYS,
+    API_MIN_INTERVAL, API_MAX_INTERVAL,
 )
+from src.pipeline import metrics
 
 # ── Columns we actually need ────────────────────────────────────────────────
 COLUMNS = [
@@ -60,40 +82,404 @@ DATE_COLS = [
     "fecha_de_fin_del_contrato",
 ]
 
+# ── Fixed Arrow schema for streamed pages ───────────────────────────────────
+NUMERIC_COLS = ["valor_del_contrato", "dias_adicionados"]
 
-def fetch_page(offset: int, limit: int) -> list[dict]:
-    """Pull one page from the API with retry logic."""
-    params = {
-        "$select": ",".join(COLUMNS),
-        "$where": (
-            f"fecha_de_inicio_del_contrato >= '{TRAIN_START}T00:00:00' "
-            f"AND fecha_de_inicio_del_contrato <= '{VALID_END}T23:59:59' "
-            f"AND valor_del_contrato > '0'"
-        ),
+ARROW_SCHEMA = pa.schema([
+    (col,
+     pa.timestamp("ns") if col in DATE_COLS
+     else pa.float64() if col in NUMERIC_COLS
+     else pa.string())
+    for col in COLUMNS
+])
+
+# HTTP statuses worth retrying: throttling and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+# ── Rate limiting ───────────────────────────────────────────────────────────
+class AdaptiveRateLimiter:
+    """
+    Spaces requests from all workers and adapts to the server.
+
+    Throttling or server errors double the interval between requests,
+    every success shrinks it by 10% (never below min_interval).
+    """
+
+    def __init__(self, min_interval: float = API_MIN_INTERVAL,
+                 max_interval: float = API_MAX_INTERVAL):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until this caller's request slot comes up."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def success(self):
+        with self._lock:
+            self.interval = max(self.min_interval, self.interval * 0.9)
+
+    def throttled(self, retry_after: float = None):
+        with self._lock:
+            self.interval = min(self.max_interval, max(self.interval * 2, 0.25))
+            if retry_after:
+                self._next_slot = max(self._next_slot, time.monotonic() + retry_after)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Seconds to wait from a Retry-After header: delay-seconds or an HTTP date.
+
+    None when the header is missing, malformed or already past, so the
+    limiter falls back to its own backoff.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:  # RFC 9110 dates are GMT
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return seconds if math.isfinite(seconds) and seconds > 0 else None
+
+
+def make_session(workers: int = API_MAX_WORKERS) -> requests.Session:
+    """HTTP session with a connection pool sized for the worker count."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# ── Query building ──────────────────────────────────────────────────────────
+def date_shards(start: str = TRAIN_START, end: str = VALID_END,
+                days: int = API_SHARD_DAYS) -> list[tuple[str, str]]:
+    """Split [start, end] into inclusive (start, end) date strings of `days` width."""
+    shards = []
+    current = pd.Timestamp(start)
+    last = pd.Timestamp(end)
+    while current <= last:
+        shard_end = min(current + pd.Timedelta(days=days - 1), last)
+        shards.append((current.strftime("%Y-%m-%d"), shard_end.strftime("%Y-%m-%d")))
+        current = shard_end + pd.Timedelta(days=1)
+    return shards
+
+
+def build_params(offset: int, limit: int, start: str = TRAIN_START,
+                 end: str = VALID_END, updated_after: str = None,
+                 with_updated_at: bool = False) -> dict:
+    """
+    SoQL parameters for one page of contracts starting in [start, end].
+
+    updated_after restricts the page to rows changed after that timestamp
+    (Socrata's :updated_at system field); with_updated_at also returns it.
+    """
+    where = (
+        f"fecha_de_inicio_del_contrato >= '{start}T00:00:00' "
+        f"AND fecha_de_inicio_del_contrato <= '{end}T23:59:59' "
+        f"AND valor_del_contrato > '0'"
+    )
+    if updated_after:
+        where += f" AND :updated_at > '{updated_after}'"
+    select = COLUMNS + [":updated_at"] if (with_updated_at or updated_after) else COLUMNS
+    return {
+        "$select": ",".join(select),
+        "$where": where,
         "$limit": limit,
         "$offset": offset,
-        "$order": "fecha_de_inicio_del_contrato ASC",
+        # :id breaks ties so offsets stay stable across retries and resumes
+        "$order": "fecha_de_inicio_del_contrato ASC, :id",
     }
 
-    # Rate limiting: 0.5 second delay to avoid API throttling
-    time.sleep(0.5)
 
-    # Retry logic for weak internet connections
-    max_retries = 3
-    for attempt in range(max_retries):
+@metrics.instrumented("ingest.fetch_page", rows_out=len)
+def fetch_page(offset: int, limit: int, start: str = TRAIN_START, end: str = VALID_END,
+               session: requests.Session = None, limiter: AdaptiveRateLimiter = None,
+               endpoint: str = SECOP_ENDPOINT, updated_after: str = None,
+               with_updated_at: bool = False) -> list[dict]:
+    """Pull one page from the API with retry logic."""
+    params = build_params(offset, limit, start, end, updated_after, with_updated_at)
+    http = session or requests
+    limiter = limiter or AdaptiveRateLimiter()
+
+    # Retry logic for weak internet connections and API throttling
+    for attempt in range(API_MAX_RETRIES):
+        limiter.wait()
         try:
-            response = requests.get(SECOP_ENDPOINT, params=params, timeout=300)
+            response = http.get(endpoint, params=params, timeout=API_TIMEOUT)
             response.raise_for_status()
+            limiter.success()
             return response.json()
-        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                sys.stderr.write(f"  ⚠ Timeout/connection error, retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})\n")
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                requests.exceptions.HTTPError) as e:
+            status = getattr(e.response, "status_code", None)
+            if status is not None and status not in RETRYABLE_STATUS:
+                raise
+            retry_after = e.response.headers.get("Retry-After") if e.response is not None else None
+            limiter.throttled(parse_retry_after(retry_after))
+            if attempt < API_MAX_RETRIES - 1:
+                wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s, ...
+                sys.stderr.write(f"  ⚠ {type(e).__name__} at offset {offset:,} ({start}), retrying in {wait_time}s... (attempt {attempt + 1}/{API_MAX_RETRIES})\n")
                 time.sleep(wait_time)
             else:
                 raise e
 
 
+# ── Checkpointing ───────────────────────────────────────────────────────────
+class PullManifest:
+    """
+    Checkpoint of a sharded pull, stored as manifest.json next to the page files.
+
+    Each shard records the next offset to fetch, whether it is finished,
+    and the page files already on disk. The manifest is rewritten atomically
+    after every page, so a crash loses at most the pages in flight.
+
+    page_writer(batch, path) persists one page and returns the rows kept;
+    the default stores the raw page as returned by the API.
+    """
+
+    def __init__(self, directory: Path, query: dict, page_writer=None):
+        self.directory = directory
+        self.path = directory / "manifest.json"
+        self.page_writer = page_writer or _write_raw_page
+        self._lock = threading.Lock()
+
+        state = None
+        if self.path.exists():
+            state = json.loads(self.path.read_text())
+            if state.get("query") != query:
+                print("  Checkpoint belongs to a different query — starting fresh.")
+                shutil.rmtree(directory)
+                state = None
+
+        directory.mkdir(parents=True, exist_ok=True)
+        if state is None:
+            state = {
+                "query": query,
+                "shards": {
+                    f"{start}_{end}": {"start": start, "end": end, "offset": 0,
+                                       "done": False, "rows": 0, "kept": 0, "parts": []}
+                    for start, end in date_shards(query["start"], query["end"], query["shard_days"])
+                },
+            }
+        self.state = state
+        self._save()
+
+    @property
+    def shards(self) -> dict:
+        return self.state["shards"]
+
+    @property
+    def rows(self) -> int:
+        return sum(s["rows"] for s in self.shards.values())
+
+    @property
+    def kept(self) -> int:
+        return sum(s["kept"] for s in self.shards.values())
+
+    def pending(self) -> list[str]:
+        return [key for key, s in self.shards.items() if not s["done"]]
+
+    def parts(self) -> list[Path]:
+        return [self.directory / p for s in self.shards.values() for p in s["parts"]]
+
+    def record_page(self, key: str, batch: list[dict], done: bool):
+        """Persist one fetched page and advance the shard's offset."""
+        with self._lock:
+            shard = self.shards[key]
+            if batch:
+                part = f"{key}_{shard['offset']:09d}.parquet"
+                kept = self.page_writer(batch, self.directory / part)
+                if kept:
+                    shard["parts"].append(part)
+                shard["offset"] += len(batch)
+                shard["rows"] += len(batch)
+                shard["kept"] += kept
+            shard["done"] = done
+            self._save()
+
+    def _save(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=1))
+        os.replace(tmp, self.path)
+
+
+def _write_raw_page(batch: list[dict], path: Path) -> int:
+    pd.DataFrame(batch).to_parquet(path, index=False)
+    return len(batch)
+
+
+# ── Streaming ingest ────────────────────────────────────────────────────────
+class IdSet:
+    """
+    Compact set of id_contrato values, kept as sorted 64-bit hashes.
+
+    8 bytes per contract (~12 MB for 1.55M ids) instead of a set of strings.
+    Two distinct ids collide with probability ~n²/2⁶⁵ (≈1e-7 at 1.55M rows).
+    """
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add_new(self, ids) -> np.ndarray:
+        """Add ids; return a mask of those not seen before (first occurrence wins)."""
+        hashes = pd.util.hash_array(np.asarray(ids, dtype=object))
+        fresh = np.zeros(len(hashes), dtype=bool)
+        fresh[np.unique(hashes, return_index=True)[1]] = True
+        if len(self._hashes):
+            pos = np.minimum(np.searchsorted(self._hashes, hashes), len(self._hashes) - 1)
+            fresh &= self._hashes[pos] != hashes
+        self._hashes = np.union1d(self._hashes, hashes[fresh])
+        return fresh
+
+
+@metrics.instrumented("ingest.clean_page", rows_in=len, rows_out=lambda table: table.num_rows)
+def clean_page(batch: list[dict]) -> pa.Table:
+    """Clean one API page and cast it to ARROW_SCHEMA."""
+    # Socrata omits null fields, so a page can lack whole columns
+    df = pd.DataFrame(batch).reindex(columns=COLUMNS)
+    df = clean_dataframe(df)
+    return pa.Table.from_pandas(df, schema=ARROW_SCHEMA, preserve_index=False)
+
+
+class StreamingPageWriter:
+    """Page writer that cleans, types and deduplicates each page on arrival."""
+
+    def __init__(self):
+        self.ids = IdSet()
+
+    def seed(self, parts: list[Path]):
+        """Rebuild the id set from pages already checkpointed (on resume)."""
+        for part in parts:
+            self.ids.add_new(pq.read_table(part, columns=["id_contrato"])["id_contrato"].to_numpy(zero_copy_only=False))
+
+    def __call__(self, batch: list[dict], path: Path) -> int:
+        table = clean_page(batch)
+        fresh = self.ids.add_new(table["id_contrato"].to_numpy(zero_copy_only=False))
+        table = table.filter(pa.array(fresh))
+        if table.num_rows:
+            pq.write_table(table, path, compression="snappy")
+        return table.num_rows
+
+
+@metrics.instrumented("ingest.write_dataset", rows_out=lambda stats: stats["rows"])
+def write_dataset(parts: list[Path], output_path: Path, partition: bool = False) -> dict:
+    """
+    Compact cleaned page files into the final dataset, one row group per page.
+
+    With partition=True, output_path becomes a hive-partitioned directory
+    (year=YYYY/month=M/part-0.parquet) that pd.read_parquet reads unchanged.
+    Only one page is held in memory at a time.
+    """
+    if output_path.is_dir():
+        shutil.rmtree(output_path)
+    elif output_path.exists():
+        output_path.unlink()
+
+    writers = {}
+    stats = {"rows": 0, "min_date": None, "max_date": None}
+    try:
+        for part in parts:
+            table = pq.read_table(part, schema=ARROW_SCHEMA)
+            dates = table["fecha_de_inicio_del_contrato"]
+            lo, hi = pc.min_max(dates).values()
+            stats["rows"] += table.num_rows
+            stats["min_date"] = lo.as_py() if stats["min_date"] is None else min(stats["min_date"], lo.as_py())
+            stats["max_date"] = hi.as_py() if stats["max_date"] is None else max(stats["max_date"], hi.as_py())
+
+            if not partition:
+                if None not in writers:
+                    writers[None] = pq.ParquetWriter(output_path, ARROW_SCHEMA, compression="snappy")
+                writers[None].write_table(table)
+                continue
+
+            keys = pc.add(pc.multiply(pc.year(dates), 100), pc.month(dates))
+            for key in pc.unique(keys).to_pylist():
+                if key not in writers:
+                    directory = output_path / f"year={key // 100}" / f"month={key % 100}"
+                    directory.mkdir(parents=True, exist_ok=True)
+                    writers[key] = pq.ParquetWriter(directory / "part-0.parquet", ARROW_SCHEMA,
+                                                    compression="snappy")
+                writers[key].write_table(table.filter(pc.equal(keys, key)))
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return stats
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != "darwin" else peak / 1e6
+
+
+class _RowBudget:
+    """Shared max_rows budget so concurrent shards stop at the limit."""
+
+    def __init__(self, remaining: int = None):
+        self.remaining = remaining
+        self._lock = threading.Lock()
+
+    def reserve(self, limit: int) -> int:
+        if self.remaining is None:
+            return limit
+        with self._lock:
+            granted = max(0, min(limit, self.remaining))
+            self.remaining -= granted
+            return granted
+
+    def refund(self, n: int):
+        if self.remaining is not None and n > 0:
+            with self._lock:
+                self.remaining += n
+
+
+def _pull_shard(key: str, manifest: PullManifest, session: requests.Session,
+                limiter: AdaptiveRateLimiter, budget: _RowBudget, page_size: int,
+                endpoint: str, progress: tqdm) -> int:
+    """Page through one date shard from its checkpointed offset."""
+    shard = manifest.shards[key]
+    fetched = 0
+    while True:
+        limit = budget.reserve(page_size)
+        if limit <= 0:
+            return fetched
+
+        batch = fetch_page(offset=shard["offset"], limit=limit,
+                           start=shard["start"], end=shard["end"],
+                           session=session, limiter=limiter, endpoint=endpoint)
+        budget.refund(limit - len(batch))
+
+        # A short page marks the end of the shard
+        manifest.record_page(key, batch, done=len(batch) < limit)
+        fetched += len(batch)
+        progress.update(len(batch))
+        if len(batch) < limit:
+            return fetched
+
+
+@metrics.instrumented("ingest.clean_dataframe", rows_in=len, rows_out=len)
 def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """Apply types and basic cleaning."""
     # Numeric
@@ -118,81 +504,131 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return df.reset_index(drop=True)
 
 
-def pull_data(max_rows: int = None, output_filename: str = "secop_raw.parquet") -> Path:
+@metrics.instrumented("ingest.pull")
+def pull_data(max_rows: int = None, output_filename: str = "secop_raw.parquet",
+              workers: int = API_MAX_WORKERS, page_size: int = API_PAGE_SIZE,
+              endpoint: str = SECOP_ENDPOINT, output_dir: Path = DATA_RAW,
+              stream: bool = False, partition: bool = False) -> Path:
     """
     Main pull function.
-    
+
     Args:
         max_rows: If set, stops after this many rows. Use 1000 for testing.
-        output_filename: Parquet filename saved to data/raw/
-    
+        output_filename: Parquet filename saved to output_dir
+        workers: Date shards fetched concurrently. 1 = sequential.
+        page_size: Rows per API request.
+        endpoint: Socrata resource URL (point at a local stand-in for testing).
+        output_dir: Directory for the parquet file and the pull checkpoint.
+        stream: Clean and deduplicate page by page instead of in one frame.
+            Peak memory stays flat regardless of the number of pages.
+        partition: Write a hive-partitioned year=/month= dataset directory
+            at output_filename (implies stream).
+
     Returns:
-        Path to saved parquet file.
+        Path to saved parquet file, or None if the pull did not finish.
+        An unfinished pull keeps its checkpoint; re-running resumes it.
     """
-    DATA_RAW.mkdir(parents=True, exist_ok=True)
-    output_path = DATA_RAW / output_filename
-
-    chunks = []
-    offset = 0
-    total_fetched = 0
+    stream = stream or partition
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / output_filename
+    checkpoint_dir = output_dir / "_checkpoints" / Path(output_filename).stem
+
+    query = {
+        "endpoint": endpoint, "start": TRAIN_START, "end": VALID_END,
+        "columns": COLUMNS, "shard_days": API_SHARD_DAYS, "max_rows": max_rows,
+        "stream": stream,
+    }
+    page_writer = StreamingPageWriter() if stream else None
+    manifest = PullManifest(checkpoint_dir, query, page_writer)
+    resumed_rows = manifest.rows
+    pending = manifest.pending()
+    if stream and resumed_rows:
+        page_writer.seed(manifest.parts())
 
     print(f"Starting pull from SECOP II API...")
     print(f"Date range: {TRAIN_START} → {VALID_END}")
-    print(f"Max rows: {'unlimited' if max_rows is None else f'{max_rows:,}'}")    
+    print(f"Max rows: {'unlimited' if max_rows is None else f'{max_rows:,}'}")
+    print(f"Shards:   {len(pending)} pending of {len(manifest.shards)} ({API_SHARD_DAYS}-day), {workers} worker(s)")
+    print(f"Mode:     {'streaming' if stream else 'in-memory'}{' + year/month partitions' if partition else ''}")
+    if resumed_rows:
+        print(f"Resuming from checkpoint: {resumed_rows:,} rows already on disk")
     print("-" * 50)
 
-    while True:
-        limit = API_PAGE_SIZE
-        if max_rows is not None:
-            limit = min(API_PAGE_SIZE, max_rows - total_fetched)
-            if limit <= 0:
-                break
-
-        try:
-            batch = fetch_page(offset=offset, limit=limit)
-        except requests.exceptions.RequestException as e:
-            print(f"\n❌ API error at offset {offset:,}: {e}")
-            break
-
-        if not batch:
-            break
-
-        chunks.append(pd.DataFrame(batch))
-        total_fetched += len(batch)
-        offset += len(batch)
-
-        print(f"  ✓ Fetched {total_fetched:,} rows so far...")
-
-        if len(batch) < limit:
-            # Last page
-            break
+    budget = _RowBudget(None if max_rows is None else max_rows - resumed_rows)
+    limiter = AdaptiveRateLimiter()
+    session = make_session(workers)
+    failed = []
+    started = time.perf_counter()
+
+    with tqdm(total=max_rows, initial=resumed_rows, unit="rows") as progress, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_pull_shard, key, manifest, session, limiter, budget,
+                        page_size, endpoint, progress): key
+            for key in pending
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except requests.exceptions.RequestException as e:
+                failed.append(futures[future])
+                tqdm.write(f"❌ API error in shard {futures[future]}: {e}")
+
+    elapsed = time.perf_counter() - started
+    fetched_now = manifest.rows - resumed_rows
+    print(f"Fetched {fetched_now:,} rows in {elapsed:.1f}s ({fetched_now / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    if failed:
+        print(f"❌ {len(failed)} shard(s) failed. Checkpoint kept at {checkpoint_dir}")
+        print("   Re-run the same command to resume.")
+        return None
 
-    if not chunks:
+    parts = manifest.parts()
+    if not parts:
         print("❌ No data fetched. Check your API connection.")
         return None
 
-    print(f"\nCombining {len(chunks)} chunks...")
-    df = pd.concat(chunks, ignore_index=True)
+    total_fetched = manifest.rows
+    if stream:
+        print(f"\nWriting {len(parts)} cleaned pages to {output_path}...")
+        stats = write_dataset(parts, output_path, partition)
+        rows_saved, n_columns = stats["rows"], len(ARROW_SCHEMA)
+        min_date, max_date = stats["min_date"], stats["max_date"]
+        print(f"Rows kept after cleaning + deduplication: {rows_saved:,}")
+        print(f"Rows dropped:                             {total_fetched - rows_saved:,}")
+    else:
+        print(f"\nCombining {len(parts)} chunks...")
+        df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
 
-    print("Cleaning data...")
-    df = clean_dataframe(df)
+        print("Cleaning data...")
+        df = clean_dataframe(df)
 
-    # CRITICAL: Deduplicate by id_contrato (API can return duplicates)
-    print(f"Rows before deduplication: {len(df):,}")
-    df = df.drop_duplicates(subset=['id_contrato'], keep='first')
-    print(f"Rows after deduplication:  {len(df):,}")
-    print(f"Duplicates removed:        {total_fetched - len(df):,}")
+        # CRITICAL: Deduplicate by id_contrato (API can return duplicates)
+        print(f"Rows before deduplication: {len(df):,}")
+        df = df.drop_duplicates(subset=['id_contrato'], keep='first')
+        print(f"Rows after deduplication:  {len(df):,}")
+        print(f"Duplicates removed:        {total_fetched - len(df):,}")
 
-    print(f"Saving to {output_path}...")
-    df.to_parquet(output_path, index=False, compression="snappy")
+        print(f"Saving to {output_path}...")
+        df.to_parquet(output_path, index=False, compression="snappy")
+        rows_saved, n_columns = len(df), len(df.columns)
+        min_date = df['fecha_de_inicio_del_contrato'].min()
+        max_date = df['fecha_de_inicio_del_contrato'].max()
+
+    shutil.rmtree(checkpoint_dir)
+    files = list(output_path.rglob("*.parquet")) if output_path.is_dir() else [output_path]
+    peak_rss = _peak_rss_mb()
 
     # Summary
     print("\n" + "=" * 50)
     print("✅ PULL COMPLETE")
-    print(f"   Rows saved:      {len(df):,}")
-    print(f"   Columns:         {len(df.columns)}")
-    print(f"   Date range:      {df['fecha_de_inicio_del_contrato'].min().date()} → {df['fecha_de_inicio_del_contrato'].max().date()}")
-    print(f"   File size:       {output_path.stat().st_size / 1e6:.1f} MB")
+    print(f"   Rows saved:      {rows_saved:,}")
+    print(f"   Columns:         {n_columns}")
+    print(f"   Date range:      {min_date.date()} → {max_date.date()}")
+    print(f"   File size:       {sum(f.stat().st_size for f in files) / 1e6:.1f} MB")
+    if peak_rss is not None:
+        print(f"   Peak RSS:        {peak_rss:,.0f} MB")
     print(f"   Saved to:        {output_path}")
     print("=" * 50)
 
@@ -205,9 +641,23 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Pull SECOP II contract data")
     parser.add_argument("--test", action="store_true", help="Pull only 1000 rows for testing")
     parser.add_argument("--max-rows", type=int, default=None, help="Limit total rows pulled")
+    parser.add_argument("--workers", type=int, default=API_MAX_WORKERS, help="Concurrent date shards")
+    parser.add_argument("--endpoint", default=SECOP_ENDPOINT, help="Socrata resource URL")
+    parser.add_argument("--stream", action="store_true", help="Bounded-memory page-by-page writer")
+    parser.add_argument("--partition", action="store_true", help="Hive-partition output by year/month (implies --stream)")
+    parser.add_argument("--delta", action="store_true", help="Upsert rows changed since the last run into the partitioned dataset")
+    parser.add_argument("--end", default=VALID_END, help="Last contract start date to cover in --delta mode")
     args = parser.parse_args()
 
+    if args.delta:
+        from src.ingest.delta import delta_pull
+        delta_pull(DATA_RAW / "secop_raw.parquet", end=args.end,
+                   workers=args.workers, endpoint=args.endpoint)
+        sys.exit(0)
+
+    options = dict(workers=args.workers, endpoint=args.endpoint,
+                   stream=args.stream, partition=args.partition)
     if args.test:
-        pull_data(max_rows=1000, output_filename="secop_test.parquet")
+        pull_data(max_rows=1000, output_filename="secop_test.parquet", **options)
     else:
-        pull_data(max_rows=args.max_rows, output_filename="secop_raw.parquet")
\ No newline at end of file
+        pull_data(max_rows=args.max_rows, output_filename="secop_raw.parquet", **options)
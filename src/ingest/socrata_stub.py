@@ -0,0 +1,181 @@
+# src/ingest/socrata_stub.py
+"""
+Local stand-in for the SECOP II Socrata endpoint.
+Replays recorded rows with injected latency, throttling and server errors,
+so pull_data can be exercised and benchmarked without API access.
+Rows carrying a ":updated_at" value also answer delta (:updated_at > ...) queries.
+
+Usage:
+    python src/ingest/socrata_stub.py --record 20000            # capture rows from the live API
+    python src/ingest/socrata_stub.py --bench --workers 1 4 16  # rows/s against the replay
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from pathlib import Path
+import json
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import DATA_RAW, RANDOM_STATE
+from src.ingest.secop_client import COLUMNS, fetch_page, make_session, pull_data
+
+RECORDING_PATH = DATA_RAW / "socrata_recording.jsonl"
+
+_WHERE_BOUNDS = re.compile(
+    r"fecha_de_inicio_del_contrato >= '([^']+)' AND fecha_de_inicio_del_contrato <= '([^']+)'"
+)
+_WHERE_UPDATED = re.compile(r":updated_at > '([^']+)'")
+
+
+def record_rows(max_rows: int, path: Path = RECORDING_PATH) -> Path:
+    """Capture raw API rows (as returned, all strings) to a JSON-lines file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    session = make_session(1)
+    with open(path, "w", encoding="utf-8") as f:
+        offset = 0
+        while offset < max_rows:
+            batch = fetch_page(offset=offset, limit=min(50_000, max_rows - offset), session=session)
+            if not batch:
+                break
+            for row in batch:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            offset += len(batch)
+    print(f"Recorded {offset:,} rows to {path}")
+    return path
+
+
+def load_recording(path: Path = RECORDING_PATH) -> list[dict]:
+    """Load recorded rows sorted the way the API serves them."""
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    rows.sort(key=lambda r: r.get("fecha_de_inicio_del_contrato", ""))
+    return rows
+
+
+def make_handler(rows: list[dict], latency: float, error_rate: float,
+                 throttle_rate: float, seed: int = RANDOM_STATE):
+    """Request handler class bound to one recording and fault profile."""
+    starts = [r.get("fecha_de_inicio_del_contrato", "") for r in rows]
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class SocrataStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with rng_lock:
+                roll = rng.random()
+                jitter = rng.uniform(0, latency)
+            time.sleep(latency + jitter)
+
+            if roll < throttle_rate:
+                self._send(429, {"message": "Too many requests"}, {"Retry-After": "1"})
+                return
+            if roll < throttle_rate + error_rate:
+                self._send(503, {"message": "Service unavailable"})
+                return
+
+            params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            lo, hi = "", "9999-12-31"
+            match = _WHERE_BOUNDS.search(params.get("$where", ""))
+            if match:
+                lo, hi = match.groups()
+            updated = _WHERE_UPDATED.search(params.get("$where", ""))
+            after = updated.group(1) if updated else None
+            offset = int(params.get("$offset", 0))
+            limit = int(params.get("$limit", 1000))
+            select = params.get("$select", ",".join(COLUMNS)).split(",")
+
+            matching = [
+                rows[i] for i, s in enumerate(starts)
+                if lo <= s <= hi and (after is None or rows[i].get(":updated_at", "")[:23] > after[:23])
+            ]
+            page = [{c: r[c] for c in select if c in r} for r in matching[offset:offset + limit]]
+            self._send(200, page)
+
+        def _send(self, status: int, body, headers: dict = None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return SocrataStubHandler
+
+
+def serve(rows: list[dict], latency: float = 0.05, error_rate: float = 0.02,
+          throttle_rate: float = 0.02, port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """Start the stand-in on a background thread. Returns (server, endpoint URL)."""
+    handler = make_handler(rows, latency, error_rate, throttle_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/resource/jbjy-vk9h.json"
+
+
+def benchmark(rows: list[dict], workers: list[int] = (1, 4, 16), page_size: int = 1000,
+              latency: float = 0.05, error_rate: float = 0.02, throttle_rate: float = 0.02) -> pd.DataFrame:
+    """Time a full pull against the stand-in for each worker count."""
+    results = []
+    for n in workers:
+        server, endpoint = serve(rows, latency, error_rate, throttle_rate)
+        with tempfile.TemporaryDirectory() as tmp:
+            started = time.perf_counter()
+            path = pull_data(output_filename="stub_bench.parquet", workers=n,
+                             page_size=page_size, endpoint=endpoint, output_dir=Path(tmp))
+            elapsed = time.perf_counter() - started
+            saved = len(pd.read_parquet(path, columns=["id_contrato"])) if path else 0
+        server.shutdown()
+        results.append({"workers": n, "rows": saved, "seconds": round(elapsed, 2),
+                        "rows_per_s": round(saved / elapsed, 1)})
+
+    results = pd.DataFrame(results)
+    print("\n" + "=" * 50)
+    print("STUB PULL BENCHMARK")
+    print(f"   Latency {latency*1000:.0f}ms  |  errors {error_rate:.0%}  |  throttles {throttle_rate:.0%}")
+    print(results.to_string(index=False))
+    print("=" * 50)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local Socrata stand-in for SECOP II")
+    parser.add_argument("--record", type=int, default=None, help="Record N rows from the live API")
+    parser.add_argument("--recording", type=Path, default=RECORDING_PATH, help="JSON-lines recording to replay")
+    parser.add_argument("--bench", action="store_true", help="Benchmark pull_data against the replay")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Base latency per request (s)")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.02, help="Share of 429 responses")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.record:
+        record_rows(args.record, args.recording)
+
+    if args.bench:
+        benchmark(load_recording(args.recording), args.workers, args.page_size,
+                  args.latency, args.error_rate, args.throttle_rate)
+    elif not args.record:
+        server, endpoint = serve(load_recording(args.recording), args.latency,
+                                 args.error_rate, args.throttle_rate, args.port)
+        print(f"Serving {args.recording} at {endpoint} (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -0,0 +1,447 @@
+# src/ingest/synthetic.py
+"""
+Deterministic synthetic SECOP II contracts at any scale.
+
+The pipeline's benchmarks so far ran on _synthetic_eda-style frames: 13
+columns, uniform dates, 55% direct awards and no text. That is enough to
+time one function, not to say how the whole chain behaves at 10x the
+national volume. SyntheticSecop produces rows with every secop_client
+COLUMNS field, typed like secop_raw.parquet (ARROW_SCHEMA), with the skew
+the real data has:
+
+    values      log-normal by contract type and agency, plus a Pareto tail
+                (~2% of contracts, up to hundreds of billions of pesos)
+    modality    ~90% direct awards (contratación directa + régimen especial)
+    entities    power-law agency and vendor activity; each vendor works
+                mostly with one home agency, so vendor-agency degrees are
+                heavy-tailed too
+    dates       seasonal (January peak, few weekend starts) between start and end
+    text        objeto_del_contrato / descripcion_del_proceso from per-type
+                templates, so many contracts read almost alike
+    splitting   planted clusters (~2% of rows): 3-6 direct awards from one
+                vendor to its home agency within 30 days, each valued just
+                below the mínima or menor cuantía threshold of its year and
+                sharing one description ("... - ETAPA k")
+
+Rows are generated in chunks of chunk_rows, each from its own seed, so 20x
+(31M contracts) is written to Parquet with one chunk in memory at a time,
+and the same (n_rows, seed, start, end, chunk_rows) always gives the same
+rows. Dates must fall in years that config/settings.py has an SMMLV for.
+
+Usage:
+    python src/ingest/synthetic.py --scale 1 -o data/raw/secop_synthetic.parquet
+    python src/ingest/synthetic.py --rows 200000 --end 2023-12-31 --summary
+"""
+
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import RANDOM_STATE, SMMLV, THRESHOLD_MULTIPLES, TRAIN_START, VALID_END
+from src.ingest.secop_client import ARROW_SCHEMA, COLUMNS, DATE_COLS
+
+BASE_ROWS = 1_553_594      # contracts in the 2019-01-01 → 2022-08-06 pull (1x)
+SCALES = [0.1, 1, 10, 20]
+CHUNK_ROWS = 500_000
+CLUSTER_SHARE = 0.02       # share of rows in planted splitting clusters
+HOME_SHARE = 0.7           # share of a vendor's contracts with its home agency
+
+# ── Vocabularies ────────────────────────────────────────────────────────────
+DEPARTAMENTOS = {  # departamento → (share of agencies, capital)
+    "Bogotá D.C.": (0.22, "Bogotá"), "Antioquia": (0.13, "Medellín"), "Valle del Cauca": (0.09, "Cali"),
+    "Cundinamarca": (0.07, "Zipaquirá"), "Santander": (0.05, "Bucaramanga"), "Atlántico": (0.05, "Barranquilla"),
+    "Bolívar": (0.05, "Cartagena"), "Nariño": (0.04, "Pasto"), "Córdoba": (0.04, "Montería"),
+    "Boyacá": (0.04, "Tunja"), "Cauca": (0.04, "Popayán"), "Tolima": (0.03, "Ibagué"),
+    "Norte de Santander": (0.03, "Cúcuta"), "Huila": (0.03, "Neiva"), "Meta": (0.03, "Villavicencio"),
+    "Magdalena": (0.03, "Santa Marta"), "Cesar": (0.03, "Valledupar"),
+}
+SECTORES = {
+    "Salud y Protección Social": 0.20, "Educación Nacional": 0.16, "Servicio Público": 0.14,
+    "Transporte": 0.09, "Defensa": 0.08, "Hacienda y Crédito Público": 0.06, "Interior": 0.06,
+    "Vivienda, Ciudad y Territorio": 0.05, "Inclusión Social y Reconciliación": 0.05,
+    "Agricultura y Desarrollo Rural": 0.04, "Cultura": 0.04, "Minas y Energía": 0.03,
+}
+MODALIDADES = {
+    "Contratación directa": 0.82, "Contratación régimen especial": 0.08, "Mínima cuantía": 0.05,
+    "Selección abreviada de menor cuantía": 0.025, "Licitación pública": 0.015, "Concurso de méritos abierto": 0.01,
+}
+ESTADOS = {"En ejecución": 0.45, "Modificado": 0.14, "Cerrado": 0.30, "terminado": 0.08, "Cancelado": 0.03}
+# tipo_de_contrato → (share, log10 median value, UNSPSC categories)
+TIPOS = {
+    "Prestación de servicios": (0.72, 7.2, ["V1.80111600", "V1.80121700", "V1.86101700", "V1.93141500"]),
+    "Suministro": (0.08, 7.5, ["V1.44121600", "V1.15101500", "V1.51100000"]),
+    "Compraventa": (0.07, 7.4, ["V1.43211500", "V1.56101700", "V1.42131600"]),
+    "Obra": (0.05, 8.4, ["V1.72141100", "V1.72121400", "V1.95121900"]),
+    "Consultoría": (0.03, 7.9, ["V1.81101500", "V1.80101500"]),
+    "Arrendamiento": (0.03, 7.3, ["V1.80131500"]),
+    "Otro": (0.02, 7.6, ["V1.93151500", "V1.80161500"]),
+}
+ACTIVITIES = [
+    "EL ACOMPAÑAMIENTO JURÍDICO", "EL APOYO ADMINISTRATIVO", "LA GESTIÓN DOCUMENTAL",
+    "EL SEGUIMIENTO A PROYECTOS DE INVERSIÓN", "LA ATENCIÓN AL CIUDADANO", "EL FORTALECIMIENTO INSTITUCIONAL",
+    "LA IMPLEMENTACIÓN DEL PLAN DE DESARROLLO", "EL SOPORTE TECNOLÓGICO", "LA SUPERVISIÓN DE CONTRATOS",
+    "LA GESTIÓN FINANCIERA Y CONTABLE", "EL MANTENIMIENTO DE INFRAESTRUCTURA", "LA PROMOCIÓN DE LA SALUD PÚBLICA",
+    "LA GESTIÓN DEL RIESGO DE DESASTRES", "LAS ACTIVIDADES CULTURALES Y DEPORTIVAS",
+    "EL PROGRAMA DE ALIMENTACIÓN ESCOLAR", "LA GESTIÓN AMBIENTAL",
+]
+AREAS = [
+    "SECRETARÍA DE SALUD", "SECRETARÍA DE EDUCACIÓN", "SECRETARÍA DE GOBIERNO", "SECRETARÍA DE HACIENDA",
+    "SECRETARÍA DE INFRAESTRUCTURA", "OFICINA JURÍDICA", "OFICINA DE PLANEACIÓN", "DIRECCIÓN ADMINISTRATIVA",
+    "SUBDIRECCIÓN FINANCIERA", "OFICINA DE CONTROL INTERNO",
+]
+ITEMS = [
+    "ELEMENTOS DE PAPELERÍA Y ÚTILES DE OFICINA", "EQUIPOS DE CÓMPUTO", "MEDICAMENTOS E INSUMOS MÉDICOS",
+    "COMBUSTIBLE PARA EL PARQUE AUTOMOTOR", "ELEMENTOS DE ASEO Y CAFETERÍA", "MATERIALES DE CONSTRUCCIÓN",
+    "DOTACIÓN DE UNIFORMES", "RACIONES ALIMENTARIAS", "LICENCIAS DE SOFTWARE", "MOBILIARIO ESCOLAR",
+]
+WORKS = [
+    "MEJORAMIENTO DE VÍAS TERCIARIAS", "CONSTRUCCIÓN DE PLACA HUELLA", "MANTENIMIENTO DE SEDES EDUCATIVAS",
+    "ADECUACIÓN DEL CENTRO DE SALUD", "REHABILITACIÓN DEL ACUEDUCTO", "CONSTRUCCIÓN DE ESCENARIOS DEPORTIVOS",
+]
+_MONTH_WEIGHT = np.array([2.2, 1.6, 1.1, 1.0, 1.0, 0.9, 1.0, 1.0, 0.9, 0.9, 0.8, 0.7])
+
+
+def scale_rows(scale: float) -> int:
+    """Contracts at a multiple of the 1x (1.55M contract) pull."""
+    return int(round(scale * BASE_ROWS))
+
+
+def _cdf(weights: np.ndarray) -> np.ndarray:
+    cdf = np.cumsum(weights, dtype=np.float64)
+    return cdf / cdf[-1]
+
+
+def _draw(rng: np.random.Generator, cdf: np.ndarray, size: int) -> np.ndarray:
+    """Indexes drawn with the probabilities behind cdf (one binary search per draw)."""
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side="right"), len(cdf) - 1)
+
+
+def _pick(rng: np.random.Generator, options: dict, size: int) -> np.ndarray:
+    """Indexes into options drawn by their shares (the first tuple item, or the value)."""
+    shares = np.array([v[0] if isinstance(v, tuple) else v for v in options.values()])
+    return _draw(rng, _cdf(shares), size)
+
+
+class SyntheticSecop:
+    """
+    A fixed universe of agencies and vendors, and the contracts between them chunk by chunk.
+
+    Attributes:
+        n_rows: Contracts in the full dataset.
+        seed: Base seed; chunk k draws from (seed, k + 1).
+        chunk_rows: Contracts per chunk.
+        days: Candidate start dates (datetime64[D]) and day_cdf their seasonal weights.
+        agencies: One row per agency: code, nit, name, departamento, ciudad, orden, sector, rama, effect.
+        vendors: One row per vendor: code, document, name, es_pyme, home agency.
+    """
+
+    def __init__(self, n_rows: int, seed: int, chunk_rows: int, days: np.ndarray, day_cdf: np.ndarray,
+                 agencies: pd.DataFrame, agency_cdf: np.ndarray, vendors: pd.DataFrame, vendor_cdf: np.ndarray):
+        self.n_rows = n_rows
+        self.seed = seed
+        self.chunk_rows = chunk_rows
+        self.days = days
+        self.day_cdf = day_cdf
+        self.agencies = agencies
+        self.agency_cdf = agency_cdf
+        self.vendors = vendors
+        self.vendor_cdf = vendor_cdf
+        years = days.astype("datetime64[Y]").astype(int) + 1970
+        missing = sorted(set(years) - set(SMMLV))
+        if missing:
+            raise ValueError(f"No SMMLV for {missing} in config/settings.py; the splitting thresholds need it")
+        self._year0 = int(years.min())
+        self._smmlv = np.array([SMMLV[y] for y in range(self._year0, int(years.max()) + 1)], dtype=np.float64)
+
+    @classmethod
+    def build(cls, n_rows: int, seed: int = RANDOM_STATE, start: str = TRAIN_START, end: str = VALID_END,
+              chunk_rows: int = CHUNK_ROWS) -> "SyntheticSecop":
+        """Draw the entity universe for n_rows contracts between start and end (inclusive)."""
+        rng = np.random.default_rng([seed, 0])
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+        months = days.astype("datetime64[M]").astype(int) % 12
+        weekend = (days.astype(np.int64) + 3) % 7 >= 5  # 1970-01-01 was a Thursday
+        day_cdf = _cdf(_MONTH_WEIGHT[months] * np.where(weekend, 0.15, 1.0))
+
+        # Agencies: ~4,000 at 1x, growing with the square root of volume
+        n_agencies = max(20, int(round(4_000 * np.sqrt(n_rows / BASE_ROWS))))
+        dept = _pick(rng, DEPARTAMENTOS, n_agencies)
+        capitals = np.array([capital for _, capital in DEPARTAMENTOS.values()], dtype=object)
+        ciudad = np.where(rng.random(n_agencies) < 0.5, capitals[dept],
+                          [f"MUNICIPIO {d:02d}{m:03d}" for d, m in zip(dept, rng.integers(0, 120, n_agencies))])
+        ids = np.arange(n_agencies)
+        agencies = pd.DataFrame({
+            "codigo_entidad": [f"7{a:07d}" for a in ids],
+            "nit_entidad": [f"8{a:08d}" for a in ids],
+            "nombre_entidad": [f"ENTIDAD {a} {capitals[d].upper()}" for a, d in zip(ids, dept)],
+            "departamento": np.array(list(DEPARTAMENTOS), dtype=object)[dept],
+            "ciudad": ciudad,
+            "orden": np.where(rng.random(n_agencies) < 0.8, "Territorial", "Nacional"),
+            "sector": np.array(list(SECTORES), dtype=object)[_pick(rng, SECTORES, n_agencies)],
+            "rama": np.array(["Ejecutivo", "Corporación Autónoma", "Judicial", "Legislativo"], dtype=object)[
+                _draw(rng, _cdf(np.array([0.9, 0.06, 0.03, 0.01])), n_agencies)],
+            "effect": rng.normal(0, 0.25, n_agencies),  # log10 value shift of the agency's contracts
+        })
+        agency_cdf = _cdf(rng.pareto(1.1, n_agencies) + 1)
+
+        # Vendors: one per ~4 contracts, Pareto activity, each with a home agency
+        n_vendors = max(50, n_rows // 4)
+        vendor_ids = np.arange(n_vendors)
+        vendors = pd.DataFrame({
+            "codigo_proveedor": [f"9{v:08d}" for v in vendor_ids],
+            "documento_proveedor": [f"{10_000_000 + 37 * v}" for v in vendor_ids],
+            "proveedor_adjudicado": [f"PROVEEDOR {v}" for v in vendor_ids],
+            "es_pyme": np.where(rng.random(n_vendors) < 0.3, "Si", "No"),
+            "home": _draw(rng, agency_cdf, n_vendors),
+        })
+        vendor_cdf = _cdf(rng.pareto(1.3, n_vendors) + 1)
+        return cls(n_rows, seed, chunk_rows, days, day_cdf, agencies, agency_cdf, vendors, vendor_cdf)
+
+    @property
+    def n_chunks(self) -> int:
+        return (self.n_rows + self.chunk_rows - 1) // self.chunk_rows
+
+    def _objects(self, rng: np.random.Generator, tipo: np.ndarray, agency: np.ndarray) -> np.ndarray:
+        """objeto_del_contrato from the template of each contract's type."""
+        n = len(tipo)
+        activity = np.array(ACTIVITIES, dtype=object)[rng.integers(0, len(ACTIVITIES), n)]
+        area = np.array(AREAS, dtype=object)[rng.integers(0, len(AREAS), n)]
+        item = np.array(ITEMS, dtype=object)[rng.integers(0, len(ITEMS), n)]
+        work = np.array(WORKS, dtype=object)[rng.integers(0, len(WORKS), n)]
+        kind = np.where(rng.random(n) < 0.6, "PROFESIONALES", "DE APOYO A LA GESTIÓN")
+        names = self.agencies["nombre_entidad"].to_numpy()[agency]
+        ciudades = self.agencies["ciudad"].to_numpy()[agency]
+        templates = [
+            lambda i: f"PRESTACIÓN DE SERVICIOS {kind[i]} PARA {activity[i]} EN LA {area[i]} DE {names[i]}",
+            lambda i: f"SUMINISTRO DE {item[i]} PARA LA {area[i]} DE {names[i]}",
+            lambda i: f"ADQUISICIÓN DE {item[i]} CON DESTINO A LA {area[i]}",
+            lambda i: f"{work[i]} EN {str(ciudades[i]).upper()}",
+            lambda i: f"CONSULTORÍA PARA {activity[i]} DE {names[i]}",
+            lambda i: f"ARRENDAMIENTO DE INMUEBLE PARA EL FUNCIONAMIENTO DE LA {area[i]}",
+            lambda i: f"CONVENIO PARA {activity[i]} EN {str(ciudades[i]).upper()}",
+        ]
+        out = np.empty(n, dtype=object)
+        for t, template in enumerate(templates):
+            rows = np.flatnonzero(tipo == t)
+            out[rows] = [template(i) for i in rows]
+        return out
+
+    def _clusters(self, rng: np.random.Generator, n_rows: int) -> dict[str, np.ndarray]:
+        """Planted splitting clusters totalling n_rows contracts."""
+        sizes = rng.integers(3, 7, n_rows // 3 + 1)
+        sizes = sizes[:np.searchsorted(np.cumsum(sizes), n_rows) + 1]
+        sizes[-1] -= sizes.sum() - n_rows
+        sizes = sizes[sizes > 0]
+        cluster = np.repeat(np.arange(len(sizes)), sizes)
+        vendor = rng.integers(0, len(self.vendors), len(sizes))[cluster]
+        anchor = rng.integers(0, max(1, len(self.days) - 30), len(sizes))[cluster]
+        day = np.minimum(anchor + rng.integers(0, 30, n_rows), len(self.days) - 1)
+        year = self.days[day].astype("datetime64[Y]").astype(int) + 1970
+        multiple = np.where(rng.random(len(sizes)) < 0.75, THRESHOLD_MULTIPLES["minima_cuantia"],
+                            THRESHOLD_MULTIPLES["menor_cuantia"])[cluster]
+        value = np.round(multiple * self._smmlv[year - self._year0] * rng.uniform(0.905, 0.995, n_rows))
+        return {"cluster": cluster, "vendor": vendor, "agency": self.vendors["home"].to_numpy()[vendor],
+                "day": day, "value": value, "stage": np.arange(n_rows) - (np.cumsum(sizes) - sizes)[cluster] + 1}
+
+    def chunk(self, k: int, truth: bool = False) -> pd.DataFrame:
+        """
+        Contracts of chunk k, in the secop_raw schema.
+
+        With truth=True a planted_cluster column is added: the planted
+        splitting cluster of each contract (unique across chunks), -1 for none.
+        """
+        first = k * self.chunk_rows
+        n = min(self.chunk_rows, self.n_rows - first)
+        if n <= 0:
+            raise IndexError(f"chunk {k} out of range ({self.n_chunks} chunks)")
+        rng = np.random.default_rng([self.seed, k + 1])
+        n_planted = int(round(CLUSTER_SHARE * n))
+        planted = self._clusters(rng, n_planted)
+        n_background = n - n_planted
+
+        vendor = _draw(rng, self.vendor_cdf, n_background)
+        agency = np.where(rng.random(n_background) < HOME_SHARE, self.vendors["home"].to_numpy()[vendor],
+                          _draw(rng, self.agency_cdf, n_background))
+        tipo = _pick(rng, TIPOS, n_background)
+        median = np.array([v[1] for v in TIPOS.values()])[tipo] + self.agencies["effect"].to_numpy()[agency]
+        value = 10 ** (median + rng.normal(0, 0.45, n_background))
+        tail = rng.random(n_background) < 0.02
+        value[tail] *= 10 * (1 + rng.pareto(1.2, int(tail.sum())))
+        value = np.round(np.clip(value, 1e5, 5e11))
+
+        # Planted rows go last, then everything is shuffled together
+        vendor = np.concatenate([vendor, planted["vendor"]])
+        agency = np.concatenate([agency, planted["agency"]])
+        tipo = np.concatenate([tipo, np.zeros(n_planted, dtype=tipo.dtype)])
+        value = np.concatenate([value, planted["value"]])
+        day = np.concatenate([_draw(rng, self.day_cdf, n_background), planted["day"]])
+        modalidad = np.concatenate([_pick(rng, MODALIDADES, n_background), np.zeros(n_planted, dtype=np.int64)])
+        objeto = self._objects(rng, tipo, agency)
+        # A cluster shares its first contract's description, numbered by stage
+        lead = np.flatnonzero(planted["stage"] == 1)
+        base = objeto[n_background + lead][planted["cluster"]]
+        objeto[n_background:] = [f"{b} - ETAPA {s}" for b, s in zip(base, planted["stage"])]
+        year = self.days[day].astype("datetime64[Y]").astype(int) + 1970
+        descripcion = np.where(rng.random(n) < 0.5, objeto + " VIGENCIA " + year.astype(str).astype(object), objeto)
+
+        inicio = self.days[day].astype("datetime64[ns]")
+        duration = np.clip(rng.lognormal(np.log(120), 0.7, n), 5, 1_800).astype(np.int64)
+        estado = _pick(rng, ESTADOS, n)
+        modified = estado == list(ESTADOS).index("Modificado")
+        dias = np.where(modified, rng.choice([0, 15, 30, 60, 90], n), 0).astype(np.float64)
+        categories = [np.array(v[2], dtype=object) for v in TIPOS.values()]
+        categoria = np.array([c[i % len(c)] for c, i in zip((categories[t] for t in tipo),
+                                                            rng.integers(0, 12, n))], dtype=object)
+        ag, vd = self.agencies, self.vendors
+        df = pd.DataFrame({
+            **{col: ag[col].to_numpy()[agency] for col in
+               ("codigo_entidad", "nit_entidad", "nombre_entidad", "departamento", "ciudad", "orden", "sector", "rama")},
+            **{col: vd[col].to_numpy()[vendor] for col in
+               ("codigo_proveedor", "documento_proveedor", "proveedor_adjudicado")},
+            "modalidad_de_contratacion": np.array(list(MODALIDADES), dtype=object)[modalidad],
+            "tipo_de_contrato": np.array(list(TIPOS), dtype=object)[tipo],
+            "estado_contrato": np.array(list(ESTADOS), dtype=object)[estado],
+            "codigo_de_categoria_principal": categoria,
+            "descripcion_del_proceso": descripcion,
+            "objeto_del_contrato": objeto,
+            "fecha_de_firma": inicio - rng.integers(0, 15, n).astype("timedelta64[D]"),
+            "fecha_de_inicio_del_contrato": inicio,
+            "fecha_de_fin_del_contrato": inicio + duration.astype("timedelta64[D]"),
+            "valor_del_contrato": value,
+            "dias_adicionados": dias,
+            "destino_gasto": np.where(rng.random(n) < 0.55, "Funcionamiento", "Inversión"),
+            "origen_de_los_recursos": np.array(["Recursos propios", "Presupuesto general de la Nación – PGN",
+                                                "Sistema General de Participaciones", "Sistema General de Regalías"],
+                                               dtype=object)[_draw(rng, _cdf(np.array([0.4, 0.3, 0.2, 0.1])), n)],
+            "espostconflicto": np.where(rng.random(n) < 0.03, "Si", "No"),
+            "es_pyme": vd["es_pyme"].to_numpy()[vendor],
+            "duraci_n_del_contrato": [f"{d} Dia(s)" for d in duration],
+        })
+        df.loc[rng.random(n) < 0.01, "fecha_de_fin_del_contrato"] = pd.NaT
+        if truth:
+            df["planted_cluster"] = np.concatenate([np.full(n_background, -1), first + planted["cluster"]])
+
+        order = rng.permutation(n)
+        df = df.iloc[order].reset_index(drop=True)
+        df.insert(0, "id_contrato", [f"CO1.PCCNTR.{first + i}" for i in range(n)])
+        return df.astype({col: "str" for col in COLUMNS if col not in DATE_COLS and col not in
+                          ("valor_del_contrato", "dias_adicionados")})
+
+    def frames(self, truth: bool = False):
+        """Every chunk in order."""
+        for k in range(self.n_chunks):
+            yield self.chunk(k, truth)
+
+    def write(self, path: Path, truth_path: Path | None = None) -> dict:
+        """
+        Write the contracts as secop_raw Parquet, one row group per chunk.
+
+        truth_path, if given, gets (id_contrato, planted_cluster) of every
+        planted contract. Returns rows, planted rows and seconds.
+        """
+        path, started = Path(path), time.perf_counter()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        truth_schema = pa.schema([("id_contrato", pa.string()), ("planted_cluster", pa.int64())])
+        writer = pq.ParquetWriter(path, ARROW_SCHEMA, compression="snappy")
+        truth_writer = pq.ParquetWriter(truth_path, truth_schema) if truth_path else None
+        rows = planted = 0
+        try:
+            for df in self.frames(truth=True):
+                writer.write_table(pa.Table.from_pandas(df[COLUMNS], schema=ARROW_SCHEMA, preserve_index=False))
+                marked = df.loc[df["planted_cluster"] >= 0, ["id_contrato", "planted_cluster"]]
+                if truth_writer is not None:
+                    truth_writer.write_table(pa.Table.from_pandas(marked, schema=truth_schema, preserve_index=False))
+                rows, planted = rows + len(df), planted + len(marked)
+        finally:
+            writer.close()
+            if truth_writer is not None:
+                truth_writer.close()
+        return {"rows": rows, "planted_rows": planted, "seconds": time.perf_counter() - started}
+
+
+def generate(n_rows: int, seed: int = RANDOM_STATE, start: str = TRAIN_START, end: str = VALID_END,
+             truth: bool = False) -> pd.DataFrame:
+    """All n_rows contracts as one frame (small scales; use SyntheticSecop.write beyond memory)."""
+    source = SyntheticSecop.build(n_rows, seed, start, end)
+    return pd.concat(list(source.frames(truth)), ignore_index=True)
+
+
+def api_records(df: pd.DataFrame, seed: int = RANDOM_STATE) -> list[dict]:
+    """
+    Contracts as the API returns them: every value a string, nulls as None.
+
+    Adds the dirt clean_dataframe exists for: ~3% of entity names padded
+    with spaces, ~0.5% zero values and ~0.2% rows without a start date.
+    """
+    rng = np.random.default_rng(seed)
+    raw = df[COLUMNS].copy()
+    for col in DATE_COLS:
+        raw[col] = raw[col].dt.strftime("%Y-%m-%dT%H:%M:%S.000")
+    raw["valor_del_contrato"] = raw["valor_del_contrato"].astype(np.int64).astype(str)
+    raw["dias_adicionados"] = raw["dias_adicionados"].astype(np.int64).astype(str)
+    raw = raw.astype(object)
+    n = len(raw)
+    pad = rng.random(n) < 0.03
+    for col in ("nombre_entidad", "proveedor_adjudicado"):
+        raw.loc[pad, col] = "  " + raw.loc[pad, col] + " "
+    raw.loc[rng.random(n) < 0.005, "valor_del_contrato"] = "0"
+    raw.loc[rng.random(n) < 0.002, "fecha_de_inicio_del_contrato"] = None
+    return raw.where(raw.notna(), None).to_dict("records")
+
+
+def describe(df: pd.DataFrame) -> dict:
+    """Realism checks: direct share, value tail, entity skew and planted share."""
+    direct = df["modalidad_de_contratacion"].str.lower().str.contains("directa|régimen especial", regex=True)
+    degree = df.groupby("codigo_proveedor", observed=True)["codigo_entidad"].nunique()
+    per_vendor = df["codigo_proveedor"].value_counts()
+    top = max(1, len(per_vendor) // 100)
+    stats = {
+        "rows": len(df),
+        "direct_share": round(float(direct.mean()), 3),
+        "value_p50": float(df["valor_del_contrato"].median()),
+        "value_p99": float(df["valor_del_contrato"].quantile(0.99)),
+        "value_max": float(df["valor_del_contrato"].max()),
+        "agencies": int(df["codigo_entidad"].nunique()),
+        "vendors": len(per_vendor),
+        "top1pct_vendor_share": round(float(per_vendor.iloc[:top].sum() / len(df)), 3),
+        "vendor_agencies_max": int(degree.max()),
+        "vendor_agencies_p99": float(degree.quantile(0.99)),
+        "distinct_objetos": int(df["objeto_del_contrato"].nunique()),
+    }
+    if "planted_cluster" in df.columns:
+        stats["planted_share"] = round(float((df["planted_cluster"] >= 0).mean()), 4)
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write synthetic SECOP II contracts in the secop_raw schema")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--scale", type=float, default=None, help=f"Multiple of {BASE_ROWS:,} contracts")
+    size.add_argument("--rows", type=int, default=None)
+    parser.add_argument("-o", "--output", type=Path, default=None, help="Parquet file (default: print a summary only)")
+    parser.add_argument("--truth", type=Path, default=None, help="Also write the planted cluster ids here")
+    parser.add_argument("--start", default=TRAIN_START)
+    parser.add_argument("--end", default=VALID_END)
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    parser.add_argument("--summary", action="store_true", help="Print realism checks (loads the data)")
+    args = parser.parse_args()
+
+    n_rows = args.rows or scale_rows(args.scale if args.scale is not None else 0.1)
+    source = SyntheticSecop.build(n_rows, args.seed, args.start, args.end)
+    if args.output:
+        stats = source.write(args.output, args.truth)
+        print(f"✅ {stats['rows']:,} contracts ({stats['planted_rows']:,} planted) → {args.output} "
+              f"in {stats['seconds']:.1f}s")
+    if args.summary or not args.output:
+        df = pd.read_parquet(args.output) if args.output else generate(n_rows, args.seed, args.start, args.end, truth=True)
+        for key, value in describe(df).items():
+            print(f"  {key:<22} {value:,}" if isinstance(value, (int, float)) else f"  {key:<22} {value}")
@@ -0,0 +1,380 @@
+# src/network/graph.py
+"""
+Vendor-agency graph on a SciPy CSR matrix.
+
+Replaces the networkx graph in notebooks/06_network_analysis.ipynb. Node ids
+are factorized once to integers and the undirected, weighted adjacency is
+stored as a symmetric CSR matrix. Degree, weighted degree, HHI and top-vendor
+share are segmented reductions over the CSR rows. PageRank is the same power
+iteration as nx.pagerank, run as sparse matrix-vector products.
+
+Node semantics follow the notebook exactly: ids are strings, a vendor id that
+equals an agency id is one node (typed agency), and a repeated undirected edge
+keeps the last weight. vendor_metrics / agency_metrics match the notebook's
+frames to floating-point tolerance (PageRank within nx.pagerank's own tol).
+
+Usage:
+    python src/network/graph.py                          # metrics from data/processed/splitting_scores.parquet
+    python src/network/graph.py --bench --synthetic 300000
+"""
+
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import DATA_PROCESSED, RANDOM_STATE
+from src.pipeline import metrics
+
+MIN_CONTRACTS = 3
+
+
+def build_edges(fm: pd.DataFrame, min_contracts: int = MIN_CONTRACTS) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Vendor-agency edges (total spend, contract count) and those with >= min_contracts."""
+    edges = fm.groupby(["codigo_proveedor", "codigo_entidad"]).agg(
+        total_spend=("valor_del_contrato", "sum"),
+        contract_count=("id_contrato", "count"),
+    ).reset_index()
+    edges_filtered = edges[edges["contract_count"] >= min_contracts].copy()
+    return edges, edges_filtered
+
+
+# ── Graph ───────────────────────────────────────────────────────────────────
+class VendorAgencyGraph:
+    """
+    Undirected vendor-agency graph over integer node ids.
+
+    Attributes:
+        nodes: Node ids (str) in the notebook's insertion order; position = node id.
+        is_agency: Boolean node type per node.
+        adjacency: Symmetric CSR matrix of edge weights (total spend).
+        edges: One row per undirected edge: u, v (node ids), weight, contracts.
+    """
+
+    def __init__(self, nodes: pd.Index, is_agency: np.ndarray,
+                 adjacency: sp.csr_array, edges: pd.DataFrame):
+        self.nodes = nodes
+        self.is_agency = is_agency
+        self.adjacency = adjacency
+        self.edges = edges
+        self._pagerank = None
+
+    @classmethod
+    @metrics.instrumented("network.graph_build", rows_in=lambda cls, edges_filtered: len(edges_filtered))
+    def from_edges(cls, edges_filtered: pd.DataFrame) -> "VendorAgencyGraph":
+        """Build from the notebook's edges_filtered table."""
+        ids = pd.concat([edges_filtered["codigo_proveedor"].astype(str),
+                         edges_filtered["codigo_entidad"].astype(str)], ignore_index=True)
+        # Codes in first-appearance order: vendors first, then agencies not
+        # already present, as the notebook's G.add_node calls do
+        codes, nodes = pd.factorize(ids)
+        nodes = pd.Index(nodes)
+        n_edges = len(edges_filtered)
+        u, v = codes[:n_edges], codes[n_edges:]
+        is_agency = np.zeros(len(nodes), dtype=bool)
+        is_agency[v] = True
+
+        lo, hi = np.minimum(u, v).astype(np.int64), np.maximum(u, v).astype(np.int64)
+        # G.add_edge on an existing edge overwrites its attributes: last one wins
+        keep = ~pd.Series(lo * len(nodes) + hi).duplicated(keep="last").to_numpy()
+        edges = pd.DataFrame({
+            "u": u[keep], "v": v[keep],
+            "weight": edges_filtered["total_spend"].to_numpy(dtype=float)[keep],
+            "contracts": edges_filtered["contract_count"].to_numpy()[keep],
+        })
+
+        u, v, w = edges["u"].to_numpy(), edges["v"].to_numpy(), edges["weight"].to_numpy()
+        loop = u == v
+        adjacency = sp.coo_array(
+            (np.concatenate([w, w[~loop]]),
+             (np.concatenate([u, v[~loop]]), np.concatenate([v, u[~loop]]))),
+            shape=(len(nodes), len(nodes)),
+        ).tocsr()
+        adjacency.sort_indices()
+        return cls(nodes, is_agency, adjacency, edges)
+
+    @classmethod
+    def from_contracts(cls, fm: pd.DataFrame, min_contracts: int = MIN_CONTRACTS) -> "VendorAgencyGraph":
+        """Aggregate contracts to edges and build the graph."""
+        return cls.from_edges(build_edges(fm, min_contracts)[1])
+
+    # ── Structure ───────────────────────────────────────────────────────────
+    @property
+    def n_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.edges)
+
+    @property
+    def density(self) -> float:
+        """Same definition as nx.density for an undirected graph."""
+        n = self.n_nodes
+        return 0.0 if n <= 1 else 2 * self.n_edges / (n * (n - 1))
+
+    def degree(self) -> np.ndarray:
+        """Neighbour count per node; a self-loop counts twice, as in networkx."""
+        u, v = self.edges["u"].to_numpy(), self.edges["v"].to_numpy()
+        loops = np.bincount(u[u == v], minlength=self.n_nodes)
+        return np.diff(self.adjacency.indptr) + loops
+
+    def weighted_degree(self) -> np.ndarray:
+        """Total edge weight per node (self-loops counted once)."""
+        return np.asarray(self.adjacency.sum(axis=1)).ravel()
+
+    def neighbor_concentration(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        HHI and top-neighbour share of each node's edge weights.
+
+        Both are 0 for nodes whose weights sum to 0 (the share also for a
+        negative total), matching graph_hhi and agency_top_share in the notebook.
+        """
+        A = self.adjacency
+        starts, counts = A.indptr[:-1], np.diff(A.indptr)
+        total = self.weighted_degree()
+        nonempty = counts > 0
+
+        shares = A.data / np.repeat(np.where(total == 0, 1.0, total), counts)
+        hhi = np.zeros(self.n_nodes)
+        hhi[nonempty] = np.add.reduceat(shares ** 2, starts[nonempty])
+        hhi[total == 0] = 0.0
+
+        top = np.zeros(self.n_nodes)
+        top[nonempty] = np.maximum.reduceat(A.data, starts[nonempty])
+        top_share = np.where(total > 0, top / np.where(total > 0, total, 1.0), 0.0)
+        return hhi, top_share
+
+    @metrics.instrumented("network.pagerank", rows_in=lambda self, *args, **kwargs: self.n_edges)
+    def pagerank(self, alpha: float = 0.85, max_iter: int = 100, tol: float = 1.0e-6) -> np.ndarray:
+        """
+        Weighted PageRank per node, the power iteration of nx.pagerank.
+
+        Uniform teleport and dangling distribution; converged when the L1
+        change between iterations drops below n_nodes * tol. Because the
+        adjacency is symmetric, x @ (D^-1 A) is computed as A @ (x / d)
+        without materializing the transition matrix.
+        """
+        if self._pagerank is not None and self._pagerank[0] == (alpha, max_iter, tol):
+            return self._pagerank[1]
+        n = self.n_nodes
+        if n == 0:
+            return np.zeros(0)
+
+        out_weight = self.weighted_degree()
+        dangling = out_weight == 0
+        inv_weight = np.where(dangling, 0.0, 1.0 / np.where(dangling, 1.0, out_weight))
+        p = np.full(n, 1.0 / n)
+        x = p.copy()
+        for _ in range(max_iter):
+            x_last = x
+            x = alpha * (self.adjacency @ (x_last * inv_weight) + x_last[dangling].sum() * p) + (1 - alpha) * p
+            if np.abs(x - x_last).sum() < n * tol:
+                self._pagerank = ((alpha, max_iter, tol), x)
+                return x
+        raise RuntimeError(f"PageRank failed to converge in {max_iter} iterations")
+
+    # ── Notebook metrics ────────────────────────────────────────────────────
+    def vendor_metrics(self) -> pd.DataFrame:
+        """Notebook 06 vendor_metrics: degree, spend, PageRank and preferential-routing flag."""
+        vendors = np.flatnonzero(~self.is_agency)
+        vendor_metrics = pd.DataFrame({
+            "codigo_proveedor": self.nodes[vendors].astype(str),
+            "degree": self.degree()[vendors],
+            "total_spend": self.weighted_degree()[vendors],
+            "pagerank": self.pagerank()[vendors],
+        }).sort_values("pagerank", ascending=False)
+
+        # High PageRank relative to degree: preferential routing
+        pr_median = vendor_metrics["pagerank"].median()
+        deg_median = vendor_metrics["degree"].median()
+        vendor_metrics["flag_preferential"] = (
+            (vendor_metrics["pagerank"] > pr_median * 3) &
+            (vendor_metrics["degree"] <= deg_median)
+        ).astype(int)
+        return vendor_metrics
+
+    def agency_metrics(self) -> pd.DataFrame:
+        """Notebook 06 agency_metrics: distinct vendors, spend, HHI, top share and concentration flag."""
+        agencies = np.flatnonzero(self.is_agency)
+        hhi, top_share = self.neighbor_concentration()
+        agency_metrics = pd.DataFrame({
+            "codigo_entidad": self.nodes[agencies].astype(str),
+            "distinct_vendors": self.degree()[agencies],
+            "total_spend": self.weighted_degree()[agencies],
+            "hhi": hhi[agencies],
+            "top_vendor_share": top_share[agencies],
+        }).sort_values("hhi", ascending=False)
+
+        agency_metrics["flag_concentrated"] = (
+            agency_metrics["top_vendor_share"] > 0.5
+        ).astype(int)
+        return agency_metrics
+
+    def to_networkx(self):
+        """The equivalent nx.Graph (node_type, weight and contracts attributes)."""
+        import networkx as nx
+
+        G = nx.Graph()
+        names = self.nodes.to_numpy()
+        G.add_nodes_from((n, {"node_type": "agency" if a else "vendor"})
+                         for n, a in zip(names, self.is_agency))
+        G.add_edges_from(
+            (a, b, {"weight": w, "contracts": c})
+            for a, b, w, c in zip(names[self.edges["u"]], names[self.edges["v"]],
+                                  self.edges["weight"], self.edges["contracts"])
+        )
+        return G
+
+
+# ── Reference implementation and benchmark ──────────────────────────────────
+def legacy_network_metrics(edges_filtered: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """The notebook's original networkx code (cells 2-4). Reference for checks and benchmarks."""
+    import networkx as nx
+
+    G = nx.Graph()
+    for vendor in edges_filtered["codigo_proveedor"].unique():
+        G.add_node(str(vendor), node_type="vendor")
+    for agency in edges_filtered["codigo_entidad"].unique():
+        G.add_node(str(agency), node_type="agency")
+    for _, row in edges_filtered.iterrows():
+        G.add_edge(str(row["codigo_proveedor"]), str(row["codigo_entidad"]),
+                   weight=row["total_spend"], contracts=row["contract_count"])
+
+    vendor_nodes = [n for n, d in G.nodes(data=True) if d.get("node_type") == "vendor"]
+    pagerank = nx.pagerank(G, weight="weight")
+    vendor_metrics = pd.DataFrame({
+        "codigo_proveedor": vendor_nodes,
+        "degree": [G.degree(n) for n in vendor_nodes],
+        "total_spend": [sum(d["weight"] for _, _, d in G.edges(n, data=True)) for n in vendor_nodes],
+        "pagerank": [pagerank[n] for n in vendor_nodes],
+    }).sort_values("pagerank", ascending=False)
+    pr_median = vendor_metrics["pagerank"].median()
+    deg_median = vendor_metrics["degree"].median()
+    vendor_metrics["flag_preferential"] = (
+        (vendor_metrics["pagerank"] > pr_median * 3) &
+        (vendor_metrics["degree"] <= deg_median)
+    ).astype(int)
+
+    agency_nodes = [n for n, d in G.nodes(data=True) if d.get("node_type") == "agency"]
+
+    def graph_hhi(agency_node):
+        neighbors = list(G.neighbors(agency_node))
+        if not neighbors:
+            return 0
+        weights = np.array([G[agency_node][n]["weight"] for n in neighbors])
+        total = weights.sum()
+        if total == 0:
+            return 0
+        shares = weights / total
+        return (shares ** 2).sum()
+
+    agency_top_share = {}
+    for n in agency_nodes:
+        neighbors = list(G.neighbors(n))
+        if not neighbors:
+            agency_top_share[n] = 0
+            continue
+        weights = [G[n][nb]["weight"] for nb in neighbors]
+        total = sum(weights)
+        agency_top_share[n] = max(weights) / total if total > 0 else 0
+
+    agency_metrics = pd.DataFrame({
+        "codigo_entidad": agency_nodes,
+        "distinct_vendors": [G.degree(n) for n in agency_nodes],
+        "total_spend": [sum(d["weight"] for _, _, d in G.edges(n, data=True)) for n in agency_nodes],
+        "hhi": [graph_hhi(n) for n in agency_nodes],
+        "top_vendor_share": [agency_top_share[n] for n in agency_nodes],
+    }).sort_values("hhi", ascending=False)
+    agency_metrics["flag_concentrated"] = (agency_metrics["top_vendor_share"] > 0.5).astype(int)
+    return vendor_metrics, agency_metrics
+
+
+def _synthetic_edges(n_edges: int, seed: int = RANDOM_STATE) -> pd.DataFrame:
+    """An edges_filtered-shaped table: many small vendors, skewed agency sizes."""
+    rng = np.random.default_rng(seed)
+    n_vendors, n_agencies = max(10, int(n_edges * 0.65)), max(5, n_edges // 180)
+    vendor = (n_vendors * rng.random(n_edges) ** 1.5).astype(np.int64)
+    agency = (n_agencies * rng.random(n_edges) ** 2).astype(np.int64)
+    edges = pd.DataFrame({
+        "codigo_proveedor": (900_000_000 + vendor).astype(str),
+        "codigo_entidad": (700_000 + agency).astype(str),
+    }).drop_duplicates().sort_values(["codigo_proveedor", "codigo_entidad"], ignore_index=True)
+    edges["total_spend"] = np.round(10 ** rng.normal(8.0, 1.0, len(edges)))
+    edges["contract_count"] = MIN_CONTRACTS + rng.geometric(0.3, len(edges)) - 1
+    return edges
+
+
+def _max_rel_diff(fast: pd.DataFrame, legacy: pd.DataFrame, key: str) -> float:
+    """Largest relative difference over all metric columns, matched by node id."""
+    fast = fast.set_index(key).astype(float)
+    legacy = legacy.set_index(key).loc[fast.index].astype(float)
+    diff = (fast - legacy).abs()
+    return float((diff / legacy.abs().where(legacy != 0, 1.0)).max().max())
+
+
+def benchmark(edges_filtered: pd.DataFrame, scale: int = 10) -> pd.DataFrame:
+    """
+    Time the CSR graph against the notebook's networkx code, and check agreement.
+
+    The CSR graph is also timed on a synthetic graph `scale` times larger.
+    """
+    started = time.perf_counter()
+    legacy_vendor, legacy_agency = legacy_network_metrics(edges_filtered)
+    t_legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    graph = VendorAgencyGraph.from_edges(edges_filtered)
+    vendor_metrics, agency_metrics = graph.vendor_metrics(), graph.agency_metrics()
+    t_csr = time.perf_counter() - started
+
+    large = _synthetic_edges(len(edges_filtered) * scale, seed=RANDOM_STATE + 1)
+    started = time.perf_counter()
+    big = VendorAgencyGraph.from_edges(large)
+    big.vendor_metrics(), big.agency_metrics()
+    t_large = time.perf_counter() - started
+
+    results = pd.DataFrame([
+        {"graph": "notebook", "nodes": graph.n_nodes, "edges": graph.n_edges,
+         "networkx_s": round(t_legacy, 2), "csr_s": round(t_csr, 2),
+         "speedup": round(t_legacy / t_csr, 1),
+         "vendor_max_rel_diff": _max_rel_diff(vendor_metrics, legacy_vendor, "codigo_proveedor"),
+         "agency_max_rel_diff": _max_rel_diff(agency_metrics, legacy_agency, "codigo_entidad")},
+        {"graph": f"{scale}x synthetic", "nodes": big.n_nodes, "edges": big.n_edges,
+         "networkx_s": np.nan, "csr_s": round(t_large, 2), "speedup": np.nan,
+         "vendor_max_rel_diff": np.nan, "agency_max_rel_diff": np.nan},
+    ])
+    print("=" * 70)
+    print("NETWORK GRAPH BENCHMARK")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vendor-agency network metrics on a CSR graph")
+    parser.add_argument("--input", type=Path, default=DATA_PROCESSED / "splitting_scores.parquet")
+    parser.add_argument("--bench", action="store_true", help="Compare against the notebook's networkx code")
+    parser.add_argument("--synthetic", type=int, default=None, help="Use N synthetic edges instead of --input")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        edges_filtered = _synthetic_edges(args.synthetic)
+    else:
+        edges_filtered = build_edges(pd.read_parquet(args.input))[1]
+
+    if args.bench:
+        benchmark(edges_filtered)
+    else:
+        graph = VendorAgencyGraph.from_edges(edges_filtered)
+        vendor_metrics, agency_metrics = graph.vendor_metrics(), graph.agency_metrics()
+        print(f"✅ Graph: {graph.n_nodes:,} nodes, {graph.n_edges:,} edges")
+        print(vendor_metrics.head(10).to_string(index=False))
+        print(agency_metrics.head(10).to_string(index=False))
@@ -0,0 +1,452 @@
+# src/network/louvain.py
+"""
+Louvain community detection on the CSR vendor-agency graph.
+
+Replaces the python-louvain call in notebooks/06_network_analysis.ipynb. The
+local-moving phase is a compiled queue-driven sweep over the CSR rows. A node
+is revisited only when a neighbour changes community. Each level is then
+collapsed with one sparse product (P.T @ A @ P), as in best_partition's
+induced graph.
+
+Refreshes warm-start from the previous partition. Only endpoints of added,
+removed or re-weighted edges (and new nodes) start in the queue, so
+communities far from the change are never touched. Community ids are matched
+to the previous run by greatest node overlap. community_stats and
+community_score therefore stay comparable across refreshes.
+
+Usage:
+    python src/network/louvain.py --build                 # from data/processed/splitting_scores.parquet
+    python src/network/louvain.py --update                # warm start against the saved partition
+    python src/network/louvain.py --bench --synthetic 400000
+"""
+
+from pathlib import Path
+import json
+import sys
+import time
+
+from numba import njit
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import DATA_PROCESSED, RANDOM_STATE
+from src.pipeline import metrics
+from src.network.graph import MIN_CONTRACTS, VendorAgencyGraph, build_edges
+
+STATE_DIR = DATA_PROCESSED / "community_state"
+
+
+# ── Louvain ─────────────────────────────────────────────────────────────────
+@njit(cache=True)
+def _local_moving(indptr, indices, data, k, labels, queue_init, resolution, m2):
+    """
+    Move nodes to the neighbouring community with the best modularity gain.
+
+    labels is updated in place. Nodes in queue_init are visited first; when a
+    node moves, its neighbours outside the new community are queued again.
+    Returns the number of moves.
+    """
+    n = len(k)
+    tot = np.zeros(n)
+    for i in range(n):
+        tot[labels[i]] += k[i]
+
+    queue = np.empty(n, np.int64)
+    in_queue = np.zeros(n, np.bool_)
+    head, size = 0, 0
+    for i in queue_init:
+        queue[size] = i
+        in_queue[i] = True
+        size += 1
+
+    neigh = np.empty(n, np.int64)
+    neigh_w = np.zeros(n)
+    stamp = np.full(n, -1, np.int64)
+    visit, moves = 0, 0
+    while size > 0:
+        i = queue[head]
+        head = (head + 1) % n
+        size -= 1
+        in_queue[i] = False
+        visit += 1
+
+        # Edge weight from i to each neighbouring community (self-loops excluded)
+        n_neigh = 0
+        for p in range(indptr[i], indptr[i + 1]):
+            j = indices[p]
+            if j == i:
+                continue
+            c = labels[j]
+            if stamp[c] != visit:
+                stamp[c] = visit
+                neigh_w[c] = 0.0
+                neigh[n_neigh] = c
+                n_neigh += 1
+            neigh_w[c] += data[p]
+
+        ci, ki = labels[i], k[i]
+        tot[ci] -= ki
+        stay = (neigh_w[ci] if stamp[ci] == visit else 0.0) - resolution * tot[ci] * ki / m2
+        best, best_gain = ci, stay
+        for t in range(n_neigh):
+            c = neigh[t]
+            gain = neigh_w[c] - resolution * tot[c] * ki / m2
+            if gain > best_gain:
+                best, best_gain = c, gain
+        # Round-off must not make two equal communities trade a node forever
+        if best_gain - stay <= 1e-12 * ki:
+            best = ci
+        tot[best] += ki
+
+        if best != ci:
+            labels[i] = best
+            moves += 1
+            for p in range(indptr[i], indptr[i + 1]):
+                j = indices[p]
+                if not in_queue[j] and labels[j] != best:
+                    queue[(head + size) % n] = j
+                    in_queue[j] = True
+                    size += 1
+    return moves
+
+
+def _full_adjacency(graph: VendorAgencyGraph) -> sp.csr_array:
+    """Adjacency with self-loops counted twice, so row sums are weighted degrees as networkx defines them."""
+    A = graph.adjacency
+    loops = A.diagonal()
+    if loops.any():
+        A = (A + sp.diags_array(loops, format="csr")).tocsr()
+    return A
+
+
+def _louvain(A: sp.csr_array, labels: np.ndarray, active: np.ndarray,
+             resolution: float, rng: np.random.Generator) -> np.ndarray:
+    """Multi-level Louvain from an initial labelling; returns the top-level community of each node."""
+    k = np.asarray(A.sum(axis=1)).ravel()
+    m2 = k.sum()
+    membership = np.arange(A.shape[0])
+    if m2 == 0:
+        return membership
+    queue = rng.permutation(active)
+    while True:
+        _local_moving(A.indptr.astype(np.int64), A.indices.astype(np.int64), A.data,
+                      k, labels, queue.astype(np.int64), resolution, m2)
+        uniques, labels = np.unique(labels, return_inverse=True)
+        membership = labels[membership]
+        if len(uniques) == A.shape[0]:
+            return membership
+        # Collapse communities into nodes of the next level
+        P = sp.csr_array((np.ones(len(labels)), (np.arange(len(labels)), labels)),
+                         shape=(len(labels), len(uniques)))
+        A = (P.T @ A @ P).tocsr()
+        k = np.bincount(labels, weights=k, minlength=len(uniques))
+        labels = np.arange(len(uniques))
+        queue = rng.permutation(len(uniques))
+
+
+def _canonical(membership: np.ndarray) -> np.ndarray:
+    """Relabel communities 0..k-1 by descending size (ties by first node)."""
+    uniques, first, inverse, counts = np.unique(membership, return_index=True,
+                                                return_inverse=True, return_counts=True)
+    rank = np.empty(len(uniques), dtype=np.int64)
+    rank[np.lexsort((first, -counts))] = np.arange(len(uniques))
+    return rank[inverse]
+
+
+@metrics.instrumented("network.louvain", rows_in=lambda graph, *args, **kwargs: graph.n_nodes, rows_out=len)
+def louvain(graph: VendorAgencyGraph, previous: pd.Series | None = None,
+            changed: np.ndarray | None = None, resolution: float = 1.0,
+            seed: int = RANDOM_STATE) -> pd.Series:
+    """
+    Louvain communities of the vendor-agency graph.
+
+    Args:
+        graph: The graph to partition.
+        previous: Warm start: community id per node id (str) from an earlier
+            run. Nodes missing from it start as singletons.
+        changed: With a warm start, node ids whose incident edges changed.
+            Only these (and new nodes) are queued at the first level; None
+            queues every node.
+        resolution: Modularity resolution, as in best_partition.
+        seed: Seed for the node visiting order.
+
+    Returns:
+        Community id per node id, indexed like graph.nodes. Cold starts are
+        numbered by descending size; warm starts keep previous ids by overlap
+        (see match_communities).
+    """
+    rng = np.random.default_rng(seed)
+    A = _full_adjacency(graph)
+    n = graph.n_nodes
+
+    if previous is None:
+        labels, active = np.arange(n), np.arange(n)
+    else:
+        previous = pd.Series(previous)
+        position = previous.index.get_indexer(graph.nodes)
+        known = position >= 0
+        labels = np.empty(n, dtype=np.int64)
+        labels[known] = pd.factorize(previous.to_numpy()[position[known]])[0]
+        labels[~known] = labels[known].max(initial=-1) + 1 + np.arange((~known).sum())
+        if changed is None:
+            active = np.arange(n)
+        else:
+            touched = graph.nodes.isin(pd.Index(changed).astype(str))
+            active = np.flatnonzero(touched | ~known)
+
+    membership = _canonical(_louvain(A, labels, active, resolution, rng))
+    if previous is not None:
+        membership = _match(membership, known, previous.to_numpy()[position[known]], previous.max())
+    return pd.Series(membership, index=graph.nodes, name="community_id")
+
+
+def modularity(graph: VendorAgencyGraph, partition: pd.Series, resolution: float = 1.0) -> float:
+    """Newman modularity of a partition, the same quantity as community_louvain.modularity."""
+    A = _full_adjacency(graph).tocoo()
+    labels = pd.Series(partition).reindex(graph.nodes).to_numpy()
+    labels = pd.factorize(labels)[0]
+    k = np.asarray(A.sum(axis=1)).ravel()
+    m2 = k.sum()
+    internal = A.data[labels[A.row] == labels[A.col]].sum()
+    tot = np.bincount(labels, weights=k)
+    return float(internal / m2 - resolution * (tot ** 2).sum() / m2 ** 2)
+
+
+def _match(membership: np.ndarray, known: np.ndarray, previous_ids: np.ndarray, previous_max) -> np.ndarray:
+    """match_communities on arrays: previous_ids are the old ids of the nodes where known is True."""
+    overlap = (pd.DataFrame({"new": membership[known], "old": previous_ids})
+               .value_counts().reset_index(name="nodes")
+               .sort_values(["nodes", "new", "old"], ascending=[False, True, True]))
+
+    mapping = np.full(membership.max(initial=-1) + 1, -1, dtype=np.int64)
+    taken = set()
+    for new, old in zip(overlap["new"].to_numpy(), overlap["old"].to_numpy()):
+        if mapping[new] < 0 and old not in taken:
+            mapping[new] = old
+            taken.add(old)
+
+    unmatched = np.flatnonzero(mapping < 0)
+    start = int(previous_max) + 1 if len(previous_ids) else 0
+    mapping[unmatched] = start + np.arange(len(unmatched))
+    return mapping[membership]
+
+
+def match_communities(partition: pd.Series, previous: pd.Series) -> pd.Series:
+    """
+    Relabel communities to the previous run's ids.
+
+    Pairs (new, previous) communities greedily by shared nodes, largest overlap
+    first, one-to-one. Unmatched new communities get ids above every previous
+    id, in their current order. Partition ids must be non-negative integers.
+    """
+    previous = pd.Series(previous)
+    position = previous.index.get_indexer(partition.index)
+    known = position >= 0
+    membership = _match(partition.to_numpy().astype(np.int64), known,
+                        previous.to_numpy()[position[known]], previous.max())
+    return pd.Series(membership, index=partition.index, name="community_id")
+
+
+def _edge_hashes(edges: pd.DataFrame) -> np.ndarray:
+    """uint64 hash of each (vendor, agency, total_spend) edge."""
+    vendor = pd.util.hash_array(edges["codigo_proveedor"].astype(str).to_numpy())
+    agency = pd.util.hash_array(edges["codigo_entidad"].astype(str).to_numpy())
+    spend = pd.util.hash_array(edges["total_spend"].to_numpy(dtype=float))
+    return (vendor * np.uint64(1_000_003) + agency) * np.uint64(1_000_003) + spend
+
+
+def changed_nodes(edges: pd.DataFrame, previous_edges: pd.DataFrame) -> np.ndarray:
+    """Node ids on edges that were added, removed or re-weighted between two edge tables."""
+    current, previous = _edge_hashes(edges), _edge_hashes(previous_edges)
+    moved = []
+    for table, own, other in ((edges, current, previous), (previous_edges, previous, current)):
+        mask = ~pd.Series(own).isin(other).to_numpy()
+        moved += [table["codigo_proveedor"].astype(str).to_numpy(dtype=object)[mask],
+                  table["codigo_entidad"].astype(str).to_numpy(dtype=object)[mask]]
+    return pd.unique(np.concatenate(moved))
+
+
+# ── Persisted state ─────────────────────────────────────────────────────────
+class CommunityState:
+    """The last graph's edges and partition, for warm-started refreshes."""
+
+    def __init__(self, edges: pd.DataFrame, partition: pd.Series, resolution: float = 1.0):
+        self.edges = edges
+        self.partition = partition
+        self.resolution = resolution
+
+    @classmethod
+    def build(cls, edges_filtered: pd.DataFrame, resolution: float = 1.0,
+              seed: int = RANDOM_STATE) -> "CommunityState":
+        """Cold start from an edges_filtered table."""
+        graph = VendorAgencyGraph.from_edges(edges_filtered)
+        return cls(edges_filtered, louvain(graph, resolution=resolution, seed=seed), resolution)
+
+    @classmethod
+    def load(cls, directory: Path = STATE_DIR) -> "CommunityState":
+        """Read a state written by save()."""
+        meta = json.loads((directory / "meta.json").read_text())
+        partition = pd.read_parquet(directory / "partition.parquet")
+        return cls(
+            pd.read_parquet(directory / "edges.parquet"),
+            partition.set_index("node")["community_id"],
+            meta["resolution"],
+        )
+
+    def save(self, directory: Path = STATE_DIR) -> Path:
+        """Write edges and partition as parquet files plus meta.json."""
+        directory.mkdir(parents=True, exist_ok=True)
+        self.edges.to_parquet(directory / "edges.parquet", index=False)
+        self.partition.rename_axis("node").reset_index().to_parquet(directory / "partition.parquet", index=False)
+        meta = {
+            "resolution": self.resolution,
+            "nodes": len(self.partition),
+            "communities": int(self.partition.nunique()),
+        }
+        (directory / "meta.json").write_text(json.dumps(meta, indent=2))
+        return directory
+
+    def update(self, edges_filtered: pd.DataFrame, seed: int = RANDOM_STATE) -> dict:
+        """
+        Re-partition a refreshed edge table, warm-started from the stored partition.
+
+        Returns counts of changed nodes, communities, and how many previous
+        nodes kept their community id.
+        """
+        graph = VendorAgencyGraph.from_edges(edges_filtered)
+        changed = changed_nodes(edges_filtered, self.edges)
+        partition = louvain(graph, self.partition, changed, self.resolution, seed)
+
+        position = self.partition.index.get_indexer(partition.index)
+        known = position >= 0
+        kept = int((partition.to_numpy()[known] == self.partition.to_numpy()[position[known]]).sum())
+        self.edges, self.partition = edges_filtered, partition
+        return {
+            "changed_nodes": len(changed),
+            "communities": int(partition.nunique()),
+            "nodes_kept_id": kept,
+            "nodes_compared": int(known.sum()),
+        }
+
+    def modularity(self) -> float:
+        return modularity(VendorAgencyGraph.from_edges(self.edges), self.partition, self.resolution)
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def _synthetic_communities(n_edges: int, n_blocks: int = 120, mixing: float = 0.03,
+                           seed: int = RANDOM_STATE) -> pd.DataFrame:
+    """edges_filtered-shaped table with planted vendor-agency blocks and a few cross-block edges."""
+    rng = np.random.default_rng(seed)
+    n_vendors, n_agencies = max(10, int(n_edges * 0.5)), max(n_blocks, n_edges // 180)
+    vendor = (n_vendors * rng.random(n_edges) ** 1.5).astype(np.int64)
+    block = vendor % n_blocks
+    # Agencies live in blocks too: agency % n_blocks == block, except for mixing edges
+    per_block = n_agencies // n_blocks
+    agency = (per_block * rng.random(n_edges) ** 2).astype(np.int64) * n_blocks + block
+    cross = rng.random(n_edges) < mixing
+    agency[cross] = rng.integers(0, per_block * n_blocks, cross.sum())
+    edges = pd.DataFrame({
+        "codigo_proveedor": (900_000_000 + vendor).astype(str),
+        "codigo_entidad": (700_000 + agency).astype(str),
+    }).drop_duplicates().sort_values(["codigo_proveedor", "codigo_entidad"], ignore_index=True)
+    edges["total_spend"] = np.round(10 ** rng.normal(8.0, 1.0, len(edges)))
+    edges["contract_count"] = MIN_CONTRACTS + rng.geometric(0.3, len(edges)) - 1
+    return edges
+
+
+def _perturb(edges: pd.DataFrame, fraction: float, seed: int = RANDOM_STATE) -> pd.DataFrame:
+    """A refresh: re-weight, drop and add `fraction` of the edges each."""
+    rng = np.random.default_rng(seed)
+    edges = edges.copy()
+    n = max(1, int(len(edges) * fraction))
+    reweight = rng.choice(len(edges), n, replace=False)
+    edges.loc[reweight, "total_spend"] *= rng.uniform(0.5, 2.0, n)
+    edges = edges.drop(index=rng.choice(len(edges), n, replace=False))
+    added = edges.sample(n, random_state=seed).copy()
+    added["codigo_entidad"] = edges["codigo_entidad"].sample(n, random_state=seed + 1).to_numpy()
+    return pd.concat([edges, added]).drop_duplicates(["codigo_proveedor", "codigo_entidad"], ignore_index=True)
+
+
+def benchmark(edges_filtered: pd.DataFrame, refresh_fraction: float = 0.01) -> pd.DataFrame:
+    """
+    Time cold and warm-started Louvain against python-louvain's best_partition.
+
+    The warm start runs on a refreshed edge table (refresh_fraction of edges
+    re-weighted, dropped and added). It is compared with a cold re-run on the
+    same table, for modularity and for how many nodes keep their community id.
+    """
+    import community as community_louvain
+
+    graph = VendorAgencyGraph.from_edges(edges_filtered)
+    G = graph.to_networkx()
+    started = time.perf_counter()
+    reference = community_louvain.best_partition(G, weight="weight", random_state=RANDOM_STATE)
+    t_reference = time.perf_counter() - started
+    q_reference = community_louvain.modularity(reference, G, weight="weight")
+
+    louvain(VendorAgencyGraph.from_edges(edges_filtered.head(100)))   # compile once, outside the timings
+    started = time.perf_counter()
+    state = CommunityState.build(edges_filtered)
+    t_cold = time.perf_counter() - started
+    q_cold = state.modularity()
+
+    refreshed = _perturb(edges_filtered, refresh_fraction)
+    previous = state.partition
+    started = time.perf_counter()
+    stats = state.update(refreshed)
+    t_warm = time.perf_counter() - started
+
+    rerun = louvain(VendorAgencyGraph.from_edges(refreshed))
+    common = rerun.index.intersection(previous.index)
+    rerun_kept = int((match_communities(rerun, previous).loc[common] == previous.loc[common]).sum())
+
+    results = pd.DataFrame([
+        {"run": "python-louvain", "seconds": round(t_reference, 2), "modularity": round(q_reference, 4),
+         "communities": len(set(reference.values())), "ids_kept_pct": np.nan},
+        {"run": "csr cold", "seconds": round(t_cold, 2), "modularity": round(q_cold, 4),
+         "communities": int(previous.nunique()), "ids_kept_pct": np.nan},
+        {"run": f"csr warm ({refresh_fraction:.0%} refresh)", "seconds": round(t_warm, 2),
+         "modularity": round(state.modularity(), 4), "communities": stats["communities"],
+         "ids_kept_pct": round(stats["nodes_kept_id"] / stats["nodes_compared"] * 100, 2)},
+        {"run": "csr cold rerun (matched)", "seconds": np.nan,
+         "modularity": round(modularity(VendorAgencyGraph.from_edges(refreshed), rerun), 4),
+         "communities": int(rerun.nunique()), "ids_kept_pct": round(rerun_kept / len(common) * 100, 2)},
+    ])
+    print("=" * 70)
+    print(f"COMMUNITY DETECTION BENCHMARK — {graph.n_nodes:,} nodes, {graph.n_edges:,} edges")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Louvain communities of the vendor-agency graph")
+    parser.add_argument("--input", type=Path, default=DATA_PROCESSED / "splitting_scores.parquet")
+    parser.add_argument("--state", type=Path, default=STATE_DIR)
+    parser.add_argument("--build", action="store_true", help="Cold start and save the partition")
+    parser.add_argument("--update", action="store_true", help="Warm start from the saved partition")
+    parser.add_argument("--bench", action="store_true", help="Compare against python-louvain")
+    parser.add_argument("--synthetic", type=int, default=None, help="Use N synthetic edges instead of --input")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        edges_filtered = _synthetic_communities(args.synthetic)
+    else:
+        edges_filtered = build_edges(pd.read_parquet(args.input))[1]
+
+    if args.bench:
+        benchmark(edges_filtered)
+    elif args.update:
+        state = CommunityState.load(args.state)
+        stats = state.update(edges_filtered)
+        state.save(args.state)
+        print(f"✅ Communities updated: {stats}  modularity {state.modularity():.4f}")
+    else:
+        state = CommunityState.build(edges_filtered)
+        state.save(args.state)
+        print(f"✅ {state.partition.nunique():,} communities, modularity {state.modularity():.4f} → {args.state}")
@@ -0,0 +1,563 @@
+# src/pipeline/metrics.py
+"""
+Hot-path instrumentation shared by ingest, the pipeline stages and the dashboard.
+
+A slow refresh used to leave nothing behind but tqdm bars and prints. Code
+on the hot paths now opens named spans:
+
+    with metrics.span("splitting.window_scan", rows_in=len(direct)) as s:
+        windows = ...
+        s.rows_out = len(windows)
+
+and each span, when it closes, becomes one JSON line:
+
+    name, parent    the span and the enclosing span on the same thread
+    wall_s, cpu_s   wall and process CPU seconds (CPU includes every thread
+                    of the process, e.g. XGBoost's)
+    peak_rss_mb     the highest RSS seen while the span was open, and rss_mb
+                    at the end. RSS is read when the span opens and closes,
+                    and every RSS_INTERVAL by one sampling thread while any
+                    span is open. A spike shorter than that can be missed.
+                    The process high-water mark (VmHWM) is never reset, so
+                    a caller measuring a whole process (suite.py) still
+                    sees it. Off Linux there is no RSS: the process peak.
+    rows_in/out     as the code reports them, and rows_per_s
+    status          "ok" or "error" (with the exception type), plus any labels
+
+Spans are off unless enabled. While off, span() returns one shared no-op
+context manager: a global check and a call, ~0.5 µs per span (--bench), so
+spans stay in the code around pages, stages and queries (not per row).
+Enable them with an environment variable, which the runner's worker
+processes inherit, or with configure():
+
+    AUDITLENS_METRICS=outputs/metrics/metrics.jsonl     # JSON lines, appended
+    AUDITLENS_PROFILE=network.louvain,stage.price       # sample these spans
+
+A span named in AUDITLENS_PROFILE is sampled while it runs: a thread reads
+the span thread's Python stack every PROFILE_INTERVAL seconds and writes
+collapsed stacks (speedscope / flamegraph.pl input) to profiles/ next to
+the metrics file. Code holding the GIL in C for long stretches is sampled
+late, at its next release.
+
+For Prometheus, serve() exposes the spans of this process at
+http://127.0.0.1:<port>/metrics (the dashboard does so when
+AUDITLENS_METRICS_PORT is set). For the runner's worker processes, --serve
+follows the metrics file instead.
+
+Usage:
+    AUDITLENS_METRICS=outputs/metrics/metrics.jsonl python src/pipeline/runner.py --force splitting
+    python src/pipeline/metrics.py --summary outputs/metrics/metrics.jsonl
+    python src/pipeline/metrics.py --serve 9108 --file outputs/metrics/metrics.jsonl
+    python src/pipeline/metrics.py --bench
+"""
+
+from collections import Counter
+from datetime import datetime, timezone
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import OUTPUTS
+
+ENV_PATH = "AUDITLENS_METRICS"
+ENV_PROFILE = "AUDITLENS_PROFILE"
+ENV_PORT = "AUDITLENS_METRICS_PORT"
+DEFAULT_PATH = OUTPUTS / "metrics" / "metrics.jsonl"
+PROFILE_INTERVAL = 0.005   # seconds between stack samples
+RSS_INTERVAL = 0.01        # seconds between RSS samples while spans are open
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0, 300.0, math.inf)
+
+_sink = None               # _JsonLines, when enabled
+_registry = None           # _Registry, while serving Prometheus from this process
+_profiled = frozenset()    # span names to sample
+_local = threading.local()
+_active = set()            # spans open in any thread, whose peaks the RSS sampler raises
+_active_lock = threading.Lock()
+_rss_wake = threading.Event()
+_rss_pid = None            # process the RSS sampler thread runs in (threads do not survive fork)
+
+
+# ── Memory ──────────────────────────────────────────────────────────────────
+def memory_mb() -> tuple[float | None, float | None]:
+    """
+    (process peak RSS, current RSS) in MB.
+
+    The peak is VmHWM: since the process started or the last reset_peak().
+    Off Linux it comes from ru_maxrss and there is no current RSS.
+    """
+    try:
+        status = Path("/proc/self/status").read_text()
+        return tuple(int(status.split(f"{field}:")[1].split()[0]) / 1024 for field in ("VmHWM", "VmRSS"))
+    except (OSError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return (peak / 1024 if sys.platform != "darwin" else peak / 1e6), None
+
+
+def reset_peak() -> None:
+    """
+    Restart the process peak at the current RSS (Linux; elsewhere a no-op).
+
+    For a caller that owns the process for what it measures, as suite.py's
+    steps do. Spans never call it.
+    """
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def _rss_mb() -> float | None:
+    """Current RSS in MB from /proc/self/statm (cheaper than status); None off Linux."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _sample_rss() -> None:
+    """RSS sampler thread: raise the peak of every open span; idle while none is open."""
+    while True:
+        _rss_wake.wait()
+        with _active_lock:
+            spans = list(_active)
+            if not spans:
+                _rss_wake.clear()
+                continue
+        rss = _rss_mb()
+        if rss is None:
+            return
+        for s in spans:
+            if rss > s._peak:
+                s._peak = rss
+        time.sleep(RSS_INTERVAL)
+
+
+# ── Sinks ───────────────────────────────────────────────────────────────────
+class _JsonLines:
+    """Append-only JSON-lines file; one write() per record, so processes can share it."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd, self._pid = None, None
+
+    def write(self, record: dict) -> None:
+        if self._pid != os.getpid():  # reopen after fork
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        os.write(self._fd, (json.dumps(record, default=str) + "\n").encode())
+
+
+class _Registry:
+    """Per-span-name aggregates in the Prometheus text format."""
+
+    def __init__(self):
+        self.spans = {}
+        self._lock = threading.Lock()
+        self._offset = 0
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            entry = self.spans.setdefault(record["name"], {
+                "buckets": [0] * len(BUCKETS), "count": 0, "wall": 0.0, "cpu": 0.0,
+                "rows_in": 0, "rows_out": 0, "errors": 0, "peak": 0.0})
+            wall = record.get("wall_s") or 0.0
+            entry["buckets"][next(i for i, le in enumerate(BUCKETS) if wall <= le)] += 1
+            entry["count"] += 1
+            entry["wall"] += wall
+            entry["cpu"] += record.get("cpu_s") or 0.0
+            entry["rows_in"] += record.get("rows_in") or 0
+            entry["rows_out"] += record.get("rows_out") or 0
+            entry["errors"] += record.get("status") == "error"
+            entry["peak"] = record.get("peak_rss_mb") or entry["peak"]
+
+    def follow(self, path: Path) -> None:
+        """Add the records appended to a metrics file since the last call."""
+        path = Path(path)
+        if not path.exists():
+            return
+        with open(path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1  # a line still being written waits for the next scrape
+        self._offset += complete
+        for line in data[:complete].splitlines():
+            if line.strip():
+                self.add(json.loads(line))
+
+    def render(self) -> str:
+        lines = []
+
+        def family(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP auditlens_span_{name} {help_text}")
+            lines.append(f"# TYPE auditlens_span_{name} {kind}")
+            lines.extend(samples)
+
+        with self._lock:
+            spans = sorted(self.spans.items())
+            histogram = []
+            for span_name, e in spans:
+                cumulative = 0
+                for le, n in zip(BUCKETS, e["buckets"]):
+                    cumulative += n
+                    bound = "+Inf" if math.isinf(le) else f"{le:g}"
+                    histogram.append(f'auditlens_span_seconds_bucket{{span="{span_name}",le="{bound}"}} {cumulative}')
+                histogram.append(f'auditlens_span_seconds_sum{{span="{span_name}"}} {e["wall"]:.6f}')
+                histogram.append(f'auditlens_span_seconds_count{{span="{span_name}"}} {e["count"]}')
+            family("seconds", "histogram", "Wall time of instrumented spans.", histogram)
+            for key, name, kind, help_text in (
+                    ("cpu", "cpu_seconds_total", "counter", "Process CPU seconds inside spans."),
+                    ("rows_in", "rows_in_total", "counter", "Rows into spans."),
+                    ("rows_out", "rows_out_total", "counter", "Rows out of spans."),
+                    ("errors", "errors_total", "counter", "Spans that raised."),
+                    ("peak", "peak_rss_megabytes", "gauge", "Peak RSS of the latest span.")):
+                family(name, kind, help_text, [f'auditlens_span_{name}{{span="{span_name}"}} {e[key]:g}'
+                                               for span_name, e in spans])
+        return "\n".join(lines) + "\n"
+
+
+# ── Sampling profiler ───────────────────────────────────────────────────────
+class _Sampler(threading.Thread):
+    """Counts the Python stacks of one thread, sampled every interval seconds."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id, self.interval = thread_id, interval
+        self.counts = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.counts
+
+
+def _write_profile(name: str, counts: Counter) -> Path:
+    directory = (_sink.path.parent if _sink else DEFAULT_PATH.parent) / "profiles"
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    path = directory / f"{name}-{os.getpid()}-{stamp}.collapsed"
+    path.write_text("".join(f"{stack} {n}\n" for stack, n in counts.most_common()))
+    return path
+
+
+# ── Spans ───────────────────────────────────────────────────────────────────
+class _NullSpan:
+    """What span() returns while instrumentation is off: does nothing, keeps nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL = _NullSpan()
+
+
+class Span:
+    """
+    One timed, measured block; see span().
+
+    Attributes:
+        name: Span name, "<area>.<step>" (e.g. "ingest.clean_dataframe").
+        rows_in: Rows the block works on (None if not meaningful).
+        rows_out: Rows it produced; set inside the block.
+        labels: Extra fields for the JSON record (low cardinality).
+    """
+
+    def __init__(self, name: str, rows_in: int | None = None, labels: dict | None = None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.labels = labels or {}
+
+    def __enter__(self):
+        global _rss_pid
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self._peak = _rss_mb() or 0.0
+        with _active_lock:
+            _active.add(self)
+            if _rss_pid != os.getpid():
+                _rss_pid = os.getpid()
+                threading.Thread(target=_sample_rss, name="metrics-rss", daemon=True).start()
+            _rss_wake.set()
+        self._sampler = None
+        if self.name in _profiled:
+            self._sampler = _Sampler(threading.get_ident())
+            self._sampler.start()
+        self._cpu, self._wall = time.process_time(), time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall, cpu = time.perf_counter() - self._wall, time.process_time() - self._cpu
+        _local.stack.pop()
+        with _active_lock:
+            _active.discard(self)
+        rss = _rss_mb()
+        peak = max(self._peak, rss) if rss is not None else memory_mb()[0]
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "name": self.name, "parent": self.parent, "pid": os.getpid(),
+            "wall_s": round(wall, 6), "cpu_s": round(cpu, 6),
+            "peak_rss_mb": _round(peak), "rss_mb": _round(rss),
+            "rows_in": _count(self.rows_in), "rows_out": _count(self.rows_out),
+            "rows_per_s": round(self.rows_in / wall) if self.rows_in and wall > 0 else None,
+            "status": "ok" if exc_type is None else "error",
+            **({"error": exc_type.__name__} if exc_type is not None else {}),
+            **self.labels,
+        }
+        if self._sampler is not None:
+            counts = self._sampler.stop()
+            record["profile"] = str(_write_profile(self.name, counts))
+            record["samples"] = sum(counts.values())
+        emit(record)
+        return False
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 1)
+
+
+def _count(value) -> int | None:
+    return None if value is None else int(value)
+
+
+def enabled() -> bool:
+    """Whether spans are recorded (or sampled) in this process."""
+    return _sink is not None or _registry is not None or bool(_profiled)
+
+
+def span(name: str, rows_in: int | None = None, **labels):
+    """
+    A context manager timing and measuring its block as one record.
+
+    Costs one check while instrumentation is off. Set .rows_out on the
+    returned span inside the block; rows_in may be given up front.
+    """
+    if _sink is None and _registry is None and not _profiled:
+        return _NULL
+    return Span(name, rows_in, labels)
+
+
+def instrumented(name: str, rows_in=None, rows_out=None):
+    """
+    Decorator: run the function inside span(name).
+
+    rows_in(*args, **kwargs) and rows_out(result) give the row counts,
+    e.g. rows_in=lambda df: len(df), rows_out=len.
+    """
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _sink is None and _registry is None and not _profiled:
+                return func(*args, **kwargs)
+            with Span(name, rows_in(*args, **kwargs) if rows_in else None) as s:
+                result = func(*args, **kwargs)
+                if rows_out is not None:
+                    s.rows_out = rows_out(result)
+                return result
+        return wrapper
+    return decorate
+
+
+def emit(record: dict) -> None:
+    """Write a record (a closed span, or any measurement) to the enabled sinks."""
+    if _sink is not None:
+        _sink.write(record)
+    if _registry is not None:
+        _registry.add(record)
+
+
+def configure(path: Path | str | None = None, profile: list[str] | str | None = None) -> None:
+    """
+    Turn spans on (path: JSON-lines file; "" or "1" for the default) or off (None).
+
+    Also sets the environment variables, so processes started afterwards
+    (the runner's stage workers) record into the same file.
+    """
+    global _sink, _profiled
+    if path is None:
+        _sink = None
+        os.environ.pop(ENV_PATH, None)
+    else:
+        path = DEFAULT_PATH if str(path) in ("", "1") else Path(path)
+        _sink = _JsonLines(path)
+        os.environ[ENV_PATH] = str(path)
+    if isinstance(profile, str):
+        profile = [p for p in profile.split(",") if p.strip()]
+    _profiled = frozenset(p.strip() for p in profile or ())
+    if _profiled:
+        os.environ[ENV_PROFILE] = ",".join(sorted(_profiled))
+    else:
+        os.environ.pop(ENV_PROFILE, None)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: _Registry = None
+    follow: Path | None = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        if self.follow is not None:
+            self.registry.follow(self.follow)
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int, follow: Path | None = None, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve /metrics in Prometheus text format from a daemon thread.
+
+    Without follow, the spans of this process are exported (and recorded
+    from now on even if no metrics file is configured). With follow, the
+    records appended to that metrics file are, so one exporter covers every
+    process writing to it.
+    """
+    global _registry
+    registry = _Registry()
+    if follow is None:
+        _registry = registry
+    handler = type("Handler", (_Handler,), {"registry": registry, "follow": follow})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_from_env() -> ThreadingHTTPServer | None:
+    """serve() on AUDITLENS_METRICS_PORT if it is set (once per process: cache the result)."""
+    port = os.environ.get(ENV_PORT)
+    return serve(int(port)) if port else None
+
+
+def load(path: Path = DEFAULT_PATH):
+    """A metrics file as a DataFrame."""
+    import pandas as pd
+
+    return pd.read_json(path, lines=True)
+
+
+def summary(records) -> "pd.DataFrame":
+    """Per span name: count, total and p50/p95 wall seconds, CPU seconds, max peak RSS and rows/s."""
+    grouped = records.groupby("name", sort=False)
+    table = grouped.agg(count=("wall_s", "size"), wall_s=("wall_s", "sum"), cpu_s=("cpu_s", "sum"),
+                        p50_ms=("wall_s", lambda s: s.quantile(0.5) * 1000),
+                        p95_ms=("wall_s", lambda s: s.quantile(0.95) * 1000),
+                        peak_rss_mb=("peak_rss_mb", "max"), rows_in=("rows_in", "sum"))
+    table["rows_per_s"] = (table["rows_in"] / table["wall_s"]).where(table["rows_in"] > 0).round()
+    return table.sort_values("wall_s", ascending=False).round(3)
+
+
+def _configure_from_env() -> None:
+    path, profile = os.environ.get(ENV_PATH), os.environ.get(ENV_PROFILE)
+    if path is not None or profile:
+        configure(path, profile)
+
+
+_configure_from_env()
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_spans: int = 1_000_000) -> None:
+    """Cost per span while off and while writing JSON lines, against a bare loop."""
+    import tempfile
+
+    def loop(n: int) -> float:
+        started = time.perf_counter()
+        for _ in range(n):
+            with span("bench.noop", rows_in=1) as s:
+                s.rows_out = 1
+        return time.perf_counter() - started
+
+    saved = (_sink.path if _sink else None, sorted(_profiled))
+    started = time.perf_counter()
+    for _ in range(n_spans):
+        pass
+    t_bare = time.perf_counter() - started
+    configure(None)
+    t_off = loop(n_spans)
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(Path(tmp) / "metrics.jsonl")
+        n_on = n_spans // 100
+        t_on = loop(n_on)
+        size = (Path(tmp) / "metrics.jsonl").stat().st_size
+        configure(Path(tmp) / "metrics.jsonl", profile="bench.sampled")
+        with span("bench.sampled"):
+            deadline = time.perf_counter() + 0.5
+            while time.perf_counter() < deadline:
+                sum(range(1000))
+        sampled = load(Path(tmp) / "metrics.jsonl").iloc[-1]
+    configure(*saved)
+    print("=" * 70)
+    print(f"METRICS OVERHEAD — {n_spans:,} spans off, {n_on:,} on")
+    print(f"  bare loop:           {t_bare / n_spans * 1e9:8.1f} ns/iteration")
+    print(f"  span, off:           {(t_off - t_bare) / n_spans * 1e9:8.1f} ns/span")
+    print(f"  span, JSON lines:    {t_on / n_on * 1e6:8.1f} µs/span ({size / n_on:.0f} bytes/record)")
+    print(f"  sampled 0.5s span:   {sampled['samples']} stack samples → {Path(sampled['profile']).name}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize, export or benchmark pipeline metrics")
+    parser.add_argument("--summary", type=Path, nargs="?", const=DEFAULT_PATH, help="Per-span table of a metrics file")
+    parser.add_argument("--serve", type=int, default=None, metavar="PORT", help="Prometheus endpoint over --file")
+    parser.add_argument("--file", type=Path, default=DEFAULT_PATH, help="Metrics file followed by --serve")
+    parser.add_argument("--bench", action="store_true", help="Measure span overhead")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark()
+    elif args.serve:
+        serve(args.serve, follow=args.file)
+        print(f"✅ Serving {args.file} at http://127.0.0.1:{args.serve}/metrics (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(summary(load(args.summary or DEFAULT_PATH)).to_string())
@@ -0,0 +1,362 @@
+# src/pipeline/schema.py
+"""
+Compact typed schema for intermediate and scored datasets.
+
+The notebooks write codes, sectors and tiers as strings, flags as int64 and
+scores as float64. Every pipeline stage, and the dashboard, reads and writes
+through this module instead:
+
+    codigo_entidad, codigo_proveedor   int32 codes from persistent code dictionaries
+                                       (data/processed/codes/<column>.parquet), read
+                                       back as a categorical over that dictionary;
+                                       dictionary-encoded strings in published files
+    sector, departamento, risk_tier,   dictionary-encoded categoricals
+    modalidad_de_contratacion, ...
+    flag_*, is_*, near_*, proxy_*      int8
+    year / month / quarter, tier_rank  int16 / int8 / int8 / int8
+    counts and day spans               int32
+    scores and log-value predictions   float32
+
+Every cast is checked and skipped if it would lose information: flags must be
+whole numbers in int8 range with no nulls, for example. Money, model inputs
+(log_valor, the vendor/agency rates) and dates keep their types, so models
+see the same numbers. Scores in [0, 1] keep about 7 significant digits in
+float32, far finer than any threshold or tier boundary they feed.
+
+Code dictionaries are append-only. A value keeps its code forever, so int
+codes mean the same thing in every file written against the same directory.
+They are extended under a file lock when a frame with new values is written;
+reading a file never changes them.
+
+Usage:
+    python src/pipeline/schema.py data/processed/risk_scores.parquet   # sizes before/after
+    python src/pipeline/schema.py --bench 1553594
+"""
+
+from pathlib import Path
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import DATA_PROCESSED
+
+CODES_DIR = DATA_PROCESSED / "codes"
+
+ENTITY_COLUMNS = ["codigo_entidad", "codigo_proveedor"]
+CATEGORY_COLUMNS = [
+    "sector", "departamento", "risk_tier", "modalidad_de_contratacion",
+    "estado_contrato", "nombre_entidad",
+]
+FLAG_PREFIXES = ("flag_", "is_", "near_", "proxy_")
+FLAG_COLUMNS = ["community_flag"]
+INT_COLUMNS = {
+    "year": "int16", "month": "int8", "quarter": "int8", "tier_rank": "int8", "community_id": "int32",
+    "description_cluster": "int32",
+    # Counts and day spans (whole numbers, also when stored as float)
+    "duracion_dias": "int32", "dias_firma_a_inicio": "int32", "dias_adicionados": "int32",
+    "vendor_total_contracts": "int32", "vendor_distinct_agencies": "int32", "vendor_tenure_days": "int32",
+    "agency_total_contracts": "int32", "agency_distinct_vendors": "int32", "smmlv": "int32",
+}
+SCORE_COLUMNS = [
+    "score_isoforest", "score_hbos", "process_anomaly_score",
+    "dist_to_minima", "dist_to_menor", "splitting_score", "description_splitting_score",
+    "pagerank_norm", "top_vendor_share", "network_score",
+    "community_proxy_norm", "community_score",
+    "predicted_log_valor", "residual_log", "residual_pct", "price_benchmark_score",
+    "process_anomaly_norm", "splitting_norm", "network_norm", "community_norm", "price_norm",
+    "risk_index_raw", "risk_index", "risk_score_calibrated",
+]
+
+_METADATA_KEY = b"auditlens_schema"
+
+
+# ── Code dictionaries ───────────────────────────────────────────────────────
+class CodeBook:
+    """
+    Append-only value ↔ int32 code dictionary for one entity column.
+
+    Attributes:
+        column: Column it encodes.
+        values: Index of values; position = code.
+        directory: Where <column>.parquet lives.
+    """
+
+    def __init__(self, column: str, values: pd.Index, directory: Path = CODES_DIR):
+        self.column = column
+        self.values = values
+        self.directory = directory
+
+    @classmethod
+    def load(cls, column: str, directory: Path = CODES_DIR) -> "CodeBook":
+        path = directory / f"{column}.parquet"
+        values = pd.read_parquet(path)["value"] if path.exists() else pd.Series([], dtype="str")
+        return cls(column, pd.Index(values.astype("str")), directory)
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        """int32 code per value (-1 for nulls), adding unseen values to the dictionary."""
+        values = _strings(values)
+        codes = self.values.get_indexer(values)
+        new = pd.unique(np.asarray(values[(codes < 0) & values.notna()].astype("str")))
+        if len(new):
+            self._extend(new)
+            codes = self.values.get_indexer(values)
+        return codes.astype(np.int32)
+
+    def lookup(self, values: pd.Series) -> pd.Categorical:
+        """
+        Categorical over the dictionary without writing to it: known values get
+        their persistent codes, unseen ones are appended to this frame's
+        categories only. For reads, which must not change the code files.
+        """
+        values = _strings(values)
+        codes = self.values.get_indexer(values)
+        if ((codes < 0) & values.notna()).any():
+            # Another process may have added them since we loaded the dictionary
+            self.values = CodeBook.load(self.column, self.directory).values
+            codes = self.values.get_indexer(values)
+        new = pd.unique(np.asarray(values[(codes < 0) & values.notna()].astype("str")))
+        return pd.Categorical(values, categories=self.values.append(pd.Index(new, dtype="str")))
+
+    def decode(self, codes: np.ndarray) -> pd.Categorical:
+        """Categorical over the whole dictionary, so codes stay the persistent ones."""
+        if len(codes) and codes.max() >= len(self.values):
+            self.values = CodeBook.load(self.column, self.directory).values
+        if len(codes) and codes.max() >= len(self.values):
+            raise ValueError(f"{self.column} code {codes.max()} is not in {self.directory}; "
+                             f"the file was written against another code dictionary")
+        return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(self.values))
+
+    def _extend(self, new: np.ndarray) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / f"{self.column}.lock", "w") as lock:
+            _lock(lock)
+            # Another process may have extended it since we loaded it
+            current = CodeBook.load(self.column, self.directory).values
+            new = pd.Index(new)[~pd.Index(new).isin(current)]
+            self.values = current.append(new.astype("str"))
+            tmp = self.directory / f"{self.column}.tmp"
+            pd.DataFrame({"value": self.values}).to_parquet(tmp, index=False)
+            tmp.replace(self.directory / f"{self.column}.parquet")
+
+
+def _strings(values: pd.Series) -> pd.Series:
+    """Values as strings; a categorical keeps its codes and gets string categories."""
+    return values.astype("str") if not isinstance(values.dtype, pd.CategoricalDtype) \
+        else values.cat.rename_categories(values.cat.categories.astype("str"))
+
+
+def _lock(file) -> None:
+    """Exclusive lock on an open file until it is closed (fcntl on POSIX, msvcrt on Windows)."""
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+    else:
+        fcntl.flock(file, fcntl.LOCK_EX)
+
+
+_books: dict[tuple[Path, str], CodeBook] = {}
+
+
+def _book(column: str, directory: Path) -> CodeBook:
+    if (directory, column) not in _books:
+        _books[(directory, column)] = CodeBook.load(column, directory)
+    return _books[(directory, column)]
+
+
+# ── Typing ──────────────────────────────────────────────────────────────────
+def _is_flag(col: str) -> bool:
+    return col in FLAG_COLUMNS or col.startswith(FLAG_PREFIXES)
+
+
+def _fits(series: pd.Series, dtype: str) -> bool:
+    """True if series casts to the integer dtype without losing anything."""
+    if series.isna().any() or not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return pd.api.types.is_bool_dtype(series)
+    values = series.to_numpy()
+    info = np.iinfo(dtype)
+    return bool(len(values) == 0 or (values.min() >= info.min and values.max() <= info.max
+                                     and np.array_equal(values, np.round(values))))
+
+
+def compact(df: pd.DataFrame, codes_dir: Path = CODES_DIR, encode_entities: bool = True,
+            extend: bool = True) -> pd.DataFrame:
+    """
+    The frame with the compact types; columns the schema does not know are kept as they are.
+
+    Entity columns become categoricals over their persistent code dictionary,
+    so .cat.codes are the stored int32 codes (with encode_entities=False, plain
+    categoricals over the values present). With extend=False values missing
+    from the dictionary are added to the frame's categories only, and the
+    code files are left as they are.
+    """
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if col in ENTITY_COLUMNS and not encode_entities:
+            out[col] = (series.astype("str") if not isinstance(series.dtype, pd.CategoricalDtype)
+                        else series.cat.remove_unused_categories()).astype("category")
+        elif col in ENTITY_COLUMNS:
+            book = _book(col, codes_dir)
+            out[col] = book.decode(book.encode(series)) if extend else book.lookup(series)
+        elif col in CATEGORY_COLUMNS:
+            out[col] = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+        elif _is_flag(col) and _fits(series, "int8"):
+            out[col] = series.astype(np.int8)
+        elif col in INT_COLUMNS and _fits(series, INT_COLUMNS[col]):
+            out[col] = series.astype(INT_COLUMNS[col])
+        elif col in SCORE_COLUMNS and pd.api.types.is_float_dtype(series):
+            out[col] = series.astype(np.float32)
+        else:
+            out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+
+# ── Storage ─────────────────────────────────────────────────────────────────
+def write(df: pd.DataFrame, path: Path, codes_dir: Path = CODES_DIR, portable: bool = False) -> pd.DataFrame:
+    """
+    Write df in the compact schema: entity columns as int32 codes, categoricals
+    as Parquet dictionaries. Returns the compact frame, as read() would return it.
+
+    With portable=True entity columns are stored as dictionary-encoded strings
+    instead, so the file reads correctly without the code dictionaries. Files
+    published outside the pipeline cache are written this way.
+    """
+    df = compact(df, codes_dir, encode_entities=not portable)
+    entities = [] if portable else [c for c in df.columns if c in ENTITY_COLUMNS]
+    stored = df.assign(**{c: df[c].cat.codes.astype(np.int32) for c in entities})
+    table = pa.Table.from_pandas(stored, preserve_index=False)
+    metadata = {**(table.schema.metadata or {}),
+                _METADATA_KEY: json.dumps({"entity_columns": entities}).encode()}
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(table.replace_schema_metadata(metadata), tmp, compression="snappy")
+    tmp.replace(path)
+    return df
+
+
+def read(path: Path, columns: list[str] | None = None, codes_dir: Path = CODES_DIR) -> pd.DataFrame:
+    """Read a Parquet file into the compact schema; files written by the notebooks are compacted on load."""
+    return from_arrow(pq.read_table(path, columns=columns), codes_dir)
+
+
+def entity_columns(schema: pa.Schema) -> list[str]:
+    """Columns stored as int32 codes, per the metadata write() leaves on the file."""
+    metadata = (schema.metadata or {}).get(_METADATA_KEY)
+    return json.loads(metadata)["entity_columns"] if metadata else []
+
+
+def from_arrow(table: pa.Table, codes_dir: Path = CODES_DIR, entities: list[str] | None = None) -> pd.DataFrame:
+    """
+    An Arrow table read from compact-schema storage, as read() returns it.
+
+    entities defaults to the columns the table's own metadata lists; pass them
+    when the table comes from a dataset scan that dropped the metadata. Reading
+    never writes to the code dictionaries, so the dashboard can read published
+    (string) files without changing data/processed/codes/.
+    """
+    entities = entity_columns(table.schema) if entities is None else entities
+    df = table.to_pandas()
+    for col in entities:
+        if col in df.columns:
+            df[col] = _book(col, codes_dir).decode(df[col].to_numpy())
+    return compact(df, codes_dir, extend=False)
+
+
+def decode(df: pd.DataFrame) -> pd.DataFrame:
+    """Plain string codes and categories, as the notebooks produce them (for CSV export)."""
+    return df.assign(**{c: df[c].astype("str").where(df[c].notna()) for c in df.columns
+                        if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+# ── Size report ─────────────────────────────────────────────────────────────
+def size_report(df: pd.DataFrame, codes_dir: Path = CODES_DIR) -> pd.DataFrame:
+    """In-memory and on-disk size of a frame as the notebooks store it and in the compact schema."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        started = time.perf_counter()
+        df.to_parquet(tmp / "plain.parquet", index=False, compression="snappy")
+        t_plain_write = time.perf_counter() - started
+        started = time.perf_counter()
+        plain = pd.read_parquet(tmp / "plain.parquet")
+        t_plain_read = time.perf_counter() - started
+
+        started = time.perf_counter()
+        write(df, tmp / "compact.parquet", codes_dir)
+        t_write = time.perf_counter() - started
+        started = time.perf_counter()
+        typed = read(tmp / "compact.parquet", codes_dir=codes_dir)
+        t_read = time.perf_counter() - started
+
+        mb = 1024 ** 2
+        strings = [c for c in plain.columns if plain[c].dtype == "str"]
+        legacy = plain.astype({c: object for c in strings})
+        report = pd.DataFrame([
+            {"layout": "notebook (installed pandas)", "memory_mb": plain.memory_usage(deep=True).sum() / mb,
+             "disk_mb": (tmp / "plain.parquet").stat().st_size / mb,
+             "write_s": t_plain_write, "read_s": t_plain_read},
+            {"layout": "notebook, object strings (pandas < 3)", "memory_mb": legacy.memory_usage(deep=True).sum() / mb,
+             "disk_mb": (tmp / "plain.parquet").stat().st_size / mb,
+             "write_s": t_plain_write, "read_s": t_plain_read},
+            {"layout": "compact schema", "memory_mb": typed.memory_usage(deep=True).sum() / mb,
+             "disk_mb": (tmp / "compact.parquet").stat().st_size / mb,
+             "write_s": t_write, "read_s": t_read},
+        ]).round(2)
+    compact_row = report.iloc[-1]
+    print("=" * 70)
+    print(f"COMPACT SCHEMA — {len(df):,} rows × {df.shape[1]} columns")
+    print(report.to_string(index=False))
+    for _, row in report.iloc[:-1].iterrows():
+        print(f"Reduction vs {row['layout']}: {row['memory_mb'] / compact_row['memory_mb']:.1f}x in memory, "
+              f"{row['disk_mb'] / compact_row['disk_mb']:.1f}x on disk")
+    print("=" * 70)
+    return report
+
+
+def _synthetic_risk_scores(n_rows: int) -> pd.DataFrame:
+    """risk_scores-shaped frame: the synthetic feature matrix plus every scored column."""
+    from config import settings
+    from src.features.engine import _synthetic_eda
+    from src.pipeline.stages import eda, features
+
+    fm = features(eda(_synthetic_eda(n_rows)))
+    rng = np.random.default_rng(0)
+    for col in SCORE_COLUMNS:
+        fm[col] = rng.random(n_rows)
+    fm["smmlv"] = fm["year"].map(settings.SMMLV).fillna(settings.SMMLV[2022])
+    for name, multiple in settings.THRESHOLD_MULTIPLES.items():
+        fm[f"threshold_{name.split('_')[0]}"] = fm["smmlv"] * multiple
+    fm["predicted_valor"] = 10 ** (fm["log_valor"] + rng.normal(0, 0.3, n_rows))
+    for col in ["near_minima", "near_menor", "near_any_threshold", "flag_preferential",
+                "flag_concentrated", "community_flag", "flag_overpriced"]:
+        fm[col] = (rng.random(n_rows) < 0.05).astype(np.int64 if col.startswith("near") else float)
+    fm["community_id"] = rng.integers(0, 5_000, n_rows).astype(float)
+    fm["risk_tier"] = rng.choice(["Low", "High", "Medium"], n_rows, p=[0.5, 0.4, 0.1])
+    fm["tier_rank"] = fm["risk_tier"].map({"High": 2, "Medium": 1, "Low": 0})
+    return fm
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Report sizes of a dataset before and after the compact schema")
+    parser.add_argument("input", type=Path, nargs="?")
+    parser.add_argument("--bench", type=int, default=None, help="Use a synthetic risk_scores frame of N rows")
+    args = parser.parse_args()
+
+    if args.bench:
+        with tempfile.TemporaryDirectory() as codes:
+            size_report(_synthetic_risk_scores(args.bench), Path(codes))
+    else:
+        size_report(pd.read_parquet(args.input))
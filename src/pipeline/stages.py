@@ -0,0 +1,361 @@
+# src/pipeline/stages.py
+"""
+Stage definitions for the pipeline runner (src/pipeline/runner.py).
+
+Each stage is the computation of one notebook as a plain function of
+DataFrames. Each stage declares:
+- which upstream stages it reads, and which columns of each;
+- which config/settings.py values it depends on;
+- which source files hold its code.
+
+Stages after features return narrow frames: id_contrato plus the columns the
+stage adds, in the features row order. The risk stage lines them up by
+position instead of re-merging files on id_contrato, so nothing needs
+repairing downstream:
+- no date re-merged from raw (notebook 05);
+- no de-duplication after merges (notebook 06).
+
+    raw ─ eda ─ features ─┬─ anomaly ───┐
+                          ├─ splitting ─┤
+                          ├─ network ───┼─ risk ─┬─ cube
+                          └─ price ─────┘        └─ profiles
+"""
+
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config import settings
+from src.dashboard.cube import CUBE_COLUMNS, build_cube
+from src.dashboard.profiles import PROFILE_COLUMNS, build_profiles
+from src.features.engine import DIRECT_KEYWORDS, build_feature_matrix
+from src.network.graph import MIN_CONTRACTS, VendorAgencyGraph, build_edges
+from src.network.louvain import louvain
+from src.scoring.bundle import (
+    ANOMALY_FEATURES, CATEGORICAL_FEATURES, PRICE_FEATURES,
+    ModelBundle, fit_anomaly, fit_price, risk_component,
+)
+from src.scoring.near_duplicates import STATE_DIR, TEXT_COLUMNS, description_splitting
+from src.scoring.near_duplicates import update as update_near_duplicates
+from src.scoring.splitting import PAIR_KEYS, add_threshold_flags, detect_splitting
+
+DATE_COL = "fecha_de_inicio_del_contrato"
+
+# Raw columns any stage uses (secop_raw has many more)
+RAW_COLUMNS = [
+    "id_contrato", "codigo_entidad", "nombre_entidad", "codigo_proveedor",
+    "valor_del_contrato", "fecha_de_inicio_del_contrato", "fecha_de_fin_del_contrato",
+    "fecha_de_firma", "modalidad_de_contratacion", "estado_contrato",
+    "dias_adicionados", "sector", "departamento", *TEXT_COLUMNS,
+]
+# Raw columns older extracts may lack; the runner reads them as all-null text
+OPTIONAL_RAW_COLUMNS = TEXT_COLUMNS
+
+
+class Stage:
+    """
+    One pipeline step.
+
+    Attributes:
+        name: Stage name; also the cache directory name.
+        func: Called with one DataFrame per input, as keyword arguments named
+            after the input. Returns the output frame, or (frame, extras) where
+            extras is a dict of fitted models or side tables.
+        inputs: Upstream stage (or "raw") → the columns read from it (None: all).
+        settings: Names of the config/settings.py values the output depends on.
+        sources: Source files (relative to the project root) of the code it
+            calls. The stage function's own source is hashed separately.
+        state: Name of a directory, under the runner's state directory, that
+            the stage keeps between runs to save work (passed as state=<path>).
+            The output must not depend on it; it is not part of the key.
+
+    A func with an n_jobs parameter also gets the runner's thread count.
+    """
+
+    def __init__(self, name: str, func, inputs: dict[str, list[str] | None],
+                 settings: tuple[str, ...] = (), sources: tuple[str, ...] = (), state: str | None = None):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.settings = settings
+        self.sources = sources
+        self.state = state
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, inputs={list(self.inputs)})"
+
+
+# ── Notebook 02 ─────────────────────────────────────────────────────────────
+def eda(raw: pd.DataFrame) -> pd.DataFrame:
+    """Calendar columns, value cap and the direct/modified flags notebook 02 adds."""
+    df = raw
+    df["year"] = df[DATE_COL].dt.year
+    df["month"] = df[DATE_COL].dt.month
+    df["quarter"] = df[DATE_COL].dt.quarter
+
+    cap_value = df["valor_del_contrato"].quantile(0.999)
+    df["valor_capped"] = df["valor_del_contrato"].clip(upper=cap_value)
+    df["log_valor"] = np.log10(df["valor_del_contrato"].clip(lower=1))
+
+    df["is_direct"] = df["modalidad_de_contratacion"].str.lower().str.contains(
+        "|".join(DIRECT_KEYWORDS), na=False
+    ).astype(int)
+    df["is_modified"] = (df["estado_contrato"] == "Modificado").astype(int)
+    df["dias_adicionados"] = pd.to_numeric(df["dias_adicionados"], errors="coerce").fillna(0)
+    return df
+
+
+# ── Notebook 03 ─────────────────────────────────────────────────────────────
+def features(eda: pd.DataFrame) -> pd.DataFrame:
+    """The notebook 03 feature matrix, keeping the start date that notebook 05 re-merges from raw."""
+    fm = build_feature_matrix(eda)
+    fm[DATE_COL] = eda[DATE_COL].to_numpy()
+    return fm
+
+
+# ── Notebooks 04-07 (independent of each other) ─────────────────────────────
+def anomaly(features: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    """IsolationForest + HBOS scores and their rank average (notebook 04)."""
+    component = fit_anomaly(features)
+    scores = ModelBundle(component, None, None, "pipeline").anomaly_scores(features)
+    scores.insert(0, "id_contrato", features["id_contrato"].to_numpy())
+    return scores, {"component": component}
+
+
+def splitting(features: pd.DataFrame, eda: pd.DataFrame, state: Path = STATE_DIR, n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Threshold proximity and the pair splitting score every contract inherits (notebook 05),
+    plus the description splitting score of near-threshold pieces with near-duplicate descriptions.
+
+    The near-duplicate index is kept in state: a run whose direct awards
+    extend the last run's only indexes the new ones (near_duplicates.update).
+    """
+    if not np.array_equal(eda["id_contrato"].to_numpy(), features["id_contrato"].to_numpy()):
+        raise ValueError("eda is not aligned with the feature matrix")
+    columns = list(features.columns)
+    fm = add_threshold_flags(features)
+    pair_scores, windows_df = detect_splitting(fm)
+    if len(windows_df):
+        fm = fm.merge(pair_scores[[*PAIR_KEYS, "splitting_score"]], on=PAIR_KEYS, how="left")
+    else:
+        fm["splitting_score"] = np.nan
+    fm["splitting_score"] = fm["splitting_score"].fillna(0)
+
+    # Direct awards with near-duplicate descriptions, whichever vendor got them
+    direct = fm["is_direct"].to_numpy() == 1
+    index = update_near_duplicates(pd.concat(
+        [fm.loc[direct, ["id_contrato", "codigo_entidad", DATE_COL]].reset_index(drop=True),
+         eda.loc[direct, TEXT_COLUMNS].reset_index(drop=True)], axis=1), state, n_jobs)
+    clusters = index.clusters()
+    fm["description_cluster"] = -1
+    fm.loc[direct, "description_cluster"] = clusters
+    fm["description_splitting_score"] = 0.0
+    fm.loc[direct, "description_splitting_score"] = description_splitting(fm[direct], clusters, n_jobs)[0]
+    return fm[["id_contrato", *(c for c in fm.columns if c not in columns)]]
+
+
+def network(features: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    """
+    Graph concentration and Louvain community scores per contract (notebook 06).
+
+    Unlike notebook 06, Louvain starts cold here: it does not warm-start
+    from CommunityState. A warm-started partition depends on every earlier
+    refresh, not only on this stage's inputs and key. Its community ids are
+    matched to the previous run's ids, and the partition can differ from a
+    cold one by a few nodes. A cold start from the same edges and
+    RANDOM_STATE gives the same output every time. Community ids can
+    therefore differ from the notebook's after a refresh. The community
+    flags and scores come from the same Louvain method either way.
+    """
+    _, edges_filtered = build_edges(features, MIN_CONTRACTS)
+    graph = VendorAgencyGraph.from_edges(edges_filtered)
+    vendor_metrics, agency_metrics = graph.vendor_metrics(), graph.agency_metrics()
+
+    vendor = features["codigo_proveedor"].astype(str)
+    agency = features["codigo_entidad"].astype(str)
+    pagerank = vendor_metrics.set_index("codigo_proveedor")["pagerank"]
+    pagerank_norm = (pagerank - pagerank.min()) / (pagerank.max() - pagerank.min())
+    agency_metrics = agency_metrics.set_index("codigo_entidad")
+
+    # Contracts outside the graph (pairs under MIN_CONTRACTS) get 0, as in the notebook
+    out = pd.DataFrame({
+        "id_contrato": features["id_contrato"].to_numpy(),
+        "pagerank_norm": vendor.map(pagerank_norm).fillna(0).to_numpy(),
+        "flag_preferential": vendor.map(vendor_metrics.set_index("codigo_proveedor")["flag_preferential"])
+                                   .fillna(0).to_numpy(),
+        "top_vendor_share": agency.map(agency_metrics["top_vendor_share"]).fillna(0).to_numpy(),
+        "flag_concentrated": agency.map(agency_metrics["flag_concentrated"]).fillna(0).to_numpy(),
+    })
+    out["network_score"] = (
+        out["pagerank_norm"] * 0.4 +
+        out["top_vendor_share"] * 0.4 +
+        out["flag_concentrated"] * 0.2
+    ).clip(0, 1)
+
+    partition = louvain(graph, seed=settings.RANDOM_STATE)
+    community_id = vendor.map(partition)
+    community_stats = features.assign(community_id=community_id.to_numpy()).groupby("community_id").agg(
+        n_contracts=("id_contrato", "count"),
+        n_vendors=("codigo_proveedor", "nunique"),
+        n_agencies=("codigo_entidad", "nunique"),
+        total_spend=("valor_del_contrato", "sum"),
+        direct_rate=("is_direct", "mean"),
+        modified_rate=("is_modified", "mean"),
+        proxy_rate=("proxy_strong", "mean"),
+    ).reset_index().sort_values("total_spend", ascending=False)
+
+    proxy_rate, total_spend = community_stats["proxy_rate"], community_stats["total_spend"]
+    community_stats["flag_systemic"] = (
+        (proxy_rate > proxy_rate.quantile(0.75)) & (total_spend > total_spend.quantile(0.75))
+    ).astype(int)
+    community_stats["flag_collusion"] = (
+        (proxy_rate > proxy_rate.quantile(0.90)) & (total_spend > total_spend.quantile(0.25))
+    ).astype(int)
+    community_stats["flag_tight_community"] = (
+        (community_stats["flag_systemic"] == 1) | (community_stats["flag_collusion"] == 1)
+    ).astype(int)
+
+    by_community = community_stats.set_index("community_id")
+    proxy_norm = (by_community["proxy_rate"] - proxy_rate.min()) / (proxy_rate.max() - proxy_rate.min() + 1e-9)
+    out["community_id"] = community_id.fillna(0).to_numpy()
+    out["community_flag"] = community_id.map(by_community["flag_tight_community"]).fillna(0).to_numpy()
+    out["community_score"] = (
+        community_id.map(proxy_norm).fillna(0).to_numpy() * 0.7 +
+        out["community_flag"] * 0.3
+    ).clip(0, 1)
+    return out, {"community_stats": community_stats}
+
+
+def price(features: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    """XGBoost price benchmark residual score and overpricing flag (notebook 07)."""
+    component = fit_price(features)
+    scores = ModelBundle(None, component, None, "pipeline").price_scores(features)
+    predicted_valor = 10 ** scores["predicted_log_valor"]
+    out = pd.DataFrame({
+        "id_contrato": features["id_contrato"].to_numpy(),
+        "predicted_log_valor": scores["predicted_log_valor"].to_numpy(),
+        "predicted_valor": predicted_valor.to_numpy(),
+        "residual_log": (features["log_valor"] - scores["predicted_log_valor"]).to_numpy(),
+        "residual_pct": ((features["valor_del_contrato"] - predicted_valor) / predicted_valor * 100).to_numpy(),
+        "price_benchmark_score": scores["price_benchmark_score"].to_numpy(),
+        "flag_overpriced": scores["flag_overpriced"].to_numpy(),
+    })
+    return out, {"component": component}
+
+
+# ── Notebook 08 ─────────────────────────────────────────────────────────────
+def risk(features: pd.DataFrame, anomaly: pd.DataFrame, splitting: pd.DataFrame,
+         network: pd.DataFrame, price: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    """Train-normalized composite risk index, tiers and the agency leaderboard (notebook 08)."""
+    parts = [anomaly, splitting, network, price]
+    for part in parts:
+        if not np.array_equal(part["id_contrato"].to_numpy(), features["id_contrato"].to_numpy()):
+            raise ValueError("Stage outputs are not aligned with the feature matrix")
+    fm = pd.concat([features, *(p.drop(columns="id_contrato") for p in parts)], axis=1)
+    fm["price_benchmark_score"] = fm["price_benchmark_score"].fillna(0)
+
+    train_mask = fm[DATE_COL] <= settings.TRAIN_END
+    weights = {
+        "process_anomaly_score": settings.WEIGHT_PROCESS_ANOMALY,
+        "splitting_score": settings.WEIGHT_SPLITTING,
+        "network_score": settings.WEIGHT_NETWORK,
+        "community_score": settings.WEIGHT_COMMUNITY,
+        "price_benchmark_score": settings.WEIGHT_PRICE,
+    }
+    norm_names = {
+        "process_anomaly_score": "process_anomaly_norm", "splitting_score": "splitting_norm",
+        "network_score": "network_norm", "community_score": "community_norm",
+        "price_benchmark_score": "price_norm",
+    }
+    fm["risk_index_raw"] = 0.0
+    for col, weight in weights.items():
+        series = fm[col]
+        train_min, train_max = series[train_mask].min(), series[train_mask].max()
+        fm[norm_names[col]] = ((series - train_min) / (train_max - train_min)).clip(0, 1)
+        fm["risk_index_raw"] += fm[norm_names[col]] * weight
+    fm["risk_index"] = fm["risk_index_raw"]
+
+    # Tiers on process_anomaly_norm: High p50-p90 (audit priority), Medium above p90, Low below p50
+    p50 = fm["process_anomaly_norm"].quantile(0.50)
+    p90 = fm["process_anomaly_norm"].quantile(0.90)
+    fm["risk_tier"] = np.select(
+        [fm["process_anomaly_norm"] >= p90,
+         (fm["process_anomaly_norm"] >= p50) & (fm["process_anomaly_norm"] < p90)],
+        ["Medium", "High"], default="Low",
+    )
+    fm["risk_score_calibrated"] = fm["process_anomaly_norm"]
+    for tier, base in {"High": 0.75, "Medium": 0.45, "Low": 0.15}.items():
+        mask = fm["risk_tier"] == tier
+        within = fm.loc[mask, "process_anomaly_norm"]
+        fm.loc[mask, "risk_score_calibrated"] = base + (within - within.min()) / (within.max() - within.min() + 1e-9) * 0.15
+    fm["tier_rank"] = fm["risk_tier"].map({"High": 2, "Medium": 1, "Low": 0})
+
+    high = fm["risk_tier"] == "High"
+    agency_leaderboard = fm.assign(
+        _high=high.astype(int), _flagged_spend=fm["valor_del_contrato"].where(high, 0),
+    ).groupby(["codigo_entidad", "sector", "departamento"]).agg(
+        total_contracts=("id_contrato", "count"),
+        total_spend=("valor_del_contrato", "sum"),
+        mean_risk_index=("risk_index", "mean"),
+        mean_calibrated_score=("risk_score_calibrated", "mean"),
+        high_risk_contracts=("_high", "sum"),
+        flagged_spend=("_flagged_spend", "sum"),
+    ).reset_index()
+    agency_leaderboard["value_at_risk"] = (
+        agency_leaderboard["flagged_spend"] * agency_leaderboard["mean_calibrated_score"]
+    )
+    agency_leaderboard = agency_leaderboard.sort_values("value_at_risk", ascending=False)
+    return fm, {"component": risk_component(fm, train_mask), "agency_leaderboard": agency_leaderboard}
+
+
+# ── Dashboard ───────────────────────────────────────────────────────────────
+def cube(risk: pd.DataFrame) -> pd.DataFrame:
+    """Year × sector × departamento × risk_tier rollup behind the National Overview tab."""
+    return build_cube(risk)
+
+
+def profiles(risk: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    """Per-agency tables behind the Agency Drill-Down tab; published as a partitioned store."""
+    parts = build_profiles(risk)
+    return parts["agencies"], {"agency_profiles": parts}
+
+
+# ── Registry ────────────────────────────────────────────────────────────────
+_NETWORK_COLUMNS = ["id_contrato", *PAIR_KEYS, "valor_del_contrato", "is_direct", "is_modified", "proxy_strong"]
+
+STAGES = (
+    Stage("eda", eda, {"raw": RAW_COLUMNS}, sources=("src/features/engine.py",)),
+    Stage("features", features, {"eda": None},
+          sources=("src/features/engine.py",)),
+    Stage("anomaly", anomaly, {"features": ["id_contrato", *ANOMALY_FEATURES]},
+          settings=("CONTAMINATION_RATE", "RANDOM_STATE"),
+          sources=("src/scoring/bundle.py", "src/scoring/sketch.py")),
+    Stage("splitting", splitting,
+          {"features": ["id_contrato", *PAIR_KEYS, "is_direct", "valor_del_contrato", "year", DATE_COL],
+           "eda": ["id_contrato", *TEXT_COLUMNS]},
+          settings=("SMMLV", "SPLITTING_WINDOWS_DAYS", "THRESHOLD_PROXIMITY_PCT", "THRESHOLD_MULTIPLES",
+                    "NEAR_DUP_NUM_PERM", "NEAR_DUP_BANDS", "NEAR_DUP_THRESHOLD", "RANDOM_STATE"),
+          sources=("src/scoring/splitting.py", "src/scoring/near_duplicates.py"), state="near_duplicates"),
+    Stage("network", network, {"features": _NETWORK_COLUMNS},
+          settings=("RANDOM_STATE",),
+          sources=("src/network/graph.py", "src/network/louvain.py")),
+    Stage("price", price,
+          {"features": list(dict.fromkeys(["id_contrato", "log_valor", "valor_del_contrato", "is_direct",
+                                           DATE_COL, *PRICE_FEATURES, *CATEGORICAL_FEATURES]))},
+          settings=("RANDOM_STATE", "TRAIN_END", "VALID_START"),
+          sources=("src/scoring/bundle.py",)),
+    Stage("risk", risk,
+          {"features": None, "anomaly": None, "splitting": None, "network": None,
+           "price": ["id_contrato", "price_benchmark_score", "flag_overpriced"]},
+          settings=("TRAIN_END", *(f"WEIGHT_{w}" for w in
+                                   ("PROCESS_ANOMALY", "SPLITTING", "NETWORK", "COMMUNITY", "PRICE"))),
+          sources=("src/scoring/bundle.py",)),
+    Stage("cube", cube, {"risk": CUBE_COLUMNS}, sources=("src/dashboard/cube.py",)),
+    Stage("profiles", profiles, {"risk": PROFILE_COLUMNS},
+          sources=("src/dashboard/profiles.py", "src/dashboard/cube.py")),
+)
+STAGES_BY_NAME = {stage.name: stage for stage in STAGES}
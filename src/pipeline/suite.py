@@ -0,0 +1,377 @@
+# src/pipeline/suite.py
+"""
+Scale benchmark suite: the whole pipeline on synthetic SECOP data at 0.1x-20x.
+
+Each module's --bench times one function against the notebook code it
+replaced. This suite answers a different question: how long does each step
+of the chain take, and how much memory does it need, as volume grows? For
+every scale it writes SyntheticSecop contracts (src/ingest/synthetic.py) as
+secop_raw.parquet and then runs, each in a fresh process:
+
+    generate    the synthetic raw file itself
+    ingest      clean_page over API-shaped pages of the same contracts
+    eda ... profiles
+                every runner stage (src/pipeline/stages.py), from the cached
+                outputs of the stages before it, exactly as the runner
+                executes them (read inputs, compute, write the output)
+    dashboard   publish the scored dataset, cold start (open + explorer
+                index), and the latency of explorer queries, a page read,
+                a filtered scan, the overview cube and an agency profile
+
+Per step it records wall and CPU seconds, peak RSS (VmHWM of the step's
+process, reset when the step starts), rows in and out and rows/s. The
+splitting step also reports the share of planted split contracts scored by
+the pair score and by the description score. A step that fails (say,
+killed for memory at 20x) is recorded with its error and the steps that
+need it are skipped, so a run always says where the chain broke.
+
+Results are appended as JSON lines to outputs/benchmarks/scale.jsonl, one
+record per (run, scale, step), with the git commit and host, so runs from
+different commits can be compared with --compare.
+
+Usage:
+    python src/pipeline/suite.py                          # 0.1x and 1x
+    python src/pipeline/suite.py --scales 0.1 1 10 20 --keep /data/bench
+    python src/pipeline/suite.py --scales 1 --steps ingest splitting dashboard
+    python src/pipeline/suite.py --compare                # last two runs, step by step
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import API_PAGE_SIZE, OUTPUTS, RANDOM_STATE, ROOT_DIR, TRAIN_START, VALID_END
+from src.pipeline.metrics import memory_mb, reset_peak
+from src.pipeline.stages import STAGES, STAGES_BY_NAME
+
+RESULTS_PATH = OUTPUTS / "benchmarks" / "scale.jsonl"
+DEFAULT_SCALES = [0.1, 1]
+STEPS = ["generate", "ingest", *(stage.name for stage in STAGES), "dashboard"]
+# What each step needs to have succeeded first
+NEEDS = {"ingest": [], "eda": ["generate"], "dashboard": ["risk", "cube", "profiles"],
+         **{stage.name: [dep for dep in stage.inputs if dep != "raw"] for stage in STAGES if stage.name != "eda"}}
+
+
+# ── Measurement ─────────────────────────────────────────────────────────────
+def _peak_mb() -> float:
+    """Peak resident memory of this step's process since the last reset_peak, in MB."""
+    return memory_mb()[0] or 0.0
+
+
+class _Timer:
+    """Wall and CPU seconds of a with-block."""
+
+    def __enter__(self):
+        self.wall, self.cpu = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall, self.cpu = time.perf_counter() - self.wall, time.process_time() - self.cpu
+
+
+def _record(step: str, wall: float, cpu: float, peak_mb: float, rows_in: int, rows_out: int, **extra) -> dict:
+    return {"step": step, "status": "ok", "wall_s": round(wall, 3), "cpu_s": round(cpu, 3),
+            "peak_rss_mb": round(peak_mb, 1), "rows_in": int(rows_in), "rows_out": int(rows_out),
+            "rows_per_s": round(rows_in / wall) if wall else None, **extra}
+
+
+# ── Steps (each runs in its own process) ────────────────────────────────────
+def _paths(work: Path) -> dict[str, Path]:
+    return {"raw": work / "secop_raw.parquet", "truth": work / "planted.parquet",
+            "cache": work / "pipeline", "codes": work / "codes", "dataset": work / "risk_scores_dataset"}
+
+
+def _step_generate(work: Path, n_rows: int, seed: int, end: str) -> list[dict]:
+    from src.ingest.synthetic import SyntheticSecop
+
+    paths = _paths(work)
+    reset_peak()
+    with _Timer() as t:
+        stats = SyntheticSecop.build(n_rows, seed, TRAIN_START, end).write(paths["raw"], paths["truth"])
+    return [_record("generate", t.wall, t.cpu, _peak_mb(), n_rows, stats["rows"],
+                    planted_rows=stats["planted_rows"], mb_on_disk=round(paths["raw"].stat().st_size / 1024 ** 2, 1))]
+
+
+def _step_ingest(work: Path, n_rows: int, seed: int, end: str) -> list[dict]:
+    """clean_page over API_PAGE_SIZE pages; building the API rows is not timed."""
+    from src.ingest.secop_client import clean_page
+    from src.ingest.synthetic import SyntheticSecop, api_records
+
+    wall = cpu = peak = 0.0
+    rows_out = 0
+    for k, df in enumerate(SyntheticSecop.build(n_rows, seed, TRAIN_START, end).frames()):
+        for start in range(0, len(df), API_PAGE_SIZE):
+            batch = api_records(df.iloc[start:start + API_PAGE_SIZE], seed=seed + k)
+            reset_peak()
+            with _Timer() as t:
+                rows_out += clean_page(batch).num_rows
+            wall, cpu, peak = wall + t.wall, cpu + t.cpu, max(peak, _peak_mb())
+            del batch
+    return [_record("ingest", wall, cpu, peak, n_rows, rows_out, page_rows=API_PAGE_SIZE)]
+
+
+def _cached(targets: list[str], paths: dict[str, Path]) -> dict:
+    """Metadata of stages already run by earlier steps (nothing runs: they are all cached)."""
+    from src.pipeline.runner import run
+
+    if not targets:
+        return {}
+    return run(targets, workers=1, directory=paths["cache"], raw_path=paths["raw"], codes_dir=paths["codes"],
+               state_dir=paths["cache"].parent)
+
+
+def _step_stage(name: str, work: Path) -> list[dict]:
+    """One runner stage as _execute runs it, from cached inputs."""
+    import pyarrow.parquet as pq
+    from src.pipeline.runner import _execute, _input_columns, _raw_hashes, stage_key
+
+    paths = _paths(work)
+    stage = STAGES_BY_NAME[name]
+    metas = _cached([dep for dep in stage.inputs if dep != "raw"], paths)
+    hashes = {dep: meta["columns"] for dep, meta in metas.items()}
+    files = {dep: Path(meta["path"]) for dep, meta in metas.items()}
+    rows_in = max([meta["rows"] for dep, meta in metas.items() if dep in stage.inputs], default=0)
+    if "raw" in stage.inputs:
+        hashes["raw"] = _raw_hashes(paths["raw"], stage.inputs["raw"], paths["cache"])
+        files["raw"] = paths["raw"]
+        rows_in = pq.ParquetFile(paths["raw"]).metadata.num_rows
+    key = stage_key(stage, hashes)
+    inputs = {dep: (files[dep], _input_columns(stage, dep, hashes[dep])) for dep in stage.inputs}
+
+    reset_peak()
+    with _Timer() as t:
+        meta = _execute(name, key, inputs, paths["cache"], paths["codes"], work)
+    record = _record(name, t.wall, t.cpu, _peak_mb(), rows_in, meta["rows"])
+
+    if name == "splitting" and paths["truth"].exists():
+        scores = pd.read_parquet(meta["path"], columns=["splitting_score", "description_splitting_score"])
+        ids = pd.read_parquet(metas["features"]["path"], columns=["id_contrato"])["id_contrato"]
+        planted = ids.isin(pd.read_parquet(paths["truth"], columns=["id_contrato"])["id_contrato"]).to_numpy()
+        for prefix, col in (("", "splitting_score"), ("description_", "description_splitting_score")):
+            flagged = scores[col].to_numpy() > 0
+            record[f"{prefix}planted_recall"] = round(float(flagged[planted].mean()), 4) if planted.any() else None
+            record[f"{prefix}flagged_share"] = round(float(flagged.mean()), 4)
+    return [record]
+
+
+def _latency_ms(func, repeats: int = 5) -> float:
+    """Median milliseconds of func() over repeats calls."""
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return round(float(np.median(times)) * 1000, 2)
+
+
+def _step_dashboard(work: Path) -> list[dict]:
+    """Publish the scored dataset, then what one dashboard session does, each timed."""
+    from src.dashboard.cube import overview, select
+    from src.dashboard.explorer import INDEX_COLUMNS, ExplorerIndex
+    from src.dashboard.profiles import ProfileStore, write_store
+    from src.dashboard.query import SCORE_COL, ScoredDataset, write_dataset
+    from src.pipeline import schema
+    from src.pipeline.runner import extras
+
+    paths = _paths(work)
+    metas = _cached(["risk", "cube", "profiles"], paths)
+    source, rows = Path(metas["risk"]["path"]), metas["risk"]["rows"]
+
+    reset_peak()
+    with _Timer() as publish:
+        write_dataset(source, paths["dataset"])
+        write_store(extras(metas["profiles"])["agency_profiles"], work / "agency_profiles", paths["codes"])
+    with _Timer() as start:
+        scored = ScoredDataset.open(paths["dataset"], source, paths["codes"])
+        index = ExplorerIndex.build(scored.scan(INDEX_COLUMNS))
+        cube = schema.decode(schema.read(Path(metas["cube"]["path"]), codes_dir=paths["codes"]))
+        store = ProfileStore.open(work / "agency_profiles", paths["codes"])
+    peak = _peak_mb()
+
+    years = (int(cube["year"].min()), int(cube["year"].max()))
+    sectors = list(cube["sector"].dropna().unique()[:2])
+    vendor = str(scored.take(index.query(years)[0][:1], ["codigo_proveedor"])["codigo_proveedor"].iloc[0])
+    agency = str(store.options(years).index[0])
+    positions, _ = index.query(years, tiers=["High"])
+    queries = {
+        "explorer_high_ms": lambda: index.query(years, tiers=["High"]),
+        "explorer_sectors_ms": lambda: index.query(years, sectors=sectors, min_risk=0.3),
+        "explorer_vendor_ms": lambda: index.query(years, vendor=vendor[:5]),
+        "page_ms": lambda: scored.take(positions, ["id_contrato", "codigo_proveedor", SCORE_COL]),
+        "scan_high_ms": lambda: scored.scan(["id_contrato", SCORE_COL], years, tiers=["High"]),
+        "overview_ms": lambda: overview(select(cube, years, sectors=sectors)),
+        "profile_ms": lambda: store.profile(agency, years),
+    }
+    latency = {label: _latency_ms(func) for label, func in queries.items()}
+    return [_record("dashboard", publish.wall + start.wall, publish.cpu + start.cpu, max(peak, _peak_mb()),
+                    rows, rows, publish_s=round(publish.wall, 3), cold_start_s=round(start.wall, 3), **latency)]
+
+
+def _run_step(step: str, work: Path, n_rows: int, seed: int, end: str) -> list[dict]:
+    if step == "generate":
+        return _step_generate(work, n_rows, seed, end)
+    if step == "ingest":
+        return _step_ingest(work, n_rows, seed, end)
+    if step == "dashboard":
+        return _step_dashboard(work)
+    return _step_stage(step, work)
+
+
+# ── Suite ───────────────────────────────────────────────────────────────────
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _host() -> dict:
+    return {"cpus": os.cpu_count(), "python": platform.python_version(), "pandas": pd.__version__,
+            "platform": platform.platform()}
+
+
+def run_suite(scales: list[float] = DEFAULT_SCALES, steps: list[str] | None = None, output: Path = RESULTS_PATH,
+              work: Path | None = None, seed: int = RANDOM_STATE, end: str = VALID_END) -> pd.DataFrame:
+    """
+    Run the steps (default: all) at each scale and append the records to output.
+
+    Args:
+        scales: Multiples of the 1x (1.55M contract) pull.
+        steps: Steps to time; generate and the stages they need still run, untimed.
+        output: JSON-lines results file.
+        work: Directory for the data and stage cache (kept); default a temporary one.
+        seed: Generator seed.
+        end: Last contract start date (coverage past VALID_END needs its year in SMMLV).
+
+    Returns:
+        The records of this run.
+    """
+    from src.ingest.synthetic import scale_rows
+
+    steps = steps or STEPS
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    meta = {"run_id": run_id, "commit": _commit(), "host": _host(), "seed": seed, "end": end}
+    output.parent.mkdir(parents=True, exist_ok=True)
+    records = []
+    for scale in scales:
+        n_rows = scale_rows(scale)
+        scale_dir = Path(work or tempfile.mkdtemp(prefix="auditlens_suite_")) / f"scale_{scale:g}x"
+        shutil.rmtree(scale_dir, ignore_errors=True)
+        scale_dir.mkdir(parents=True)
+        print(f"── {scale:g}x: {n_rows:,} contracts → {scale_dir}")
+        # Stages a requested step depends on run too, or it would have nothing to read
+        wanted, queue = set(), list(steps)
+        while queue:
+            step = queue.pop()
+            if step not in wanted:
+                wanted.add(step)
+                queue.extend(NEEDS.get(step, []))
+        failed = set()
+        try:
+            for step in (s for s in STEPS if s in wanted):
+                base = {**meta, "scale": scale, "rows": n_rows, "step": step}
+                if any(dep in failed for dep in NEEDS.get(step, [])):
+                    failed.add(step)
+                    record = {**base, "status": "skipped"}
+                else:
+                    cmd = [sys.executable, __file__, "--step", step, str(scale_dir), str(n_rows), str(seed), end]
+                    out = subprocess.run(cmd, capture_output=True, text=True)
+                    if out.returncode == 0:
+                        record = {**base, **json.loads(out.stdout.strip().splitlines()[-1])[0]}
+                    else:
+                        failed.add(step)
+                        lines = (out.stderr or "").strip().splitlines()
+                        record = {**base, "status": "failed", "returncode": out.returncode,
+                                  "error": lines[-1] if lines else f"exit code {out.returncode}"}
+                if step not in steps:
+                    continue
+                records.append(record)
+                with open(output, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+                _print_record(record)
+        finally:
+            if work is None:
+                shutil.rmtree(scale_dir.parent, ignore_errors=True)
+    return pd.DataFrame(records)
+
+
+def _print_record(record: dict) -> None:
+    if record["status"] != "ok":
+        print(f"  ✗ {record['step']:<10} {record['status']}  {record.get('error', '')}")
+        return
+    extra = {k: v for k, v in record.items() if k.endswith(("_ms", "_recall", "_share"))}
+    detail = "  " + ", ".join(f"{k}={v}" for k, v in extra.items()) if extra else ""
+    print(f"  ✅ {record['step']:<10} {record['wall_s']:>8.2f}s wall {record['cpu_s']:>8.2f}s cpu "
+          f"{record['peak_rss_mb']:>8.0f} MB {record['rows_per_s'] or 0:>12,} rows/s{detail}")
+
+
+def load_results(path: Path = RESULTS_PATH) -> pd.DataFrame:
+    """Every record in a results file."""
+    return pd.read_json(path, lines=True, dtype={"run_id": str, "commit": str})
+
+
+def compare(results: pd.DataFrame, before: str | None = None, after: str | None = None) -> pd.DataFrame:
+    """Wall time and peak memory per (scale, step) of two runs (default: the last two) and their ratios."""
+    runs = list(dict.fromkeys(results["run_id"]))
+    if before is None or after is None:
+        if len(runs) < 2:
+            raise ValueError("compare needs two runs in the results file")
+        before, after = runs[-2], runs[-1]
+    keys = ["scale", "step"]
+    a = results[results["run_id"] == before].set_index(keys)[["wall_s", "peak_rss_mb"]]
+    b = results[results["run_id"] == after].set_index(keys)[["wall_s", "peak_rss_mb"]]
+    table = a.join(b, lsuffix="_before", rsuffix="_after", how="outer")
+    table["wall_ratio"] = (table["wall_s_after"] / table["wall_s_before"]).round(2)
+    table["peak_ratio"] = (table["peak_rss_mb_after"] / table["peak_rss_mb_before"]).round(2)
+    order = {step: i for i, step in enumerate(STEPS)}
+    return table.reset_index().sort_values(["scale", "step"], key=lambda s: s.map(order) if s.name == "step" else s)
+
+
+def summary(records: pd.DataFrame) -> pd.DataFrame:
+    """One row per step, one wall-time and one peak-memory column per scale."""
+    ok = records[records["status"] == "ok"]
+    table = ok.pivot_table(index="step", columns="scale", values=["wall_s", "peak_rss_mb"], aggfunc="first")
+    table.columns = [f"{'s' if value == 'wall_s' else 'MB'}@{scale:g}x" for value, scale in table.columns]
+    return table.reindex([s for s in STEPS if s in table.index])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time and memory-profile every pipeline step at several data scales")
+    parser.add_argument("--scales", type=float, nargs="+", default=DEFAULT_SCALES, help="Multiples of 1.55M contracts")
+    parser.add_argument("--steps", nargs="+", choices=STEPS, default=None, help="Default: all")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH, help="JSON-lines results file (appended)")
+    parser.add_argument("--keep", type=Path, default=None, help="Keep data and stage cache here")
+    parser.add_argument("--end", default=VALID_END, help="Last contract start date (extends coverage)")
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    parser.add_argument("--compare", nargs="*", metavar="RUN_ID", default=None,
+                        help="Compare two runs (default: the last two) instead of running")
+    parser.add_argument("--step", nargs=5, metavar=("STEP", "WORK", "ROWS", "SEED", "END"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.step:
+        step, work, n_rows, seed, end = args.step
+        print(json.dumps(_run_step(step, Path(work), int(n_rows), int(seed), end)))
+    elif args.compare is not None:
+        print(compare(load_results(args.output), *args.compare[:2]).to_string(index=False))
+    else:
+        records = run_suite(args.scales, args.steps, args.output, args.keep, args.seed, args.end)
+        print("=" * 70)
+        print(f"SCALE SUITE — {', '.join(f'{s:g}x' for s in args.scales)} → {args.output}")
+        print(summary(records).to_string())
+        print("=" * 70)
@@ -0,0 +1,156 @@
+# src/scoring/batch.py
+"""
+Batch scoring of new contracts from a saved model bundle.
+
+Reads a Parquet file of contract feature rows in chunks and scores them in a
+process pool. Each worker loads the bundle once, at start-up, and runs its
+models single-threaded, so N workers use N cores without oversubscription.
+Scored chunks are written in input order as they complete, with a bounded
+number in flight, so memory stays flat for any input size.
+
+Input rows need the feature_matrix columns used by the models (see
+ModelBundle.input_columns). splitting_score, network_score and
+community_score are picked up when present.
+
+Usage:
+    python src/scoring/batch.py new_features.parquet scored.parquet
+    python src/scoring/batch.py new_features.parquet scored.parquet --workers 8 --chunk-rows 50000
+    python src/scoring/batch.py --bench --synthetic 1500000
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import MODELS_DIR
+from src.scoring.bundle import RISK_WEIGHTS, ModelBundle
+
+_bundle = None
+
+
+def _init_worker(version: str, directory: Path) -> None:
+    global _bundle
+    _bundle = ModelBundle.load(version, directory, n_jobs=1)
+
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    return _bundle.score(chunk)
+
+
+def score_file(input_path: Path, output_path: Path, version: str = "latest",
+               directory: Path = MODELS_DIR, chunk_rows: int = 100_000,
+               workers: int | None = None) -> dict:
+    """
+    Score every row of a Parquet file and write the scores to output_path.
+
+    Args:
+        input_path: Contract feature rows.
+        output_path: Parquet file of id_contrato plus the bundle's scores.
+        version: Bundle version, or "latest".
+        directory: Root of the bundle store.
+        chunk_rows: Rows per task.
+        workers: Worker processes (default: all cores).
+
+    Returns:
+        rows, seconds, contracts_per_s, workers and the bundle version used.
+    """
+    workers = workers or os.cpu_count()
+    bundle = ModelBundle.load(version, directory)
+    source = pq.ParquetFile(input_path)
+    available = set(source.schema_arrow.names)
+    columns = [c for c in bundle.input_columns + list(RISK_WEIGHTS) if c in available]
+
+    started = time.perf_counter()
+    rows, writer, pending = 0, None, []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(bundle.version, directory)) as pool:
+
+        def drain(keep: int):
+            nonlocal rows, writer
+            while len(pending) > keep:
+                scored = pa.Table.from_pandas(pending.pop(0).result(), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, scored.schema, compression="snappy")
+                writer.write_table(scored)
+                rows += scored.num_rows
+
+        for batch in source.iter_batches(batch_size=chunk_rows, columns=columns):
+            pending.append(pool.submit(_score_chunk, batch.to_pandas()))
+            drain(keep=2 * workers)
+        drain(keep=0)
+    if writer is not None:
+        writer.close()
+    seconds = time.perf_counter() - started
+
+    stats = {"rows": rows, "seconds": round(seconds, 2),
+             "contracts_per_s": round(rows / seconds) if seconds else 0,
+             "workers": workers, "version": bundle.version}
+    print(f"✅ Scored {rows:,} contracts in {seconds:.1f}s "
+          f"({stats['contracts_per_s']:,} contracts/s, {workers} workers, bundle {bundle.version})")
+    return stats
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_rows: int, workers: list[int], chunk_rows: int = 100_000) -> pd.DataFrame:
+    """Fit a bundle on synthetic contracts, then time scoring them back with 1..N workers."""
+    import tempfile
+
+    import numpy as np
+    from src.features.engine import _synthetic_eda, build_feature_matrix
+    from src.scoring.bundle import fit_bundle
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        eda = _synthetic_eda(n_rows)
+        fm = build_feature_matrix(eda)
+        fm["fecha_de_inicio_del_contrato"] = eda["fecha_de_inicio_del_contrato"].to_numpy()
+        rng = np.random.default_rng(0)
+        for col in ("splitting_score", "network_score", "community_score"):
+            fm[col] = rng.random(len(fm)) * (rng.random(len(fm)) < 0.1)
+
+        started = time.perf_counter()
+        version = fit_bundle(fm, tmp / "models")
+        t_fit = time.perf_counter() - started
+        fm.to_parquet(tmp / "features.parquet", index=False)
+
+        results = []
+        for n in workers:
+            stats = score_file(tmp / "features.parquet", tmp / "scored.parquet", version,
+                               tmp / "models", chunk_rows, n)
+            results.append({"rows": stats["rows"], "workers": n, "score_s": stats["seconds"],
+                            "contracts_per_s": stats["contracts_per_s"], "refit_s": round(t_fit, 1)})
+        results = pd.DataFrame(results)
+
+    print("=" * 70)
+    print("BATCH SCORING BENCHMARK (refit_s = notebooks 04 + 07 fit time, avoided)")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score contract feature rows with a saved model bundle")
+    parser.add_argument("input", type=Path, nargs="?")
+    parser.add_argument("output", type=Path, nargs="?")
+    parser.add_argument("--version", default="latest")
+    parser.add_argument("--dir", type=Path, default=MODELS_DIR)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--bench", action="store_true", help="Fit on synthetic data and time scoring")
+    parser.add_argument("--synthetic", type=int, default=300_000)
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.synthetic, [1, args.workers or os.cpu_count()], args.chunk_rows)
+    else:
+        score_file(args.input, args.output, args.version, args.dir, args.chunk_rows, args.workers)
@@ -0,0 +1,581 @@
+# src/scoring/bundle.py
+"""
+Versioned model artifact bundle.
+
+Notebooks 04, 07 and 08 fit the anomaly models, the price model and the risk
+normalization. Each saves its fitted pieces here as one component of a bundle
+version. Scoring new contracts then loads the bundle and applies the same
+transforms with no refit:
+
+    anomaly  StandardScaler, IsolationForest, HBOS, and a QuantileSketch of
+             each normalized score on the fit population. process_anomaly_score
+             is notebook 04's rank average, with ranks read from the sketches
+             (within max_rank_error of a global rank(pct=True)).
+    price    XGBRegressor on native categoricals, the category levels of
+             CATEGORICAL_FEATURES, per-sector residual quantiles and the
+             train 95th percentile. Bundles saved with one-hot vocabularies
+             (top TOP_CATEGORIES values) still load and score as before.
+    risk     Train-period min/max of every sub-score and the risk weights.
+
+Rows of the fit population get the scores the notebooks gave them.
+
+Layout:
+    models/<version>/anomaly.joblib, price.joblib, risk.joblib, manifest.json
+    models/LATEST                     # version written by the last new_version()
+
+Usage:
+    python src/scoring/bundle.py --fit                       # fit all components from price_integrated.parquet
+    python src/scoring/bundle.py --show                      # manifest of the latest version
+    python src/scoring/bundle.py --bench 1553594             # price model: native categoricals vs notebook 07
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import json
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import (
+    CONTAMINATION_RATE, DATA_PROCESSED, MODELS_DIR, RANDOM_STATE, TRAIN_END, VALID_START,
+    WEIGHT_COMMUNITY, WEIGHT_NETWORK, WEIGHT_PRICE, WEIGHT_PROCESS_ANOMALY, WEIGHT_SPLITTING,
+)
+from src.pipeline import metrics
+from src.scoring.sketch import QuantileSketch
+
+# The only features the anomaly models see (notebook 04)
+ANOMALY_FEATURES = [
+    # Contract behavior
+    "log_valor", "duracion_dias", "dias_firma_a_inicio",
+    "flag_rush", "flag_q4", "flag_december",
+    "flag_short_contract", "flag_long_contract",
+    "is_direct", "is_modified", "is_cancelled", "flag_extended", "dias_adicionados",
+
+    # Vendor behavior
+    "vendor_total_contracts", "vendor_distinct_agencies", "vendor_direct_rate",
+    "vendor_modified_rate", "vendor_tenure_days", "vendor_agency_diversity",
+    "log_vendor_total_spend",
+
+    # Agency concentration
+    "agency_direct_rate", "agency_modified_rate", "agency_hhi",
+    "agency_top_vendor_share", "flag_agency_concentrated",
+]
+
+# Price model inputs known before the price is set (notebook 07)
+PRICE_FEATURES = [
+    # Contract characteristics
+    "duracion_dias", "flag_q4", "flag_december",
+    "flag_short_contract", "flag_long_contract", "is_direct",
+
+    # Vendor historical behavior (no spend aggregates: leakage)
+    "vendor_total_contracts", "vendor_distinct_agencies", "vendor_direct_rate",
+    "vendor_modified_rate", "vendor_tenure_days", "vendor_agency_diversity",
+
+    # Agency characteristics
+    "agency_total_contracts", "agency_direct_rate", "agency_modified_rate",
+    "agency_distinct_vendors", "agency_hhi", "agency_top_vendor_share",
+    "flag_agency_concentrated",
+]
+CATEGORICAL_FEATURES = ["sector", "departamento"]
+TOP_CATEGORIES = 20          # one-hot vocabulary size of bundles saved before native categoricals
+PREDICT_CHUNK_ROWS = 262_144
+
+# Sub-score → weight in the composite risk index (notebook 08)
+RISK_WEIGHTS = {
+    "process_anomaly_score": WEIGHT_PROCESS_ANOMALY,
+    "splitting_score": WEIGHT_SPLITTING,
+    "network_score": WEIGHT_NETWORK,
+    "community_score": WEIGHT_COMMUNITY,
+    "price_benchmark_score": WEIGHT_PRICE,
+}
+
+COMPONENTS = ("anomaly", "price", "risk")
+
+
+# ── Anomaly component (notebook 04) ─────────────────────────────────────────
+def _minmax(values: np.ndarray) -> tuple[float, float]:
+    return float(values.min()), float(values.max())
+
+
+def anomaly_component(scaler, iso, hbos, iso_raw: np.ndarray, hbos_raw: np.ndarray) -> dict:
+    """
+    Package notebook 04's fitted models with their normalization constants.
+
+    Args:
+        scaler, iso, hbos: The fitted StandardScaler, IsolationForest and HBOS.
+        iso_raw: iso.score_samples on the fit population.
+        hbos_raw: hbos.decision_scores_.
+    """
+    iso_range, hbos_range = _minmax(-iso_raw), _minmax(hbos_raw)
+    iso_score = (-iso_raw - iso_range[0]) / (iso_range[1] - iso_range[0])
+    hbos_score = (hbos_raw - hbos_range[0]) / (hbos_range[1] - hbos_range[0])
+    return {
+        "features": list(ANOMALY_FEATURES),
+        "scaler": scaler, "isoforest": iso, "hbos": hbos,
+        "iso_range": iso_range, "hbos_range": hbos_range,
+        "iso_sketch": QuantileSketch.fit(iso_score).to_dict(),
+        "hbos_sketch": QuantileSketch.fit(hbos_score).to_dict(),
+    }
+
+
+@metrics.instrumented("anomaly.fit", rows_in=len)
+def fit_anomaly(fm: pd.DataFrame) -> dict:
+    """Fit the anomaly models exactly as notebook 04 does and return the component."""
+    from pyod.models.hbos import HBOS
+    from sklearn.ensemble import IsolationForest
+    from sklearn.preprocessing import StandardScaler
+
+    X = fm[ANOMALY_FEATURES]
+    scaler = StandardScaler()
+    X_scaled = pd.DataFrame(scaler.fit_transform(X), columns=ANOMALY_FEATURES, index=X.index)
+    with metrics.span("anomaly.isoforest_fit", rows_in=len(X_scaled)):
+        iso = IsolationForest(n_estimators=200, contamination=CONTAMINATION_RATE,
+                              random_state=RANDOM_STATE, n_jobs=-1).fit(X_scaled)
+    with metrics.span("anomaly.hbos_fit", rows_in=len(X_scaled)):
+        hbos = HBOS(n_bins=50, contamination=CONTAMINATION_RATE).fit(X_scaled)
+    return anomaly_component(scaler, iso, hbos, iso.score_samples(X_scaled), hbos.decision_scores_)
+
+
+# ── Price component (notebook 07) ───────────────────────────────────────────
+def category_levels(fm: pd.DataFrame) -> dict[str, list]:
+    """Every observed value of each categorical feature, sorted: the model's category codes."""
+    return {cat: sorted(fm[cat].dropna().unique().tolist())
+            for cat in CATEGORICAL_FEATURES if cat in fm.columns}
+
+
+def price_matrix(df: pd.DataFrame, categories: dict[str, list]) -> pd.DataFrame:
+    """
+    PRICE_FEATURES as float32 (nulls filled with 0) plus CATEGORICAL_FEATURES as categoricals.
+
+    Categoricals are recoded to the fitted levels, so a code means the same
+    value at fit and predict time; values unseen at fit time become missing.
+    """
+    X = pd.DataFrame({col: df[col].fillna(0).to_numpy(dtype=np.float32) for col in PRICE_FEATURES},
+                     index=df.index)
+    for cat, levels in categories.items():
+        X[cat] = pd.Categorical(df[cat], categories=levels)
+    return X
+
+
+def category_vocabulary(fm: pd.DataFrame) -> dict[str, list]:
+    """The TOP_CATEGORIES most common values of each categorical feature (one-hot bundles)."""
+    return {cat: fm[cat].value_counts().head(TOP_CATEGORIES).index.tolist()
+            for cat in CATEGORICAL_FEATURES if cat in fm.columns}
+
+
+def onehot_price_matrix(df: pd.DataFrame, vocabulary: dict[str, list]) -> pd.DataFrame:
+    """PRICE_FEATURES plus one-hot columns for the vocabulary, nulls filled with 0 (notebook 07 before native categoricals)."""
+    X = df[PRICE_FEATURES].copy()
+    for cat, values in vocabulary.items():
+        for val in values:
+            X[f"{cat}_{val}"] = (df[cat] == val).astype(int)
+    return X.fillna(0)
+
+
+def predict_price(model, X: pd.DataFrame, chunk_rows: int = PREDICT_CHUNK_ROWS) -> np.ndarray:
+    """model.predict over row chunks, each on all of the model's threads; bounds the temporary copies to one chunk."""
+    out = np.empty(len(X), dtype=np.float32)
+    for start in range(0, len(X), chunk_rows):
+        out[start:start + chunk_rows] = model.predict(X.iloc[start:start + chunk_rows])
+    return out
+
+
+def _sector_quantiles(abs_residual: pd.Series, sector: pd.Series) -> dict:
+    q = abs_residual.groupby(sector, observed=True).quantile([0.01, 0.99]).unstack()
+    return {s: (float(lo), float(hi)) for s, lo, hi in zip(q.index, q[0.01], q[0.99])}
+
+
+def sector_normalize(abs_residual: np.ndarray, sector: pd.Series, quantiles: dict,
+                      fallback: tuple[float, float]) -> np.ndarray:
+    """Per-sector min-max of abs residuals to [0, 1], as sector_normalize in notebook 07."""
+    # One gather of the stored quantiles by sector code; code -1 (a sector
+    # unseen at fit time, or none) reads the all-sector fallback at the end
+    codes = pd.Categorical(sector, categories=list(quantiles)).codes
+    lo = np.array([q[0] for q in quantiles.values()] + [fallback[0]])[codes]
+    hi = np.array([q[1] for q in quantiles.values()] + [fallback[1]])[codes]
+    flat = hi - lo == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        base = np.clip((abs_residual - lo) / np.where(flat, 1.0, hi - lo), 0, 1)
+    base[flat] = 0.5
+    # Contracts without a sector are not normalized in the notebook either
+    base[sector.isna().to_numpy()] = np.nan
+    return base
+
+
+def price_component(model, categories: dict[str, list], abs_residual_log: pd.Series,
+                    sector: pd.Series, threshold_95: float) -> dict:
+    """
+    Package notebook 07's fitted price model with its normalization constants.
+
+    Args:
+        model: The fitted XGBRegressor.
+        categories: Category levels the model was fitted with (category_levels on the fit frame).
+        abs_residual_log: |log_valor - predicted_log_valor| on the fit frame.
+        sector: Sector of each fit row.
+        threshold_95: Train 95th percentile of price_benchmark_score.
+    """
+    valid = sector.notna()
+    fallback = abs_residual_log[valid].quantile([0.01, 0.99])
+    return {
+        "features": list(PRICE_FEATURES), "categories": categories, "model": model,
+        "sector_quantiles": _sector_quantiles(abs_residual_log, sector),
+        "fallback_quantiles": (float(fallback[0.01]), float(fallback[0.99])),
+        "threshold_95": float(threshold_95),
+    }
+
+
+def price_model():
+    """Notebook 07's XGBRegressor settings, splitting categoricals natively."""
+    import xgboost as xgb
+
+    return xgb.XGBRegressor(
+        n_estimators=200, max_depth=6, learning_rate=0.1, subsample=0.8, colsample_bytree=0.8,
+        random_state=RANDOM_STATE, n_jobs=-1, tree_method="hist",
+        early_stopping_rounds=20, eval_metric="rmse", enable_categorical=True,
+    )
+
+
+@metrics.instrumented("price.fit", rows_in=len)
+def fit_price(fm: pd.DataFrame) -> dict:
+    """Fit the price model as notebook 07 does and return the component."""
+    categories = category_levels(fm)
+    X = price_matrix(fm, categories)
+    y = fm["log_valor"]
+    train_mask = (fm["fecha_de_inicio_del_contrato"] <= TRAIN_END).to_numpy()
+    valid_mask = (fm["fecha_de_inicio_del_contrato"] >= VALID_START).to_numpy()
+
+    model = price_model()
+    with metrics.span("price.xgb_fit", rows_in=int(train_mask.sum())):
+        model.fit(X[train_mask], y[train_mask], eval_set=[(X[valid_mask], y[valid_mask])], verbose=False)
+
+    with metrics.span("price.predict", rows_in=len(X)):
+        abs_residual = (y - predict_price(model, X)).abs()
+    component = price_component(model, categories, abs_residual, fm["sector"], np.nan)
+    score = _price_score(component, abs_residual.to_numpy(), fm)
+    component["threshold_95"] = float(pd.Series(score)[train_mask].quantile(0.95))
+    return component
+
+
+def _price_score(component: dict, abs_residual: np.ndarray, df: pd.DataFrame) -> np.ndarray:
+    base = sector_normalize(abs_residual, df["sector"], component["sector_quantiles"],
+                             component["fallback_quantiles"])
+    # Overpricing matters more without competition: direct ×1.0, competitive ×0.5
+    return base * (0.5 + 0.5 * df["is_direct"].to_numpy())
+
+
+# ── Risk component (notebook 08) ────────────────────────────────────────────
+def risk_component(fm: pd.DataFrame, train_mask: pd.Series) -> dict:
+    """Train-period min/max of each sub-score, and the weights they are combined with."""
+    ranges = {}
+    for col in RISK_WEIGHTS:
+        series = fm[col].fillna(0) if col in fm.columns else pd.Series(0.0, index=fm.index)
+        ranges[col] = (float(series[train_mask].min()), float(series[train_mask].max()))
+    return {"ranges": ranges, "weights": dict(RISK_WEIGHTS)}
+
+
+# ── Versioned storage ───────────────────────────────────────────────────────
+def new_version(directory: Path = MODELS_DIR) -> str:
+    """Start a bundle version (UTC timestamp) and make it the latest."""
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    (directory / version).mkdir(parents=True, exist_ok=True)
+    (directory / "LATEST").write_text(version)
+    return version
+
+
+def latest_version(directory: Path = MODELS_DIR) -> str:
+    return (directory / "LATEST").read_text().strip()
+
+
+def _library_versions() -> dict:
+    import sklearn, xgboost, pyod
+    return {"sklearn": sklearn.__version__, "xgboost": xgboost.__version__,
+            "pyod": pyod.__version__, "numpy": np.__version__, "pandas": pd.__version__}
+
+
+def save_component(name: str, component: dict, version: str | None = None,
+                   directory: Path = MODELS_DIR, fitted_rows: int | None = None) -> Path:
+    """
+    Write one component into a bundle version and record it in manifest.json.
+
+    Args:
+        name: One of COMPONENTS.
+        component: Output of anomaly_component / price_component / risk_component.
+        version: Bundle version; None adds to the latest one.
+        directory: Root of the bundle store.
+        fitted_rows: Rows the component was fitted on, for the manifest.
+    """
+    if name not in COMPONENTS:
+        raise ValueError(f"Unknown component {name!r}; expected one of {COMPONENTS}")
+    version = version or latest_version(directory)
+    path = directory / version / f"{name}.joblib"
+    joblib.dump(component, path)
+
+    manifest_path = directory / version / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {"version": version}
+    manifest[name] = {
+        "saved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sha256": hashlib.sha256(path.read_bytes()).hexdigest(),
+        "fitted_rows": fitted_rows,
+        "libraries": _library_versions(),
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return path
+
+
+# ── Bundle ──────────────────────────────────────────────────────────────────
+class ModelBundle:
+    """The three fitted components of one version; scores contract feature rows."""
+
+    def __init__(self, anomaly: dict, price: dict, risk: dict | None, version: str):
+        self.anomaly = anomaly
+        self.price = price
+        self.risk = risk
+        self.version = version
+
+    @classmethod
+    def load(cls, version: str = "latest", directory: Path = MODELS_DIR,
+             n_jobs: int | None = None) -> "ModelBundle":
+        """
+        Load and verify a bundle version.
+
+        Args:
+            version: Version directory name, or "latest".
+            directory: Root of the bundle store.
+            n_jobs: Override the models' thread count (1 inside worker processes).
+        """
+        if version == "latest":
+            version = latest_version(directory)
+        manifest = json.loads((directory / version / "manifest.json").read_text())
+        components = {}
+        for name in COMPONENTS:
+            if name not in manifest:
+                raise FileNotFoundError(f"Bundle {version} has no {name} component")
+            path = directory / version / f"{name}.joblib"
+            if hashlib.sha256(path.read_bytes()).hexdigest() != manifest[name]["sha256"]:
+                raise ValueError(f"{path} does not match its manifest checksum")
+            components[name] = joblib.load(path)
+        if n_jobs is not None:
+            components["anomaly"]["isoforest"].set_params(n_jobs=n_jobs)
+            components["price"]["model"].set_params(n_jobs=n_jobs)
+        return cls(**components, version=version)
+
+    @property
+    def input_columns(self) -> list[str]:
+        """Columns score() reads; sub-scores from other stages are optional."""
+        cols = ["id_contrato", "log_valor", "is_direct", *self.anomaly["features"],
+                *self.price["features"], *self.price.get("categories", self.price.get("vocabulary"))]
+        return list(dict.fromkeys(cols))
+
+    def anomaly_scores(self, df: pd.DataFrame) -> pd.DataFrame:
+        """score_isoforest, score_hbos and process_anomaly_score (notebook 04)."""
+        a = self.anomaly
+        X_scaled = pd.DataFrame(a["scaler"].transform(df[a["features"]]), columns=a["features"])
+        (iso_min, iso_max), (hbos_min, hbos_max) = a["iso_range"], a["hbos_range"]
+        iso_score = (-a["isoforest"].score_samples(X_scaled) - iso_min) / (iso_max - iso_min)
+        hbos_score = (a["hbos"].decision_function(X_scaled) - hbos_min) / (hbos_max - hbos_min)
+        return pd.DataFrame({
+            "score_isoforest": iso_score,
+            "score_hbos": hbos_score,
+            "process_anomaly_score": (QuantileSketch.from_dict(a["iso_sketch"]).rank_pct(iso_score)
+                                      + QuantileSketch.from_dict(a["hbos_sketch"]).rank_pct(hbos_score)) / 2,
+        }, index=df.index)
+
+    def price_scores(self, df: pd.DataFrame) -> pd.DataFrame:
+        """predicted_log_valor, price_benchmark_score and flag_overpriced (notebook 07)."""
+        p = self.price
+        if "categories" in p:
+            predicted = predict_price(p["model"], price_matrix(df, p["categories"]))
+        else:
+            predicted = p["model"].predict(onehot_price_matrix(df, p["vocabulary"]))
+        score = _price_score(p, np.abs(df["log_valor"].to_numpy() - predicted), df)
+        return pd.DataFrame({
+            "predicted_log_valor": predicted,
+            "price_benchmark_score": score,
+            "flag_overpriced": (score > p["threshold_95"]).astype(int),
+        }, index=df.index)
+
+    def score(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Score contract feature rows with no refit.
+
+        splitting_score, network_score and community_score are read from df
+        when present (pair/vendor lookups from their own stages) and count as 0
+        otherwise, as missing sub-scores do in notebook 08.
+        """
+        scores = pd.concat([self.anomaly_scores(df), self.price_scores(df)], axis=1)
+        risk_index = np.zeros(len(df))
+        for col, weight in self.risk["weights"].items():
+            if col in scores.columns:
+                values = scores[col].fillna(0).to_numpy()
+            elif col in df.columns:
+                values = df[col].fillna(0).to_numpy(dtype=float)
+            else:
+                values = np.zeros(len(df))
+            lo, hi = self.risk["ranges"][col]
+            norm = np.clip((values - lo) / (hi - lo), 0, 1) if hi > lo else np.zeros(len(df))
+            risk_index += norm * weight
+        scores["risk_index"] = risk_index
+        scores.insert(0, "id_contrato", df["id_contrato"].to_numpy())
+        return scores
+
+
+def fit_bundle(fm: pd.DataFrame, directory: Path = MODELS_DIR) -> str:
+    """Fit all three components on a price_integrated-shaped frame and save a new version."""
+    version = new_version(directory)
+    anomaly = fit_anomaly(fm)
+    save_component("anomaly", anomaly, version, directory, fitted_rows=len(fm))
+    price = fit_price(fm)
+    save_component("price", price, version, directory, fitted_rows=len(fm))
+
+    bundle = ModelBundle(anomaly, price, None, version)
+    scored = fm.drop(columns=[c for c in ("process_anomaly_score", "price_benchmark_score") if c in fm.columns])
+    scored = pd.concat([scored, bundle.anomaly_scores(fm)[["process_anomaly_score"]],
+                        bundle.price_scores(fm)[["price_benchmark_score"]]], axis=1)
+    train_mask = fm["fecha_de_inicio_del_contrato"] <= TRAIN_END
+    save_component("risk", risk_component(scored, train_mask), version, directory, fitted_rows=int(train_mask.sum()))
+    return version
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def _notebook_sector_normalize(fm: pd.DataFrame) -> pd.Series:
+    """Notebook 07's per-sector groupby().apply, on fm["abs_residual_log"]."""
+    def normalize_group(group):
+        residual_min = group["abs_residual_log"].quantile(0.01)
+        residual_max = group["abs_residual_log"].quantile(0.99)
+        if residual_max - residual_min == 0:
+            return pd.Series(0.5, index=group.index)
+        return ((group["abs_residual_log"] - residual_min) / (residual_max - residual_min)).clip(0, 1)
+
+    return fm.groupby("sector", group_keys=False).apply(normalize_group, include_groups=False).reindex(fm.index)
+
+
+def _price_run(mode: str, path: Path) -> dict:
+    """Notebook 07's price model (mode "notebook") or fit_price's (mode "native") on path; run in a fresh process."""
+    import time
+
+    from sklearn.metrics import r2_score
+    from src.pipeline import schema
+
+    # Peak reset here, so it is this run's alone (off Linux it includes the imports)
+    metrics.reset_peak()
+    before = metrics.memory_mb()[1] or 0.0
+    times = {}
+    started = time.perf_counter()
+    if mode == "notebook":
+        fm = pd.read_parquet(path)
+        X = onehot_price_matrix(fm, category_vocabulary(fm))
+        model = price_model().set_params(enable_categorical=False)
+    else:
+        fm = schema.read(path, columns=["log_valor", "fecha_de_inicio_del_contrato", *PRICE_FEATURES,
+                                        *CATEGORICAL_FEATURES])
+        X = price_matrix(fm, category_levels(fm))
+        model = price_model()
+    y = fm["log_valor"]
+    train_mask = (fm["fecha_de_inicio_del_contrato"] <= TRAIN_END).to_numpy()
+    valid_mask = (fm["fecha_de_inicio_del_contrato"] >= VALID_START).to_numpy()
+    times["load_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model.fit(X[train_mask], y[train_mask], eval_set=[(X[valid_mask], y[valid_mask])], verbose=False)
+    times["fit_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    predicted = model.predict(X) if mode == "notebook" else predict_price(model, X)
+    times["predict_s"] = time.perf_counter() - started
+
+    abs_residual = (y - predicted).abs()
+    started = time.perf_counter()
+    if mode == "notebook":
+        base = _notebook_sector_normalize(fm.assign(abs_residual_log=abs_residual)).to_numpy()
+    else:
+        sector = fm["sector"]
+        fallback = abs_residual[sector.notna()].quantile([0.01, 0.99])
+        base = sector_normalize(abs_residual.to_numpy(), sector, _sector_quantiles(abs_residual, sector),
+                                 (fallback[0.01], fallback[0.99]))
+    times["normalize_s"] = time.perf_counter() - started
+    return {**times, "columns": X.shape[1], "X_mb": X.memory_usage(deep=True).sum() / 1024 ** 2,
+            "peak_mb": (metrics.memory_mb()[0] or float("nan")) - before,
+            "r2_valid": r2_score(y[valid_mask], predicted[valid_mask]),
+            "score_mean": float(np.nanmean(base))}
+
+
+def benchmark(n_rows: int = 1_553_594) -> pd.DataFrame:
+    """Notebook 07's one-hot price model against native categoricals, each in a fresh process."""
+    import subprocess
+    import tempfile
+    import time
+
+    from src.features.engine import _synthetic_eda, build_feature_matrix
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "network_scores.parquet"
+        eda = _synthetic_eda(n_rows)
+        fm = build_feature_matrix(eda)
+        fm["fecha_de_inicio_del_contrato"] = eda["fecha_de_inicio_del_contrato"].to_numpy()
+        # SECOP-like long tails (the synthetic frame has 4 of each), with prices
+        # that depend on them, so the top-20 cutoff and R² mean something
+        rng = np.random.default_rng(0)
+        for cat, n_levels in [("sector", 45), ("departamento", 33)]:
+            share = 1 / np.arange(1, n_levels + 1) ** 1.2
+            level = rng.choice(n_levels, len(fm), p=share / share.sum())
+            fm[cat] = np.array([f"{cat} {i:02d}" for i in range(n_levels)])[level]
+            fm["log_valor"] = (fm["log_valor"] if cat == "departamento" else 7.3) + rng.normal(0, 0.4, n_levels)[level]
+        fm["log_valor"] += (0.2 * np.log1p(fm["duracion_dias"].clip(lower=0)) + 0.3 * fm["is_direct"]
+                            + rng.normal(0, 0.3, len(fm)))
+        fm.to_parquet(path, index=False)
+
+        # The gather normalization against the notebook's groupby().apply on the same residuals
+        residual = pd.Series(np.random.default_rng(0).gamma(1.0, 0.3, len(fm)), index=fm.index)
+        started = time.perf_counter()
+        reference = _notebook_sector_normalize(fm.assign(abs_residual_log=residual)).to_numpy()
+        t_apply = time.perf_counter() - started
+        started = time.perf_counter()
+        quantiles = _sector_quantiles(residual, fm["sector"])
+        gathered = sector_normalize(residual.to_numpy(), fm["sector"], quantiles, (0.0, 1.0))
+        t_gather = time.perf_counter() - started
+        normalize_diff = np.nanmax(np.abs(gathered - reference))
+        del fm, eda
+
+        runs = {}
+        for mode in ["notebook", "native"]:
+            out = subprocess.run([sys.executable, __file__, "--price-run", mode, str(path)],
+                                 capture_output=True, text=True, check=True)
+            runs[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    results = pd.DataFrame(runs).T.astype(float).round(3)
+    results["columns"] = results["columns"].astype(int)
+    print("=" * 70)
+    print(f"PRICE MODEL — {n_rows:,} contracts (notebook 07 one-hot vs native categoricals)")
+    print(results.to_string())
+    print(f"\nSector normalization on identical residuals: groupby().apply {t_apply:.2f}s, "
+          f"quantiles + gather {t_gather:.2f}s, max diff {normalize_diff:.1e}")
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fit or inspect the model artifact bundle")
+    parser.add_argument("--input", type=Path, default=DATA_PROCESSED / "price_integrated.parquet")
+    parser.add_argument("--dir", type=Path, default=MODELS_DIR)
+    parser.add_argument("--fit", action="store_true", help="Fit every component and save a new version")
+    parser.add_argument("--show", action="store_true", help="Print the latest manifest")
+    parser.add_argument("--bench", type=int, default=None, help="Benchmark the price model on N synthetic contracts")
+    parser.add_argument("--price-run", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.price_run:
+        print(json.dumps(_price_run(args.price_run[0], Path(args.price_run[1]))))
+    elif args.bench:
+        benchmark(args.bench)
+    elif args.fit:
+        version = fit_bundle(pd.read_parquet(args.input), args.dir)
+        print(f"✅ Bundle {version} → {args.dir / version}")
+    else:
+        print((args.dir / latest_version(args.dir) / "manifest.json").read_text())
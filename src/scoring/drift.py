@@ -0,0 +1,480 @@
+# src/scoring/drift.py
+"""
+Streaming drift monitor: frozen bin edges and mergeable monthly histograms for PSI.
+
+Notebook 09's compute_psi takes one feature at a time on the full train and
+validation frames. It re-derives percentile breakpoints and runs np.histogram
+twice per feature, and it only compares one train window with one validation
+window. A rolling 12-month baseline would rescan the history every month.
+
+DriftMonitor keeps instead:
+
+    edges    per feature, the decile breakpoints of the baseline period
+             (contracts up to baseline_end), frozen when the monitor is built:
+             np.percentile + np.unique, exactly as compute_psi derives them
+    counts   an int64 tensor segment × month × feature × bucket, where a
+             segment is the whole country ("all", ""), one sector or one
+             departamento, and the buckets are: below the first edge, the
+             bins, above the last edge, missing
+
+A histogram over any set of months is a sum of months, and two monitors'
+histograms merge by adding counts. update() adds a batch of newly scored
+contracts to the months and segments it falls in. Pass the previous versions
+of re-scored contracts as removed to subtract them. Nothing else is rescanned.
+
+PSI for every segment × month × feature is one vectorized pass over the
+tensor, against either the frozen baseline period or a rolling window of the
+preceding months. Shares and the 0.0001 floor for empty bins follow
+compute_psi, including its quirks: the denominator counts every contract,
+so missing and out-of-range values only dilute the shares, and features
+with fewer than 3 distinct edges get PSI 0. Status is "stable" below
+PSI_MONITOR_THRESHOLD, "monitor" below PSI_RETRAIN_THRESHOLD and "retrain"
+above that.
+
+Usage:
+    python src/scoring/drift.py --build                        # from data/processed/risk_scores.parquet
+    python src/scoring/drift.py --update new_scored.parquet    # add a month of newly scored contracts
+    python src/scoring/drift.py --report --rolling 12          # cells at or above PSI_MONITOR_THRESHOLD
+    python src/scoring/drift.py --bench 1553594
+"""
+
+from pathlib import Path
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import DATA_PROCESSED, PSI_MONITOR_THRESHOLD, PSI_RETRAIN_THRESHOLD, TRAIN_END
+
+STATE_DIR = DATA_PROCESSED / "drift_monitor"
+DATE_COL = "fecha_de_inicio_del_contrato"
+SEGMENTS = ["sector", "departamento"]
+MONITOR_FEATURES = [
+    "log_valor",
+    "duracion_dias",
+    "dias_firma_a_inicio",
+    "is_direct",
+    "is_modified",
+    "vendor_direct_rate",
+    "vendor_modified_rate",
+    "agency_hhi",
+    "agency_top_vendor_share",
+    "splitting_score",
+    "network_score",
+    "process_anomaly_score",
+    "risk_index",
+]
+N_BINS = 10
+FLOOR = 0.0001  # share given to empty bins, as in compute_psi
+
+# Bucket layout along the last axis of counts
+_BELOW, _ABOVE, _MISSING = 0, N_BINS + 1, N_BINS + 2
+_BUCKETS = N_BINS + 3
+
+
+def compute_psi(train_series: pd.Series, valid_series: pd.Series, n_bins: int = N_BINS,
+                breakpoints: np.ndarray | None = None) -> float:
+    """Notebook 09's PSI between two samples; breakpoints, if given, replace the train percentiles (reference)."""
+    if breakpoints is None:
+        breakpoints = np.unique(np.percentile(train_series.dropna(), np.linspace(0, 100, n_bins + 1)))
+    if len(breakpoints) < 3:
+        return 0.0
+    train_pct = np.histogram(train_series.dropna(), bins=breakpoints)[0] / len(train_series)
+    valid_pct = np.histogram(valid_series.dropna(), bins=breakpoints)[0] / len(valid_series)
+    train_pct = np.where(train_pct == 0, FLOOR, train_pct)
+    valid_pct = np.where(valid_pct == 0, FLOOR, valid_pct)
+    return float(np.sum((valid_pct - train_pct) * np.log(valid_pct / train_pct)))
+
+
+def status(psi) -> np.ndarray:
+    """stable / monitor / retrain per PSI value, by the thresholds in config/settings.py."""
+    psi = np.asarray(psi, dtype=np.float64)
+    return np.select([psi >= PSI_RETRAIN_THRESHOLD, psi >= PSI_MONITOR_THRESHOLD], ["retrain", "monitor"], "stable")
+
+
+def _psi(base: np.ndarray, cur: np.ndarray, n_edges: np.ndarray) -> np.ndarray:
+    """PSI over the last axis of two (..., F, buckets) count arrays; NaN where either side is empty."""
+    base_total = base.sum(-1, keepdims=True).astype(np.float64)
+    cur_total = cur.sum(-1, keepdims=True).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        b = base[..., 1:N_BINS + 1] / base_total
+        c = cur[..., 1:N_BINS + 1] / cur_total
+        b = np.where(b == 0, FLOOR, b)
+        c = np.where(c == 0, FLOOR, c)
+        used = np.arange(N_BINS) < (n_edges - 1)[:, None]
+        psi = np.where(used, (c - b) * np.log(c / b), 0.0).sum(-1)
+    psi = np.where(n_edges < 3, 0.0, psi)
+    return np.where((base_total[..., 0] == 0) | (cur_total[..., 0] == 0), np.nan, psi)
+
+
+class DriftMonitor:
+    """
+    Frozen bin edges and per-segment, per-month histograms of the monitored features.
+
+    Attributes:
+        features: Monitored feature names (F).
+        edges: (F, N_BINS + 1) frozen bin edges, padded with +inf.
+        n_edges: (F,) distinct edges per feature (n_edges - 1 bins).
+        segments: DataFrame of (segment, value); row s is segment s, row 0 is ("all", "").
+        months: pd.PeriodIndex of consecutive months; position m is month m.
+        counts: (S, M, F, N_BINS + 3) int64 counts: below, bins, above, missing.
+        baseline_end: Last month of the period the edges were frozen on.
+    """
+
+    def __init__(self, features: list[str], edges: np.ndarray, n_edges: np.ndarray, segments: pd.DataFrame,
+                 months: pd.PeriodIndex, counts: np.ndarray, baseline_end: pd.Period):
+        self.features = list(features)
+        self.edges = edges
+        self.n_edges = n_edges
+        self.segments = segments.reset_index(drop=True)
+        self.months = months
+        self.counts = counts
+        self.baseline_end = baseline_end
+        self.last_update = {}
+
+    # ── Build / persist ─────────────────────────────────────────────────────
+    @classmethod
+    def build(cls, contracts: pd.DataFrame, baseline_end: str = TRAIN_END,
+              features: list[str] = MONITOR_FEATURES) -> "DriftMonitor":
+        """Freeze edges on the contracts up to baseline_end, then histogram all contracts."""
+        features = [f for f in features if f in contracts.columns]
+        baseline = contracts[contracts[DATE_COL] <= pd.Timestamp(baseline_end)]
+        edges = np.full((len(features), N_BINS + 1), np.inf)
+        n_edges = np.zeros(len(features), dtype=np.int64)
+        for f, col in enumerate(features):
+            found = np.unique(np.percentile(baseline[col].dropna(), np.linspace(0, 100, N_BINS + 1)))
+            edges[f, :len(found)] = found
+            n_edges[f] = len(found)
+        monitor = cls(features, edges, n_edges, pd.DataFrame({"segment": ["all"], "value": [""]}),
+                      pd.PeriodIndex([], freq="M"), np.zeros((1, 0, len(features), _BUCKETS), dtype=np.int64),
+                      pd.Period(baseline_end, freq="M"))
+        monitor.update(contracts)
+        return monitor
+
+    @classmethod
+    def load(cls, directory: Path = STATE_DIR) -> "DriftMonitor":
+        """Read a monitor written by save()."""
+        meta = json.loads((directory / "meta.json").read_text())
+        edges = np.array(meta["edges"], dtype=np.float64)
+        n_edges = np.array(meta["n_edges"], dtype=np.int64)
+        edges[np.arange(edges.shape[1]) >= n_edges[:, None]] = np.inf
+        months = pd.period_range(meta["first_month"], periods=meta["n_months"], freq="M") \
+            if meta["n_months"] else pd.PeriodIndex([], freq="M")
+        return cls(meta["features"], edges, n_edges,
+                   pd.DataFrame(meta["segments"], columns=["segment", "value"]), months,
+                   np.load(directory / "counts.npy"), pd.Period(meta["baseline_end"], freq="M"))
+
+    def save(self, directory: Path = STATE_DIR) -> Path:
+        """Write the counts tensor as counts.npy and everything else as meta.json."""
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "counts.npy", self.counts)
+        meta = {
+            "features": self.features,
+            # +inf padding is not valid JSON; n_edges says where each row ends
+            "edges": np.where(np.isinf(self.edges), 0.0, self.edges).tolist(),
+            "n_edges": self.n_edges.tolist(),
+            "segments": self.segments.values.tolist(),
+            "first_month": str(self.months[0]) if len(self.months) else None,
+            "n_months": len(self.months),
+            "baseline_end": str(self.baseline_end),
+            "contracts": int(self.counts[0, :, 0].sum()) if self.counts.size else 0,
+        }
+        (directory / "meta.json").write_text(json.dumps(meta, indent=2))
+        return directory
+
+    # ── Histograms ──────────────────────────────────────────────────────────
+    def _buckets(self, contracts: pd.DataFrame) -> np.ndarray:
+        """(n, F) bucket of each contract's value of each feature, on the frozen edges."""
+        out = np.empty((len(contracts), len(self.features)), dtype=np.int64)
+        for f, col in enumerate(self.features):
+            x = contracts[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            k = self.n_edges[f]
+            edges = self.edges[f, :k]
+            # searchsorted right: 0 below, i in 1..k-1 for bin i - 1, k at or above the last edge
+            bucket = np.searchsorted(edges, x, side="right")
+            bucket[(bucket == k) & (x == edges[-1])] = k - 1   # np.histogram's last bin is closed
+            bucket[bucket == k] = _ABOVE
+            bucket[np.isnan(x)] = _MISSING
+            out[:, f] = bucket
+        return out
+
+    def _segment_codes(self, contracts: pd.DataFrame) -> list[np.ndarray]:
+        """Per segment column, each contract's segment row (-1 when null), adding unseen values."""
+        index = {(s, v): i for i, (s, v) in enumerate(self.segments.itertuples(index=False))}
+        codes, new = [], []
+        for column in SEGMENTS:
+            values = contracts[column].astype("str").where(contracts[column].notna()).to_numpy()
+            distinct = pd.unique(values[pd.notna(values)])
+            for value in distinct:
+                if (column, value) not in index:
+                    index[(column, value)] = len(index)
+                    new.append((column, value))
+            lookup = pd.Series({v: index[(column, v)] for v in distinct}, dtype=np.int64)
+            codes.append(pd.Series(values).map(lookup).fillna(-1).to_numpy(dtype=np.int64))
+        if new:
+            self.segments = pd.concat([self.segments, pd.DataFrame(new, columns=["segment", "value"])],
+                                      ignore_index=True)
+            pad = np.zeros((len(new), *self.counts.shape[1:]), dtype=np.int64)
+            self.counts = np.concatenate([self.counts, pad])
+        return codes
+
+    def _month_codes(self, contracts: pd.DataFrame) -> np.ndarray:
+        """Each contract's month position (-1 when undated), extending the month range as needed."""
+        months = contracts[DATE_COL].dt.to_period("M")
+        dated = months.dropna()
+        if len(dated):
+            lo, hi = dated.min(), dated.max()
+            if len(self.months):
+                lo, hi = min(lo, self.months[0]), max(hi, self.months[-1])
+            span = pd.period_range(lo, hi, freq="M")
+            if len(span) != len(self.months):
+                before = (self.months[0] - lo).n if len(self.months) else 0
+                grown = np.zeros((self.counts.shape[0], len(span), *self.counts.shape[2:]), dtype=np.int64)
+                grown[:, before:before + len(self.months)] = self.counts
+                self.counts, self.months = grown, span
+        codes = np.full(len(contracts), -1, dtype=np.int64)
+        mask = months.notna().to_numpy()
+        if len(self.months):
+            codes[mask] = (months[mask].dt.year.to_numpy() - self.months[0].year) * 12 \
+                + months[mask].dt.month.to_numpy() - self.months[0].month
+        return codes
+
+    def histogram(self, contracts: pd.DataFrame) -> np.ndarray:
+        """Counts of contracts in the monitor's layout (adding any new months and segments to it)."""
+        months = self._month_codes(contracts)
+        segments = self._segment_codes(contracts)
+        buckets = self._buckets(contracts)
+        S, M, F, B = self.counts.shape
+        out = np.zeros(S * M * F * B, dtype=np.int64)
+        feature_offset = np.arange(F) * B
+        for segment in [np.zeros(len(contracts), dtype=np.int64), *segments]:
+            keep = (segment >= 0) & (months >= 0)
+            cell = (segment[keep] * M + months[keep]) * F * B
+            flat = (cell[:, None] + feature_offset[None, :] + buckets[keep]).ravel()
+            out += np.bincount(flat, minlength=S * M * F * B)
+        return out.reshape(S, M, F, B)
+
+    def update(self, added: pd.DataFrame, removed: pd.DataFrame | None = None) -> "DriftMonitor":
+        """Add newly scored contracts; removed are earlier versions of re-scored ones, subtracted."""
+        started = time.perf_counter()
+        removed = removed if removed is not None and len(removed) else None
+        for frame in (added, removed):
+            # Grow the month range and segment list first, so both histograms share one layout
+            if frame is not None:
+                self._month_codes(frame)
+                self._segment_codes(frame)
+        delta = self.histogram(added)
+        if removed is not None:
+            delta -= self.histogram(removed)
+        counts = self.counts + delta
+        if (counts < 0).any():
+            raise ValueError("removed contracts were never added to this monitor")
+        self.counts = counts
+        self.last_update = {"added": len(added), "removed": 0 if removed is None else len(removed),
+                            "months": len(self.months), "segments": len(self.segments),
+                            "seconds": time.perf_counter() - started}
+        return self
+
+    def merge(self, other: "DriftMonitor") -> "DriftMonitor":
+        """A monitor holding both monitors' contracts (edges must be the same)."""
+        if self.features != other.features or not np.array_equal(self.n_edges, other.n_edges) \
+                or not np.array_equal(self.edges, other.edges):
+            raise ValueError("monitors were frozen on different bin edges")
+        merged = DriftMonitor(self.features, self.edges, self.n_edges, self.segments, self.months,
+                              self.counts.copy(), self.baseline_end)
+        months = other.months if len(other.months) else pd.PeriodIndex([], freq="M")
+        if len(months):
+            merged._month_codes(pd.DataFrame({DATE_COL: months[[0, -1]].to_timestamp()}))
+        index = {(s, v): i for i, (s, v) in enumerate(merged.segments.itertuples(index=False))}
+        new = [key for key in other.segments.itertuples(index=False, name=None) if key not in index]
+        if new:
+            merged.segments = pd.concat([merged.segments, pd.DataFrame(new, columns=["segment", "value"])],
+                                        ignore_index=True)
+            merged.counts = np.concatenate([merged.counts, np.zeros((len(new), *merged.counts.shape[1:]),
+                                                                    dtype=np.int64)])
+            index.update({key: len(index) + i for i, key in enumerate(new)})
+        if len(months):
+            rows = np.array([index[key] for key in other.segments.itertuples(index=False, name=None)])
+            start = (months[0] - merged.months[0]).n
+            merged.counts[rows, start:start + len(months)] += other.counts
+        return merged
+
+    # ── PSI ─────────────────────────────────────────────────────────────────
+    def _window(self, start, end) -> np.ndarray:
+        """(S, F, buckets) counts summed over the months from start to end (None = open)."""
+        start = 0 if start is None else max(0, (pd.Period(start, freq="M") - self.months[0]).n)
+        end = len(self.months) if end is None else (pd.Period(end, freq="M") - self.months[0]).n + 1
+        return self.counts[:, start:max(start, end)].sum(axis=1)
+
+    def _report(self, psi: np.ndarray, base: np.ndarray, cur: np.ndarray, month=None) -> pd.DataFrame:
+        S, F = self.counts.shape[0], len(self.features)
+        out = {
+            "segment": np.repeat(self.segments["segment"].to_numpy(), psi.size // S),
+            "value": np.repeat(self.segments["value"].to_numpy(), psi.size // S),
+        }
+        if month is not None:
+            out["month"] = np.tile(np.repeat(self.months.astype(str), F), S)
+        out.update({
+            "feature": np.tile(self.features, psi.size // F),
+            "psi": psi.ravel(),
+            "baseline_contracts": base.sum(-1).ravel(),
+            "contracts": cur.sum(-1).ravel(),
+        })
+        report = pd.DataFrame(out)
+        report = report[report["psi"].notna()].reset_index(drop=True)
+        report["status"] = status(report["psi"])
+        return report
+
+    def window_psi(self, baseline: tuple = (None, None), current: tuple = (None, None),
+                   segment: str | None = None) -> pd.DataFrame:
+        """
+        PSI of one window of months against another, per segment and feature.
+
+        baseline and current are (first, last) months or dates, None for open
+        ends; the default baseline is everything up to baseline_end.
+        """
+        if baseline == (None, None):
+            baseline = (None, self.baseline_end)
+        base, cur = self._window(*baseline), self._window(*current)
+        report = self._report(_psi(base, cur, self.n_edges), base, cur)
+        return report if segment is None else report[report["segment"] == segment].reset_index(drop=True)
+
+    def monthly_psi(self, baseline: str = "frozen", window: int = 12) -> pd.DataFrame:
+        """
+        PSI of every segment × month × feature in one pass.
+
+        baseline "frozen" compares each month with the baseline period (up to
+        baseline_end); "rolling" with the window months before it.
+        """
+        if baseline == "frozen":
+            base = self._window(None, self.baseline_end)[:, None]
+        elif baseline == "rolling":
+            cum = np.concatenate([np.zeros_like(self.counts[:, :1]), self.counts.cumsum(axis=1)], axis=1)
+            m = np.arange(len(self.months))
+            base = cum[:, m] - cum[:, np.maximum(m - window, 0)]
+        else:
+            raise ValueError(f"baseline must be 'frozen' or 'rolling', got {baseline!r}")
+        psi = _psi(np.broadcast_to(base, self.counts.shape), self.counts, self.n_edges)
+        return self._report(psi, np.broadcast_to(base, self.counts.shape), self.counts, month=True)
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_rows: int = 1_553_594) -> pd.DataFrame:
+    """Build, notebook-equivalent PSI, all-cells PSI and a one-month update, each checked against compute_psi."""
+    import tempfile
+
+    from config.settings import VALID_START
+    from src.pipeline import schema
+
+    with tempfile.TemporaryDirectory() as codes:
+        df = schema.compact(schema._synthetic_risk_scores(n_rows)[[DATE_COL, *SEGMENTS, *MONITOR_FEATURES]],
+                            Path(codes))
+    train = df[df[DATE_COL] <= TRAIN_END]
+    valid = df[df[DATE_COL] >= VALID_START]
+    rows = []
+
+    started = time.perf_counter()
+    expected = {f: compute_psi(train[f], valid[f]) for f in MONITOR_FEATURES}
+    t_ref = time.perf_counter() - started
+    started = time.perf_counter()
+    monitor = DriftMonitor.build(df)
+    t_build = time.perf_counter() - started
+    started = time.perf_counter()
+    got = monitor.window_psi(current=(VALID_START, None), segment="all").set_index("feature")["psi"]
+    t_psi = time.perf_counter() - started
+    rows.append({"step": "train vs valid, 13 features", "cells": len(got), "reference_s": round(t_ref, 3),
+                 "monitor_s": round(t_psi, 4),
+                 "max_abs_diff": max(abs(got[f] - expected[f]) for f in MONITOR_FEATURES)})
+
+    # Every month × segment × feature against a rolling 12-month baseline
+    started = time.perf_counter()
+    monthly = monitor.monthly_psi(baseline="rolling", window=12)
+    t_monthly = time.perf_counter() - started
+    month = df[DATE_COL].dt.to_period("M")
+    national = monthly[monthly["segment"] == "all"]
+    started = time.perf_counter()
+    diffs = []
+    for label, cells in national.groupby("month"):
+        period = pd.Period(label, freq="M")
+        base = df[(month < period) & (month >= period - 12)]
+        cur = df[month == period]
+        for feature, psi in zip(cells["feature"], cells["psi"]):
+            f = monitor.features.index(feature)
+            ref = compute_psi(base[feature], cur[feature], breakpoints=monitor.edges[f, :monitor.n_edges[f]])
+            diffs.append(abs(psi - ref))
+    t_loop = time.perf_counter() - started
+    rows.append({"step": "rolling 12m, all cells", "cells": len(monthly),
+                 "reference_s": f"{t_loop:.2f} (national only)", "monitor_s": round(t_monthly, 4),
+                 "max_abs_diff": max(diffs)})
+
+    # Monthly update: histogram only the newest month's contracts
+    last = month.max()
+    started = time.perf_counter()
+    partial = DriftMonitor.build(df[month < last])
+    t_partial = time.perf_counter() - started
+    partial.update(df[month == last])
+    rows.append({"step": f"update with {int((month == last).sum()):,} contracts", "cells": "",
+                 "reference_s": round(t_partial, 2), "monitor_s": round(partial.last_update["seconds"], 4),
+                 "max_abs_diff": int(np.abs(partial.counts - monitor.counts).max())})
+    results = pd.DataFrame(rows)
+    print("=" * 70)
+    print(f"DRIFT MONITOR — {n_rows:,} contracts, {len(monitor.segments)} segments × "
+          f"{len(monitor.months)} months × {len(monitor.features)} features, built in {t_build:.2f}s")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Streaming PSI drift monitor")
+    parser.add_argument("--build", action="store_true", help="Rebuild the monitor from a full scored table")
+    parser.add_argument("--input", type=Path, default=DATA_PROCESSED / "risk_scores.parquet",
+                        help="Scored contracts for --build")
+    parser.add_argument("--update", type=Path, default=None, help="Parquet of newly scored contracts")
+    parser.add_argument("--removed", type=Path, default=None, help="Previous versions of re-scored contracts")
+    parser.add_argument("--report", action="store_true", help="Print cells at or above PSI_MONITOR_THRESHOLD")
+    parser.add_argument("--rolling", type=int, default=None, help="Rolling baseline of N months (default: frozen)")
+    parser.add_argument("--min-contracts", type=int, default=100, help="Smallest month × segment to report")
+    parser.add_argument("--state", type=Path, default=STATE_DIR)
+    parser.add_argument("--bench", type=int, default=None, help="Benchmark on N synthetic contracts")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench)
+        sys.exit()
+
+    columns = [DATE_COL, *SEGMENTS, *MONITOR_FEATURES]
+    if args.build:
+        from src.pipeline import schema
+
+        monitor = DriftMonitor.build(schema.read(args.input, columns=columns))
+        monitor.save(args.state)
+        print(f"✅ Built drift monitor: {len(monitor.segments)} segments × {len(monitor.months)} months "
+              f"× {len(monitor.features)} features → {args.state}")
+
+    if args.update:
+        monitor = DriftMonitor.load(args.state)
+        removed = pd.read_parquet(args.removed, columns=columns) if args.removed else None
+        monitor.update(pd.read_parquet(args.update, columns=columns), removed)
+        monitor.save(args.state)
+        stats = monitor.last_update
+        print(f"✅ Drift monitor updated: +{stats['added']:,} / -{stats['removed']:,} contracts "
+              f"in {stats['seconds']:.2f}s → {args.state}")
+
+    if args.report:
+        monitor = DriftMonitor.load(args.state)
+        report = monitor.monthly_psi("rolling", args.rolling) if args.rolling else monitor.monthly_psi()
+        flagged = report[(report["status"] != "stable") & (report["contracts"] >= args.min_contracts)]
+        print("=" * 70)
+        print(f"PSI by month × segment × feature ({'rolling ' + str(args.rolling) + 'm' if args.rolling else 'frozen'}"
+              f" baseline): {len(report):,} cells, {(flagged['status'] == 'monitor').sum():,} monitor, "
+              f"{(flagged['status'] == 'retrain').sum():,} retrain")
+        print("=" * 70)
+        if len(flagged):
+            print(flagged.sort_values("psi", ascending=False).head(30).to_string(index=False))
@@ -0,0 +1,827 @@
+# src/scoring/near_duplicates.py
+"""
+MinHash-LSH index of near-duplicate contract descriptions.
+
+The splitting detector (splitting.py) looks at vendor-agency pairs and value
+proximity to the SMMLV thresholds only. Works split across several
+contracts usually keep one description ("... - ETAPA 2", "... VIGENCIA
+2021"), and the pieces can go to different vendors. Comparing every pair of
+descriptions of 1.4M direct awards is out of the question. This index finds
+the near duplicates in roughly linear time:
+
+    texts       objeto_del_contrato and descripcion_del_proceso, lowercased,
+                accents stripped, punctuation to spaces. Contracts with the
+                same normalized text share one text id, and only distinct
+                texts are hashed.
+    shingles    word bigrams of each field (a one-word field is its word),
+                as a sorted set of 32-bit hashes per text
+    signatures  NEAR_DUP_NUM_PERM MinHash values per text, from universal
+                hashes (a·h + b) mod (2^61 - 1). They are never stored: each
+                text keeps NEAR_DUP_BANDS band keys, each a 64-bit hash of
+                NEAR_DUP_NUM_PERM / NEAR_DUP_BANDS consecutive values.
+    bands       per band, the band keys sorted with their text ids. Texts
+                with an equal key in some band are candidates. The odds of
+                that rise steeply with Jaccard: about 0.71 is the midpoint
+                at 16 bands of 8 rows.
+    clusters    leader clustering in text id order: a text joins the
+                earliest leader it shares a bucket with at exact Jaccard
+                >= NEAR_DUP_THRESHOLD, or leads a new cluster. Every member
+                is that close to its leader, so templated descriptions that
+                differ by one word at a time do not chain into one cluster
+                (union-find of all close pairs did, into clusters of ~9,000
+                contracts at 600k synthetic rows).
+
+Hashing runs in compiled, GIL-free chunks of texts on n_jobs threads. insert()
+hashes only texts it has not seen and merges their band keys after the
+existing ones with equal keys. New texts have higher ids, so their clusters
+are the ones a rebuild over all contracts would give. similar() answers
+"which contracts of this agency, within this many days, read almost like
+this one", with exact Jaccard.
+
+update() is what the splitting stage calls. It loads the index saved in
+the stage's state directory (STATE_DIR for the real pipeline). Suppose that
+index has the same settings and code as this module, and its contracts are
+the first rows of this run's contracts with unchanged texts. Then only the
+remaining contracts are inserted. Otherwise the index is rebuilt. Either way
+the clusters are those of a rebuild, and the index is saved back.
+
+description_splitting() runs the notebook 05 window scan over
+(agency, description cluster) instead of (vendor, agency) and scores the
+near-threshold contracts in suspicious windows. The splitting stage adds the
+result as description_splitting_score.
+
+Usage:
+    python src/scoring/near_duplicates.py --bench 1553594 --jobs 4
+    python src/scoring/near_duplicates.py --similar <id_contrato> --days 90
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import hashlib
+import json
+import shutil
+import sys
+import time
+
+from numba import njit
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import (
+    DATA_PROCESSED, NEAR_DUP_BANDS, NEAR_DUP_NUM_PERM, NEAR_DUP_THRESHOLD, RANDOM_STATE,
+    SPLITTING_WINDOWS_DAYS,
+)
+from src.pipeline import metrics
+from src.scoring.splitting import DATE_COL, score_pairs, window_scan
+
+STATE_DIR = DATA_PROCESSED / "near_duplicates"
+CODE_HASH = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]  # saved indexes of other code are rebuilt
+TEXT_COLUMNS = ["objeto_del_contrato", "descripcion_del_proceso"]
+INDEX_COLUMNS = ["id_contrato", "codigo_entidad", DATE_COL, *TEXT_COLUMNS]
+DESCRIPTION_KEYS = ["codigo_entidad", "description_cluster"]
+CHUNK_TEXTS = 100_000
+
+_P61 = np.uint64((1 << 61) - 1)
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SEPARATOR = ord("|")
+_SPACE = ord(" ")
+
+
+# ── Kernels ─────────────────────────────────────────────────────────────────
+@njit(cache=True, nogil=True)
+def _shingle(buf, starts):
+    """
+    Sorted distinct word-bigram hashes of each text in buf[starts[i]:starts[i + 1]].
+
+    Words are split on spaces. "|" separates fields: no bigram spans it, and a
+    one-word field gives its word hash. Returns (hashes, offsets).
+    """
+    n = len(starts) - 1
+    out = np.empty(len(buf) + n, np.uint32)
+    offsets = np.zeros(n + 1, np.int64)
+    pos = 0
+    for d in range(n):
+        begin = pos
+        prev = np.uint64(0)
+        words = 0
+        h = np.uint64(2166136261)
+        in_word = False
+        for i in range(starts[d], starts[d + 1] + 1):
+            c = buf[i] if i < starts[d + 1] else _SEPARATOR
+            if c != _SPACE and c != _SEPARATOR:
+                h = ((h ^ np.uint64(c)) * np.uint64(16777619)) & _MASK32
+                in_word = True
+                continue
+            if in_word:
+                if words > 0:
+                    x = ((prev * np.uint64(0x9E3779B1)) ^ h) & _MASK32
+                    x ^= x >> np.uint64(16)
+                    x = (x * np.uint64(0x85EBCA6B)) & _MASK32
+                    x ^= x >> np.uint64(13)
+                    out[pos] = np.uint32(x)
+                    pos += 1
+                prev = h
+                words += 1
+                h = np.uint64(2166136261)
+                in_word = False
+            if c == _SEPARATOR:
+                if words == 1:
+                    out[pos] = np.uint32(prev)
+                    pos += 1
+                words = 0
+        if pos > begin:
+            segment = np.sort(out[begin:pos])
+            k = begin
+            for j in range(len(segment)):
+                if j == 0 or segment[j] != segment[j - 1]:
+                    out[k] = segment[j]
+                    k += 1
+            pos = k
+        offsets[d + 1] = pos
+    return out[:pos].copy(), offsets
+
+
+@njit(cache=True, nogil=True)
+def _band_keys(shingles, offsets, a, b, n_bands):
+    """MinHash signature of each text, folded into one 64-bit key per band (0 for empty texts)."""
+    n, n_perm = len(offsets) - 1, len(a)
+    rows = n_perm // n_bands
+    keys = np.zeros((n, n_bands), np.uint64)
+    sig = np.empty(n_perm, np.uint64)
+    for d in range(n):
+        if offsets[d + 1] == offsets[d]:
+            continue
+        sig[:] = _MASK32
+        for s in range(offsets[d], offsets[d + 1]):
+            h = np.uint64(shingles[s])
+            for k in range(n_perm):
+                x = a[k] * h + b[k]
+                x = (x & _P61) + (x >> np.uint64(61))
+                if x >= _P61:
+                    x -= _P61
+                x &= _MASK32
+                if x < sig[k]:
+                    sig[k] = x
+        for band in range(n_bands):
+            key = np.uint64(14695981039346656037)
+            for r in range(band * rows, (band + 1) * rows):
+                key = (key ^ sig[r]) * np.uint64(1099511628211)
+            keys[d, band] = key | np.uint64(1)
+    return keys
+
+
+@njit(cache=True)
+def _jaccard(shingles, offsets, s, t):
+    """Exact Jaccard of the shingle sets of texts s and t (merge of two sorted arrays)."""
+    i, i_end = offsets[s], offsets[s + 1]
+    j, j_end = offsets[t], offsets[t + 1]
+    if i == i_end or j == j_end:
+        return 0.0
+    union = (i_end - i) + (j_end - j)
+    inter = 0
+    while i < i_end and j < j_end:
+        if shingles[i] == shingles[j]:
+            inter += 1
+            i += 1
+            j += 1
+        elif shingles[i] < shingles[j]:
+            i += 1
+        else:
+            j += 1
+    return inter / (union - inter)
+
+
+@njit(cache=True)
+def _jaccards(shingles, offsets, query, texts):
+    out = np.empty(len(texts), np.float64)
+    for k in range(len(texts)):
+        out[k] = _jaccard(shingles, offsets, query, texts[k])
+    return out
+
+
+@njit(cache=True)
+def _append(head, tail, following, bucket, i):
+    if tail[bucket] < 0:
+        head[bucket] = i
+    else:
+        following[tail[bucket]] = i
+    tail[bucket] = i
+
+
+@njit(cache=True)
+def _assign(keys, texts, leaders, first_new, shingles, offsets, threshold):
+    """
+    Leader clustering of texts first_new.. in text id order (leaders[:first_new] is kept).
+
+    A text joins the smallest earlier leader it shares a band bucket with at
+    exact Jaccard >= threshold, or becomes a leader itself. Every member is
+    within the threshold of its leader, so clusters do not chain. Equal keys
+    are in text id order, so the leaders before a text in its bucket are the
+    ones a rebuild would see. Returns the number of Jaccard checks.
+    """
+    n_bands, m = keys.shape
+    n_texts = len(leaders)
+    where = np.full((n_bands, n_texts), -1, np.int32)
+    start = np.empty((n_bands, m), np.int32)
+    following = np.full((n_bands, m), -1, np.int32)  # next leader in the same bucket, by text id
+    head = np.full((n_bands, m), -1, np.int32)       # first and last leader per bucket (by bucket start)
+    tail = np.full((n_bands, m), -1, np.int32)
+    for band in range(n_bands):
+        for i in range(m):
+            where[band, texts[band, i]] = i
+            start[band, i] = i if i == 0 or keys[band, i] != keys[band, i - 1] else start[band, i - 1]
+            t = texts[band, i]
+            if t < first_new and leaders[t] == t:
+                _append(head[band], tail[band], following[band], start[band, i], i)
+
+    n_checks = 0
+    checked = np.full(n_texts, -1, np.int64)   # leaders already compared with text t
+    for t in range(first_new, n_texts):
+        if where[0, t] < 0:
+            leaders[t] = -1
+            continue
+        best = -1
+        for band in range(n_bands):
+            p = head[band, start[band, where[band, t]]]
+            # Leaders come in id order: stop at the first match or past the best so far
+            while p >= 0:
+                leader = texts[band, p]
+                if best >= 0 and leader >= best:
+                    break
+                if checked[leader] != t:
+                    checked[leader] = t
+                    n_checks += 1
+                    if _jaccard(shingles, offsets, t, leader) >= threshold:
+                        best = leader
+                        break
+                p = following[band, p]
+        if best >= 0:
+            leaders[t] = best
+            continue
+        leaders[t] = t
+        for band in range(n_bands):
+            i = where[band, t]
+            _append(head[band], tail[band], following[band], start[band, i], i)
+    return n_checks
+
+
+@njit(cache=True)
+def _matches(shingles, offsets, query, threshold):
+    """Every text with exact Jaccard >= threshold to text query (brute force; benchmark truth)."""
+    out = []
+    for t in range(len(offsets) - 1):
+        if t != query and _jaccard(shingles, offsets, query, t) >= threshold:
+            out.append(t)
+    return np.array(out, dtype=np.int64)
+
+
+# ── Text preparation ────────────────────────────────────────────────────────
+def normalize(texts: pd.Series) -> pd.Series:
+    """Lowercase ASCII words separated by single spaces ("" for missing text)."""
+    texts = texts.astype("str").fillna("")
+    texts = texts.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    return texts.str.lower().str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip()
+
+
+def document_texts(contracts: pd.DataFrame) -> pd.Series:
+    """Each contract's indexed text: the normalized TEXT_COLUMNS joined by "|"."""
+    fields = []
+    for col in TEXT_COLUMNS:
+        values = contracts[col] if col in contracts.columns else pd.Series("", index=contracts.index)
+        # Normalize each distinct value once; descriptions repeat heavily
+        codes, uniques = pd.factorize(values.astype("str"))
+        normalized = np.append(normalize(pd.Series(uniques, dtype="str")).to_numpy(dtype=object), "")
+        fields.append(normalized[codes])  # code -1 (missing) picks the trailing ""
+    joined = fields[0]
+    for field in fields[1:]:
+        joined = joined + "|" + field
+    return pd.Series(joined, index=contracts.index, dtype="str")
+
+
+def _encode(texts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Concatenated ASCII bytes of texts and the start of each (plus the end)."""
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    starts = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=starts[1:])
+    buf = np.frombuffer("".join(texts).encode("ascii"), dtype=np.uint8)
+    return buf, starts
+
+
+def _hash_family(n_perm: int, seed: int = RANDOM_STATE) -> tuple[np.ndarray, np.ndarray]:
+    """a in [1, 2^32) and b in [0, 2^32), so a·h + b fits in 64 bits for 32-bit h."""
+    rng = np.random.default_rng(seed)
+    return (rng.integers(1, 1 << 32, n_perm, dtype=np.uint64),
+            rng.integers(0, 1 << 32, n_perm, dtype=np.uint64))
+
+
+def _text_keys(texts: np.ndarray) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(texts, dtype=object))
+
+
+# ── Index ───────────────────────────────────────────────────────────────────
+class NearDuplicateIndex:
+    """
+    MinHash-LSH band index and near-duplicate clusters over contract descriptions.
+
+    Attributes:
+        contracts: One row per indexed contract: id_contrato, codigo_entidad,
+            the start date and text (its text id).
+        shingles: Sorted shingle hashes of every distinct text, text t at
+            shingles[offsets[t]:offsets[t + 1]].
+        offsets: Shingle offsets per text id.
+        band_keys: (bands × banded texts) uint64, each row sorted.
+        band_texts: Text id of each entry of band_keys.
+        leaders: Cluster leader (a text id) per text id, -1 for empty texts.
+        text_keys, text_ids: 64-bit hashes of the distinct texts, sorted, and
+            their text ids (for matching inserted texts).
+        n_perm, bands, threshold, seed: MinHash size, LSH bands, link Jaccard
+            and the seed of the MinHash hash family.
+        last_update: Counts and timings of the last build or insert.
+    """
+
+    def __init__(self, contracts: pd.DataFrame, shingles: np.ndarray, offsets: np.ndarray,
+                 band_keys: np.ndarray, band_texts: np.ndarray, leaders: np.ndarray,
+                 text_keys: np.ndarray, text_ids: np.ndarray, n_perm: int = NEAR_DUP_NUM_PERM,
+                 bands: int = NEAR_DUP_BANDS, threshold: float = NEAR_DUP_THRESHOLD, seed: int = RANDOM_STATE):
+        if n_perm % bands:
+            raise ValueError(f"n_perm ({n_perm}) must be a multiple of bands ({bands})")
+        self.contracts = contracts
+        self.shingles = shingles
+        self.offsets = offsets
+        self.band_keys = band_keys
+        self.band_texts = band_texts
+        self.leaders = leaders
+        self.text_keys = text_keys
+        self.text_ids = text_ids
+        self.n_perm, self.bands, self.threshold, self.seed = n_perm, bands, threshold, seed
+        self._a, self._b = _hash_family(n_perm, seed)
+        self._arrays = None
+        self.last_update = {}
+
+    @property
+    def n_texts(self) -> int:
+        return len(self.offsets) - 1
+
+    def __len__(self) -> int:
+        return len(self.contracts)
+
+    # ── Hashing ─────────────────────────────────────────────────────────────
+    def _hash(self, texts: np.ndarray, n_jobs: int = 1,
+              chunk_texts: int = CHUNK_TEXTS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Shingles, offsets and band keys of texts, in chunks on n_jobs threads."""
+        bounds = [(s, min(s + chunk_texts, len(texts))) for s in range(0, len(texts), chunk_texts)]
+
+        def run(bound):
+            buf, starts = _encode(texts[bound[0]:bound[1]])
+            shingles, offsets = _shingle(buf, starts)
+            return shingles, offsets, _band_keys(shingles, offsets, self._a, self._b, self.bands)
+
+        if n_jobs == 1:
+            parts = [run(b) for b in bounds]
+        else:
+            with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+                parts = list(pool.map(run, bounds))
+        if not parts:
+            return np.empty(0, np.uint32), np.zeros(1, np.int64), np.empty((0, self.bands), np.uint64)
+        shingles = np.concatenate([p[0] for p in parts])
+        sizes = np.concatenate([np.diff(p[1]) for p in parts])
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        return shingles, offsets, np.concatenate([p[2] for p in parts])
+
+    # ── Build / insert ──────────────────────────────────────────────────────
+    @classmethod
+    @metrics.instrumented("near_duplicates.build", rows_in=lambda cls, contracts, *args, **kwargs: len(contracts))
+    def build(cls, contracts: pd.DataFrame, n_jobs: int = 1, chunk_texts: int = CHUNK_TEXTS,
+              n_perm: int = NEAR_DUP_NUM_PERM, bands: int = NEAR_DUP_BANDS,
+              threshold: float = NEAR_DUP_THRESHOLD, seed: int = RANDOM_STATE) -> "NearDuplicateIndex":
+        """
+        Index contracts (INDEX_COLUMNS; missing text columns count as empty).
+
+        Args:
+            contracts: Contracts to index, e.g. the direct awards.
+            n_jobs: Threads hashing chunks of distinct texts concurrently.
+            chunk_texts: Distinct texts per chunk; bounds the temporary arrays.
+            n_perm, bands, threshold: MinHash size, LSH bands and link Jaccard.
+            seed: Seed of the MinHash hash family.
+        """
+        index = cls(cls._frame(contracts.iloc[:0], np.empty(0, np.int64)), np.empty(0, np.uint32),
+                    np.zeros(1, np.int64), np.empty((bands, 0), np.uint64), np.empty((bands, 0), np.int32),
+                    np.empty(0, np.int64), np.empty(0, np.uint64), np.empty(0, np.int64),
+                    n_perm, bands, threshold, seed)
+        index.insert(contracts, n_jobs, chunk_texts)
+        return index
+
+    @staticmethod
+    def _frame(contracts: pd.DataFrame, text: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({
+            "id_contrato": contracts["id_contrato"].to_numpy(),
+            "codigo_entidad": contracts["codigo_entidad"].astype("str").to_numpy(),
+            DATE_COL: pd.to_datetime(contracts[DATE_COL]).to_numpy(dtype="datetime64[ns]"),
+            "text": text.astype(np.int64),
+        })
+
+    @metrics.instrumented("near_duplicates.insert", rows_in=lambda self, contracts, *args, **kwargs: len(contracts))
+    def insert(self, contracts: pd.DataFrame, n_jobs: int = 1, chunk_texts: int = CHUNK_TEXTS) -> np.ndarray:
+        """
+        Add contracts; only texts not seen before are hashed and banded.
+
+        Clusters afterwards are those a rebuild over all contracts in insertion
+        order would give. Returns the text id of each inserted contract.
+        """
+        started = time.perf_counter()
+        texts = document_texts(contracts).to_numpy(dtype=object)
+        codes, uniques = pd.factorize(texts)
+        keys = _text_keys(uniques)
+        # Distinct texts already indexed keep their id; the rest get new ids in order
+        at = np.searchsorted(self.text_keys, keys)
+        found = (at < len(self.text_keys)) & (self.text_keys[np.minimum(at, len(self.text_keys) - 1)] == keys) \
+            if len(self.text_keys) else np.zeros(len(keys), dtype=bool)
+        unique_ids = np.empty(len(uniques), dtype=np.int64)
+        unique_ids[found] = self.text_ids[at[found]]
+        new = np.flatnonzero(~found)
+        unique_ids[new] = self.n_texts + np.arange(len(new))
+        text = unique_ids[codes]
+
+        shingles, offsets, band_keys = self._hash(np.asarray(uniques[new], dtype=object), n_jobs, chunk_texts)
+        t_hash = time.perf_counter() - started
+        self.shingles = np.concatenate([self.shingles, shingles])
+        self.offsets = np.concatenate([self.offsets, self.offsets[-1] + offsets[1:]])
+        first_new = len(self.leaders)
+        self.leaders = np.concatenate([self.leaders, unique_ids[new]])
+        order = np.argsort(keys[new], kind="stable")
+        all_keys = np.concatenate([self.text_keys, keys[new][order]])
+        all_ids = np.concatenate([self.text_ids, unique_ids[new][order]])
+        resort = np.argsort(all_keys, kind="stable")
+        self.text_keys, self.text_ids = all_keys[resort], all_ids[resort]
+
+        # Merge each band's new keys after the existing equal keys, then cluster the new texts
+        banded = band_keys[:, 0] != 0
+        new_ids = unique_ids[new][banded].astype(np.int32)
+        merged_keys, merged_texts = [], []
+        for band in range(self.bands):
+            add_keys = band_keys[banded, band]
+            sorter = np.argsort(add_keys, kind="stable")
+            at = np.searchsorted(self.band_keys[band], add_keys[sorter], side="right")
+            merged_keys.append(np.insert(self.band_keys[band], at, add_keys[sorter]))
+            merged_texts.append(np.insert(self.band_texts[band], at, new_ids[sorter]))
+        self.band_keys, self.band_texts = np.stack(merged_keys), np.stack(merged_texts)
+        n_checks = _assign(self.band_keys, self.band_texts, self.leaders, first_new,
+                           self.shingles, self.offsets, self.threshold)
+        self.contracts = pd.concat([self.contracts, self._frame(contracts, text)], ignore_index=True)
+        self._arrays = None
+        self.last_update = {
+            "contracts": len(contracts), "distinct_texts": len(uniques), "new_texts": len(new),
+            "jaccard_checks": int(n_checks), "hash_s": round(t_hash, 3),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        return text
+
+    # ── Clusters and queries ────────────────────────────────────────────────
+    def text_clusters(self) -> np.ndarray:
+        """Cluster id per text id: its leader's text id, -1 for empty texts."""
+        return self.leaders.copy()
+
+    def clusters(self) -> np.ndarray:
+        """Cluster id of each indexed contract, in contracts order (-1: empty description)."""
+        return self.text_clusters()[self.contracts["text"].to_numpy()]
+
+    def _view(self) -> dict:
+        """Contract arrays for queries, built on first use: rows by text id, sorted ids, agency, date."""
+        if self._arrays is None:
+            text = self.contracts["text"].to_numpy()
+            ids = self.contracts["id_contrato"].to_numpy(dtype=object)
+            by_id = np.argsort(ids, kind="stable")
+            offsets = np.zeros(self.n_texts + 1, dtype=np.int64)
+            np.cumsum(np.bincount(text, minlength=self.n_texts), out=offsets[1:])
+            self._arrays = {
+                "order": np.argsort(text, kind="stable"), "offsets": offsets,
+                "ids": ids[by_id], "by_id": by_id,
+                "agency": self.contracts["codigo_entidad"].to_numpy(dtype=object),
+                "date": self.contracts[DATE_COL].to_numpy(dtype="datetime64[ns]"),
+            }
+        return self._arrays
+
+    def _contracts_of(self, texts: np.ndarray) -> np.ndarray:
+        """Rows of self.contracts whose text is in texts."""
+        view = self._view()
+        if not len(texts):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([view["order"][view["offsets"][t]:view["offsets"][t + 1]] for t in texts])
+
+    def _keys(self, texts: np.ndarray) -> np.ndarray:
+        """Band keys of indexed text ids, rehashed from their shingles ((len(texts), bands))."""
+        sizes = np.diff(self.offsets)[texts]
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        shingles = np.concatenate([self.shingles[self.offsets[t]:self.offsets[t + 1]] for t in texts]) \
+            if len(texts) else np.empty(0, np.uint32)
+        return _band_keys(shingles, offsets, self._a, self._b, self.bands)
+
+    def _candidates(self, keys: np.ndarray) -> np.ndarray:
+        """Text ids sharing at least one band key with keys (one key per band)."""
+        found = []
+        for band in range(self.bands):
+            lo = np.searchsorted(self.band_keys[band], keys[band], side="left")
+            hi = np.searchsorted(self.band_keys[band], keys[band], side="right")
+            found.append(self.band_texts[band][lo:hi])
+        return np.unique(np.concatenate(found)).astype(np.int64)
+
+    @metrics.instrumented("near_duplicates.similar", rows_out=len)
+    def similar(self, id_contrato=None, text: str | None = None, agency=None, date=None,
+                window_days: int | None = max(SPLITTING_WINDOWS_DAYS), threshold: float | None = None) -> pd.DataFrame:
+        """
+        Indexed contracts whose description is a near duplicate of a contract's or a text's.
+
+        Args:
+            id_contrato: An indexed contract; its text, agency and date are the defaults.
+            text: Or a description (matched against both fields joined).
+            agency: Only contracts of this codigo_entidad (None: any).
+            date: With window_days, only contracts starting within window_days of it.
+            window_days: None for no date filter.
+            threshold: Minimum exact Jaccard (default: the index's link threshold).
+
+        Returns:
+            Matching contracts with their jaccard, highest first (the query
+            contract itself excluded).
+        """
+        threshold = self.threshold if threshold is None else threshold
+        view = self._view()
+        if id_contrato is not None:
+            own = view["by_id"][np.searchsorted(view["ids"], id_contrato, side="left"):
+                                np.searchsorted(view["ids"], id_contrato, side="right")]
+            if not len(own):
+                raise KeyError(f"id_contrato {id_contrato!r} is not in the index")
+            query_text = int(self.contracts["text"].iat[own[-1]])
+            agency = view["agency"][own[-1]] if agency is None else agency
+            date = view["date"][own[-1]] if date is None else date
+            shingles, offsets = self.shingles, self.offsets
+            keys = self._keys(np.array([query_text]))[0]
+        else:
+            if text is None:
+                raise ValueError("Give id_contrato or text")
+            normalized = normalize(pd.Series([text]))[0]
+            query_shingles, query_offsets, query_keys = self._hash(np.array([normalized], dtype=object))
+            shingles = np.concatenate([self.shingles, query_shingles])
+            offsets = np.concatenate([self.offsets, self.offsets[-1] + query_offsets[1:]])
+            query_text, keys = self.n_texts, query_keys[0]
+
+        candidates = self._candidates(keys) if keys.any() else np.empty(0, dtype=np.int64)
+        if query_text < self.n_texts:
+            candidates = np.union1d(candidates, [query_text])
+        scores = _jaccards(shingles, offsets, query_text, candidates)
+        keep = scores >= threshold
+        if query_text < self.n_texts:
+            keep |= candidates == query_text
+        counts = np.diff(view["offsets"])[candidates[keep]]
+        rows = self._contracts_of(candidates[keep])
+        jaccard = np.repeat(scores[keep], counts)
+        mask = np.ones(len(rows), dtype=bool)
+        if agency is not None:
+            mask &= view["agency"][rows] == str(agency)
+        if date is not None and window_days is not None:
+            delta = np.abs(view["date"][rows] - np.datetime64(pd.Timestamp(date), "ns"))
+            mask &= delta <= np.timedelta64(window_days, "D")
+        if id_contrato is not None:
+            mask &= ~np.isin(rows, own)
+        out = self.contracts.iloc[rows[mask]].assign(jaccard=jaccard[mask])
+        return out.sort_values(["jaccard", DATE_COL], ascending=[False, True]).reset_index(drop=True)
+
+    # ── Persist ─────────────────────────────────────────────────────────────
+    @classmethod
+    def load(cls, directory: Path = STATE_DIR) -> "NearDuplicateIndex":
+        """Read an index written by save()."""
+        meta = json.loads((directory / "meta.json").read_text())
+        arrays = np.load(directory / "index.npz")
+        return cls(pd.read_parquet(directory / "contracts.parquet"), arrays["shingles"], arrays["offsets"],
+                   arrays["band_keys"], arrays["band_texts"], arrays["leaders"], arrays["text_keys"],
+                   arrays["text_ids"], meta["n_perm"], meta["bands"], meta["threshold"], meta["seed"])
+
+    def save(self, directory: Path = STATE_DIR) -> Path:
+        """Write the contracts as parquet, the arrays as one .npz, plus meta.json; replaces directory whole."""
+        directory = Path(directory)
+        tmp = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        self.contracts.to_parquet(tmp / "contracts.parquet", index=False)
+        np.savez(tmp / "index.npz", shingles=self.shingles, offsets=self.offsets,
+                 band_keys=self.band_keys, band_texts=self.band_texts, leaders=self.leaders,
+                 text_keys=self.text_keys, text_ids=self.text_ids)
+        clusters = self.text_clusters()
+        meta = {
+            "n_perm": self.n_perm, "bands": self.bands, "threshold": self.threshold, "seed": self.seed,
+            "code": CODE_HASH, "contracts": len(self.contracts), "texts": self.n_texts,
+            "clusters": int(len(np.unique(clusters[clusters >= 0]))),
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+        shutil.rmtree(directory, ignore_errors=True)
+        tmp.replace(directory)
+        return directory
+
+
+@metrics.instrumented("near_duplicates.update", rows_in=lambda contracts, *args, **kwargs: len(contracts))
+def update(contracts: pd.DataFrame, directory: Path = STATE_DIR, n_jobs: int = 1,
+           chunk_texts: int = CHUNK_TEXTS) -> NearDuplicateIndex:
+    """
+    The index of contracts, reusing the index saved in directory where it can.
+
+    The saved index is reused when it was built with the current settings
+    and code, and its contracts are the first rows of contracts, same ids
+    and same texts. Then only the rest are inserted, and their agencies and
+    dates are refreshed. Otherwise the index is rebuilt. The clusters are
+    the same either way. The result is saved back to directory when it
+    changed; last_update["reused"] counts the contracts not re-indexed.
+    """
+    directory = Path(directory)
+    index = None
+    if (directory / "meta.json").exists():
+        meta = json.loads((directory / "meta.json").read_text())
+        current = {"n_perm": NEAR_DUP_NUM_PERM, "bands": NEAR_DUP_BANDS, "threshold": NEAR_DUP_THRESHOLD,
+                   "seed": RANDOM_STATE, "code": CODE_HASH}
+        if all(meta.get(k) == v for k, v in current.items()) and meta["contracts"] <= len(contracts):
+            index = NearDuplicateIndex.load(directory)
+
+    n = len(index) if index is not None else 0
+    if index is not None:
+        head = contracts.iloc[:n]
+        same = np.array_equal(index.contracts["id_contrato"].astype("str").to_numpy(dtype=object),
+                              head["id_contrato"].astype("str").to_numpy(dtype=object))
+        if same:
+            # Text ids of the saved contracts → their text hashes, against the current texts
+            key_of_text = np.empty(index.n_texts, dtype=np.uint64)
+            key_of_text[index.text_ids] = index.text_keys
+            codes, uniques = pd.factorize(document_texts(head).to_numpy(dtype=object))
+            same = np.array_equal(key_of_text[index.contracts["text"].to_numpy()], _text_keys(uniques)[codes])
+        if not same:
+            index, n = None, 0
+
+    if index is None:
+        index = NearDuplicateIndex.build(contracts, n_jobs, chunk_texts)
+        changed = True
+    else:
+        text = index.contracts["text"].to_numpy()
+        fresh = NearDuplicateIndex._frame(contracts.iloc[:n], text)
+        changed = n < len(contracts) or not fresh.equals(NearDuplicateIndex._frame(index.contracts, text))
+        index.contracts = fresh
+        if n < len(contracts):
+            index.insert(contracts.iloc[n:], n_jobs, chunk_texts)
+    index.last_update = {**index.last_update, "reused": n}
+    if changed:
+        index.save(directory)
+    return index
+
+
+# ── Splitting signal ────────────────────────────────────────────────────────
+def description_splitting(direct: pd.DataFrame, clusters: np.ndarray,
+                          n_jobs: int = 1) -> tuple[np.ndarray, pd.DataFrame]:
+    """
+    Notebook 05's windows and score over (agency, description cluster) instead of pairs.
+
+    A vendor-agency pair is one relationship, so every contract of a pair
+    inherits its score. A description cluster can be a standing template an
+    agency uses hundreds of times a year, so only the pieces are scored: the
+    near-threshold contracts with another near-threshold near duplicate at the
+    agency within max(SPLITTING_WINDOWS_DAYS) days, i.e. the near-threshold
+    members of a suspicious window.
+
+    Args:
+        direct: Direct awards with codigo_entidad, the start date,
+            valor_del_contrato and near_any_threshold.
+        clusters: Description cluster of each row of direct (-1: none).
+
+    Returns:
+        (description_splitting_score per row of direct, 0 if not a piece;
+        group scores per DESCRIPTION_KEYS).
+    """
+    keyed = direct.assign(description_cluster=clusters)
+    windows = window_scan(keyed[clusters >= 0], n_jobs=n_jobs, keys=DESCRIPTION_KEYS)
+    score = np.zeros(len(direct))
+    if not len(windows):
+        return score, pd.DataFrame(columns=[*DESCRIPTION_KEYS, "description_splitting_score"])
+    groups = score_pairs(windows, keys=DESCRIPTION_KEYS).rename(
+        columns={"splitting_score": "description_splitting_score"})
+
+    dates = keyed[DATE_COL].to_numpy(dtype="datetime64[ns]")
+    rows = np.flatnonzero((clusters >= 0) & (keyed["near_any_threshold"].to_numpy() == 1) & ~np.isnat(dates))
+    group = keyed.iloc[rows].groupby(DESCRIPTION_KEYS, sort=False).ngroup().to_numpy()
+    order = np.lexsort((dates[rows], group))
+    group, days, rows = group[order], dates[rows][order], rows[order]
+    close = (group[1:] == group[:-1]) & (days[1:] - days[:-1] <= np.timedelta64(max(SPLITTING_WINDOWS_DAYS), "D"))
+    pieces = rows[np.r_[False, close] | np.r_[close, False]]
+
+    merged = keyed.iloc[pieces][DESCRIPTION_KEYS].merge(
+        groups[[*DESCRIPTION_KEYS, "description_splitting_score"]], on=DESCRIPTION_KEYS, how="left")
+    score[pieces] = merged["description_splitting_score"].fillna(0).to_numpy()
+    return score, groups
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_rows: int = 1_553_594, n_jobs: int = 4, sample_texts: int = 300,
+              n_queries: int = 200, seed: int = RANDOM_STATE) -> pd.DataFrame:
+    """
+    Build time, insert and query latency, and recall on synthetic SECOP contracts.
+
+    Recall is measured against brute force: for a sample of distinct texts,
+    the indexed texts with exact Jaccard >= threshold that share a band key
+    with it (candidate_recall) and that are in its cluster (cluster_recall;
+    lower by design, as leader clusters do not chain). The first query
+    builds the lookup arrays and is timed apart.
+    """
+    from src.features.engine import DIRECT_KEYWORDS
+    from src.ingest.synthetic import generate
+    from src.scoring.splitting import add_threshold_flags
+
+    df = generate(n_rows, seed=seed, truth=True)
+    direct = df[df["modalidad_de_contratacion"].str.lower().str.contains("|".join(DIRECT_KEYWORDS), na=False)]
+    direct = direct.reset_index(drop=True)
+    head, tail = direct.iloc[:int(len(direct) * 0.99)], direct.iloc[int(len(direct) * 0.99):]
+
+    started = time.perf_counter()
+    NearDuplicateIndex.build(head, n_jobs=1)
+    t_single = time.perf_counter() - started
+    started = time.perf_counter()
+    index = NearDuplicateIndex.build(head, n_jobs=n_jobs)
+    t_parallel = time.perf_counter() - started
+    build_stats = index.last_update
+    index.insert(tail)
+    insert_stats = index.last_update
+    index_mb = (index.shingles.nbytes + index.offsets.nbytes + index.band_keys.nbytes + index.band_texts.nbytes
+                + index.leaders.nbytes + index.text_keys.nbytes + index.text_ids.nbytes) / 1024 ** 2
+
+    # Recall against brute force over all distinct texts
+    rng = np.random.default_rng(seed)
+    clusters = index.text_clusters()
+    sample = rng.choice(np.flatnonzero(clusters >= 0), size=min(sample_texts, int((clusters >= 0).sum())),
+                        replace=False)
+    sample_keys = index._keys(sample)
+    candidate, in_cluster = [], []
+    for query, keys in zip(sample, sample_keys):
+        matches = _matches(index.shingles, index.offsets, query, index.threshold)
+        if len(matches):
+            candidate.append((index._keys(matches) == keys).any(axis=1))
+            in_cluster.append(clusters[matches] == clusters[query])
+    candidate = np.concatenate(candidate) if candidate else np.empty(0, dtype=bool)
+    in_cluster = np.concatenate(in_cluster) if in_cluster else np.empty(0, dtype=bool)
+
+    # Query latency: contracts' own near duplicates within 90 days at their agency
+    ids = index.contracts["id_contrato"].to_numpy()[rng.integers(0, len(index), n_queries)]
+    started = time.perf_counter()
+    index.similar(ids[0])
+    t_first = time.perf_counter() - started
+    latencies = []
+    for id_contrato in ids:
+        started = time.perf_counter()
+        index.similar(id_contrato)
+        latencies.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    index.similar(text=str(direct["objeto_del_contrato"].iloc[0]))
+    t_text = time.perf_counter() - started
+
+    # The splitting signal on the planted clusters
+    flagged = add_threshold_flags(direct.assign(year=direct[DATE_COL].dt.year))
+    contract_clusters = index.clusters()
+    scored = description_splitting(flagged, contract_clusters)[0] > 0
+    planted = direct["planted_cluster"].to_numpy() >= 0
+
+    results = pd.DataFrame([{
+        "rows": n_rows, "direct": len(direct), "distinct_texts": index.n_texts,
+        "build_s": round(t_single, 2), f"build_{n_jobs}j_s": round(t_parallel, 2),
+        "insert_1pct_s": insert_stats["seconds"], "index_mb": round(index_mb, 1),
+        "first_query_s": round(t_first, 2),
+        "query_p50_ms": round(float(np.median(latencies)) * 1000, 2),
+        "query_p95_ms": round(float(np.quantile(latencies, 0.95)) * 1000, 2),
+        "text_query_ms": round(t_text * 1000, 2),
+        "exact_pairs": len(candidate),
+        "candidate_recall": round(float(candidate.mean()), 4) if len(candidate) else None,
+        "cluster_recall": round(float(in_cluster.mean()), 4) if len(in_cluster) else None,
+        "planted_recall": round(float(scored[planted].mean()), 4) if planted.any() else None,
+        "flagged_share": round(float(scored.mean()), 4),
+    }])
+    print("=" * 70)
+    print(f"NEAR-DUPLICATE INDEX — {n_rows:,} synthetic contracts, {index.n_perm} permutations, "
+          f"{index.bands} bands, Jaccard >= {index.threshold}")
+    print(f"  build: {build_stats['distinct_texts']:,} distinct texts, "
+          f"{build_stats['jaccard_checks']:,} Jaccard checks, hashing {build_stats['hash_s']:.2f}s")
+    print(results.astype(object).T.to_string(header=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MinHash-LSH near-duplicate description index")
+    parser.add_argument("--bench", type=int, default=None, help="Synthetic contracts")
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--similar", default=None, help="id_contrato to find near duplicates of")
+    parser.add_argument("--days", type=int, default=max(SPLITTING_WINDOWS_DAYS))
+    parser.add_argument("--state", type=Path, default=STATE_DIR)
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench, args.jobs)
+    if args.similar:
+        matches = NearDuplicateIndex.load(args.state).similar(args.similar, window_days=args.days)
+        print(matches.to_string(index=False) if len(matches) else "No near duplicates.")
@@ -0,0 +1,256 @@
+# src/scoring/sketch.py
+"""
+Compact, mergeable quantile sketch for rank and min-max normalization.
+
+Notebook 04 ranks anomaly scores with Series.rank(pct=True) over the whole
+dataset, and notebook 08 min-max normalizes over the training set. With
+either, adding one contract moves every other contract's score, and a new
+contract cannot be scored alone. A QuantileSketch is fitted once at training
+time and then answers rank_pct for any value in O(log K), for K knots.
+
+The sketch is a compressed ECDF. Each knot v stores lo = #{x < v} and
+hi = #{x <= v}, so values that hit a knot get the exact tied rank
+(lo + hi + 1) / 2n, as rank(pct=True) computes it. Between knots the count is
+interpolated linearly. Knots are placed so that at most n / K values fall
+strictly between two neighbours. Any value that fills a whole gap by itself
+becomes a knot, so heavy ties are always exact.
+
+Error bound (max_rank_error, computed and stored per sketch):
+
+    |rank_pct(x) - rank(pct=True) of x|  <=  (max_gap + knot_error) / n
+
+max_gap is the largest count strictly between adjacent knots (<= n / K for a
+direct fit). knot_error bounds the error in the stored counts at knots. It is 0
+for a direct fit and only grows through merges. The default K = 4096 keeps the
+error under 1/K = 0.025% of rank for a direct fit. merge_all of any number of
+shards stays under about 3/K:
+- the union's knots are off by up to n/K, since each shard is interpolated
+  at the other shards' knots;
+- the final compression cuts at n/K steps of cumulative count, so a kept
+  gap can span up to n/K plus one gap of the union, about 2n/K together.
+With 16 shards the stored bound is about 3.2/K (0.0062 at K = 512). The
+errors observed in the benchmark stay near 1/K.
+
+Sketches from shards merge by adding their rank functions at the union of
+their knots. Only the final union is compressed back to K knots, so fitting
+parallelizes over shards.
+
+Usage:
+    python src/scoring/sketch.py --bench 1500000
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import RANDOM_STATE
+
+DEFAULT_KNOTS = 4096
+
+
+def _select_knots(hi: np.ndarray, counts: np.ndarray, n: float, max_knots: int | None) -> np.ndarray:
+    """Indices of the knots to keep: first/last, every n/K of cumulative count, and every heavy value."""
+    if max_knots is None or len(hi) <= max_knots:
+        return np.arange(len(hi))
+    cap = n / max_knots
+    targets = np.arange(1, max_knots) * cap
+    keep = np.searchsorted(hi, targets, side="left")
+    heavy = np.flatnonzero(counts >= cap)
+    return np.unique(np.concatenate([[0, len(hi) - 1], keep, heavy]))
+
+
+class QuantileSketch:
+    """
+    Knots of a compressed ECDF.
+
+    Attributes:
+        values: Sorted knot values; the first and last are the exact min and max.
+        lo: Count of values strictly below each knot.
+        hi: Count of values at or below each knot.
+        n: Number of values summarized.
+        knot_error: Bound on the error of lo / hi at knots (0 for a direct fit).
+    """
+
+    def __init__(self, values: np.ndarray, lo: np.ndarray, hi: np.ndarray, n: float,
+                 knot_error: float = 0.0):
+        self.values = values
+        self.lo = lo
+        self.hi = hi
+        self.n = n
+        self.knot_error = knot_error
+
+    @classmethod
+    def fit(cls, x, max_knots: int | None = DEFAULT_KNOTS) -> "QuantileSketch":
+        """Sketch of x (NaNs ignored). max_knots=None keeps every distinct value: exact ranks."""
+        x = np.asarray(x, dtype=float)
+        x = np.sort(x[~np.isnan(x)])
+        if len(x) == 0:
+            raise ValueError("Cannot sketch an empty sample")
+        values, counts = np.unique(x, return_counts=True)
+        hi = np.cumsum(counts).astype(float)
+        keep = _select_knots(hi, counts, len(x), max_knots)
+        return cls(values[keep], (hi - counts)[keep], hi[keep], float(len(x)))
+
+    @classmethod
+    def fit_sharded(cls, x, shards: int, max_knots: int | None = DEFAULT_KNOTS,
+                    n_jobs: int = 1) -> "QuantileSketch":
+        """Fit shards independently (optionally in threads) and merge them."""
+        parts = np.array_split(np.asarray(x, dtype=float), shards)
+        if n_jobs == 1:
+            sketches = [cls.fit(p, max_knots) for p in parts]
+        else:
+            with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+                sketches = list(pool.map(lambda p: cls.fit(p, max_knots), parts))
+        return cls.merge_all(sketches, max_knots)
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+    @property
+    def min(self) -> float:
+        return float(self.values[0])
+
+    @property
+    def max(self) -> float:
+        return float(self.values[-1])
+
+    @property
+    def max_gap(self) -> float:
+        """Largest count strictly between two adjacent knots."""
+        return float((self.lo[1:] - self.hi[:-1]).max(initial=0.0))
+
+    @property
+    def max_rank_error(self) -> float:
+        """Worst-case |rank_pct(x) - rank(pct=True)| over any x."""
+        return (self.max_gap + self.knot_error) / self.n
+
+    def _counts(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Estimated #{< x} and #{<= x} for each x."""
+        j = np.searchsorted(self.values, x, side="right") - 1       # last knot <= x
+        at_knot = (j >= 0) & (self.values[np.clip(j, 0, None)] == x)
+        lo = np.where(j < 0, 0.0, self.hi[np.clip(j, 0, None)])
+        hi = lo.copy()
+
+        inner = (j >= 0) & (j < len(self.values) - 1) & ~at_knot
+        k = j[inner]
+        frac = (x[inner] - self.values[k]) / (self.values[k + 1] - self.values[k])
+        lo[inner] = hi[inner] = self.hi[k] + frac * (self.lo[k + 1] - self.hi[k])
+
+        lo[at_knot], hi[at_knot] = self.lo[j[at_knot]], self.hi[j[at_knot]]
+        return lo, hi
+
+    def rank_pct(self, x) -> np.ndarray:
+        """Series.rank(pct=True) of each x within the sketched sample (average ties)."""
+        x = np.asarray(x, dtype=float)
+        lo, hi = self._counts(x)
+        out = (lo + hi + 1) / 2 / self.n
+        out[np.isnan(x)] = np.nan
+        return out
+
+    def minmax(self, x) -> np.ndarray:
+        """(x - min) / (max - min) with the sketched sample's exact min and max, unclipped."""
+        return (np.asarray(x, dtype=float) - self.min) / (self.max - self.min)
+
+    # ── Merging ─────────────────────────────────────────────────────────────
+    def compress(self, max_knots: int = DEFAULT_KNOTS) -> "QuantileSketch":
+        """The same sketch with at most about max_knots knots."""
+        keep = _select_knots(self.hi, self.hi - self.lo, self.n, max_knots)
+        return QuantileSketch(self.values[keep], self.lo[keep], self.hi[keep], self.n, self.knot_error)
+
+    def merge(self, other: "QuantileSketch", max_knots: int | None = DEFAULT_KNOTS) -> "QuantileSketch":
+        """Sketch of the union of both samples; max_knots=None keeps every knot of both."""
+        values = np.union1d(self.values, other.values)
+        (lo_a, hi_a), (lo_b, hi_b) = self._counts(values), other._counts(values)
+        # A knot of one side is interpolated on the other, off by at most its gap + knot error
+        knot_error = self.knot_error + other.knot_error + max(self.max_gap, other.max_gap)
+        merged = QuantileSketch(values, lo_a + lo_b, hi_a + hi_b, self.n + other.n, knot_error)
+        return merged if max_knots is None else merged.compress(max_knots)
+
+    @staticmethod
+    def merge_all(sketches: list["QuantileSketch"], max_knots: int | None = DEFAULT_KNOTS) -> "QuantileSketch":
+        """Merge in a balanced tree without intermediate compression, then compress once."""
+        sketches = list(sketches)
+        while len(sketches) > 1:
+            merged = [a.merge(b, None) for a, b in zip(sketches[::2], sketches[1::2])]
+            sketches = merged + sketches[len(merged) * 2:]
+        return sketches[0] if max_knots is None else sketches[0].compress(max_knots)
+
+    # ── Storage ─────────────────────────────────────────────────────────────
+    def to_dict(self) -> dict:
+        return {"values": self.values, "lo": self.lo, "hi": self.hi,
+                "n": self.n, "knot_error": self.knot_error}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "QuantileSketch":
+        return cls(np.asarray(d["values"]), np.asarray(d["lo"]), np.asarray(d["hi"]),
+                   float(d["n"]), float(d.get("knot_error", 0.0)))
+
+    def __repr__(self) -> str:
+        return (f"QuantileSketch(n={self.n:,.0f}, knots={len(self.values):,}, "
+                f"max_rank_error={self.max_rank_error:.2e})")
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_rows: int = 1_500_000, max_knots: int = DEFAULT_KNOTS, shards: int = 8) -> pd.DataFrame:
+    """
+    Observed vs documented rank error against rank(pct=True), and query speed.
+
+    Uses a continuous, IsolationForest-like score and a heavily tied,
+    HBOS-like score (sums of a few histogram-bin log densities).
+    """
+    rng = np.random.default_rng(RANDOM_STATE)
+    samples = {
+        "continuous": rng.beta(2, 8, n_rows),
+        "tied": np.round(rng.choice(np.log(rng.random(50) + 0.01), (n_rows, 5)).sum(axis=1), 6),
+    }
+    results = []
+    for name, x in samples.items():
+        started = time.perf_counter()
+        exact = pd.Series(x).rank(pct=True).to_numpy()
+        t_rank = time.perf_counter() - started
+
+        for label, sketch in (
+            ("direct", QuantileSketch.fit(x, max_knots)),
+            (f"{shards} shards merged", QuantileSketch.fit_sharded(x, shards, max_knots)),
+        ):
+            started = time.perf_counter()
+            approx = sketch.rank_pct(x)
+            t_query = time.perf_counter() - started
+            fresh = rng.uniform(x.min(), x.max(), 100_000)
+            fresh_exact = _exact_rank(np.sort(x), fresh)
+            results.append({
+                "sample": name, "sketch": label, "knots": len(sketch.values),
+                "kb": round(sum(a.nbytes for a in (sketch.values, sketch.lo, sketch.hi)) / 1024, 1),
+                "max_err_seen": max(np.abs(approx - exact).max(), np.abs(sketch.rank_pct(fresh) - fresh_exact).max()),
+                "max_rank_error": sketch.max_rank_error,
+                "global_rank_s": round(t_rank, 3),
+                "ns_per_row": round(t_query / n_rows * 1e9, 1),
+            })
+    results = pd.DataFrame(results)
+    print("=" * 70)
+    print(f"QUANTILE SKETCH — {n_rows:,} values, K={max_knots}")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+def _exact_rank(sorted_x: np.ndarray, values: np.ndarray) -> np.ndarray:
+    lo = np.searchsorted(sorted_x, values, side="left")
+    hi = np.searchsorted(sorted_x, values, side="right")
+    return (lo + hi + 1) / 2 / len(sorted_x)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Quantile sketch error and speed benchmark")
+    parser.add_argument("--bench", type=int, default=1_500_000, help="Sample size")
+    parser.add_argument("--knots", type=int, default=DEFAULT_KNOTS)
+    parser.add_argument("--shards", type=int, default=8)
+    args = parser.parse_args()
+
+    benchmark(args.bench, args.knots, args.shards)
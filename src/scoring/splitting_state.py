@@ -0,0 +1,389 @@
+# src/scoring/splitting_state.py
+"""
+Incremental splitting-score maintenance.
+
+Keeps the state behind notebook 05's pair scores on disk: every direct award
+(pair, date, value, near-threshold flag), the suspicious windows found so
+far, and the per-pair aggregates. A batch of new or updated direct awards only
+touches the pairs it lands in, and within those pairs only the windows
+anchored on or after the earliest changed date. Earlier windows cannot see
+the new contracts, so they are kept as they are.
+
+Scores are stored un-normalized. max(total_flagged_spend) and max_raw are
+tracked as two scalars and applied when scores are read. When a new pair
+moves either maximum, the pair table (thousands of rows) is rescaled. No
+windows are rescanned and no contracts are rescored: contracts pick up their
+pair's score by key.
+
+A contract already in the history is replaced by its new version. If the
+new version no longer qualifies (it is not a direct award any more, or it
+lost its pair keys or date), the old row is removed. It leaves its pair's
+windows either way.
+
+Usage:
+    python src/scoring/splitting_state.py --build                    # from data/processed/splitting_scores.parquet
+    python src/scoring/splitting_state.py --update new_contracts.parquet
+    python src/scoring/splitting_state.py --bench 1553594            # updates against full rescans
+"""
+
+from pathlib import Path
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path so config is importable
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from config.settings import DATA_PROCESSED, RANDOM_STATE, SPLITTING_WINDOWS_DAYS
+from src.scoring.splitting import (
+    DATE_COL, PAIR_KEYS, add_threshold_flags, score_pairs, window_scan,
+)
+
+STATE_DIR = DATA_PROCESSED / "splitting_state"
+
+AGG_COLUMNS = [
+    "total_suspicious_windows", "max_window_contracts", "total_flagged_spend",
+    "windows_30d", "windows_60d", "windows_90d",
+]
+HISTORY_COLUMNS = ["pair_code", "id_contrato", DATE_COL, "valor_del_contrato", "near_any_threshold", "id_hash"]
+
+_NO_CUTOFF = np.iinfo(np.int64).max
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def _aggregate(windows: pd.DataFrame) -> pd.DataFrame:
+    """Per-pair aggregates of suspicious windows, same reductions as score_pairs."""
+    return windows.assign(
+        _is_30=(windows["window_days"] == 30).astype(np.int64),
+        _is_60=(windows["window_days"] == 60).astype(np.int64),
+        _is_90=(windows["window_days"] == 90).astype(np.int64),
+    ).groupby("pair_code").agg(
+        total_suspicious_windows=("anchor_date", "count"),
+        max_window_contracts=("window_contracts", "max"),
+        total_flagged_spend=("window_spend", "max"),
+        windows_30d=("_is_30", "sum"),
+        windows_60d=("_is_60", "sum"),
+        windows_90d=("_is_90", "sum"),
+    )
+
+
+def _prepare(contracts: pd.DataFrame) -> pd.DataFrame:
+    """Direct awards only, with near-threshold flags."""
+    if "is_direct" in contracts:
+        contracts = contracts[contracts["is_direct"] == 1]
+    if "near_any_threshold" not in contracts:
+        contracts = add_threshold_flags(contracts.copy())
+    contracts = contracts.dropna(subset=PAIR_KEYS + [DATE_COL])
+    contracts = contracts.drop_duplicates("id_contrato", keep="last")
+    # 64-bit id hashes, as in secop_client.IdSet: replacement lookups stay numeric
+    return contracts.assign(id_hash=_id_hash(contracts))
+
+
+def _id_hash(contracts: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_array(contracts["id_contrato"].to_numpy(dtype=object))
+
+
+class SplittingState:
+    """
+    Persisted splitting state with per-pair incremental updates.
+
+    Args:
+        history: Direct awards with HISTORY_COLUMNS.
+        windows: Suspicious windows keyed by pair_code.
+        pairs: One row per pair_code (row i = pair i) with PAIR_KEYS and AGG_COLUMNS.
+        windows_days: Window lengths the state was built with.
+    """
+
+    def __init__(self, history: pd.DataFrame, windows: pd.DataFrame, pairs: pd.DataFrame,
+                 windows_days: list[int] = SPLITTING_WINDOWS_DAYS):
+        self.history = history
+        self.windows = windows
+        self.pairs = pairs
+        self.windows_days = list(windows_days)
+        self.last_update = {}
+        self._pair_index = None
+
+    # ── Build / persist ─────────────────────────────────────────────────────
+    @classmethod
+    def build(cls, contracts: pd.DataFrame,
+              windows_days: list[int] = SPLITTING_WINDOWS_DAYS) -> "SplittingState":
+        """Full scan of all direct awards."""
+        direct = _prepare(contracts)
+        pair_code = direct.groupby(PAIR_KEYS, sort=True).ngroup().to_numpy().astype(np.int64)
+        pairs = direct[PAIR_KEYS].drop_duplicates().sort_values(PAIR_KEYS).reset_index(drop=True)
+
+        history = direct.assign(pair_code=pair_code)[HISTORY_COLUMNS].reset_index(drop=True)
+        windows = window_scan(history, windows_days, keys=["pair_code"])
+        state = cls(history, windows, pairs, windows_days)
+        state.pairs = pd.concat([pairs, state._empty_aggregates(len(pairs))], axis=1)
+        state._set_aggregates(np.arange(len(pairs)), _aggregate(windows))
+        return state
+
+    @classmethod
+    def load(cls, directory: Path = STATE_DIR) -> "SplittingState":
+        """Read a state written by save()."""
+        meta = json.loads((directory / "meta.json").read_text())
+        return cls(
+            pd.read_parquet(directory / "history.parquet"),
+            pd.read_parquet(directory / "windows.parquet"),
+            pd.read_parquet(directory / "pairs.parquet"),
+            meta["windows_days"],
+        )
+
+    def save(self, directory: Path = STATE_DIR) -> Path:
+        """Write the state as three parquet files plus meta.json."""
+        directory.mkdir(parents=True, exist_ok=True)
+        self.history.to_parquet(directory / "history.parquet", index=False)
+        self.windows.to_parquet(directory / "windows.parquet", index=False)
+        self.pairs.to_parquet(directory / "pairs.parquet", index=False)
+        max_tfs, max_raw = self.normalizers
+        meta = {
+            "windows_days": self.windows_days,
+            "contracts": len(self.history),
+            "pairs": len(self.pairs),
+            "max_flagged_spend": max_tfs,
+            "max_raw": max_raw,
+        }
+        (directory / "meta.json").write_text(json.dumps(meta, indent=2))
+        return directory
+
+    # ── Scores ──────────────────────────────────────────────────────────────
+    @property
+    def normalizers(self) -> tuple[float, float]:
+        """(max total_flagged_spend, max splitting_score_raw) over pairs with signals."""
+        flagged = self.pairs[self.pairs["total_suspicious_windows"] > 0]
+        if flagged.empty:
+            return 0.0, 0.0
+        max_tfs = flagged["total_flagged_spend"].max()
+        raw = self._raw(flagged, max_tfs)
+        return float(max_tfs), float(raw.max())
+
+    @staticmethod
+    def _raw(pairs: pd.DataFrame, max_tfs: float) -> pd.Series:
+        return (
+            pairs["total_suspicious_windows"] * 0.5 +
+            pairs["max_window_contracts"] * 0.3 +
+            pairs["total_flagged_spend"] / max_tfs * 0.2
+        )
+
+    def _score(self, pairs: pd.DataFrame) -> pd.DataFrame:
+        max_tfs, max_raw = self.normalizers
+        pairs = pairs.copy()
+        pairs["splitting_score_raw"] = self._raw(pairs, max_tfs)
+        pairs["splitting_score"] = pairs["splitting_score_raw"] / max_raw
+        return pairs
+
+    def scores(self) -> pd.DataFrame:
+        """Pair scores, identical to score_pairs() on a full rescan."""
+        flagged = self.pairs[self.pairs["total_suspicious_windows"] > 0]
+        flagged = flagged.sort_values(PAIR_KEYS).reset_index(drop=True)
+        return self._score(flagged).sort_values("splitting_score", ascending=False)
+
+    # ── Incremental update ──────────────────────────────────────────────────
+    def update(self, contracts: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply new or updated contracts and rescore only the pairs they touch.
+
+        Contracts already in the history (same id_contrato) are replaced, or
+        removed if their new version is no longer a dated direct award of a
+        pair. The pair they left is treated as affected too.
+
+        Args:
+            contracts: New rows with PAIR_KEYS, id_contrato,
+                fecha_de_inicio_del_contrato, valor_del_contrato and either
+                near_any_threshold or year (flags are then derived).
+
+        Returns:
+            Changed pair scores: affected pairs, plus every flagged pair if a
+            normalizer moved. Pairs that lost all windows come back with
+            splitting_score 0.
+        """
+        max_before = self.normalizers
+        # Every incoming id leaves the history, including those _prepare filters out
+        replaced = self.history["id_hash"].isin(_id_hash(contracts)).to_numpy()
+        batch = _prepare(contracts)
+        if batch.empty and not replaced.any():
+            self.last_update = {"contracts": 0, "pairs_changed": 0, "renormalized": False}
+            return self._score(self.pairs.iloc[:0])
+
+        # Codes for batch pairs, registering unseen pairs at the end
+        if self._pair_index is None:
+            self._pair_index = pd.MultiIndex.from_frame(self.pairs[PAIR_KEYS])
+        batch_keys = pd.MultiIndex.from_frame(batch[PAIR_KEYS])
+        codes = self._pair_index.get_indexer(batch_keys)
+        unseen = codes < 0
+        if unseen.any():
+            new_pairs = batch.loc[unseen, PAIR_KEYS].drop_duplicates().reset_index(drop=True)
+            new_pairs = pd.concat([new_pairs, self._empty_aggregates(len(new_pairs))], axis=1)
+            self.pairs = pd.concat([self.pairs, new_pairs], ignore_index=True)
+            self._pair_index = self._pair_index.append(pd.MultiIndex.from_frame(new_pairs[PAIR_KEYS]))
+            codes = self._pair_index.get_indexer(batch_keys)
+        batch = batch.assign(pair_code=codes.astype(np.int64))[HISTORY_COLUMNS]
+
+        # Earliest changed date per pair, counting rows being replaced
+        touched = pd.concat([batch[["pair_code", DATE_COL]], self.history.loc[replaced, ["pair_code", DATE_COL]]])
+        touched_ns = touched[DATE_COL].to_numpy().astype("datetime64[ns]").astype(np.int64)
+        cutoff = np.full(len(self.pairs), _NO_CUTOFF, dtype=np.int64)
+        np.minimum.at(cutoff, touched["pair_code"].to_numpy(), touched_ns)
+        affected = np.flatnonzero(cutoff != _NO_CUTOFF)
+
+        removed = int((~self.history.loc[replaced, "id_hash"].isin(batch["id_hash"])).sum())
+        self.history = pd.concat([self.history[~replaced], batch], ignore_index=True)
+
+        # Drop windows anchored on/after the cutoff, rescan from cutoff - longest window
+        anchor_ns = self.windows["anchor_date"].to_numpy().astype("datetime64[ns]").astype(np.int64)
+        stale = anchor_ns >= cutoff[self.windows["pair_code"].to_numpy()]
+        lookback = max(self.windows_days) * _NS_PER_DAY
+        history_ns = self.history[DATE_COL].to_numpy().astype("datetime64[ns]").astype(np.int64)
+        history_codes = self.history["pair_code"].to_numpy()
+        tail = self.history[history_ns >= cutoff[history_codes] - lookback]
+
+        fresh = window_scan(tail, self.windows_days, keys=["pair_code"])
+        fresh_ns = fresh["anchor_date"].to_numpy().astype("datetime64[ns]").astype(np.int64)
+        fresh = fresh[fresh_ns >= cutoff[fresh["pair_code"].to_numpy().astype(np.int64)]]
+        self.windows = pd.concat([self.windows[~stale], fresh], ignore_index=True)
+
+        # Re-aggregate affected pairs from their windows
+        in_affected = cutoff[self.windows["pair_code"].to_numpy()] != _NO_CUTOFF
+        self._set_aggregates(affected, _aggregate(self.windows[in_affected]))
+
+        max_after = self.normalizers
+        renormalized = max_after != max_before
+        if renormalized:
+            changed = self.pairs[(self.pairs["total_suspicious_windows"] > 0) |
+                                 self.pairs.index.isin(affected)]
+        else:
+            changed = self.pairs.iloc[affected]
+        changed = self._score(changed)
+        changed.loc[changed["total_suspicious_windows"] == 0, ["splitting_score_raw", "splitting_score"]] = 0.0
+
+        self.last_update = {
+            "contracts": len(batch),
+            "replaced": int(replaced.sum()),
+            "removed": removed,
+            "pairs_affected": len(affected),
+            "windows_removed": int(stale.sum()),
+            "windows_added": len(fresh),
+            "renormalized": renormalized,
+            "pairs_changed": len(changed),
+        }
+        return changed.sort_values("splitting_score", ascending=False)
+
+    def _empty_aggregates(self, n: int) -> pd.DataFrame:
+        return pd.DataFrame({
+            col: np.zeros(n, dtype=np.float64 if col == "total_flagged_spend" else np.int64)
+            for col in AGG_COLUMNS
+        })
+
+    def _set_aggregates(self, codes: np.ndarray, aggregates: pd.DataFrame) -> None:
+        """Overwrite AGG_COLUMNS for `codes`; codes absent from `aggregates` reset to 0."""
+        values = aggregates.reindex(codes)
+        for col in AGG_COLUMNS:
+            filled = values[col].fillna(0).to_numpy().astype(self.pairs[col].dtype)
+            column = self.pairs[col].to_numpy().copy()
+            column[codes] = filled
+            self.pairs[col] = column
+
+
+# ── Benchmark ───────────────────────────────────────────────────────────────
+def benchmark(n_rows: int = 1_553_594, batch_rows: int = 15_000, seed: int = RANDOM_STATE) -> pd.DataFrame:
+    """
+    Update time and agreement with a full rescan, batch by batch, on synthetic contracts.
+
+    The state is built from the first 97% of contracts, then gets four
+    batches: new contracts, late changes (moved dates and values), direct
+    awards that become non-direct, and direct awards that lose their date.
+    After each, scores() must equal score_pairs(window_scan()) over the
+    contracts as they now stand.
+    """
+    from src.features.engine import _synthetic_eda
+
+    rng = np.random.default_rng(seed)
+    contracts = add_threshold_flags(_synthetic_eda(n_rows, seed=seed))
+    n_base = int(len(contracts) * 0.97)
+    current = contracts.iloc[:n_base]
+    started = time.perf_counter()
+    state = SplittingState.build(current)
+    t_build = time.perf_counter() - started
+
+    def existing_direct(n):
+        direct = np.flatnonzero(current["is_direct"].to_numpy() == 1)
+        return current.iloc[rng.choice(direct, size=min(n, len(direct)), replace=False)].copy()
+
+    late = existing_direct(batch_rows)
+    late[DATE_COL] = late[DATE_COL] + pd.to_timedelta(rng.integers(-60, 60, len(late)), unit="D")
+    late["valor_del_contrato"] = late["valor_del_contrato"] * rng.uniform(0.9, 1.1, len(late))
+    late = add_threshold_flags(late.drop(columns=["near_any_threshold"]))
+    batches = [("new", contracts.iloc[n_base:n_base + batch_rows]), ("late changes", late)]
+    for label, n in (("become non-direct", batch_rows), ("lose their date", batch_rows // 10)):
+        batch = existing_direct(n)
+        if label == "become non-direct":
+            batch["is_direct"] = 0
+        else:
+            batch[DATE_COL] = pd.NaT
+        batches.append((label, batch))
+
+    results = []
+    for label, batch in batches:
+        started = time.perf_counter()
+        state.update(batch)
+        t_update = time.perf_counter() - started
+        current = pd.concat([current[~current["id_contrato"].isin(batch["id_contrato"])], batch], ignore_index=True)
+        started = time.perf_counter()
+        reference = score_pairs(window_scan(_prepare(current)))
+        t_rescan = time.perf_counter() - started
+        ours, reference = (x.sort_values(PAIR_KEYS).reset_index(drop=True) for x in (state.scores(), reference))
+        same = (len(ours) == len(reference)
+                and all(np.array_equal(ours[k].astype(str), reference[k].astype(str)) for k in PAIR_KEYS)
+                and np.allclose(ours["splitting_score"], reference["splitting_score"], rtol=1e-12, atol=0))
+        results.append({"batch": label, "rows": len(batch), "replaced": state.last_update.get("replaced", 0),
+                        "removed": state.last_update.get("removed", 0),
+                        "pairs_affected": state.last_update.get("pairs_affected", 0),
+                        "update_s": round(t_update, 3), "rescan_s": round(t_rescan, 3), "identical": same})
+    results = pd.DataFrame(results)
+    print("=" * 70)
+    print(f"SPLITTING STATE — {n_rows:,} synthetic contracts, built in {t_build:.1f}s")
+    print(results.to_string(index=False))
+    print("=" * 70)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incremental splitting-score state")
+    parser.add_argument("--build", action="store_true", help="Rebuild the state from a full contract table")
+    parser.add_argument("--input", type=Path, default=DATA_PROCESSED / "splitting_scores.parquet",
+                        help="Contracts for --build (notebook 05 output)")
+    parser.add_argument("--update", type=Path, default=None, help="Parquet of new/updated contracts")
+    parser.add_argument("--state", type=Path, default=STATE_DIR)
+    parser.add_argument("--bench", type=int, default=None, help="Check updates against rescans on N synthetic contracts")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench)
+
+    if args.build:
+        state = SplittingState.build(pd.read_parquet(args.input))
+        state.save(args.state)
+        print(f"✅ Built splitting state: {len(state.history):,} direct awards, "
+              f"{(state.pairs['total_suspicious_windows'] > 0).sum():,} flagged pairs → {args.state}")
+
+    if args.update:
+        state = SplittingState.load(args.state)
+        changed = state.update(pd.read_parquet(args.update))
+        state.save(args.state)
+        stats = state.last_update
+        print("=" * 50)
+        print("✅ SPLITTING STATE UPDATED")
+        print(f"   Contracts applied:   {stats['contracts']:,} ({stats.get('replaced', 0):,} replaced, "
+              f"{stats.get('removed', 0):,} removed)")
+        print(f"   Pairs affected:      {stats.get('pairs_affected', 0):,}")
+        print(f"   Windows -/+:         {stats.get('windows_removed', 0):,} / {stats.get('windows_added', 0):,}")
+        print(f"   Renormalized:        {stats['renormalized']}")
+        print(f"   Changed score rows:  {stats['pairs_changed']:,}")
+        print("=" * 50)
+        if len(changed):
+            print(changed.head(10)[PAIR_KEYS + ["total_suspicious_windows", "splitting_score"]].to_string(index=False))